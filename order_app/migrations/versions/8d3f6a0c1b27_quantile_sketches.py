@@ -0,0 +1,31 @@
+"""quantile sketches
+
+Revision ID: 8d3f6a0c1b27
+Revises: 5b1e7c9a2d40
+Create Date: 2026-10-18 14:03:27.540129
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d3f6a0c1b27'
+down_revision = '5b1e7c9a2d40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('quantile_sketches',
+    sa.Column('scope', sa.String(length=10), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('count', sa.BigInteger(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('updated', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('scope', 'key')
+    )
+
+
+def downgrade():
+    op.drop_table('quantile_sketches')
@@ -0,0 +1,48 @@
+"""user order stats
+
+Revision ID: a5d1e8c3f620
+Revises: f2c8a6d4b915
+Create Date: 2026-10-18 21:34:12.480316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5d1e8c3f620'
+down_revision = 'f2c8a6d4b915'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('orders', sa.Column('created', sa.DateTime(), server_default=sa.text('now()'), nullable=True))
+    # existing orders: time of their first line, now for an order without lines
+    op.execute("""
+        UPDATE orders
+        SET created = COALESCE((SELECT MIN(od.created) FROM order_details od WHERE od.order_id = orders.id), now())
+    """)
+    op.alter_column('orders', 'created', existing_type=sa.DateTime(), existing_server_default=sa.text('now()'),
+                    nullable=False)
+
+    op.create_table('user_order_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('orders_count', sa.Integer(), nullable=False),
+    sa.Column('units', sa.BigInteger(), nullable=False),
+    sa.Column('lifetime_value', sa.DECIMAL(precision=14, scale=2), nullable=False),
+    sa.Column('first_order_at', sa.DateTime(), nullable=False),
+    sa.Column('last_order_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='cascade'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.execute("""
+        INSERT INTO user_order_stats (user_id, orders_count, units, lifetime_value, first_order_at, last_order_at)
+        SELECT user_id, COUNT(*), SUM(total_qty), SUM(total_value), MIN(created), MAX(created)
+        FROM orders GROUP BY user_id
+    """)
+
+
+def downgrade():
+    op.drop_table('user_order_stats')
+    op.drop_column('orders', 'created')
@@ -0,0 +1,36 @@
+"""sku pairs
+
+Revision ID: b9e4c2a7d351
+Revises: a5d1e8c3f620
+Create Date: 2026-10-18 22:41:05.118724
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e4c2a7d351'
+down_revision = 'a5d1e8c3f620'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('sku_pairs',
+    sa.Column('sku_a', sa.String(length=10), nullable=False),
+    sa.Column('sku_b', sa.String(length=10), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('sku_a', 'sku_b')
+    )
+    # existing orders - the same as `flask recommendations rebuild`
+    op.execute("""
+        INSERT INTO sku_pairs (sku_a, sku_b, orders)
+        SELECT a.product_sku, b.product_sku, COUNT(*)
+        FROM order_details a JOIN order_details b ON b.order_id = a.order_id AND b.product_sku >= a.product_sku
+        GROUP BY a.product_sku, b.product_sku
+    """)
+
+
+def downgrade():
+    op.drop_table('sku_pairs')
@@ -0,0 +1,35 @@
+"""reorder forecasts
+
+Revision ID: c3f7a9e1b482
+Revises: b9e4c2a7d351
+Create Date: 2026-10-18 23:52:37.604195
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f7a9e1b482'
+down_revision = 'b9e4c2a7d351'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('reorder_forecasts',
+    sa.Column('sku', sa.String(length=10), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.Column('daily_demand', sa.DECIMAL(precision=12, scale=3), nullable=False),
+    sa.Column('days_of_cover', sa.DECIMAL(precision=12, scale=1), nullable=True),
+    sa.Column('suggested_qty', sa.Integer(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['sku'], ['products.sku'], ondelete='cascade'),
+    sa.PrimaryKeyConstraint('sku')
+    )
+    op.create_index(op.f('ix_reorder_forecasts_days_of_cover'), 'reorder_forecasts', ['days_of_cover'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_reorder_forecasts_days_of_cover'), table_name='reorder_forecasts')
+    op.drop_table('reorder_forecasts')
@@ -0,0 +1,32 @@
+"""sales rollups
+
+Revision ID: c4a9e2f7d183
+Revises: 8d3f6a0c1b27
+Create Date: 2026-10-18 16:41:09.224517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4a9e2f7d183'
+down_revision = '8d3f6a0c1b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('sales_hourly', 'sales_daily'):
+        op.create_table(table,
+        sa.Column('bucket', sa.DateTime(), nullable=False),
+        sa.Column('sku', sa.String(length=10), nullable=False),
+        sa.Column('units', sa.BigInteger(), nullable=False),
+        sa.Column('revenue', sa.DECIMAL(precision=14, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint('bucket', 'sku')
+        )
+
+
+def downgrade():
+    op.drop_table('sales_daily')
+    op.drop_table('sales_hourly')
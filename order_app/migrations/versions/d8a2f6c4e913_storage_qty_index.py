@@ -0,0 +1,24 @@
+"""storage qty index
+
+Revision ID: d8a2f6c4e913
+Revises: c3f7a9e1b482
+Create Date: 2026-10-19 00:38:14.925370
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8a2f6c4e913'
+down_revision = 'c3f7a9e1b482'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_storage_qty'), 'storage', ['qty'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_storage_qty'), table_name='storage')
@@ -0,0 +1,27 @@
+"""products fulltext
+
+Revision ID: e1b5d7f3a624
+Revises: d8a2f6c4e913
+Create Date: 2026-10-19 01:26:48.301552
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e1b5d7f3a624'
+down_revision = 'd8a2f6c4e913'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # MySQL only - SQLite gets its FTS5 table from db.create_all (see models/products.py)
+    if op.get_bind().dialect.name == "mysql":
+        op.create_index('ft_products_name', 'products', ['name'], unique=False, mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "mysql":
+        op.drop_index('ft_products_name', table_name='products')
@@ -0,0 +1,24 @@
+"""order details created index
+
+Revision ID: e7b3d5a19c42
+Revises: c4a9e2f7d183
+Create Date: 2026-10-18 18:20:53.710394
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3d5a19c42'
+down_revision = 'c4a9e2f7d183'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_order_details_created'), 'order_details', ['created'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_order_details_created'), table_name='order_details')
@@ -0,0 +1,46 @@
+"""order totals
+
+Revision ID: f2c8a6d4b915
+Revises: e7b3d5a19c42
+Create Date: 2026-10-18 20:07:31.905128
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8a6d4b915'
+down_revision = 'e7b3d5a19c42'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('orders', sa.Column('total_qty', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('orders', sa.Column('line_count', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('orders', sa.Column('total_value', sa.DECIMAL(precision=14, scale=2), server_default='0', nullable=False))
+
+    # totals of existing orders, with current prices
+    op.execute("""
+        UPDATE orders SET
+            total_qty = COALESCE((SELECT SUM(od.qty) FROM order_details od WHERE od.order_id = orders.id), 0),
+            line_count = (SELECT COUNT(*) FROM order_details od WHERE od.order_id = orders.id),
+            total_value = COALESCE((
+                SELECT SUM(od.qty * p.price) FROM order_details od JOIN products p ON p.sku = od.product_sku
+                WHERE od.order_id = orders.id
+            ), 0)
+    """)
+
+    op.create_index('ix_orders_total_value_id', 'orders', ['total_value', 'id'], unique=False)
+    op.create_index('ix_orders_total_qty_id', 'orders', ['total_qty', 'id'], unique=False)
+    op.create_index('ix_orders_line_count_id', 'orders', ['line_count', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_orders_line_count_id', table_name='orders')
+    op.drop_index('ix_orders_total_qty_id', table_name='orders')
+    op.drop_index('ix_orders_total_value_id', table_name='orders')
+    op.drop_column('orders', 'total_value')
+    op.drop_column('orders', 'line_count')
+    op.drop_column('orders', 'total_qty')
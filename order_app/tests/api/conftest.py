@@ -38,6 +38,7 @@ def app() -> Generator[Flask, Any, None]:
             "webapp.api.products",
             "webapp.api.storage",
             "webapp.api.orders",
+            "webapp.api.statistics",
         ]
     )
 
@@ -108,7 +109,7 @@ def seed_order_data(
     with app.app_context():
 
         # Order 1
-        order_1 = Order(user_id=1)
+        order_1 = Order(user_id=1, order_details=[])
         db.session.add(order_1)
         db.session.flush()  # ⬅️ TERAZ order_1.id ISTNIEJE
 
@@ -120,7 +121,7 @@ def seed_order_data(
         )
 
         # Order 2
-        order_2 = Order(user_id=2)
+        order_2 = Order(user_id=2, order_details=[])
         db.session.add(order_2)
         db.session.flush()
 
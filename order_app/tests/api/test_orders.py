@@ -1,6 +1,12 @@
+import csv
+import json
+
 from flask.testing import FlaskClient
 import pytest
 
+from webapp.database.repositories.orders import TotalOrderRepository
+from webapp.extensions import db
+
 def test_get_all_orders(client: FlaskClient, seed_order_data) -> None:
     resp = client.get("/api/orders/")
     assert resp.status_code == 200
@@ -14,6 +20,23 @@ def test_get_all_orders(client: FlaskClient, seed_order_data) -> None:
     assert len(data_by_id[2]["details"]) == 1
 
 
+def test_get_all_orders_paginated(client: FlaskClient, seed_order_data) -> None:
+    resp_1 = client.get("/api/orders/?limit=1")
+    assert resp_1.status_code == 200
+    assert [o["id"] for o in resp_1.get_json()] == [2]
+    assert resp_1.headers["X-Next-Cursor"] == "2"
+
+    resp_2 = client.get("/api/orders/?limit=1&after=2")
+    assert resp_2.status_code == 200
+    assert [o["id"] for o in resp_2.get_json()] == [1]
+    assert "X-Next-Cursor" not in resp_2.headers
+
+
+def test_get_all_orders_wrong_limit(client: FlaskClient, seed_order_data) -> None:
+    resp = client.get("/api/orders/?limit=0")
+    assert resp.status_code == 400
+
+
 def test_get_order_by_id(client: FlaskClient, seed_order_data) -> None:
     resp = client.get("/api/orders/order/1")
     assert resp.status_code == 200
@@ -89,3 +112,179 @@ def test_delete_order_with_details(client: FlaskClient, seed_order_data) -> None
     resp_2 = client.get("/api/orders/")
     assert resp_2.status_code == 200
     assert len(resp_2.get_json()) == 1
+
+
+def test_add_orders_bulk_partial(client: FlaskClient, seed_order_data) -> None:
+    resp_1 = client.post("/api/orders/bulk", json={
+        "mode": "partial",
+        "orders": [
+            {"user_name": "John Test 1", "details": [{"sku": "SKU-1", "qty": 4}, {"sku": "SKU-2", "qty": 5}]},
+            {"user_name": "Nobody", "details": [{"sku": "SKU-1", "qty": 1}]},
+            {"user_name": "John Test 2", "details": [{"sku": "SKU-1", "qty": 7}]},
+            {"user_name": "John Test 2", "details": [{"sku": "SKU-1", "qty": 6}]},
+        ]
+    })
+
+    assert resp_1.status_code == 207
+    data = resp_1.get_json()
+    assert [r["order_id"] is not None for r in data] == [True, False, False, True]
+    assert "Nobody" in data[1]["error"]
+    assert "SKU-1" in data[2]["error"]                      # 10 - 4 = 6 left, 7 ordered
+
+    resp_2 = client.get("/api/storage/sku/SKU-1")
+    assert resp_2.get_json()["quantity"] == 0
+
+    resp_3 = client.get(f"/api/orders/order/{data[0]['order_id']}")
+    assert {d["sku"]: d["qty"] for d in resp_3.get_json()["details"]} == {"SKU-1": 4, "SKU-2": 5}
+
+
+def test_add_orders_bulk_all_or_nothing(client: FlaskClient, seed_order_data) -> None:
+    resp_1 = client.post("/api/orders/bulk", json={
+        "orders": [
+            {"user_name": "John Test 1", "details": [{"sku": "SKU-1", "qty": 1}]},
+            {"user_name": "John Test 2", "details": [{"sku": "SKU-2", "qty": 21}]},
+        ]
+    })
+
+    assert resp_1.status_code == 207
+    data = resp_1.get_json()
+    assert all(r["order_id"] is None for r in data)
+    assert "rolled back" in data[0]["error"]
+
+    assert len(client.get("/api/orders/").get_json()) == 2
+    assert client.get("/api/storage/sku/SKU-1").get_json()["quantity"] == 10
+
+    resp_2 = client.post("/api/orders/bulk", json={
+        "orders": [
+            {"user_name": "John Test 1", "details": [{"sku": "SKU-1", "qty": 1}]},
+            {"user_name": "John Test 2", "details": [{"sku": "SKU-1", "qty": 2}, {"sku": "SKU-2", "qty": 20}]},
+        ]
+    })
+
+    assert resp_2.status_code == 201
+    assert len(client.get("/api/orders/").get_json()) == 4
+    assert client.get("/api/storage/sku/SKU-1").get_json()["quantity"] == 7
+
+
+def test_add_order_idempotency_key_replays_response(client: FlaskClient, seed_order_data) -> None:
+    body = {"user_name": "John Test 1", "details": [{"sku": "SKU-1", "qty": 2}]}
+    headers = {"Idempotency-Key": "retry-1"}
+
+    resp_1 = client.post("/api/orders/add_order", json=body, headers=headers)
+    assert resp_1.status_code == 201
+
+    resp_2 = client.post("/api/orders/add_order", json=body, headers=headers)
+    assert resp_2.status_code == 201
+    assert resp_2.get_json() == resp_1.get_json()
+    assert resp_2.headers["Idempotent-Replayed"] == "true"
+
+    assert len(client.get("/api/orders/").get_json()) == 3
+    assert client.get("/api/storage/sku/SKU-1").get_json()["quantity"] == 8
+
+    resp_3 = client.post("/api/orders/add_order", json={**body, "user_name": "John Test 2"}, headers=headers)
+    assert resp_3.status_code == 422
+
+
+def test_add_order_idempotency_key_released_after_error(client: FlaskClient, seed_order_data) -> None:
+    body = {"user_name": "John Test 1", "details": [{"sku": "SKU-1", "qty": 11}]}
+    headers = {"Idempotency-Key": "retry-2"}
+
+    resp_1 = client.post("/api/orders/add_order", json=body, headers=headers)
+    assert resp_1.status_code == 409
+
+    client.patch("/api/storage/add", json={"sku": "SKU-1", "quantity": 1})
+
+    resp_2 = client.post("/api/orders/add_order", json=body, headers=headers)
+    assert resp_2.status_code == 201
+    assert "Idempotent-Replayed" not in resp_2.headers
+
+
+def test_export_orders_ndjson(client: FlaskClient, seed_order_data) -> None:
+    resp = client.get("/api/orders/export")
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+
+    lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert [o["id"] for o in lines] == [1, 2]
+    assert lines[0]["user_name"] == "John Test 1"
+    assert lines[0]["details"] == [{"sku": "SKU-1", "qty": 10}, {"sku": "SKU-2", "qty": 20}]
+    assert lines[1]["details"] == [{"sku": "SKU-3", "qty": 30}]
+
+
+def test_export_orders_csv(client: FlaskClient, seed_order_data) -> None:
+    resp = client.get("/api/orders/export?format=csv")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/csv"
+
+    rows = list(csv.reader(resp.get_data(as_text=True).splitlines()))
+    assert rows == [
+        ["order_id", "user_name", "sku", "qty"],
+        ["1", "John Test 1", "SKU-1", "10"],
+        ["1", "John Test 1", "SKU-2", "20"],
+        ["2", "John Test 2", "SKU-3", "30"],
+    ]
+
+
+def test_export_orders_csv_order_without_lines(client: FlaskClient, seed_order_data) -> None:
+    assert client.post("/api/orders/add_order", json={"user_name": "John Test 1", "details": []}).status_code == 201
+
+    rows = list(csv.reader(client.get("/api/orders/export?format=csv").get_data(as_text=True).splitlines()))
+    assert rows[-1] == ["3", "John Test 1", "", ""]
+
+
+def test_export_orders_wrong_format(client: FlaskClient, seed_order_data) -> None:
+    resp = client.get("/api/orders/export?format=xml")
+    assert resp.status_code == 400
+
+
+def _totals(client: FlaskClient, order_id: int) -> tuple[int, int, str]:
+    order = client.get(f"/api/orders/order/{order_id}").get_json()
+    return order["total_qty"], order["line_count"], order["total_value"]
+
+
+def _ids(client: FlaskClient, query: str) -> tuple[list[int], str | None]:
+    resp = client.get(f"/api/orders/?{query}")
+    assert resp.status_code == 200
+    return [o["id"] for o in resp.get_json()], resp.headers.get("X-Next-Cursor")
+
+
+def test_order_totals_follow_order_writes(app, client: FlaskClient, seed_order_data) -> None:
+    client.post("/api/orders/add_order", json={
+        "user_name": "John Test 1", "details": [{"sku": "SKU-1", "qty": 2}, {"sku": "SKU-2", "qty": 3}]
+    })
+    assert _totals(client, 3) == (5, 2, "80.00")
+
+    client.post("/api/orders/add_order", json={"user_name": "John Test 2", "details": [{"sku": "SKU-1", "qty": 1}]})
+    client.post("/api/orders/4/items", json={"sku": "SKU-2", "qty": 1})
+    client.delete("/api/orders/delete_product", json={"order_id": 3, "product_sku": "SKU-2"})
+    client.post("/api/orders/bulk", json={"orders": [{"user_name": "John Test 1", "details": [{"sku": "SKU-2", "qty": 2}]}]})
+
+    assert _totals(client, 3) == (2, 1, "20.00")
+    assert _totals(client, 4) == (2, 2, "30.00")
+    assert _totals(client, 5) == (2, 1, "40.00")
+    assert _totals(client, 1) == (0, 0, "0.00")             # seeded without OrderService
+
+    with app.app_context():
+        assert TotalOrderRepository().recompute_totals_between(1, 2) == 2
+        db.session.commit()
+    assert _totals(client, 1) == (30, 2, "500.00")
+
+
+def test_get_all_orders_sorted_and_filtered_by_value(client: FlaskClient, seed_order_data) -> None:
+    for qty in (3, 1, 2):                                    # orders 3, 4, 5 worth 30, 10, 20
+        client.post("/api/orders/add_order", json={"user_name": "John Test 1", "details": [{"sku": "SKU-1", "qty": qty}]})
+
+    assert _ids(client, "sort=total_value&limit=2") == ([3, 5], "5")
+    assert _ids(client, "sort=total_value&limit=2&after=5") == ([4, 2], "2")
+    assert _ids(client, "sort=total_value&limit=2&after=2") == ([1], None)
+    assert _ids(client, "sort=total_value&direction=asc&min_value=10&max_value=20") == ([4, 5], None)
+    assert _ids(client, "sort=total_qty&direction=asc&limit=3") == ([1, 2, 4], "4")
+    assert _ids(client, "min_value=15") == ([5, 3], None)
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["sort=price", "direction=up", "min_value=abc", "min_value=5&max_value=1", "sort=total_value&after=99"]
+)
+def test_get_all_orders_wrong_listing(client: FlaskClient, seed_order_data, query: str) -> None:
+    assert client.get(f"/api/orders/?{query}").status_code == 400
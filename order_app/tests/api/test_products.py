@@ -58,4 +58,32 @@ def test_get_by_sku_not_found(client: FlaskClient, seed_product_data) -> None:
     assert resp.status_code == 404
 
     data = resp.get_json()
-    assert data["error"] == "Product with sku SKU-3 not found."
\ No newline at end of file
+    assert data["error"] == "Product with sku SKU-3 not found."
+
+def test_search_products_by_name(client: FlaskClient, seed_product_data) -> None:
+    client.post("/api/products/", json={"sku": "SKU-5", "name": "Test Test 5", "price": 5})
+
+    resp_1 = client.get("/api/products/search?q=tes&limit=2")
+    assert resp_1.status_code == 200
+    assert [p["sku"] for p in resp_1.get_json()][0] == "SKU-5"             # the name with more hits first
+    assert resp_1.headers["X-Next-Cursor"] == "2"
+
+    resp_2 = client.get("/api/products/search?q=tes&limit=2&after=2")
+    assert len(resp_2.get_json()) == 2
+    assert "X-Next-Cursor" not in resp_2.headers
+
+    assert client.get("/api/products/search?q=test 4").get_json()[0]["sku"] == "SKU-4"
+    assert client.get("/api/products/search?q=nothing").status_code == 404
+    assert client.get("/api/products/search?q=").status_code == 400
+
+
+def test_typeahead(client: FlaskClient, seed_product_data) -> None:
+    assert client.get("/api/products/typeahead?q=tes").get_json()[0]["sku"] == "SKU-1"
+    client.post("/api/products/", json={"sku": "ABC-1", "name": "Typeahead Lamp", "price": 5})
+
+    resp = client.get("/api/products/typeahead?q=typ la")
+    assert resp.status_code == 200
+    assert resp.get_json() == [{"sku": "ABC-1", "name": "Typeahead Lamp"}]
+    assert [p["sku"] for p in client.get("/api/products/typeahead?q=sku&limit=2").get_json()] == ["SKU-1", "SKU-2"]
+    assert client.get("/api/products/typeahead?q=nothing").get_json() == []
+    assert client.get("/api/products/typeahead?q=").status_code == 400
@@ -0,0 +1,273 @@
+from datetime import datetime
+from decimal import Decimal
+
+from flask import Flask
+from flask.testing import FlaskClient
+import pytest
+from sqlalchemy import update
+
+from webapp.database.models.order_details import OrderDetail
+from webapp.database.models.orders import Order
+from webapp.database.repositories.products import ProductRepository
+from webapp.database.repositories.sales_rollups import SalesRollupRepository
+from webapp.database.repositories.sku_pairs import SkuPairRepository
+from webapp.extensions import db
+from webapp.services.statistics.bought_together import BoughtTogetherIndex
+from webapp.services.statistics.sales import SalesRollupService
+
+
+# orders: 1 (John Test 1): SKU-1 x10, SKU-2 x20 | 2 (John Test 2): SKU-3 x30 (no product) | 3 (John Test 2): SKU-1 x5
+@pytest.fixture()
+def seed_statistics_data(app: Flask, seed_order_data) -> None:
+    with app.app_context():
+        db.session.add(Order(user_id=2, order_details=[OrderDetail(product_sku="SKU-1", qty=5)]))
+        db.session.commit()
+
+
+def test_get_sku_stats(client: FlaskClient, seed_statistics_data) -> None:
+    resp = client.get("/api/statistics/skus")
+    assert resp.status_code == 200
+
+    assert resp.get_json() == [
+        {"sku": "SKU-1", "units": 15, "revenue": "150.00", "orders_qty": 2},
+        {"sku": "SKU-2", "units": 20, "revenue": "400.00", "orders_qty": 1},
+    ]
+
+
+def test_get_sku_stats_filtered(client: FlaskClient, seed_statistics_data) -> None:
+    resp = client.get("/api/statistics/skus?sku=SKU-1&sku=SKU-3&user=John Test 2")
+    assert resp.status_code == 200
+
+    assert resp.get_json() == [{"sku": "SKU-1", "units": 5, "revenue": "50.00", "orders_qty": 1}]
+
+
+def test_get_top_products_by_revenue(client: FlaskClient, seed_statistics_data) -> None:
+    resp = client.get("/api/statistics/skus/top?limit=1&by=revenue")
+    assert resp.status_code == 200
+
+    assert [s["sku"] for s in resp.get_json()] == ["SKU-2"]
+
+
+@pytest.mark.parametrize("query", ["limit=0", "limit=101", "by=price"])
+def test_get_top_products_wrong_params(client: FlaskClient, seed_statistics_data, query: str) -> None:
+    resp = client.get(f"/api/statistics/skus/top?{query}")
+    assert resp.status_code == 400
+
+
+def test_get_user_stats(client: FlaskClient, seed_statistics_data) -> None:
+    resp = client.get("/api/statistics/users")
+    assert resp.status_code == 200
+
+    assert resp.get_json() == [
+        {"user_name": "John Test 1", "orders_qty": 1, "units": 30, "revenue": "500.00"},
+        {"user_name": "John Test 2", "orders_qty": 2, "units": 35, "revenue": "50.00"},
+    ]
+
+
+def test_get_order_summary(client: FlaskClient, seed_statistics_data) -> None:
+    resp = client.get("/api/statistics/summary")
+    assert resp.status_code == 200
+
+    data = resp.get_json()
+    assert data["orders_qty"] == 3
+    assert data["lines_qty"] == 4
+    assert data["units"] == 65
+    assert data["revenue"] == "550.00"
+    assert data["avg_units_per_order"] == 21.67
+    assert data["avg_order_value"] == "183.33"
+
+
+def test_get_order_summary_no_orders(client: FlaskClient) -> None:
+    resp = client.get("/api/statistics/summary?user=Nobody")
+    assert resp.status_code == 200
+
+    data = resp.get_json()
+    assert data["orders_qty"] == 0
+    assert data["avg_units_per_order"] == 0.0
+    assert data["avg_order_value"] == "0.00"
+
+
+def test_get_order_percentile_median(client: FlaskClient, seed_statistics_data) -> None:
+    resp = client.get("/api/statistics/orders/percentile?p=50")
+    assert resp.status_code == 200
+
+    # values: order 2 = 0 (SKU-3 has no product), order 3 = 50, order 1 = 500
+    assert resp.get_json() == {"order_id": 3, "metric": "value", "value": "50.00", "rank": 2, "total": 3}
+
+
+def test_get_kth_order_by_lines(client: FlaskClient, seed_statistics_data) -> None:
+    resp = client.get("/api/statistics/orders/kth?k=3&metric=lines")
+    assert resp.status_code == 200
+
+    assert resp.get_json()["order_id"] == 1
+    assert resp.get_json()["value"] == 2
+
+
+def test_get_order_rank_follows_order_writes(client: FlaskClient, seed_statistics_data) -> None:
+    assert client.get("/api/statistics/orders/3/rank").get_json()["rank"] == 2
+
+    resp = client.post("/api/orders/3/items", json={"sku": "SKU-2", "qty": 19})     # order 3: 50 + 380 = 430
+    assert resp.status_code == 201
+    resp = client.post("/api/orders/add_order", json={"user_name": "John Test 1", "details": [{"sku": "SKU-1", "qty": 1}]})
+    assert resp.status_code == 201
+
+    data = client.get("/api/statistics/orders/3/rank").get_json()
+    assert data["value"] == "430.00"
+    assert data["rank"] == 3
+    assert data["total"] == 4
+
+    client.delete("/api/orders/1")
+    assert client.get("/api/statistics/orders/3/rank").get_json() == {
+        "order_id": 3, "metric": "value", "value": "430.00", "rank": 3, "total": 3
+    }
+
+
+@pytest.mark.parametrize(
+    "url, status",
+    [
+        ("/api/statistics/orders/kth?k=4", 400),
+        ("/api/statistics/orders/percentile?p=-1", 400),
+        ("/api/statistics/orders/kth?metric=price", 400),
+        ("/api/statistics/orders/99/rank", 404),
+    ]
+)
+def test_order_ranking_errors(client: FlaskClient, seed_statistics_data, url: str, status: int) -> None:
+    assert client.get(url).status_code == status
+
+
+def test_get_quantiles_after_order_writes(client: FlaskClient, seed_statistics_data) -> None:
+    for qty in (1, 2, 3):
+        resp = client.post("/api/orders/add_order", json={"user_name": "John Test 1", "details": [{"sku": "SKU-1", "qty": qty}]})
+        assert resp.status_code == 201
+
+    resp = client.get("/api/statistics/quantiles/sku/SKU-1?q=0.5&q=1")
+    assert resp.status_code == 200
+    assert resp.get_json() == {
+        "scope": "sku", "key": "SKU-1", "count": 3, "quantiles": {"0.5": 2, "1.0": 3}, "exact": True, "rank_error": 0.0
+    }
+
+    assert client.get("/api/statistics/quantiles/user/John Test 1").get_json()["count"] == 3
+
+
+@pytest.mark.parametrize(
+    "url, status",
+    [("/api/statistics/quantiles/sku/SKU-9", 404), ("/api/statistics/quantiles/product/SKU-1", 400)]
+)
+def test_get_quantiles_errors(client: FlaskClient, url: str, status: int) -> None:
+    assert client.get(url).status_code == status
+
+
+def test_get_trending_skus(client: FlaskClient, seed_statistics_data) -> None:
+    client.post("/api/orders/add_order", json={"user_name": "John Test 1", "details": [{"sku": "SKU-1", "qty": 3}]})
+    client.post("/api/orders/add_order", json={
+        "user_name": "John Test 2", "details": [{"sku": "SKU-1", "qty": 2}, {"sku": "SKU-2", "qty": 4}]
+    })
+    client.delete("/api/orders/delete_product", json={"order_id": 4, "product_sku": "SKU-1"})
+
+    resp = client.get("/api/statistics/skus/trending?limit=5")
+    assert resp.status_code == 200
+    assert resp.get_json() == [{"sku": "SKU-2", "units": 4, "error": 0}, {"sku": "SKU-1", "units": 2, "error": 0}]
+
+    assert client.get("/api/statistics/skus/trending?limit=0").status_code == 400
+
+
+def _bought_together(client: FlaskClient, sku: str) -> list[tuple[str, int, float]]:
+    resp = client.get(f"/api/statistics/skus/{sku}/bought-together")
+    assert resp.status_code == 200
+    return [(n["sku"], n["orders"], n["share"]) for n in resp.get_json()]
+
+
+def test_bought_together_follows_rebuild_and_order_writes(
+        app: Flask, client: FlaskClient, seed_statistics_data
+) -> None:
+    with app.app_context():             # seeded orders were written without OrderService
+        assert BoughtTogetherIndex(SkuPairRepository()).rebuild(chunk_size=2) == 3
+    assert _bought_together(client, "SKU-1") == [("SKU-2", 1, 0.5)]
+
+    client.post("/api/orders/add_order", json={
+        "user_name": "John Test 1", "details": [{"sku": "SKU-1", "qty": 1}, {"sku": "SKU-2", "qty": 1}]
+    })
+    client.post("/api/orders/2/items", json={"sku": "SKU-1", "qty": 1})
+    assert _bought_together(client, "SKU-1") == [("SKU-2", 2, 0.5), ("SKU-3", 1, 0.25)]
+
+    client.delete("/api/orders/delete_product", json={"order_id": 1, "product_sku": "SKU-1"})
+    client.delete("/api/orders/4")
+    assert _bought_together(client, "SKU-1") == [("SKU-3", 1, 0.5)]
+    assert _bought_together(client, "SKU-3") == [("SKU-1", 1, 1.0)]
+
+
+@pytest.mark.parametrize(
+    "url, status",
+    [("/api/statistics/skus/SKU-9/bought-together", 404), ("/api/statistics/skus/SKU-1/bought-together?limit=0", 400)]
+)
+def test_bought_together_errors(client: FlaskClient, seed_statistics_data, url: str, status: int) -> None:
+    assert client.get(url).status_code == status
+
+
+def _sales_total(client: FlaskClient, query: str) -> tuple[int, str]:
+    resp = client.get(f"/api/statistics/sales?{query}")
+    assert resp.status_code == 200
+    buckets = resp.get_json()
+    return sum(b["units"] for b in buckets), f'{sum(Decimal(b["revenue"]) for b in buckets):.2f}'
+
+
+def test_get_sales_follows_order_writes_and_backfill(app: Flask, client: FlaskClient, seed_statistics_data) -> None:
+    client.post("/api/orders/add_order", json={
+        "user_name": "John Test 1", "details": [{"sku": "SKU-1", "qty": 3}, {"sku": "SKU-2", "qty": 4}]
+    })
+    client.delete("/api/orders/delete_product", json={"order_id": 4, "product_sku": "SKU-1"})
+    client.post("/api/orders/add_order", json={"user_name": "John Test 2", "details": [{"sku": "SKU-1", "qty": 2}]})
+    client.delete("/api/orders/5")
+
+    # seeded orders are not in the rollups until the backfill
+    assert _sales_total(client, "period=hour") == (4, "80.00")
+    assert _sales_total(client, "period=day&sku=SKU-2") == (4, "80.00")
+    assert _sales_total(client, "sku=SKU-1") == (0, "0.00")
+
+    with app.app_context():
+        lines = SalesRollupService(SalesRollupRepository(), ProductRepository()).backfill(chunk_size=2)
+    assert lines == 5
+    assert _sales_total(client, "period=hour") == (69, "630.00")         # SKU-3 has no product - no revenue
+    assert _sales_total(client, "period=day&sku=SKU-1") == (15, "150.00")
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["period=week", "from=yesterday", "from=2026-01-02&to=2026-01-01", "period=hour&from=2020-01-01&to=2026-01-01"]
+)
+def test_get_sales_wrong_params(client: FlaskClient, query: str) -> None:
+    assert client.get(f"/api/statistics/sales?{query}").status_code == 400
+
+
+@pytest.fixture()
+def seed_snapshot_data(app: Flask, seed_statistics_data) -> None:
+    with app.app_context():             # older than the lag of the snapshot
+        db.session.execute(update(OrderDetail).values(created=datetime(2026, 1, 1)))
+        db.session.commit()
+
+
+def test_snapshot_analytics(client: FlaskClient, seed_snapshot_data) -> None:
+    info = client.get("/api/statistics/snapshot").get_json()
+    assert (info["lines"], info["users"]) == (4, 2)
+
+    resp = client.get("/api/statistics/snapshot/price-bands?edge=15")
+    assert resp.status_code == 200
+    assert resp.get_json() == [
+        {"low": None, "high": "15", "lines": 3, "units": 45, "revenue": "150.00"},         # SKU-3 has no product
+        {"low": "15", "high": None, "lines": 1, "units": 20, "revenue": "400.00"},
+    ]
+
+    assert client.get("/api/statistics/snapshot/sku-users?sku=SKU-1&sku=SKU-2").get_json() == {
+        "skus": ["SKU-1", "SKU-2"], "users": ["John Test 2", "John Test 1"], "units": [[5, 10], [0, 20]]
+    }
+
+    histogram = client.get("/api/statistics/snapshot/distribution/order_value?bins=2").get_json()
+    assert histogram["counts"] == [2, 1]                    # orders worth 0, 50 and 500
+    assert histogram["edges"] == [0.0, 250.0, 500.0]
+
+
+@pytest.mark.parametrize(
+    "url", ["/api/statistics/snapshot/price-bands?edge=abc", "/api/statistics/snapshot/distribution/price"]
+)
+def test_snapshot_wrong_params(client: FlaskClient, seed_snapshot_data, url: str) -> None:
+    assert client.get(url).status_code == 400
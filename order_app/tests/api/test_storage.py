@@ -1,6 +1,15 @@
+from datetime import datetime, timedelta, timezone
+
+from flask import Flask
 from flask.testing import FlaskClient
 import pytest
 
+from webapp.database.models.sales_rollups import DailySales
+from webapp.database.models.storage import Storage
+from webapp.database.repositories.reorder_forecasts import ReorderForecastRepository
+from webapp.extensions import db
+from webapp.services.storage.forecast import DemandForecastService
+
 
 def test_get_all_storage(client: FlaskClient, seed_storage_data) -> None:
     resp = client.get("/api/storage/")
@@ -72,3 +81,69 @@ def test_deduct_qty_from_storage_sku_and_deduct(client: FlaskClient, seed_storag
     assert len(resp_4.get_json()) == 1
     assert {u["sku"] for u in resp_4.get_json()} == {"SKU-2"}
 
+
+
+def test_reorder_suggestions_from_stored_forecast(
+        app: Flask, client: FlaskClient, seed_product_data, seed_storage_data
+) -> None:
+    today = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    with app.app_context():
+        db.session.add_all(
+            [DailySales(bucket=today - timedelta(days=d), sku="SKU-1", units=5, revenue=50) for d in range(1, 29)]
+            + [DailySales(bucket=today - timedelta(days=d), sku="SKU-2", units=1, revenue=20) for d in range(1, 29)]
+        )
+        db.session.commit()
+        assert DemandForecastService(ReorderForecastRepository()).run() == 3        # SKU-4 has no storage row
+
+    resp = client.get("/api/storage/reorder")
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert [(s["sku"], s["stock"], s["daily_demand"], s["days_of_cover"], s["suggested_qty"]) for s in data] == [
+        ("SKU-1", 10, "5.000", "2.0", 95)          # 21 days (lead time + cover) of demand minus the stock
+    ]
+
+    assert [s["sku"] for s in client.get("/api/storage/reorder?max_days=30").get_json()] == ["SKU-1", "SKU-2"]
+    assert client.get("/api/storage/reorder?limit=0").status_code == 400
+
+
+def test_inventory_stats(app: Flask, client: FlaskClient, seed_storage_data) -> None:
+    with app.app_context():
+        db.session.add_all([Storage(sku="SKU-5", qty=0), Storage(sku="SKU-6", qty=3)])
+        db.session.commit()
+
+    resp = client.get("/api/storage/stats?bins=4&q=0&q=0.5&q=1")
+    assert resp.status_code == 200
+    assert resp.get_json() == {
+        "skus": 4, "zero_stock": 1, "total_units": 33, "min_qty": 0, "max_qty": 20,
+        "quantiles": {"0.0": 0, "0.5": 3, "1.0": 20},
+        "histogram": [
+            {"low": 0, "high": 6, "skus": 2}, {"low": 6, "high": 12, "skus": 1},
+            {"low": 12, "high": 18, "skus": 0}, {"low": 18, "high": 24, "skus": 1},
+        ]
+    }
+
+
+@pytest.mark.parametrize("query, status", [("bins=0", 400), ("q=1.5", 400), ("", 404)])
+def test_inventory_stats_errors(client: FlaskClient, query: str, status: int) -> None:
+    assert client.get(f"/api/storage/stats?{query}").status_code == status
+
+
+def test_get_by_sku_cached_until_commit(client: FlaskClient, seed_product_data, seed_storage_data) -> None:
+    assert client.get("/api/storage/sku/SKU-1").get_json()["quantity"] == 10
+    assert client.get("/api/storage/sku/SKU-1").get_json()["quantity"] == 10
+    client.patch("/api/storage/add", json={"sku": "SKU-1", "quantity": 5})       # the commit drops SKU-1
+
+    assert client.get("/api/storage/sku/SKU-1").get_json()["quantity"] == 15
+
+    stats = {c["name"]: c for c in client.get("/api/statistics/caches").get_json()}
+    assert stats["storage"]["hits"] == 1
+    assert stats["storage"]["misses"] == 2
+    assert stats["products"]["misses"] == 1                # the product check of the write
+
+
+def test_get_all_counted_by_coalescing_stats(client: FlaskClient, seed_storage_data) -> None:
+    client.get("/api/storage/")
+    client.get("/api/storage/")
+
+    stats = {c["name"]: c for c in client.get("/api/statistics/coalescing").get_json()}
+    assert stats["storage.get_all"] == {"name": "storage.get_all", "calls": 2, "executions": 2, "collapsed": 0}
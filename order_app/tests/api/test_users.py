@@ -11,6 +11,17 @@ def test_get_all_users(client: FlaskClient, seed_user_data) -> None:
     assert {u["name"] for u in data} == {"John Test 1", "John Test 2"}
 
 
+def test_get_all_users_orders_qty_and_pages(client: FlaskClient, seed_order_data) -> None:
+    resp_1 = client.get("/api/users/?limit=1")
+    assert resp_1.status_code == 200
+    assert resp_1.get_json() == [{"id": 1, "name": "John Test 1", "orders_qty": 1}]
+    assert resp_1.headers["X-Next-Cursor"] == "1"
+
+    resp_2 = client.get("/api/users/?limit=1&after=1")
+    assert resp_2.get_json() == [{"id": 2, "name": "John Test 2", "orders_qty": 1}]
+    assert "X-Next-Cursor" not in resp_2.headers
+
+
 def test_get_by_username(client: FlaskClient, seed_user_data) -> None:
     resp = client.get("/api/users/John Test 1")
 
@@ -38,3 +49,39 @@ def test_create_user(client: FlaskClient, seed_user_data) -> None:
     assert len(users) == 3
     assert users[-1]["name"] == "Test User 3"
 
+
+
+def _summary(client: FlaskClient, username: str) -> tuple[int, int, str]:
+    data = client.get(f"/api/users/{username}/summary").get_json()
+    return data["orders_count"], data["units"], data["lifetime_value"]
+
+
+def test_order_summary_follows_order_writes(client: FlaskClient, seed_order_data) -> None:
+    client.post("/api/users/", json={"name": "Test User 3"})
+    resp = client.get("/api/users/Test User 3/summary")
+    assert resp.status_code == 200
+    assert resp.get_json() == {
+        "name": "Test User 3", "orders_count": 0, "units": 0, "lifetime_value": "0.00",
+        "first_order_at": None, "last_order_at": None
+    }
+
+    client.post("/api/orders/add_order", json={"user_name": "Test User 3", "details": [{"sku": "SKU-1", "qty": 2}]})
+    client.post("/api/orders/bulk", json={"orders": [{"user_name": "Test User 3", "details": [{"sku": "SKU-2", "qty": 1}]}]})
+    client.post("/api/orders/3/items", json={"sku": "SKU-2", "qty": 3})
+    assert _summary(client, "Test User 3") == (2, 6, "100.00")
+    summary = client.get("/api/users/Test User 3/summary").get_json()
+    assert summary["first_order_at"] is not None and summary["first_order_at"] <= summary["last_order_at"]
+
+    client.delete("/api/orders/delete_product", json={"order_id": 3, "product_sku": "SKU-1"})
+    assert _summary(client, "Test User 3") == (2, 4, "80.00")
+
+    client.delete("/api/orders/4")
+    assert _summary(client, "Test User 3") == (1, 3, "60.00")
+
+    client.delete("/api/orders/3")
+    assert client.get("/api/users/Test User 3/summary").get_json()["first_order_at"] is None
+    assert _summary(client, "Test User 3") == (0, 0, "0.00")
+
+
+def test_order_summary_unknown_user(client: FlaskClient, seed_user_data) -> None:
+    assert client.get("/api/users/Nobody/summary").status_code == 404
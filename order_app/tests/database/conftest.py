@@ -60,6 +60,23 @@ def session(app):
         db.session.close()
 
 
+# ---------------------------------------------------------
+# B2) Fixture counting SQL statements sent to the database
+# ---------------------------------------------------------
+@pytest.fixture
+def query_counter(app):
+    from sqlalchemy import event
+
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
 # ---------------------------------------------------------
 # C) Fixtures models
 # ---------------------------------------------------------
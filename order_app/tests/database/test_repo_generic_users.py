@@ -49,3 +49,28 @@ def test_user_crud_get_by_username(session: Session, user_repo: UserRepository,
     u = user_repo.get_by_username(user_1.username)
     assert u is not None
     assert u.username == user_1.username
+
+
+
+def test_get_all_with_orders_qty(session: Session, user_repo: UserRepository, users: list[User], orders):
+    rows = user_repo.get_all_with_orders_qty()
+
+    assert [(r.id, r.username, r.orders_qty) for r in rows] == [(1, "John Test 1", 2), (2, "John Test 2", 1)]
+
+    page = user_repo.get_all_with_orders_qty(limit=1, after=1)
+
+    assert [(r.id, r.orders_qty) for r in page] == [(2, 1)]
+
+
+def test_get_by_username_with_orders_qty(session: Session, user_repo: UserRepository, user_1: User):
+    row = user_repo.get_by_username_with_orders_qty(user_1.username)
+
+    assert row is not None
+    assert row.orders_qty == 0
+    assert user_repo.get_by_username_with_orders_qty("Nobody") is None
+
+
+def test_get_ids_by_usernames(session: Session, user_repo: UserRepository, users: list[User]):
+    result = user_repo.get_ids_by_usernames(["John Test 2", "Nobody"])
+
+    assert result == {"John Test 2": users[1].id}
@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from webapp.database.repositories.idempotency import IdempotencyRepository
+
+
+# the repository commits in its own sessions - every test removes its key again
+def test_reserve_takes_over_expired_key_in_progress(session: Session):
+    repo = IdempotencyRepository()
+    now = datetime(2025, 1, 2, 12, 0)
+    try:
+        assert repo.reserve("retry-dead", "abc", now - timedelta(minutes=1), now - timedelta(days=1))   # worker died
+
+        assert repo.reserve("retry-dead", "def", now + timedelta(days=1), now)
+
+        record = repo.get("retry-dead")
+        assert record is not None
+        assert record.fingerprint == "def"
+        assert record.status_code is None
+    finally:
+        repo.release("retry-dead")
+
+
+def test_reserve_keeps_live_key(session: Session):
+    repo = IdempotencyRepository()
+    now = datetime(2025, 1, 2, 12, 0)
+    try:
+        assert repo.reserve("retry-live", "abc", now + timedelta(minutes=1), now)
+
+        assert not repo.reserve("retry-live", "def", now + timedelta(days=1), now)
+        record = repo.get("retry-live")
+        assert record is not None
+        assert record.fingerprint == "abc"
+    finally:
+        repo.release("retry-live")
+
+
+def test_complete_stores_response_until_expiry(session: Session):
+    repo = IdempotencyRepository()
+    now = datetime(2025, 1, 2, 12, 0)
+    try:
+        assert repo.reserve("retry-done", "abc", now + timedelta(minutes=5), now)
+
+        repo.complete("retry-done", 201, "{}", now + timedelta(days=1))
+
+        record = repo.get("retry-done")
+        assert record is not None
+        assert record.status_code == 201
+        assert record.expires_at == now + timedelta(days=1)
+    finally:
+        repo.release("retry-done")
@@ -52,4 +52,41 @@ def test_get_total_orders_by_user_name(session: Session, order_repo: TotalOrderR
     result = order_repo.get_total_orders_by_user_name(user_name = "John Test 1")
 
     assert result is not None
-    assert len(result) == 2
\ No newline at end of file
+    assert len(result) == 2
+
+
+def test_get_all_total_orders_keyset_page(session: Session, order_repo: TotalOrderRepository, orders: list[Order]):
+    first_page = order_repo.get_all_total_orders(limit=2)
+
+    assert [o.id for o in first_page] == [3, 2]
+
+    second_page = order_repo.get_all_total_orders(limit=2, after=first_page[-1].id)
+
+    assert [o.id for o in second_page] == [1]
+    assert second_page[0].order_details[0].product_sku == "SKU-1"
+
+
+def test_add_details_bulk(session: Session, order_repo: TotalOrderRepository, orders: list[Order]):
+    order_repo.add_details_bulk([
+        {"order_id": orders[2].id, "product_sku": "SKU-1", "qty": 1},
+        {"order_id": orders[2].id, "product_sku": "SKU-2", "qty": 2},
+    ])
+
+    session.expire_all()
+    result = order_repo.get_total_order_by_id(orders[2].id)
+
+    assert result is not None
+    assert sorted((d.product_sku, d.qty) for d in result.order_details) == [("SKU-1", 1), ("SKU-2", 2)]
+
+
+def test_stream_order_rows(session: Session, order_repo: TotalOrderRepository, orders: list[Order], users):
+
+    rows = list(order_repo.stream_order_rows(chunk_size=2))
+
+    assert [(r.id, r.product_sku, r.qty) for r in rows] == [
+        (orders[0].id, "SKU-1", 10),
+        (orders[0].id, "SKU-2", 20),
+        (orders[1].id, "SKU-3", 30),
+        (orders[2].id, None, None),         # order without lines - outer join
+    ]
+    assert rows[0].username == "John Test 1"
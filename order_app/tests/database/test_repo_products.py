@@ -12,6 +12,35 @@ def test_get_by_part_name(session: Session, product_repo: ProductRepository, pro
     assert len(products_small_text) == 3
 
 
+def test_get_by_part_name_full_text(session: Session, product_repo: ProductRepository):
+    session.add_all([
+        Product(sku="FT-1", name="Blue Shirt", price=10),
+        Product(sku="FT-2", name="Shirt blue blue navy", price=10),
+        Product(sku="FT-3", name="Bluebell vase", price=10),
+        Product(sku="FT-4", name="Red shirt", price=10),
+    ])
+    session.flush()
+
+    assert {p.sku for p in product_repo.get_by_part_name("blu sh")} == {"FT-1", "FT-2"}     # word prefixes, AND
+    assert [p.sku for p in product_repo.get_by_part_name("blue")][0] == "FT-2"             # more hits rank first
+    assert {p.sku for p in product_repo.get_by_part_name("BLUE")} == {"FT-1", "FT-2", "FT-3"}
+    assert product_repo.get_by_part_name("lue") == []                                       # not a word prefix
+    assert product_repo.get_by_part_name("'\"*") == []
+
+    first = product_repo.get_by_part_name("shirt", limit=2)
+    rest = product_repo.get_by_part_name("shirt", limit=2, offset=2)
+    assert len(first) == 2 and len(rest) == 1
+    assert {p.sku for p in first + rest} == {"FT-1", "FT-2", "FT-4"}
+
+    # the FTS5 stand-in follows updates and deletes
+    product = session.get(Product, "FT-4")
+    assert product is not None
+    product.name = "Green vase"
+    session.delete(session.get(Product, "FT-3"))
+    session.flush()
+    assert [p.sku for p in product_repo.get_by_part_name("vase")] == ["FT-4"]
+
+
 @pytest.mark.parametrize(
     "min_price, max_price, expected_sku, expected_len",
      [
@@ -44,3 +73,18 @@ def test_get_by_sku(session: Session, product_repo: ProductRepository, products:
     assert products_sku is not None
     assert products_sku.sku == "SKU-1"
 
+
+
+
+def test_get_all_runs_one_query_regardless_of_order_history(
+        session: Session,
+        product_repo: ProductRepository,
+        orders,
+        query_counter: list[str]
+):
+    session.expire_all()
+
+    result = product_repo.get_all()
+
+    assert len(result) == 3
+    assert len(query_counter) == 1
@@ -0,0 +1,46 @@
+from sqlalchemy.orm import Session
+import pytest
+
+from webapp.database.models.orders import Order
+from webapp.database.repositories.statistics import StatisticsRepository
+
+
+@pytest.fixture
+def statistics_repo():
+    return StatisticsRepository()
+
+
+# orders fixture: order 1 (user 1) SKU-1 x10 (10.0), SKU-2 x20 (20.0) | order 2 (user 2) SKU-3 x30 (30.0) | order 3 empty
+
+def test_get_sku_stats_is_one_query(
+        session: Session,
+        statistics_repo: StatisticsRepository,
+        orders: list[Order],
+        users,
+        query_counter: list[str]
+):
+    rows = statistics_repo.get_sku_stats(user_name="John Test 1")
+
+    assert len(query_counter) == 1
+    assert [(r.sku, r.units, float(r.revenue), r.orders_qty) for r in rows] == [
+        ("SKU-1", 10, 100.0, 1),
+        ("SKU-2", 20, 400.0, 1),
+    ]
+
+
+def test_get_top_products(session: Session, statistics_repo: StatisticsRepository, orders: list[Order]):
+    rows = statistics_repo.get_top_products(limit=2, by="revenue")
+
+    assert [r.sku for r in rows] == ["SKU-3", "SKU-2"]
+
+
+def test_get_user_stats(session: Session, statistics_repo: StatisticsRepository, orders: list[Order], users):
+    rows = statistics_repo.get_user_stats(skus=["SKU-1", "SKU-3"])
+
+    assert [(r.user_name, r.orders_qty, r.units) for r in rows] == [("John Test 1", 1, 10), ("John Test 2", 1, 30)]
+
+
+def test_get_order_totals(session: Session, statistics_repo: StatisticsRepository, orders: list[Order]):
+    row = statistics_repo.get_order_totals()
+
+    assert (row.orders_qty, row.lines_qty, row.units, float(row.revenue)) == (3, 3, 60, 1400.0)
@@ -2,6 +2,7 @@ from webapp.database.models.storage import Storage
 from webapp.database.repositories.storage import StorageRepository
 from sqlalchemy.orm import Session
 import pytest
+from sqlalchemy.exc import InvalidRequestError
 
 def test_storage_get_by_sku(session: Session, storage_repo: StorageRepository, storage: list[Storage]):
     storage_from_db = storage_repo.get_by_sku(storage[0].sku)
@@ -43,8 +44,79 @@ def test_get_by_sku_for_update(session: Session, storage_repo: StorageRepository
     assert result.sku == sku
     assert result.qty == 10
 
+def test_get_by_skus_for_update(session: Session, storage_repo: StorageRepository, storage: list[Storage]):
+    result = storage_repo.get_by_skus_for_update(["SKU-3", "SKU-9", "SKU-1", "SKU-3"])
+
+    assert [s.sku for s in result] == ["SKU-1", "SKU-3"]
+
+
+@pytest.mark.parametrize(
+    "sku, qty, expected_result, expected_qty",
+    [
+        ("SKU-1", 10, True, 0),
+        ("SKU-1", 11, False, 10),
+        ("SKU-9", 1, False, None),
+    ]
+)
+def test_decrement_qty_if_available(
+        session: Session,
+        storage_repo: StorageRepository,
+        storage: list[Storage],
+        sku: str,
+        qty: int,
+        expected_result: bool,
+        expected_qty: int | None
+):
+    assert storage_repo.decrement_qty_if_available(sku, qty) is expected_result
+
+    session.expire_all()
+    row = storage_repo.get_by_sku(sku)
+    assert (row.qty if row else None) == expected_qty
+
+
+def test_increment_qty(session: Session, storage_repo: StorageRepository, storage: list[Storage]):
+    assert storage_repo.increment_qty("SKU-2", 5) is True
+    assert storage_repo.increment_qty("SKU-9", 5) is False
+
+    session.expire_all()
+    row = storage_repo.get_by_sku("SKU-2")
+    assert row is not None
+    assert row.qty == 105
+
+
 def test_get_all(session: Session, storage_repo: StorageRepository, storage: list[Storage]):
     result = storage_repo.get_all()
 
     assert result is not None
-    assert len(result) == 3
\ No newline at end of file
+    assert len(result) == 3
+
+
+def test_get_all_does_not_load_relationships(
+        session: Session,
+        storage_repo: StorageRepository,
+        storage: list[Storage],
+        orders,
+        query_counter: list[str]
+):
+    session.expire_all()
+
+    result = storage_repo.get_all()
+
+    assert len(result) == 3
+    assert len(query_counter) == 1
+
+    with pytest.raises(InvalidRequestError):
+        _ = result[0].product
+
+
+def test_get_all_with_products_profile(session: Session, storage_repo: StorageRepository, storage: list[Storage], orders):
+    session.expire_all()
+
+    result = storage_repo.get_all(profile="with_products")
+
+    assert {s.product.name for s in result} == {"P1", "P2", "P3"}
+
+
+def test_get_all_unknown_profile(session: Session, storage_repo: StorageRepository):
+    with pytest.raises(ValueError):
+        storage_repo.get_all(profile="everything")
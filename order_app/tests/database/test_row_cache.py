@@ -0,0 +1,131 @@
+from decimal import Decimal
+from typing import Generator
+
+import pytest
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+from webapp.core.lru import LRUCache
+from webapp.core.cache_backends import LocalCacheBackend
+from webapp.database.cache import RowCache
+from webapp.database.models.products import Product
+from webapp.database.models.storage import Storage
+from webapp.database.models.users import User
+from webapp.database.repositories.storage import StorageRepository
+
+
+# these tests commit - the rows are deleted again afterwards
+@pytest.fixture
+def committed_storage(session: Session) -> Generator[None, None, None]:
+    session.add_all([Product(sku=f"C-{i}", name=f"Cached {i}", price=Decimal(i)) for i in (1, 2)])
+    session.add_all([Storage(sku="C-1", qty=10), Storage(sku="C-2", qty=20)])
+    session.commit()
+    yield
+    session.rollback()
+    session.execute(delete(Storage).where(Storage.sku.in_(["C-1", "C-2"])))
+    session.execute(delete(Product).where(Product.sku.in_(["C-1", "C-2"])))
+    session.commit()
+
+
+@pytest.fixture
+def storage_cache() -> RowCache[int]:
+    return RowCache(Storage, LocalCacheBackend(maxsize=10), ttl_seconds=60)
+
+
+def qty(session: Session, cache: RowCache[int], sku: str) -> int | None:
+    def load() -> int:
+        storage = session.get(Storage, sku, populate_existing=True)
+        assert storage is not None
+        return storage.qty
+
+    return cache.get(sku, load)
+
+
+def test_lru_cache_ttl_and_counters():
+    now = [0.0]
+    cache: LRUCache[str, int] = LRUCache(maxsize=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)                                   # "a" is the least recently used
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    now[0] = 10.0
+    assert cache.get("c") is None                       # expired
+    assert cache.stats().hits == 1 and cache.stats().misses == 2 and cache.stats().size == 1
+
+
+def test_read_through(session: Session, committed_storage, storage_cache: RowCache[int]):
+    loads = []
+
+    def load() -> int:
+        loads.append(1)
+        return 10
+
+    assert storage_cache.get("C-1", load) == 10
+    assert storage_cache.get("C-1", load) == 10
+    assert storage_cache.get("missing", lambda: None) is None
+    assert storage_cache.get("missing", lambda: None) is None         # missing rows are not cached
+
+    assert len(loads) == 1
+    assert storage_cache.stats().hits == 1
+    assert storage_cache.stats().misses == 3
+
+
+def test_commit_drops_only_changed_keys(session: Session, committed_storage, storage_cache: RowCache[int]):
+    assert qty(session, storage_cache, "C-1") == 10
+    assert qty(session, storage_cache, "C-2") == 20
+
+    storage = session.get(Storage, "C-1")
+    assert storage is not None
+    storage.qty = 11                                    # unit of work
+    session.commit()
+    assert storage_cache.stats().size == 1
+    assert qty(session, storage_cache, "C-1") == 11
+
+    StorageRepository().decrement_qty_if_available("C-2", 5)      # UPDATE .. WHERE sku = :sku
+    session.commit()
+    assert qty(session, storage_cache, "C-2") == 15
+    assert qty(session, storage_cache, "C-1") == 11
+    assert storage_cache.stats().hits == 1
+
+
+def test_update_without_key_drops_table(session: Session, committed_storage, storage_cache: RowCache[int]):
+    qty(session, storage_cache, "C-1")
+    qty(session, storage_cache, "C-2")
+
+    session.execute(update(Storage).where(Storage.qty > 100).values(qty=0))
+    session.commit()
+
+    assert storage_cache.stats().size == 0
+
+
+def test_rollback_keeps_cache_and_reads_of_changed_keys_are_not_cached(
+        session: Session, committed_storage, storage_cache: RowCache[int]
+):
+    assert qty(session, storage_cache, "C-1") == 10
+
+    session.execute(update(Storage).where(Storage.sku.in_(["C-1", "C-2"])).values(qty=99))
+    assert qty(session, storage_cache, "C-2") == 99     # uncommitted - read, but not cached
+    session.rollback()
+
+    assert storage_cache.stats().size == 1
+    assert qty(session, storage_cache, "C-1") == 10
+    assert qty(session, storage_cache, "C-2") == 20
+
+
+def test_cache_by_unique_column_drops_old_key(session: Session):
+    user = User(username="cached-user")
+    session.add(user)
+    session.commit()
+    user_cache: RowCache[int] = RowCache(User, LocalCacheBackend(), key="username")
+    load = lambda name: session.query(User.id).filter_by(username=name).scalar()
+
+    assert user_cache.get("cached-user", lambda: load("cached-user")) == user.id
+    user.username = "renamed-user"
+    session.commit()
+
+    assert user_cache.get("cached-user", lambda: load("cached-user")) is None
+    assert user_cache.stats().size == 0
+    session.delete(user)
+    session.commit()
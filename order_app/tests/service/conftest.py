@@ -1,3 +1,4 @@
+from collections import namedtuple
 from unittest.mock import MagicMock
 import pytest
 
@@ -34,14 +35,30 @@ def mock_user_repo():
 def mock_product_repo():
     return MagicMock()
 
+@pytest.fixture
+def mock_user_stats_repo():
+    return MagicMock()
+
+@pytest.fixture
+def mock_statistics_repo():
+    return MagicMock()
+
+@pytest.fixture
+def mock_pair_repo():
+    return MagicMock()
+
+@pytest.fixture
+def mock_forecast_repo():
+    return MagicMock()
+
 
 # -----------------------------------------------------------------------
 # MOCKED SERVICES
 # -----------------------------------------------------------------------
 
 @pytest.fixture
-def mock_user_service(mock_user_repo):
-    return UserService(mock_user_repo)
+def mock_user_service(mock_user_repo, mock_user_stats_repo):
+    return UserService(mock_user_repo, mock_user_stats_repo)
 
 
 @pytest.fixture
@@ -71,6 +88,15 @@ def fake_user_with_orders():
     return user
 
 
+@pytest.fixture
+def fake_user_rows():
+    UserRow = namedtuple("UserRow", ["id", "username", "orders_qty"])      # shape of rows with aggregated orders
+    return [
+        UserRow(id=1, username="John Test 1", orders_qty=3),
+        UserRow(id=2, username="John Test 2", orders_qty=0),
+    ]
+
+
 @pytest.fixture
 def fake_products():
     return [
@@ -0,0 +1,106 @@
+import random
+from collections import Counter, namedtuple
+from unittest.mock import patch
+import pytest
+
+from webapp.services.exceptions import NotFoundException, ValidationException
+from webapp.services.statistics.bought_together import BoughtTogetherIndex, order_pairs, line_pairs
+
+
+LineRow = namedtuple("LineRow", "order_id product_sku")
+
+
+@pytest.fixture
+def orders() -> dict[int, list[str]]:
+    return {}
+
+
+@pytest.fixture
+def pair_rows() -> Counter[tuple[str, str]]:
+    return Counter()
+
+
+# the pair repository answers from the orders and keeps the stored pairs in pair_rows
+@pytest.fixture
+def repo(mock_pair_repo, orders, pair_rows):
+    def increment(rows):
+        pair_rows.update({(r["sku_a"], r["sku_b"]): r["orders"] for r in rows})
+
+    mock_pair_repo.stream_pairs.side_effect = lambda chunk_size=10_000: [
+        (a, b, n) for (a, b), n in pair_rows.items() if n > 0
+    ]
+    mock_pair_repo.get_order_skus.side_effect = lambda order_id: list(orders.get(order_id, []))
+    mock_pair_repo.stream_order_skus.side_effect = lambda chunk_size=10_000: [
+        LineRow(order_id, sku) for order_id in sorted(orders) for sku in orders[order_id]
+    ]
+    mock_pair_repo.increment.side_effect = increment
+    mock_pair_repo.add_all.side_effect = increment
+    mock_pair_repo.delete_all.side_effect = pair_rows.clear
+    return mock_pair_repo
+
+
+def _brute_force(orders: dict[int, list[str]], sku: str) -> tuple[int, Counter[str]]:
+    with_sku = [set(skus) for skus in orders.values() if sku in skus]
+    return len(with_sku), Counter(other for skus in with_sku for other in skus - {sku})
+
+
+def test_pairs_of_order_and_line():
+    assert order_pairs(["B", "A", "C"]) == Counter({
+        ("A", "A"): 1, ("B", "B"): 1, ("C", "C"): 1, ("A", "B"): 1, ("A", "C"): 1, ("B", "C"): 1
+    })
+    assert line_pairs("B", ["C", "A", "B"], sign=-1) == Counter({("B", "B"): -1, ("A", "B"): -1, ("B", "C"): -1})
+
+
+def test_index_follows_writes_like_a_self_join(repo, orders):
+    rnd = random.Random(5)
+    skus = [f"S-{i}" for i in range(8)]
+    index = BoughtTogetherIndex(repo, max_age_seconds=0)
+
+    for order_id in range(1, 60):
+        orders[order_id] = rnd.sample(skus, rnd.randrange(1, 5))
+        pairs = order_pairs(orders[order_id])
+        index.save(pairs)
+        index.apply(pairs)
+        if order_id == 20:                      # loaded in the middle, applied changes from then on
+            index.get_neighbours(orders[order_id][0])
+        if rnd.random() < 0.3:                  # drop a line of a random order or the whole order
+            victim = rnd.choice(list(orders))
+            if len(orders[victim]) > 1:
+                sku = orders[victim].pop()
+                pairs = line_pairs(sku, orders[victim], sign=-1)
+            else:
+                pairs = index.order_removed(victim)
+                del orders[victim]
+            index.save(pairs)
+            index.apply(pairs)
+
+    for sku in skus:
+        count, together = _brute_force(orders, sku)
+        if not count:
+            with pytest.raises(NotFoundException):
+                index.get_neighbours(sku)
+            continue
+        expected = sorted(together.items(), key=lambda kv: (-kv[1], kv[0]))[:3]
+        assert [(n.sku, n.orders, n.share) for n in index.get_neighbours(sku, limit=3)] == [
+            (other, n, round(n / count, 4)) for other, n in expected
+        ]
+
+
+@patch("webapp.services.statistics.bought_together.db")
+def test_rebuild_replaces_the_pairs(mock_db, repo, orders, pair_rows):
+    orders.update({1: ["A", "B"], 2: ["A", "B", "C"], 3: ["C"]})
+    pair_rows[("A", "Z")] = 7                   # stale row
+    index = BoughtTogetherIndex(repo)
+
+    assert index.rebuild(chunk_size=2) == 3
+    mock_db.session.begin.assert_called_once()
+    assert pair_rows == Counter({
+        ("A", "A"): 2, ("B", "B"): 2, ("C", "C"): 2, ("A", "B"): 2, ("A", "C"): 1, ("B", "C"): 1
+    })
+    assert [(n.sku, n.orders) for n in index.get_neighbours("C")] == [("A", 1), ("B", 1)]
+
+
+@pytest.mark.parametrize("limit", [0, 101])
+def test_limit_validation(repo, limit: int):
+    with pytest.raises(ValidationException):
+        BoughtTogetherIndex(repo).get_neighbours("A", limit)
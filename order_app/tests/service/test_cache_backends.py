@@ -0,0 +1,205 @@
+import re
+import socketserver
+import threading
+import time
+import uuid
+from decimal import Decimal
+from multiprocessing import shared_memory
+from typing import Generator
+
+import pytest
+
+from webapp.core.cache_backends import LocalCacheBackend, SharedMemoryCacheBackend, RespClient, RedisCacheBackend
+from webapp.services.products.dtos import ReadProductDTO
+
+
+# In-process stand-in for a Redis server: the RESP2 commands RedisCacheBackend sends, data in a dict.
+class FakeRespServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), FakeRespHandler)
+        self.data: dict[bytes, tuple[bytes, float | None]] = {}
+        self.lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def live(self) -> dict[bytes, bytes]:
+        now = time.monotonic()
+        return {k: v for k, (v, expires) in self.data.items() if expires is None or expires > now}
+
+
+class FakeRespHandler(socketserver.StreamRequestHandler):
+    server: FakeRespServer
+
+    def handle(self) -> None:
+        while line := self.rfile.readline():
+            args = [self._bulk() for _ in range(int(line[1:]))]
+            with self.server.lock:
+                self.wfile.write(self._reply(args[0].upper(), args[1:]))
+
+    def _bulk(self) -> bytes:
+        length = int(self.rfile.readline()[1:])
+        return self.rfile.read(length + 2)[:-2]
+
+    def _reply(self, command: bytes, args: list[bytes]) -> bytes:
+        live = self.server.live()
+        if command in (b"PING", b"AUTH", b"SELECT"):
+            return b"+OK\r\n"
+        if command == b"GET":
+            value = live.get(args[0])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if command == b"SET":
+            ttl = int(args[3]) / 1000 if len(args) > 3 and args[2].upper() == b"PX" else None
+            self.server.data[args[0]] = (args[1], time.monotonic() + ttl if ttl is not None else None)
+            return b"+OK\r\n"
+        if command == b"DEL":
+            deleted = [self.server.data.pop(key, None) for key in args]
+            return b":%d\r\n" % sum(1 for d in deleted if d is not None)
+        if command == b"SCAN":
+            escape = lambda m: re.escape(m.group(1)) if m.group(1) else b".*"
+            pattern = re.compile(re.sub(rb"\\\\(.)|\*", escape, args[2]))
+            found = [key for key in live if pattern.fullmatch(key)]
+            return b"*2\r\n$1\r\n0\r\n*%d\r\n" % len(found) + b"".join(b"$%d\r\n%s\r\n" % (len(k), k) for k in found)
+        if command == b"DBSIZE":
+            return b":%d\r\n" % len(live)
+        return b"-ERR unknown command\r\n"
+
+
+@pytest.fixture
+def resp_server() -> Generator[FakeRespServer, None, None]:
+    server = FakeRespServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def segment(tmp_path) -> Generator[str, None, None]:
+    name = f"oa_test_{uuid.uuid4().hex[:12]}"
+    yield name
+    try:
+        shm = shared_memory.SharedMemory(name, track=False)
+        shm.close()
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+@pytest.fixture(params=["local", "shared_memory", "redis"])
+def backend(request, tmp_path, segment):
+    if request.param == "local":
+        return LocalCacheBackend(maxsize=100)
+    if request.param == "shared_memory":
+        return SharedMemoryCacheBackend(segment, slots=64, slot_size=256, lock_dir=str(tmp_path))
+    server = request.getfixturevalue("resp_server")
+    return RedisCacheBackend(RespClient(server.url), key_prefix="test:")
+
+
+PRODUCT = ReadProductDTO(sku="SKU-1", name="Blue Shirt", price=Decimal("19.99"))
+
+
+def test_backend_get_set_delete(backend):
+    backend.set("products.sku:SKU-1", PRODUCT, 60)
+    backend.set("products.sku:SKU-2", 2, 60)
+    backend.set("storage.sku:SKU-1", 10, 60)
+
+    assert backend.get("products.sku:SKU-1") == PRODUCT
+    assert backend.get("missing") is None
+    backend.delete(["products.sku:SKU-1"])
+    assert backend.get("products.sku:SKU-1") is None
+    assert backend.get("products.sku:SKU-2") == 2
+
+    backend.delete_prefix("products.sku:")
+    assert backend.get("products.sku:SKU-2") is None
+    assert backend.get("storage.sku:SKU-1") == 10
+    assert backend.stats().hits == 3
+    assert backend.stats().misses == 3
+    assert backend.stats().size == 1
+
+
+def test_backend_ttl(backend):
+    backend.set("storage.sku:SKU-1", 10, 0.05)
+    assert backend.get("storage.sku:SKU-1") == 10
+    time.sleep(0.1)
+    assert backend.get("storage.sku:SKU-1") is None
+
+
+def test_shared_memory_is_shared_between_workers(segment, tmp_path):
+    worker_1 = SharedMemoryCacheBackend(segment, slots=64, slot_size=256, lock_dir=str(tmp_path))
+    worker_2 = SharedMemoryCacheBackend(segment, slots=64, slot_size=256, lock_dir=str(tmp_path))
+
+    worker_1.set("products.sku:SKU-1", PRODUCT, 60)
+    assert worker_2.get("products.sku:SKU-1") == PRODUCT
+    worker_2.delete(["products.sku:SKU-1"])                 # a commit in worker 2 drops the entry for worker 1 too
+    assert worker_1.get("products.sku:SKU-1") is None
+
+    with pytest.raises(ValueError):
+        SharedMemoryCacheBackend(segment, slots=128, slot_size=256, lock_dir=str(tmp_path))
+
+
+def test_shared_memory_bounded(segment, tmp_path):
+    now = [0.0]
+    cache = SharedMemoryCacheBackend(segment, slots=4, slot_size=128, lock_dir=str(tmp_path), clock=lambda: now[0])
+
+    cache.set("too-big", "x" * 200, 60)                     # does not fit in a slot - not cached
+    for i in range(10):
+        cache.set(f"key-{i}", i, 60 + i)
+
+    assert cache.get("too-big") is None
+    assert cache.stats().size == 4
+    assert [cache.get(f"key-{i}") for i in range(6, 10)] == [6, 7, 8, 9]       # the ones expiring first were evicted
+
+
+def test_redis_backend_shared_between_workers(resp_server):
+    worker_1 = RedisCacheBackend(RespClient(resp_server.url), key_prefix="app:")
+    worker_2 = RedisCacheBackend(RespClient(resp_server.url), key_prefix="app:")
+
+    worker_1.set("users.username:john", 1, 60)
+    assert worker_2.get("users.username:john") == 1
+    worker_2.delete(["users.username:john"])
+    assert worker_1.get("users.username:john") is None
+    assert list(resp_server.live()) == []
+
+
+def test_redis_backend_down_is_a_miss(resp_server):
+    cache = RedisCacheBackend(RespClient(resp_server.url, timeout_seconds=0.2))
+    cache.set("products.sku:SKU-1", PRODUCT, 60)
+    resp_server.shutdown()
+    resp_server.server_close()
+    cache.client.close()
+
+    assert cache.get("products.sku:SKU-1") is None
+    cache.set("products.sku:SKU-1", PRODUCT, 60)
+    cache.delete(["products.sku:SKU-1"])
+    assert cache.stats().misses == 1
+
+
+def test_redis_client_skips_server_after_failure(resp_server):
+    now = [0.0]
+    client = RespClient(resp_server.url, timeout_seconds=0.2, retry_after_seconds=5, clock=lambda: now[0])
+    resp_server.shutdown()
+    resp_server.server_close()
+
+    with pytest.raises(OSError):
+        client.execute("GET", "a")                      # connect refused
+    client.host = "203.0.113.1"                         # would time out - must not be tried during the back-off
+    started = time.monotonic()
+    with pytest.raises(ConnectionError):
+        client.execute("GET", "a")
+    assert time.monotonic() - started < 0.1
+
+    server = FakeRespServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        client.host, client.port = "127.0.0.1", server.server_address[1]
+        now[0] = 5.0                                    # back-off over, the server is tried again
+        assert client.execute("GET", "a") is None
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
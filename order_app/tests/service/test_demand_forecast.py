@@ -0,0 +1,85 @@
+import math
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import patch
+import pytest
+
+from webapp.services.exceptions import ValidationException
+from webapp.services.storage.forecast import DemandForecastService
+
+
+StockRow = namedtuple("StockRow", "sku qty")
+DailyRow = namedtuple("DailyRow", "sku bucket units")
+
+NOW = datetime(2026, 3, 10, 15, 30)
+TODAY = datetime(2026, 3, 10)
+
+
+# get_daily_units answers from the daily rows like the database would
+def _with_rows(repo, stock: list[StockRow], daily: list[DailyRow]) -> None:
+    repo.get_stock.return_value = stock
+    repo.get_daily_units.side_effect = lambda start, end: [row for row in daily if start <= row.bucket < end]
+
+
+def _smoothed(units: list[float], alpha: float) -> float:
+    level = units[0]
+    for value in units[1:]:
+        level = alpha * value + (1 - alpha) * level
+    return level
+
+
+@patch("webapp.services.storage.forecast.db")
+def test_run_matches_per_sku_smoothing(mock_db, mock_forecast_repo):
+    rnd = random.Random(11)
+    history = 14
+    stock = [StockRow(f"S-{i}", rnd.randrange(0, 200)) for i in range(30)]
+    daily = [
+        DailyRow(row.sku, TODAY - timedelta(days=day), rnd.randrange(-1, 20))
+        for row in stock[:25] for day in range(0, history + 3) if rnd.random() < 0.7
+    ]
+    daily.append(DailyRow("NO-PRODUCT", TODAY - timedelta(days=1), 50))
+    _with_rows(mock_forecast_repo, stock, daily)
+    service = DemandForecastService(
+        mock_forecast_repo, history_days=history, alpha=0.3, lead_time_days=5, cover_days=10, clock=lambda: NOW
+    )
+
+    assert service.run() == 30
+
+    mock_db.session.begin.assert_called_once()
+    [forecasts] = mock_forecast_repo.replace_all.call_args.args
+    by_sku = {row["sku"]: row for row in forecasts}
+    assert set(by_sku) == {row.sku for row in stock}
+    for row in stock:
+        units = [0.0] * history
+        for d in daily:
+            if d.sku == row.sku and TODAY - timedelta(days=history) <= d.bucket < TODAY:    # today is left out
+                units[(d.bucket - (TODAY - timedelta(days=history))).days] += d.units
+        demand = round(max(_smoothed(units, 0.3), 0), 3)
+
+        stored = by_sku[row.sku]
+        assert stored["daily_demand"] == Decimal(f"{demand:.3f}")
+        assert stored["stock"] == row.qty
+        assert stored["computed_at"] == NOW
+        if demand > 0:
+            assert stored["days_of_cover"] == Decimal(f"{row.qty / demand:.1f}")
+        else:
+            assert stored["days_of_cover"] is None
+        assert stored["suggested_qty"] == max(math.ceil(demand * 15 - row.qty), 0)    # lead time + cover days
+
+
+@patch("webapp.services.storage.forecast.db")
+def test_run_without_products(mock_db, mock_forecast_repo):
+    _with_rows(mock_forecast_repo, [], [DailyRow("S-1", TODAY - timedelta(days=1), 3)])
+
+    assert DemandForecastService(mock_forecast_repo, clock=lambda: NOW).run() == 0
+    mock_forecast_repo.replace_all.assert_called_once_with([])
+
+
+@pytest.mark.parametrize("max_days, limit", [(-1, 50), (None, 0), (None, 501)])
+def test_reorder_suggestions_validation(mock_forecast_repo, max_days, limit):
+    service = DemandForecastService(mock_forecast_repo)
+
+    with pytest.raises(ValidationException):
+        service.get_reorder_suggestions(max_days, limit)
@@ -0,0 +1,146 @@
+import threading
+from unittest.mock import patch, MagicMock
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from webapp.services.exceptions import NotFoundException
+from webapp.services.orders.group_commit import GroupCommitter
+from webapp.services.orders.dtos import CreateOrderDTO, CreateOrderDetailDTO
+from webapp.services.orders.service import OrderService
+
+
+def _apply(item: int) -> int:
+    if item < 0:
+        raise NotFoundException(f'Item {item} not found')
+    return item * 10
+
+
+def _submit_all(committer: GroupCommitter, items: list[int]) -> dict[int, int | Exception]:
+    results: dict[int, int | Exception] = {}
+    start = threading.Barrier(len(items))
+
+    def worker(item: int) -> None:
+        start.wait()
+        try:
+            results[item] = committer.submit(item)
+        except Exception as e:
+            results[item] = e
+
+    pool = [threading.Thread(target=worker, args=(item,)) for item in items]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join(timeout=5)
+    return results
+
+
+@patch("webapp.services.orders.group_commit.db")
+def test_group_commit_single_call(mock_db):
+
+    committer = GroupCommitter(_apply, window_ms=0, max_batch=10)
+
+    assert committer.submit(3) == 30
+
+    mock_db.session.begin.assert_called_once()
+    mock_db.session.begin_nested.assert_called_once()
+
+
+@patch("webapp.services.orders.group_commit.db")
+def test_group_commit_concurrent_calls_share_one_transaction(mock_db):
+
+    committer = GroupCommitter(_apply, window_ms=2000, max_batch=4)
+
+    results = _submit_all(committer, [1, 2, 3, 4])
+
+    assert results == {1: 10, 2: 20, 3: 30, 4: 40}
+    mock_db.session.begin.assert_called_once()              # full batch - no need to wait for the whole window
+    assert mock_db.session.begin_nested.call_count == 4
+
+
+@patch("webapp.services.orders.group_commit.db")
+def test_group_commit_failed_item_gets_own_error(mock_db):
+
+    committer = GroupCommitter(_apply, window_ms=2000, max_batch=3)
+
+    results = _submit_all(committer, [1, -1, 2])
+
+    assert results[1] == 10
+    assert results[2] == 20
+    assert isinstance(results[-1], NotFoundException)
+    mock_db.session.begin.assert_called_once()
+
+
+@patch("webapp.services.orders.group_commit.db")
+def test_group_commit_splits_by_max_batch(mock_db):
+
+    committer = GroupCommitter(_apply, window_ms=200, max_batch=2)
+
+    results = _submit_all(committer, [1, 2, 3, 4, 5])
+
+    assert results == {1: 10, 2: 20, 3: 30, 4: 40, 5: 50}
+    assert mock_db.session.begin.call_count >= 3
+
+
+@patch("webapp.services.orders.group_commit.db")
+def test_group_commit_failed_commit_is_returned_to_everyone(mock_db):
+
+    mock_db.session.begin.return_value.__exit__.side_effect = RuntimeError("commit failed")
+    committer = GroupCommitter(_apply, window_ms=0, max_batch=10)
+
+    with pytest.raises(RuntimeError):
+        committer.submit(1)
+
+    assert committer._leader is None         # leadership released, next call is not blocked
+
+
+@patch("webapp.services.orders.group_commit.db")
+def test_group_commit_database_error_fails_whole_batch(mock_db):
+
+    def apply(item: int) -> int:
+        if item == 2:
+            raise OperationalError("UPDATE storage", {}, Exception("Deadlock found when trying to get lock"))
+        return _apply(item)
+
+    committer = GroupCommitter(apply, window_ms=2000, max_batch=3)
+
+    results = _submit_all(committer, [1, 2, 3])
+
+    assert all(isinstance(results[item], OperationalError) for item in (1, 2, 3))     # none of them was saved
+
+
+@patch("webapp.services.orders.group_commit.db")
+def test_group_commit_prepare_gets_whole_batch(mock_db):
+
+    prepared: list[list[int]] = []
+    committer = GroupCommitter(_apply, window_ms=2000, max_batch=3, prepare=prepared.append)
+
+    results = _submit_all(committer, [1, 2, 3])
+
+    assert results == {1: 10, 2: 20, 3: 30}
+    assert [sorted(items) for items in prepared] == [[1, 2, 3]]
+
+
+def test_group_commit_wrong_max_batch():
+
+    with pytest.raises(ValueError):
+        GroupCommitter(_apply, max_batch=0)
+
+
+@patch("webapp.services.orders.group_commit.db")
+@patch("webapp.services.orders.service.db")
+def test_add_order_with_details_group_commit(mock_service_db, mock_db, mock_order_repo, mock_storage_repo,
+                                             mock_user_repo):
+
+    service = OrderService(mock_order_repo, mock_storage_repo, mock_user_repo, group_commit=True,
+                           group_commit_window_ms=0)
+    service.stock = MagicMock()
+    mock_order_repo.add.side_effect = lambda order: setattr(order, "id", 7) or order
+
+    dto = CreateOrderDTO(user_name="John", details=[CreateOrderDetailDTO(sku="SKU-1", qty=1)])
+    result = service.add_order_with_details(dto)
+
+    assert result == 'Order 7 created successfully with 1 products'
+    mock_db.session.begin.assert_called_once()              # transaction of the group, not of the service
+    mock_service_db.session.begin.assert_not_called()
+    service.stock.take.assert_called_once_with([("SKU-1", 1)])
+    mock_storage_repo.get_by_skus_for_update.assert_called_once_with({"SKU-1"})    # batch lock before the order
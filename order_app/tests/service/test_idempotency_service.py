@@ -0,0 +1,91 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+import pytest
+
+from webapp.database.models.idempotency_keys import IdempotencyKey
+from webapp.services.idempotency.service import IdempotencyService
+from webapp.services.exceptions import IdempotencyConflictException, IdempotencyKeyReusedException
+
+
+@pytest.fixture
+def mock_idempotency_repo():
+    return MagicMock()
+
+
+@pytest.fixture
+def idempotency_service(mock_idempotency_repo):
+    return IdempotencyService(mock_idempotency_repo, ttl_seconds=3600, lease_seconds=60, cache_size=2)
+
+
+def _stored_record(fingerprint: str = "abc", status_code: int | None = 201) -> IdempotencyKey:
+    return IdempotencyKey(
+        key="key-1",
+        fingerprint=fingerprint,
+        status_code=status_code,
+        response_body='{"message": "ok"}',
+        expires_at=datetime.now() + timedelta(days=2)
+    )
+
+
+def test_begin_reserves_new_key_for_lease(idempotency_service, mock_idempotency_repo):
+    mock_idempotency_repo.get.return_value = None
+    mock_idempotency_repo.reserve.return_value = True
+
+    assert idempotency_service.begin("key-1", "abc") is None
+
+    mock_idempotency_repo.reserve.assert_called_once()
+    _, _, expires_at, now = mock_idempotency_repo.reserve.call_args.args
+    assert expires_at - now == timedelta(seconds=60)
+
+
+def test_begin_returns_stored_response(idempotency_service, mock_idempotency_repo):
+    mock_idempotency_repo.get.return_value = _stored_record()
+
+    stored = idempotency_service.begin("key-1", "abc")
+
+    assert stored is not None
+    assert stored.status_code == 201
+    assert stored.body == '{"message": "ok"}'
+    mock_idempotency_repo.reserve.assert_not_called()
+
+
+def test_begin_error_different_request(idempotency_service, mock_idempotency_repo):
+    mock_idempotency_repo.get.return_value = _stored_record(fingerprint="other")
+
+    with pytest.raises(IdempotencyKeyReusedException):
+        idempotency_service.begin("key-1", "abc")
+
+
+def test_begin_error_in_progress(idempotency_service, mock_idempotency_repo):
+    mock_idempotency_repo.get.return_value = _stored_record(status_code=None)
+    mock_idempotency_repo.reserve.return_value = False
+
+    with pytest.raises(IdempotencyConflictException):
+        idempotency_service.begin("key-1", "abc")
+
+
+def test_complete_serves_next_begin_from_memory(idempotency_service, mock_idempotency_repo):
+    idempotency_service.complete("key-1", "abc", 201, '{"message": "ok"}')
+
+    stored = idempotency_service.begin("key-1", "abc")
+
+    assert stored is not None
+    assert stored.status_code == 201
+    mock_idempotency_repo.complete.assert_called_once_with("key-1", 201, '{"message": "ok"}', stored.expires_at)
+    mock_idempotency_repo.get.assert_not_called()
+
+
+def test_complete_extends_lease_to_ttl(idempotency_service, mock_idempotency_repo):
+    before = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    idempotency_service.complete("key-1", "abc", 201, "{}")
+
+    expires_at = mock_idempotency_repo.complete.call_args.args[3]
+    assert expires_at >= before + timedelta(seconds=3600)
+
+
+def test_cache_is_bounded(idempotency_service):
+    for i in range(5):
+        idempotency_service.complete(f"key-{i}", "abc", 201, "{}")
+
+    assert len(idempotency_service.cache) == 2
@@ -0,0 +1,142 @@
+import bisect
+import random
+from collections import namedtuple
+from decimal import Decimal
+from unittest.mock import MagicMock
+import pytest
+
+from webapp.core.order_statistic_tree import OrderStatisticTree
+from webapp.services.exceptions import ValidationException, NotFoundException
+from webapp.services.statistics.order_index import OrderStatisticsIndex
+from webapp.services.statistics.service import StatisticsService
+
+
+OrderValueRow = namedtuple("OrderValueRow", "order_id value lines_qty")
+
+
+def test_order_statistic_tree_against_sorted_list():
+    rnd = random.Random(7)
+    keys = set(rnd.sample(range(10_000), 500))
+    tree = OrderStatisticTree(keys, seed=1)
+    expected = sorted(keys)
+
+    for _ in range(3000):
+        key = rnd.randrange(10_000)
+        if rnd.random() < 0.5 and key not in keys:
+            keys.add(key)
+            bisect.insort(expected, key)
+            tree.insert(key)
+        elif expected:
+            key = rnd.choice(expected)
+            keys.remove(key)
+            expected.remove(key)
+            assert tree.remove(key)
+
+        i = rnd.randrange(len(expected))
+        assert tree.kth(i) == expected[i]
+        assert tree.rank(key) == bisect.bisect_left(expected, key)
+
+    assert len(tree) == len(expected)
+    assert not tree.remove(-1)
+
+
+def test_order_statistic_tree_kth_out_of_range():
+    tree = OrderStatisticTree([1, 2, 3])
+
+    with pytest.raises(IndexError):
+        tree.kth(3)
+
+
+@pytest.fixture
+def mock_statistics_repo():
+    repo = MagicMock()
+    repo.get_order_values.return_value = [
+        OrderValueRow(1, Decimal("100.00"), 2),
+        OrderValueRow(2, Decimal("20.00"), 1),
+        OrderValueRow(3, Decimal("100.00"), 3),
+        OrderValueRow(4, 55.5, 1),                  # SQLite returns float
+    ]
+    return repo
+
+
+@pytest.fixture
+def order_index(mock_statistics_repo):
+    return OrderStatisticsIndex(mock_statistics_repo, max_age_seconds=0)
+
+
+def test_order_index_kth_and_rank(order_index, mock_statistics_repo):
+
+    assert order_index.kth("value", 1).order_id == 2
+    assert order_index.kth("value", 2).value == Decimal("55.50")
+    assert order_index.rank("value", 3).rank == 3         # equal values share the rank
+    assert order_index.rank("lines", 3).rank == 4
+    assert order_index.rank("value", 99) is None
+
+    mock_statistics_repo.get_order_values.assert_called_once_with()     # loaded once, then only in memory
+
+
+def test_order_index_refresh_and_remove(order_index, mock_statistics_repo):
+    len(order_index)                                        # load
+    mock_statistics_repo.get_order_values.return_value = [OrderValueRow(2, Decimal("500.00"), 4)]
+
+    order_index.refresh([2, 5])                             # order 5 is gone from the database
+    order_index.remove([1])
+
+    mock_statistics_repo.get_order_values.assert_called_with([2, 5])
+    assert len(order_index) == 3
+    assert order_index.kth("value", 3).order_id == 2
+    assert order_index.rank("lines", 2).total == 3
+
+
+def test_order_index_kth_checked_against_current_size(order_index):
+    assert order_index.kth("value", 4).order_id == 3
+
+    order_index.remove([3])                                 # another request deleted an order
+
+    with pytest.raises(ValidationException):
+        order_index.kth("value", 4)
+    assert order_index.percentile("value", 100).order_id == 1
+
+
+def test_order_index_refresh_before_load_does_nothing(order_index, mock_statistics_repo):
+
+    order_index.refresh([1])
+
+    mock_statistics_repo.get_order_values.assert_not_called()
+
+
+def test_statistics_service_order_percentile(order_index, mock_statistics_repo):
+    service = StatisticsService(mock_statistics_repo, order_index)
+
+    assert service.get_order_percentile("value", 50).order_id == 4     # median of 20, 55.5, 100, 100
+    assert service.get_order_percentile("value", 0).order_id == 2
+    assert service.get_order_percentile("lines", 100).order_id == 3
+    assert service.get_kth_order("lines", 4).value == 3
+
+
+@pytest.mark.parametrize(
+    "call",
+    [
+        lambda s: s.get_kth_order("value", 0),
+        lambda s: s.get_kth_order("value", 5),
+        lambda s: s.get_kth_order("price", 1),
+        lambda s: s.get_order_percentile("value", 101),
+        lambda s: s.get_order_rank("qty", 1),
+    ]
+)
+def test_statistics_service_order_ranking_error_validation(order_index, mock_statistics_repo, call):
+    service = StatisticsService(mock_statistics_repo, order_index)
+
+    with pytest.raises(ValidationException):
+        call(service)
+
+
+def test_statistics_service_order_ranking_error_no_orders(mock_statistics_repo):
+    mock_statistics_repo.get_order_values.return_value = []
+    service = StatisticsService(mock_statistics_repo, OrderStatisticsIndex(mock_statistics_repo))
+
+    with pytest.raises(NotFoundException):
+        service.get_order_percentile("value", 50)
+
+    with pytest.raises(NotFoundException):
+        service.get_order_rank("value", 1)
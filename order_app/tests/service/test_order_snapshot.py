@@ -0,0 +1,155 @@
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta
+from decimal import Decimal
+import pytest
+
+from webapp.services.exceptions import NotFoundException, ValidationException
+from webapp.services.statistics.snapshot import OrderSnapshot
+
+
+START = datetime(2026, 10, 18, 12, 0, 0)
+PRICES = {"SKU-1": Decimal("5.00"), "SKU-2": Decimal("19.99"), "SKU-3": Decimal("120.50")}
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = START
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def seconds(self, n: int) -> None:
+        self.now += timedelta(seconds=n)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+# (created, order_id, user_id, sku, qty)
+@pytest.fixture
+def lines():
+    rnd = random.Random(7)
+    lines = []
+    for order_id in range(1, 301):
+        created = START - timedelta(minutes=rnd.randrange(600))
+        user_id = rnd.randrange(1, 4)
+        for sku in rnd.sample(sorted(PRICES), rnd.randrange(1, 4)):
+            lines.append((created, order_id, user_id, sku, rnd.randrange(1, 20)))
+    return lines
+
+
+# stream_line_chunks answers from the lines like the database would
+@pytest.fixture
+def repo(mock_statistics_repo, lines):
+    def stream_line_chunks(since, until, chunk_size):
+        rows = [line[1:] for line in lines if (since is None or line[0] >= since) and line[0] < until]
+        return [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+
+    mock_statistics_repo.stream_line_chunks.side_effect = stream_line_chunks
+    mock_statistics_repo.get_prices.return_value = list(PRICES.items())
+    mock_statistics_repo.get_usernames.return_value = [(1, "ann"), (2, "bob"), (3, "cid")]
+    return mock_statistics_repo
+
+
+def loaded_between(repo) -> list[tuple[datetime | None, datetime]]:
+    return [c.args[:2] for c in repo.stream_line_chunks.call_args_list]
+
+
+@pytest.fixture
+def snapshot(repo, clock):
+    return OrderSnapshot(repo, max_age_seconds=30, full_reload_seconds=3600, lag_seconds=5, chunk_size=64, clock=clock)
+
+
+def test_price_bands_match_python_sums(snapshot, lines):
+    bands = snapshot.get_price_bands([Decimal("10"), Decimal("100")])
+
+    expected = defaultdict(lambda: [0, 0, Decimal(0)])
+    for _, _, _, sku, qty in lines:
+        band = 0 if PRICES[sku] < 10 else 1 if PRICES[sku] < 100 else 2
+        expected[band][0] += 1
+        expected[band][1] += qty
+        expected[band][2] += qty * PRICES[sku]
+    assert [(b.low, b.high) for b in bands] == [(None, Decimal("10")), (Decimal("10"), Decimal("100")), (Decimal("100"), None)]
+    assert [[b.lines, b.units, b.revenue] for b in bands] == [expected[i] for i in range(3)]
+
+
+def test_sku_user_matrix(snapshot, lines):
+    matrix = snapshot.get_sku_user_matrix(["SKU-3", "SKU-9", "SKU-1"], ["cid", "ann"])
+
+    units = defaultdict(int)
+    for _, _, user_id, sku, qty in lines:
+        units[(sku, user_id)] += qty
+    assert matrix.skus == ["SKU-3", "SKU-1"]                     # unknown SKU left out
+    assert matrix.users == ["cid", "ann"]
+    assert matrix.units == [[units[("SKU-3", 3)], units[("SKU-3", 1)]], [units[("SKU-1", 3)], units[("SKU-1", 1)]]]
+
+    top = snapshot.get_sku_user_matrix(limit=2)
+    by_sku, by_user = defaultdict(int), defaultdict(int)
+    for _, _, user_id, sku, qty in lines:
+        by_sku[sku] += qty
+        by_user[user_id] += qty
+    top_users = sorted(by_user, key=lambda u: -by_user[u])[:2]
+    assert top.skus == sorted(by_sku, key=lambda s: -by_sku[s])[:2]
+    assert top.users == [{1: "ann", 2: "bob", 3: "cid"}[u] for u in top_users]
+    assert top.units == [[units[(sku, u)] for u in top_users] for sku in top.skus]
+
+
+def test_order_value_distribution(snapshot, lines):
+    values = defaultdict(Decimal)
+    for _, order_id, _, sku, qty in lines:
+        values[order_id] += qty * PRICES[sku]
+
+    histogram = snapshot.get_distribution("order_value", bins=4)
+
+    assert sum(histogram.counts) == len(values)
+    assert histogram.edges[0] == pytest.approx(float(min(values.values())))
+    assert histogram.edges[-1] == pytest.approx(float(max(values.values())))
+
+
+def test_incremental_refresh_by_watermark(snapshot, repo, lines, clock):
+    assert snapshot.get_info().lines == len(lines)
+    assert loaded_between(repo) == [(None, START - timedelta(seconds=5))]
+
+    lines.append((START - timedelta(seconds=2), 301, 1, "SKU-1", 4))      # still inside the lag
+    clock.seconds(10)
+    assert snapshot.get_info().lines == len(lines) - 1                     # younger than max age - not refreshed
+    clock.seconds(30)
+    info = snapshot.get_info()
+
+    assert info.lines == len(lines)
+    assert info.as_of == START + timedelta(seconds=35)
+    assert loaded_between(repo)[-1] == (START - timedelta(seconds=5), START + timedelta(seconds=35))
+
+
+def test_full_reload_sees_deleted_lines(snapshot, repo, lines, clock):
+    snapshot.get_info()
+    del lines[:10]
+    clock.seconds(3601)
+
+    assert snapshot.get_info().lines == len(lines)
+    assert loaded_between(repo)[-1][0] is None
+
+
+@pytest.mark.parametrize(
+    "call",
+    [
+        lambda s: s.get_price_bands([]),
+        lambda s: s.get_price_bands([Decimal("10"), Decimal("10")]),
+        lambda s: s.get_price_bands([Decimal("Infinity")]),
+        lambda s: s.get_sku_user_matrix(limit=0),
+        lambda s: s.get_distribution("price"),
+        lambda s: s.get_distribution("qty", bins=0),
+    ]
+)
+def test_snapshot_validation(snapshot, call):
+    with pytest.raises(ValidationException):
+        call(snapshot)
+
+
+def test_distribution_of_empty_snapshot(repo, lines, clock):
+    lines.clear()
+    with pytest.raises(NotFoundException):
+        OrderSnapshot(repo, clock=clock).get_distribution("qty")
@@ -1,7 +1,10 @@
+from datetime import datetime
+from decimal import Decimal
 from unittest.mock import patch, MagicMock
 import pytest
 
 from webapp.database.models.orders import Order
+from webapp.database.models.sales_rollups import HourlySales
 from webapp.database.models.order_details import OrderDetail
 from webapp.database.models.storage import Storage
 from webapp.database.models.users import User
@@ -12,8 +15,12 @@ from webapp.services.orders.mappers import read_dto_order_details_to_order_detai
 
 from webapp.services.orders.service import OrderService
 from webapp.services.exceptions import NotFoundException, ProductAlreadyExistsException, NotEnoughStockException, \
-    ServiceException
+    ServiceException, ValidationException
 from webapp.services.orders.dtos import CreateOrderDTO, ReadOrderDTO, CreateOrderDetailDTO, DeleteProductsInOrderDTO
+from webapp.services.statistics.sales import SalesRollupService
+
+
+NOW = datetime(2026, 10, 18, 14, 25, 7)                 # UTC clock of the app
 
 
 def test_get_all_orders_with_details(mock_order_service, mock_order_repo, fake_orders_with_details):
@@ -22,9 +29,59 @@ def test_get_all_orders_with_details(mock_order_service, mock_order_repo, fake_o
 
     result = mock_order_service.get_all_orders_with_details()
 
-    assert len(result) == 2
-    assert len(result[0].details) == 3
+    mock_order_repo.get_all_total_orders.assert_called_once_with(
+        51, None, sort="id", descending=True, min_value=None, max_value=None
+    )
+
+    assert len(result.items) == 2
+    assert len(result.items[0].details) == 3
+    assert result.next_cursor is None
+
+
+def test_get_all_orders_with_details_next_cursor(mock_order_service, mock_order_repo, fake_orders_with_details):
+
+    mock_order_repo.get_all_total_orders.return_value = fake_orders_with_details
+
+    result = mock_order_service.get_all_orders_with_details(limit=1, after=5)
+
+    mock_order_repo.get_all_total_orders.assert_called_once_with(
+        2, 5, sort="id", descending=True, min_value=None, max_value=None
+    )
+
+    assert len(result.items) == 1
+    assert result.items[0].id == 1
+    assert result.next_cursor == 1
+
+
+@pytest.mark.parametrize(
+    "limit, after",
+    [(0, None), (-1, None), (501, None), (10, 0), (10, -3)]
+)
+def test_get_all_orders_with_details_error_wrong_page(mock_order_service, mock_order_repo, limit, after):
+
+    with pytest.raises(ServiceException):
+        mock_order_service.get_all_orders_with_details(limit=limit, after=after)
+
+    mock_order_repo.get_all_total_orders.assert_not_called()
+
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"sort": "price"},
+        {"direction": "up"},
+        {"min_value": Decimal("20"), "max_value": Decimal("10")},
+        {"sort": "total_value", "after": 99},
+    ]
+)
+def test_get_all_orders_with_details_error_wrong_listing(mock_order_service, mock_order_repo, kwargs):
+    mock_order_repo.get.return_value = None
+
+    with pytest.raises(ValidationException):
+        mock_order_service.get_all_orders_with_details(**kwargs)
 
+    mock_order_repo.get_all_total_orders.assert_not_called()
 
 
 def test_mapper_read_dto_order_details_to_order_details():
@@ -71,13 +128,13 @@ def test_get_all_orders_by_user_name_success(mock_order_service, mock_order_repo
 
 
     mock_user_repo.get_by_username.assert_called_once_with("John Test 1")
-    mock_order_repo.get_total_orders_by_user_name.assert_called_once_with("John Test 1")
+    mock_order_repo.get_total_orders_by_user_name.assert_called_once_with("John Test 1", 51, None)
 
-    assert len(result) == 2
-    assert result[0].user_name == "John Test 1"
-    assert result[1].user_name == "John Test 1"
-    assert len(result[0].details) == 3
-    assert len(result[1].details) == 3
+    assert len(result.items) == 2
+    assert result.items[0].user_name == "John Test 1"
+    assert result.items[1].user_name == "John Test 1"
+    assert len(result.items[0].details) == 3
+    assert len(result.items[1].details) == 3
 
 
 
@@ -119,7 +176,7 @@ def test_add_order_with_details_success(
 
     # Mock Storage
     storage_obj = Storage(sku="SKU-1", qty=100)
-    mock_storage_repo.get_by_sku_for_update.return_value = storage_obj     # if None gives error
+    mock_storage_repo.get_by_skus_for_update.return_value = [storage_obj]    # if empty gives error
 
 
     result = mock_order_service.add_order_with_details(dto)
@@ -129,7 +186,7 @@ def test_add_order_with_details_success(
 
     mock_user_repo.get_by_username.assert_called_once_with("John Test 1")
     mock_order_repo.add.assert_called_once()
-    mock_storage_repo.get_by_sku_for_update.assert_called_once_with("SKU-1")
+    mock_storage_repo.get_by_skus_for_update.assert_called_once_with(["SKU-1"])
 
     assert result == "Order 1 created successfully with 1 products"
 
@@ -163,6 +220,24 @@ def test_add_order_with_details_error_no_user(
     mock_user_repo.get_by_username.assert_called_once_with("John Test 1")
 
 
+# a cached id may belong to a user deleted by another worker - the order transaction reads the user itself
+@patch("webapp.services.orders.service.db")
+def test_add_order_with_details_user_not_from_cache(mock_db, mock_order_repo, mock_storage_repo, mock_user_repo):
+    user_cache = MagicMock()
+    user_cache.get.return_value = 1
+    service = OrderService(
+        order_repo=mock_order_repo, storage_repo=mock_storage_repo, user_repo=mock_user_repo, user_cache=user_cache
+    )
+    mock_user_repo.get_by_username.return_value = None
+    dto = CreateOrderDTO(user_name="John Test 1", details=[CreateOrderDetailDTO("SKU-1", qty=1)])
+
+    with pytest.raises(NotFoundException):
+        service.add_order_with_details(dto)
+
+    user_cache.get.assert_not_called()
+    mock_order_repo.add.assert_not_called()
+
+
 
 
 @pytest.mark.parametrize(
@@ -211,6 +286,200 @@ def test_add_order_with_details_error_no_sku(
 
 
 
+@patch("webapp.services.orders.service.db")
+def test_add_order_with_details_error_reports_all_stock_problems(
+        mock_db,
+        mock_order_service,
+        mock_order_repo,
+        mock_user_repo,
+        mock_storage_repo
+    ):
+
+    mock_db.session.begin.return_value.__enter__.return_value = None
+
+    dto = CreateOrderDTO(user_name="John Test 1", details=[
+        CreateOrderDetailDTO("SKU-2", qty=50),
+        CreateOrderDetailDTO("SKU-9", qty=1),
+        CreateOrderDetailDTO("SKU-1", qty=5),
+        CreateOrderDetailDTO("SKU-3", qty=40),
+    ])
+
+    mock_user_repo.get_by_username.return_value = User(id=1, username="John Test 1")
+    stock = [Storage(sku="SKU-1", qty=10), Storage(sku="SKU-2", qty=20), Storage(sku="SKU-3", qty=30)]
+    mock_storage_repo.get_by_skus_for_update.return_value = stock
+
+    with pytest.raises(NotEnoughStockException) as exc:
+        mock_order_service.add_order_with_details(dto)
+
+    mock_storage_repo.get_by_skus_for_update.assert_called_once_with(["SKU-2", "SKU-9", "SKU-1", "SKU-3"])
+    mock_order_repo.add.assert_not_called()                     # nothing applied when any line fails
+
+    assert "SKU-9" in str(exc.value)
+    assert "SKU-2" in str(exc.value)
+    assert "SKU-3" in str(exc.value)
+    assert "SKU-1" not in str(exc.value)
+    assert [s.qty for s in stock] == [10, 20, 30]
+
+
+
+@patch("webapp.services.orders.service.db")
+def test_add_order_with_details_error_duplicated_sku(
+        mock_db,
+        mock_order_service,
+        mock_order_repo,
+        mock_user_repo,
+        mock_storage_repo
+    ):
+
+    dto = CreateOrderDTO(user_name="John Test 1", details=[
+        CreateOrderDetailDTO("SKU-1", qty=1),
+        CreateOrderDetailDTO("SKU-1", qty=2),
+    ])
+
+    with pytest.raises(ProductAlreadyExistsException):
+        mock_order_service.add_order_with_details(dto)
+
+    mock_storage_repo.get_by_skus_for_update.assert_not_called()
+
+
+
+
+@patch("webapp.services.orders.service.db")
+def test_add_order_with_details_conditional_stock_success(
+        mock_db,
+        mock_order_repo,
+        mock_user_repo,
+        mock_storage_repo
+    ):
+
+    service = OrderService(mock_order_repo, mock_storage_repo, mock_user_repo, stock_strategy="conditional")
+
+    dto = CreateOrderDTO(user_name="John Test 1", details=[
+        CreateOrderDetailDTO("SKU-2", qty=5),
+        CreateOrderDetailDTO("SKU-1", qty=1),
+    ])
+
+    mock_user_repo.get_by_username.return_value = User(id=1, username="John Test 1")
+    mock_order_repo.add.return_value = Order(id=1, user_id=1, order_details=[])
+    mock_storage_repo.decrement_qty_if_available.return_value = True
+
+    result = service.add_order_with_details(dto)
+
+    assert result == "Order 1 created successfully with 2 products"
+    assert [c.args for c in mock_storage_repo.decrement_qty_if_available.call_args_list] == [("SKU-1", 1), ("SKU-2", 5)]
+    mock_storage_repo.get_by_skus_for_update.assert_not_called()
+
+
+
+@patch("webapp.services.orders.service.db")
+def test_add_order_with_details_conditional_stock_error(
+        mock_db,
+        mock_order_repo,
+        mock_user_repo,
+        mock_storage_repo
+    ):
+
+    service = OrderService(mock_order_repo, mock_storage_repo, mock_user_repo, stock_strategy="conditional")
+
+    dto = CreateOrderDTO(user_name="John Test 1", details=[
+        CreateOrderDetailDTO("SKU-1", qty=5),
+        CreateOrderDetailDTO("SKU-2", qty=50),
+        CreateOrderDetailDTO("SKU-9", qty=1),
+    ])
+
+    mock_user_repo.get_by_username.return_value = User(id=1, username="John Test 1")
+    mock_storage_repo.decrement_qty_if_available.side_effect = lambda sku, qty: sku == "SKU-1"
+    mock_storage_repo.get_by_skus.return_value = [Storage(sku="SKU-2", qty=20)]
+
+    with pytest.raises(NotEnoughStockException) as exc:
+        service.add_order_with_details(dto)
+
+    mock_storage_repo.get_by_skus.assert_called_once_with(["SKU-2", "SKU-9"])
+    assert "SKU-2" in str(exc.value)
+    assert "SKU-9" in str(exc.value)
+
+
+
+@patch("webapp.services.orders.service.db")
+def test_add_order_with_details_conditional_stock_error_when_read_shows_enough(
+        mock_db,
+        mock_order_repo,
+        mock_user_repo,
+        mock_storage_repo
+    ):
+
+    service = OrderService(mock_order_repo, mock_storage_repo, mock_user_repo, stock_strategy="conditional")
+
+    dto = CreateOrderDTO(user_name="John Test 1", details=[CreateOrderDetailDTO("SKU-1", qty=5)])
+
+    mock_user_repo.get_by_username.return_value = User(id=1, username="John Test 1")
+    mock_storage_repo.decrement_qty_if_available.return_value = False
+    mock_storage_repo.get_by_skus.return_value = [Storage(sku="SKU-1", qty=20)]        # older snapshot
+
+    with pytest.raises(NotEnoughStockException) as exc:
+        service.add_order_with_details(dto)
+
+    assert "SKU-1" in str(exc.value)
+    mock_order_repo.add.assert_not_called()
+
+
+
+
+@pytest.mark.parametrize(
+    "all_or_nothing, expected_created",
+    [
+        (True, [False, False, False]),
+        (False, [True, False, False]),
+    ]
+)
+@patch("webapp.services.orders.service.utc_now", return_value=NOW)
+@patch("webapp.services.orders.service.db")
+def test_add_orders_bulk(
+        mock_db,
+        mock_utc_now,
+        mock_order_service,
+        mock_order_repo,
+        mock_user_repo,
+        mock_storage_repo,
+        all_or_nothing,
+        expected_created
+    ):
+
+    dtos = [
+        CreateOrderDTO(user_name="John Test 1", details=[CreateOrderDetailDTO("SKU-1", qty=8)]),
+        CreateOrderDTO(user_name="John Test 1", details=[CreateOrderDetailDTO("SKU-1", qty=8)]),
+        CreateOrderDTO(user_name="John Test 9", details=[CreateOrderDetailDTO("SKU-1", qty=1)]),
+    ]
+
+    mock_user_repo.get_ids_by_usernames.return_value = {"John Test 1": 1}
+    storage_obj = Storage(sku="SKU-1", qty=10)
+    mock_storage_repo.get_by_skus_for_update.return_value = [storage_obj]
+
+    def add_all(orders):
+        for order_id, order in enumerate(orders, start=1):
+            order.id = order_id                                 # flush() simulation
+
+    mock_order_repo.add_all.side_effect = add_all
+
+    result = mock_order_service.add_orders_bulk(dtos, all_or_nothing=all_or_nothing)
+
+    mock_storage_repo.get_by_skus_for_update.assert_called_once_with({"SKU-1"})
+    assert [r.order_id is not None for r in result] == expected_created
+    assert "SKU-1" in result[1].error
+    assert "John Test 9" in result[2].error
+
+    if all_or_nothing:
+        mock_order_repo.add_details_bulk.assert_not_called()
+        assert storage_obj.qty == 10
+    else:
+        mock_order_repo.add_details_bulk.assert_called_once_with(
+            [{"order_id": 1, "product_sku": "SKU-1", "qty": 8, "created": NOW}]
+        )
+        assert storage_obj.qty == 2
+
+
+
+
 @patch("webapp.services.orders.service.db")
 def test_add_product_to_order_success(
         mock_db,
@@ -227,7 +496,7 @@ def test_add_product_to_order_success(
     mock_order_repo.get.return_value = order_obj
 
     storage_obj = Storage(sku="SKU-2", qty=100)
-    mock_storage_repo.get_by_sku_for_update.return_value = storage_obj
+    mock_storage_repo.get_by_skus_for_update.return_value = [storage_obj]
 
     result = mock_order_service.add_product_to_order(1, dto_details)
 
@@ -254,7 +523,7 @@ def test_add_product_to_order_error_no_order(
     with pytest.raises(ServiceException):
         mock_order_service.add_product_to_order(1, dto_details)
 
-    mock_order_repo.get.assert_called_once_with(1)
+    mock_order_repo.get.assert_called_once_with(1, profile="with_details")
 
 
 
@@ -276,7 +545,7 @@ def test_add_product_to_order_error_product_already_exists_in_order(
     with pytest.raises(ProductAlreadyExistsException):
         mock_order_service.add_product_to_order(1, dto_details)
 
-    mock_order_repo.get.assert_called_once_with(1)
+    mock_order_repo.get.assert_called_once_with(1, profile="with_details")
 
 
 @patch("webapp.services.orders.service.db")
@@ -294,12 +563,12 @@ def test_add_product_to_order_error_no_product_in_storage(
 
     mock_order_repo.get.return_value = order_obj
 
-    mock_storage_repo.get_by_sku_for_update.return_value = None
+    mock_storage_repo.get_by_skus_for_update.return_value = []
 
     with pytest.raises(NotFoundException):
         mock_order_service.add_product_to_order(1, dto_details)
 
-    mock_order_repo.get.assert_called_once_with(1)
+    mock_order_repo.get.assert_called_once_with(1, profile="with_details")
 
 
 
@@ -319,12 +588,12 @@ def test_add_product_to_order_error_not_enough_qty_in_storage(
     mock_order_repo.get.return_value = order_obj
 
     storage_obj = Storage(sku="SKU-2", qty=1)
-    mock_storage_repo.get_by_sku_for_update.return_value = storage_obj
+    mock_storage_repo.get_by_skus_for_update.return_value = [storage_obj]
 
     with pytest.raises(NotEnoughStockException):
         mock_order_service.add_product_to_order(1, dto_details)
 
-    mock_order_repo.get.assert_called_once_with(1)
+    mock_order_repo.get.assert_called_once_with(1, profile="with_details")
 
 
 
@@ -347,6 +616,63 @@ def test_delete_order_with_details_success(
 
 
 
+@patch("webapp.services.orders.service.db")
+def test_delete_order_with_details_takes_lines_back_from_top_skus(
+        mock_db,
+        mock_order_repo,
+        mock_user_repo,
+        mock_storage_repo
+    ):
+
+    top_skus = MagicMock()
+    service = OrderService(mock_order_repo, mock_storage_repo, mock_user_repo, top_skus=top_skus)
+    created = datetime(2025, 1, 2, 12, 0)
+    mock_order_repo.get_order_lines.return_value = [("SKU-1", 5, created), ("SKU-2", 2, created)]
+
+    service.delete_order_with_details(1)
+
+    mock_order_repo.get_order_lines.assert_called_once_with(1)
+    assert [c.args for c in top_skus.remove.call_args_list] == [("SKU-1", 5, created), ("SKU-2", 2, created)]
+
+
+
+# the database clock is two hours ahead of UTC (MySQL in Europe/Warsaw): the line is written with the UTC clock of
+# the app and its rollup bucket comes from the same value, so removing it takes it back from the same bucket
+@patch("webapp.services.orders.service.utc_now", return_value=NOW)
+@patch("webapp.services.orders.service.db")
+def test_sales_rollups_use_created_of_the_line(
+        mock_db,
+        mock_utc_now,
+        mock_order_repo,
+        mock_user_repo,
+        mock_storage_repo,
+        mock_product_repo
+    ):
+
+    rollup_repo = MagicMock()
+    mock_product_repo.get_prices.return_value = {"SKU-1": Decimal("10.00")}
+    sales_rollups = SalesRollupService(rollup_repo, mock_product_repo, clock=lambda: datetime(2026, 10, 18, 16, 25))
+    service = OrderService(mock_order_repo, mock_storage_repo, mock_user_repo, sales_rollups=sales_rollups)
+
+    mock_user_repo.get_by_username.return_value = User(id=1, username="John Test 1")
+    order_obj = Order(id=1, user_id=1, order_details=[])
+    mock_order_repo.add.return_value = order_obj
+    mock_storage_repo.get_by_skus_for_update.return_value = [Storage(sku="SKU-1", qty=100)]
+
+    service.add_order_with_details(CreateOrderDTO(user_name="John Test 1", details=[CreateOrderDetailDTO("SKU-1", 3)]))
+    [detail] = order_obj.order_details
+    mock_order_repo.get_order_lines.return_value = [(detail.product_sku, detail.qty, detail.created)]
+    service.delete_order_with_details(1)
+
+    assert detail.created == NOW
+    added, removed = [c.args[1] for c in rollup_repo.increment.call_args_list if c.args[0] is HourlySales]
+    assert added == [{"bucket": datetime(2026, 10, 18, 14), "sku": "SKU-1", "units": 3, "revenue": Decimal("30.00")}]
+    assert removed == [
+        {"bucket": datetime(2026, 10, 18, 14), "sku": "SKU-1", "units": -3, "revenue": Decimal("-30.00")}
+    ]
+
+
+
 @patch("webapp.services.orders.service.db")
 def test_delete_product_in_order_success(
         mock_db,
@@ -395,7 +721,7 @@ def test_delete_product_in_order_error_no_order(
     with pytest.raises(NotFoundException):
         mock_order_service.delete_product_in_order(dto)
 
-    mock_order_repo.get.assert_called_once_with(1)
+    mock_order_repo.get.assert_called_once_with(1, profile="with_details")
 
 
 
@@ -421,7 +747,7 @@ def test_delete_product_in_order_error_no_product_in_order(
     with pytest.raises(NotFoundException):
         mock_order_service.delete_product_in_order(dto)
 
-    mock_order_repo.get.assert_called_once_with(1)
+    mock_order_repo.get.assert_called_once_with(1, profile="with_details")
 
 
 
@@ -450,5 +776,47 @@ def test_delete_product_in_order_error_no_product_in_storage(
     with pytest.raises(NotFoundException):
         mock_order_service.delete_product_in_order(dto)
 
-    mock_order_repo.get.assert_called_once_with(1)
-    mock_storage_repo.get_by_sku_for_update.assert_called_once_with("SKU-1")
\ No newline at end of file
+    mock_order_repo.get.assert_called_once_with(1, profile="with_details")
+    mock_storage_repo.get_by_sku_for_update.assert_called_once_with("SKU-1")
+
+
+
+@patch("webapp.services.orders.service.db")
+def test_delete_product_in_order_conditional_stock(
+        mock_db,
+        mock_order_repo,
+        mock_user_repo,
+        mock_storage_repo,
+    ):
+
+    service = OrderService(mock_order_repo, mock_storage_repo, mock_user_repo, stock_strategy="conditional")
+
+    order_obj = Order(id=1, user_id=1, order_details=[OrderDetail(product_sku="SKU-1", qty=10)])
+    mock_order_repo.get.return_value = order_obj
+    mock_storage_repo.increment_qty.return_value = True
+
+    result = service.delete_product_in_order(DeleteProductsInOrderDTO(order_id=1, product_sku="SKU-1"))
+
+    assert result == 'Product SKU-1 deleted from order 1'
+    mock_storage_repo.increment_qty.assert_called_once_with("SKU-1", 10)
+    mock_storage_repo.get_by_sku_for_update.assert_not_called()
+
+
+def test_stream_orders_with_details(mock_order_service, mock_order_repo):
+    from collections import namedtuple
+    OrderRow = namedtuple("OrderRow", "id username product_sku qty total_qty line_count total_value")
+
+    mock_order_repo.stream_order_rows.return_value = iter([
+        OrderRow(1, "John", "SKU-1", 10, 30, 2, Decimal("500.00")),
+        OrderRow(1, "John", "SKU-2", 20, 30, 2, Decimal("500.00")),
+        OrderRow(2, "Anna", None, None, 0, 0, Decimal("0.00")),
+    ])
+
+    result = list(mock_order_service.stream_orders_with_details(chunk_size=10))
+
+    mock_order_repo.stream_order_rows.assert_called_once_with(10)
+    assert [o.id for o in result] == [1, 2]
+    assert [d.sku for d in result[0].details] == ["SKU-1", "SKU-2"]
+    assert (result[0].total_qty, result[0].line_count, result[0].total_value) == (30, 2, Decimal("500.00"))
+    assert result[1].user_name == "Anna"
+    assert result[1].details == []
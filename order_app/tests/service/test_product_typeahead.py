@@ -0,0 +1,114 @@
+import random
+import re
+from unittest.mock import patch
+import pytest
+
+from webapp.core.prefix_index import PrefixIndex
+from webapp.services.exceptions import ValidationException
+from webapp.services.products.typeahead import ProductTypeahead
+
+
+@pytest.fixture
+def products() -> dict[str, str]:
+    return {
+        "SKU-1": "Blue Shirt",
+        "SKU-2": "Red Shirt",
+        "SKU-3": "Blue Jeans",
+        "AB-10": "Oak Table",
+        "SHI-1": "Shoe Polish",
+    }
+
+
+@pytest.fixture
+def repo(mock_product_repo, products):
+    mock_product_repo.stream_names.side_effect = lambda chunk_size=10_000: sorted(products.items())
+    return mock_product_repo
+
+
+def skus(suggestions) -> list[str]:
+    return [s.sku for s in suggestions]
+
+
+def test_prefix_index_scan():
+    index = PrefixIndex.from_pairs([("shirt", 1), ("shoe", 2), ("blue", 1), ("shirt", 0)])
+    index.add("shirts", 3)
+
+    assert list(index.scan("shi")) == [0, 1, 3]
+    assert list(index.scan("sh")) == [0, 1, 3, 2]
+    assert list(index.scan("x")) == []
+    assert len(index) == 5
+
+
+@patch("webapp.services.products.typeahead.db")
+def test_suggest_by_word_prefix(mock_db, repo):
+    typeahead = ProductTypeahead(repo)
+
+    assert skus(typeahead.suggest("blu")) == ["SKU-1", "SKU-3"]
+    assert skus(typeahead.suggest("blu sh")) == ["SKU-1"]
+    assert skus(typeahead.suggest("SHIRT")) == ["SKU-1", "SKU-2"]
+    assert typeahead.suggest("red")[0].name == "Red Shirt"
+    assert typeahead.suggest("green") == []
+
+
+@patch("webapp.services.products.typeahead.db")
+def test_suggest_sku_first(mock_db, repo):
+    typeahead = ProductTypeahead(repo)
+
+    assert skus(typeahead.suggest("shi")) == ["SHI-1", "SKU-1", "SKU-2"]      # SKU, then the words by word order
+    assert skus(typeahead.suggest("sku-")) == ["SKU-1", "SKU-2", "SKU-3"]
+    assert skus(typeahead.suggest("ab-1")) == ["AB-10"]
+
+
+@patch("webapp.services.products.typeahead.db")
+def test_suggest_limit_and_validation(mock_db, repo):
+    typeahead = ProductTypeahead(repo)
+
+    assert skus(typeahead.suggest("s", limit=2)) == ["SHI-1", "SKU-1"]
+    with pytest.raises(ValidationException):
+        typeahead.suggest("blue", limit=0)
+    with pytest.raises(ValidationException):
+        typeahead.suggest(" - ")
+
+
+@patch("webapp.services.products.typeahead.db")
+def test_loads_once_and_adds_new_products(mock_db, repo, products):
+    typeahead = ProductTypeahead(repo)
+    typeahead.add("SKU-9", "Green Shirt")           # before the first load - the load reads it from the database
+    products["SKU-9"] = "Green Shirt"
+
+    assert skus(typeahead.suggest("gre")) == ["SKU-9"]
+    typeahead.add("SKU-8", "Green Hat")
+    typeahead.add("SKU-8", "Green Hat")
+
+    assert skus(typeahead.suggest("green")) == ["SKU-9", "SKU-8"]      # same word - in the order of adding
+    repo.stream_names.assert_called_once()
+
+
+@patch("webapp.services.products.typeahead.db")
+def test_bounded_by_max_products(mock_db, repo):
+    typeahead = ProductTypeahead(repo, max_products=3)
+
+    assert typeahead.load() == 3
+    assert typeahead.truncated
+    typeahead.add("SKU-9", "Green Shirt")
+    assert typeahead.suggest("green") == []
+
+
+@patch("webapp.services.products.typeahead.db")
+def test_suggest_matches_a_scan_of_all_names(mock_db, mock_product_repo):
+    rnd = random.Random(7)
+    vocabulary = ["blue", "black", "blanket", "shirt", "shoe", "short", "oak", "table", "tab", "lamp"]
+    products = {f"P-{i}": " ".join(rnd.sample(vocabulary, rnd.randint(1, 3))) for i in range(300)}
+    mock_product_repo.stream_names.return_value = sorted(products.items())
+    typeahead = ProductTypeahead(mock_product_repo)
+
+    for text in ["b", "bl", "bla", "sh", "sho", "tab", "ta bl", "lamp sh", "p-1", "zzz"]:
+        words = text.split()
+        expected = {
+            sku for sku, name in products.items()
+            if all(any(w.startswith(q) for w in re.findall(r"\w+", name)) for q in words)
+            or (len(words) == 1 and sku.casefold().startswith(text))
+        }
+        found = skus(typeahead.suggest(text, limit=50))
+        assert len(found) == len(set(found)) == min(50, len(expected))
+        assert set(found) <= expected
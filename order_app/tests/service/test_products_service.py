@@ -5,7 +5,7 @@ import pytest
 from webapp.database.models.products import Product
 from webapp.database.repositories.products import ProductRepository
 from webapp.services.products.service import ProductService
-from webapp.services.exceptions import NotFoundException, ProductAlreadyExistsException
+from webapp.services.exceptions import NotFoundException, ProductAlreadyExistsException, ValidationException
 from webapp.services.products.dtos import CreateProductDTO
 
 
@@ -120,9 +120,32 @@ def test_get_by_part_name_success(
 
     result = mock_product_service.get_by_part_name(part_name)
 
+    mock_product_repo.get_by_part_name.assert_called_once_with(part_name, 51, 0)
     assert result is not None
-    assert len(result) == 3
-    assert all(r.sku in ["SKU-1", "SKU-2", "SKU-3"] for r in result)
+    assert len(result.items) == 3
+    assert all(r.sku in ["SKU-1", "SKU-2", "SKU-3"] for r in result.items)
+    assert result.next_cursor is None
+
+
+def test_get_by_part_name_next_page(
+        mock_product_service: ProductService,
+        mock_product_repo: MagicMock,
+        fake_products: list[Product]
+    ):
+
+    mock_product_repo.get_by_part_name.return_value = fake_products[1:]
+
+    result = mock_product_service.get_by_part_name("Product", limit=1, after=1)
+
+    mock_product_repo.get_by_part_name.assert_called_once_with("Product", 2, 1)
+    assert [r.sku for r in result.items] == ["SKU-2"]
+    assert result.next_cursor == 2
+
+
+@pytest.mark.parametrize("name, after", [("  ", None), ("Product", 1001)])
+def test_get_by_part_name_validation(mock_product_service: ProductService, name: str, after: int | None):
+    with pytest.raises(ValidationException):
+        mock_product_service.get_by_part_name(name, after=after)
 
 
 def test_get_by_part_name_error(
@@ -178,4 +201,16 @@ def test_create_product_error(
     with pytest.raises(ProductAlreadyExistsException):
         mock_product_service.create_product(
             CreateProductDTO(sku="SKU-4", name="Test Product 4", price=Decimal(40.0))
-        )
\ No newline at end of file
+        )
+
+
+@patch("webapp.services.products.service.db")
+def test_create_product_adds_to_typeahead(mock_db, mock_product_repo: MagicMock):
+    mock_db.session.begin.return_value.__enter__.return_value = None
+    mock_product_repo.get_by_sku.return_value = None
+    typeahead = MagicMock()
+    service = ProductService(mock_product_repo, typeahead)
+
+    service.create_product(CreateProductDTO(sku="SKU-4", name="Test Product 4", price=Decimal(40.0)))
+
+    typeahead.add.assert_called_once_with("SKU-4", "Test Product 4")
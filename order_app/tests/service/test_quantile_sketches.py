@@ -0,0 +1,160 @@
+import bisect
+import json
+import random
+from collections import namedtuple
+from unittest.mock import patch, MagicMock
+import pytest
+from flask import Flask
+
+from webapp.core.kll import KLLSketch
+from webapp.database.models.quantile_sketches import QuantileSketch
+from webapp.services.exceptions import NotFoundException, ValidationException
+from webapp.services.statistics.quantiles import QuantileSketchService
+from webapp.services.statistics.sketch_flusher import SketchFlusher
+
+
+OrderRow = namedtuple("OrderRow", "id username product_sku qty")
+
+
+def _rank_error(sketch: KLLSketch, values: list[int], q: float) -> float:
+    ordered = sorted(values)
+    value = sketch.quantile(q)
+    assert value is not None
+    low = bisect.bisect_left(ordered, value) / len(ordered)
+    high = bisect.bisect_right(ordered, value) / len(ordered)
+    return 0.0 if low <= q <= high else min(abs(q - low), abs(q - high))
+
+
+def test_kll_sketch_within_error_bound_after_merge():
+    rnd = random.Random(5)
+    values = [int(rnd.lognormvariate(1.5, 1)) + 1 for _ in range(50_000)]
+    parts = [KLLSketch(seed=i) for i in range(4)]
+    for i, value in enumerate(values):
+        parts[i % 4].update(value)
+
+    merged = KLLSketch()
+    for part in parts:
+        merged.merge(KLLSketch.from_dict(json.loads(json.dumps(part.to_dict()))))
+
+    assert merged.count == len(values)
+    assert not merged.exact
+    assert len(merged.to_dict()["compactors"][0]) < 1000                 # memory does not grow with n
+    for q in (0.01, 0.5, 0.9, 0.99):
+        assert _rank_error(merged, values, q) <= merged.rank_error
+
+
+def test_kll_sketch_exact_for_few_values():
+    sketch = KLLSketch()
+    for value in [5, 1, 3, 2, 4]:
+        sketch.update(value)
+
+    assert sketch.exact
+    assert sketch.rank_error == 0.0
+    assert [sketch.quantile(q) for q in (0, 0.5, 1)] == [1, 3, 5]
+
+
+@pytest.fixture
+def mock_sketch_repo():
+    repo = MagicMock()
+    repo.get.return_value = None
+    repo.get_for_update.return_value = []
+    return repo
+
+
+@pytest.fixture
+def sketch_service(mock_sketch_repo, mock_order_repo):
+    return QuantileSketchService(mock_sketch_repo, mock_order_repo, k=200)
+
+
+def test_get_quantiles_merges_stored_and_local(sketch_service, mock_sketch_repo):
+    stored = KLLSketch()
+    for qty in [1, 1, 1]:
+        stored.update(qty)
+    mock_sketch_repo.get.return_value = QuantileSketch(scope="sku", key="SKU-1", count=3,
+                                                       payload=json.dumps(stored.to_dict()))
+
+    sketch_service.record("John", [("SKU-1", 10), ("SKU-2", 20)])
+    result = sketch_service.get_quantiles("sku", "SKU-1", [0.5, 1])
+
+    mock_sketch_repo.get.assert_called_once_with("sku", "SKU-1")
+    assert result.count == 4
+    assert result.quantiles == {0.5: 1, 1: 10}
+    assert result.exact
+
+
+def test_get_quantiles_per_user(sketch_service):
+    sketch_service.record("John", [("SKU-1", 10), ("SKU-2", 20)])
+
+    assert sketch_service.get_quantiles("user", "John", [1]).quantiles == {1: 20}
+
+
+@pytest.mark.parametrize(
+    "scope, qs, exception",
+    [("product", [0.5], ValidationException), ("sku", [1.5], ValidationException), ("sku", [0.5], NotFoundException)]
+)
+def test_get_quantiles_errors(sketch_service, scope, qs, exception):
+
+    with pytest.raises(exception):
+        sketch_service.get_quantiles(scope, "SKU-9", qs)
+
+
+@patch("webapp.services.statistics.quantiles.db")
+def test_flush_merges_deltas_into_rows(mock_db, sketch_service, mock_sketch_repo):
+    stored = KLLSketch()
+    stored.update(7)
+    row = QuantileSketch(scope="sku", key="SKU-1", count=1, payload=json.dumps(stored.to_dict()))
+    mock_sketch_repo.get_for_update.side_effect = lambda scope, keys: [row] if scope == "sku" else []
+
+    sketch_service.record("John", [("SKU-1", 10)])
+    flushed = sketch_service.flush()
+
+    assert flushed == 2
+    assert row.count == 2                                           # stored row + delta
+    new_rows = mock_sketch_repo.add_all.call_args_list[-1].args[0]
+    assert [(r.scope, r.key, r.count) for r in new_rows] == [("user", "John", 1)]
+    assert sketch_service.flush() == 0                              # deltas are emptied
+
+
+@patch("webapp.services.statistics.quantiles.db")
+def test_flush_failure_keeps_deltas(mock_db, sketch_service, mock_sketch_repo):
+    mock_sketch_repo.get_for_update.side_effect = RuntimeError("database gone")
+
+    sketch_service.record("John", [("SKU-1", 10)])
+    with pytest.raises(RuntimeError):
+        sketch_service.flush()
+
+    assert sketch_service.get_quantiles("sku", "SKU-1").count == 1
+
+
+@patch("webapp.services.statistics.quantiles.db")
+@patch("webapp.services.statistics.sketch_flusher.db")
+def test_sketch_flusher_close_flushes_last_deltas(mock_flusher_db, mock_db, sketch_service, mock_sketch_repo):
+    mock_sketch_repo.get_for_update.return_value = []
+    flusher = SketchFlusher(Flask(__name__), sketch_service, interval_seconds=3600)
+    sketch_service.record("John", [("SKU-1", 10)])
+
+    flusher.close()                         # worker exit, long before the next interval
+
+    written = {(r.scope, r.key) for call in mock_sketch_repo.add_all.call_args_list for r in call.args[0]}
+    assert written == {("sku", "SKU-1"), ("user", "John")}
+    assert sketch_service.flush() == 0                                  # nothing left in memory
+
+
+@patch("webapp.services.statistics.quantiles.db")
+def test_rebuild(mock_db, sketch_service, mock_sketch_repo, mock_order_repo):
+    mock_order_repo.stream_order_rows.return_value = iter([
+        OrderRow(1, "John", "SKU-1", 10),
+        OrderRow(1, "John", "SKU-2", 20),
+        OrderRow(2, "Anna", None, None),
+    ])
+    sketch_service.record("John", [("SKU-1", 10)])             # already in order_details, must not be counted twice
+
+    lines = sketch_service.rebuild(chunk_size=100)
+
+    assert lines == 2
+    mock_order_repo.stream_order_rows.assert_called_once_with(100)
+    mock_sketch_repo.delete_all.assert_called_once()
+    rows = mock_sketch_repo.add_all.call_args.args[0]
+    assert sorted((r.scope, r.key, r.count) for r in rows) == [
+        ("sku", "SKU-1", 1), ("sku", "SKU-2", 1), ("user", "John", 2)
+    ]
@@ -0,0 +1,70 @@
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock
+import pytest
+
+from webapp.database.models.sales_rollups import HourlySales, DailySales
+from webapp.services.exceptions import ValidationException
+from webapp.services.statistics.sales import SalesRollupService
+
+
+NOW = datetime(2026, 10, 18, 14, 25, 7)
+
+
+@pytest.fixture
+def rollup_repo():
+    return MagicMock()
+
+
+@pytest.fixture
+def sales_service(rollup_repo, mock_product_repo):
+    mock_product_repo.get_prices.return_value = {"SKU-1": Decimal("10.00"), "SKU-2": Decimal("2.50")}
+    return SalesRollupService(rollup_repo, mock_product_repo, clock=lambda: NOW)
+
+
+def _increments(rollup_repo) -> dict:
+    return {call.args[0]: call.args[1] for call in rollup_repo.increment.call_args_list}
+
+
+def test_lines_added_one_upsert_per_table(sales_service, rollup_repo):
+    created = datetime(2026, 10, 18, 12, 25, 7)         # created of the lines, not the clock of the service
+    sales_service.lines_added([("SKU-1", 2, created), ("SKU-2", 4, created), ("SKU-1", 1, created)])
+
+    increments = _increments(rollup_repo)
+    assert increments[HourlySales] == [
+        {"bucket": datetime(2026, 10, 18, 12), "sku": "SKU-1", "units": 3, "revenue": Decimal("30.00")},
+        {"bucket": datetime(2026, 10, 18, 12), "sku": "SKU-2", "units": 4, "revenue": Decimal("10.00")},
+    ]
+    assert [row["bucket"] for row in increments[DailySales]] == [datetime(2026, 10, 18)] * 2
+
+
+def test_lines_removed_taken_back_from_created_bucket(sales_service, rollup_repo):
+    sales_service.lines_removed([("SKU-2", 4, datetime(2026, 10, 17, 9, 59)), ("SKU-9", 1, None)])
+
+    increments = _increments(rollup_repo)
+    assert increments[HourlySales] == [
+        {"bucket": datetime(2026, 10, 17, 9), "sku": "SKU-2", "units": -4, "revenue": Decimal("-10.00")},
+        {"bucket": datetime(2026, 10, 18, 14), "sku": "SKU-9", "units": -1, "revenue": Decimal(0)},
+    ]
+
+
+def test_get_sales_default_range(sales_service, rollup_repo):
+    sales_service.get_sales("hour", skus=["SKU-1"])
+
+    rollup_repo.get_range.assert_called_once_with(
+        HourlySales, datetime(2026, 10, 17, 15), datetime(2026, 10, 18, 15), ["SKU-1"]
+    )
+
+
+@pytest.mark.parametrize(
+    "period, start, end",
+    [
+        ("week", None, None),
+        ("day", datetime(2026, 10, 18), datetime(2026, 10, 18)),
+        ("hour", datetime(2026, 1, 1), datetime(2026, 10, 1)),
+    ]
+)
+def test_get_sales_validation(sales_service, rollup_repo, period, start, end):
+    with pytest.raises(ValidationException):
+        sales_service.get_sales(period, start, end)
+    rollup_repo.get_range.assert_not_called()
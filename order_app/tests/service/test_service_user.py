@@ -1,3 +1,6 @@
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal
 from unittest.mock import MagicMock, patch
 import pytest
 
@@ -13,17 +16,36 @@ def test_get_all(
         mock_db: MagicMock,
         mock_user_service: UserService,
         mock_user_repo: MagicMock,
-        fake_user_with_orders
+        fake_user_rows
     ):
 
-    mock_user_repo.get_all.return_value = [fake_user_with_orders]           # set the return for get_all method
+    mock_user_repo.get_all_with_orders_qty.return_value = fake_user_rows    # set the return for repo method
 
     result = mock_user_service.get_all()
 
-    assert len(result) == 1
-    assert result[0].id == 1
-    assert result[0].name == "John Test 1"
-    assert result[0].orders_qty == 3
+    mock_user_repo.get_all_with_orders_qty.assert_called_once_with(51, None)
+
+    assert len(result.items) == 2
+    assert result.items[0].id == 1
+    assert result.items[0].name == "John Test 1"
+    assert result.items[0].orders_qty == 3
+    assert result.next_cursor is None
+
+
+@patch("webapp.services.users.service.db")
+def test_get_all_next_cursor(
+        mock_db: MagicMock,
+        mock_user_service: UserService,
+        mock_user_repo: MagicMock,
+        fake_user_rows
+    ):
+
+    mock_user_repo.get_all_with_orders_qty.return_value = fake_user_rows
+
+    result = mock_user_service.get_all(limit=1)
+
+    assert [u.id for u in result.items] == [1]
+    assert result.next_cursor == 1
 
 
 
@@ -32,10 +54,10 @@ def test_get_by_username_success(
         mock_db: MagicMock,
         mock_user_service: UserService,
         mock_user_repo: MagicMock,
-        fake_user_with_orders
+        fake_user_rows
     ):
 
-    mock_user_repo.get_by_username.return_value = fake_user_with_orders
+    mock_user_repo.get_by_username_with_orders_qty.return_value = fake_user_rows[0]
 
     result = mock_user_service.get_by_username("John Test 1")
 
@@ -52,12 +74,57 @@ def test_get_by_username_error(
         fake_user_with_orders
     ):
 
-    mock_user_repo.get_by_username.return_value = None
+    mock_user_repo.get_by_username_with_orders_qty.return_value = None
 
     with pytest.raises(NotFoundException):
         mock_user_service.get_by_username("John Test 1")
 
-    mock_user_repo.get_by_username.assert_called_once_with("John Test 1")
+    mock_user_repo.get_by_username_with_orders_qty.assert_called_once_with("John Test 1")
+
+
+StatsRow = namedtuple(
+    "StatsRow", ["username", "orders_count", "units", "lifetime_value", "first_order_at", "last_order_at"]
+)
+
+
+@patch("webapp.services.users.service.db")
+def test_get_order_summary(mock_db: MagicMock, mock_user_service: UserService, mock_user_stats_repo: MagicMock):
+
+    mock_user_stats_repo.get_by_username.return_value = StatsRow(
+        "John Test 1", 2, 35, 500.0, datetime(2026, 1, 1), datetime(2026, 2, 1)      # SQLite gives float sums
+    )
+
+    result = mock_user_service.get_order_summary("John Test 1")
+
+    mock_user_stats_repo.get_by_username.assert_called_once_with("John Test 1")
+    assert result.orders_count == 2
+    assert result.units == 35
+    assert result.lifetime_value == Decimal("500.00")
+    assert result.last_order_at == datetime(2026, 2, 1)
+
+
+@patch("webapp.services.users.service.db")
+def test_get_order_summary_unknown_user(
+        mock_db: MagicMock, mock_user_service: UserService, mock_user_stats_repo: MagicMock
+    ):
+
+    mock_user_stats_repo.get_by_username.return_value = None
+
+    with pytest.raises(NotFoundException):
+        mock_user_service.get_order_summary("Nobody")
+
+
+@patch("webapp.services.users.service.db")
+def test_rebuild_order_stats_in_chunks(
+        mock_db: MagicMock, mock_user_service: UserService, mock_user_stats_repo: MagicMock
+    ):
+
+    mock_user_stats_repo.get_max_user_id.return_value = 25
+    mock_user_stats_repo.recompute_between.return_value = 3
+
+    assert mock_user_service.rebuild_order_stats(chunk_size=10) == 9
+
+    assert [c.args for c in mock_user_stats_repo.recompute_between.call_args_list] == [(1, 10), (11, 20), (21, 30)]
 
 
 
@@ -0,0 +1,113 @@
+import threading
+import time
+from collections import namedtuple
+from decimal import Decimal
+from typing import Any, Callable
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from webapp.services.exceptions import NotFoundException
+from webapp.services.single_flight import SingleFlight
+from webapp.services.statistics.service import StatisticsService
+
+
+TotalsRow = namedtuple("TotalsRow", "orders_qty lines_qty units revenue")
+
+
+def _call_all(calls: list[Callable[[], Any]]) -> tuple[list[threading.Thread], list[Any]]:
+    results: list[Any] = [None] * len(calls)
+
+    def worker(i: int) -> None:
+        try:
+            results[i] = calls[i]()
+        except Exception as e:
+            results[i] = e
+
+    pool = [threading.Thread(target=worker, args=(i,)) for i in range(len(calls))]
+    for t in pool:
+        t.start()
+    return pool, results
+
+
+def _wait_for_calls(flights: SingleFlight, calls: int) -> None:
+    deadline = time.monotonic() + 5
+    while sum(s.calls for s in flights.stats()) < calls and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def _blocking(release: threading.Event, result: Any) -> Callable[[], Any]:
+    def run() -> Any:
+        release.wait(5)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return run
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    flights, release, runs = SingleFlight(), threading.Event(), []
+    load = _blocking(release, ["SKU-1"])
+
+    pool, results = _call_all([lambda: flights.do("storage.get_all", (), lambda: runs.append(1) or load())] * 5)
+    _wait_for_calls(flights, 5)
+    release.set()
+    for t in pool:
+        t.join(timeout=5)
+
+    assert len(runs) == 1
+    assert all(r is results[0] for r in results)                    # the same object for every caller
+    [stats] = flights.stats()
+    assert (stats.name, stats.calls, stats.executions, stats.collapsed) == ("storage.get_all", 5, 1, 4)
+
+
+def test_different_keys_run_separately():
+    flights = SingleFlight()
+
+    assert flights.do("orders", (10, None), lambda: "page 1") == "page 1"
+    assert flights.do("orders", (10, 5), lambda: "page 2") == "page 2"
+    assert flights.do("orders", (10, None), lambda: "page 1 again") == "page 1 again"   # nothing in flight
+    assert flights.stats()[0].collapsed == 0
+
+
+def test_error_is_shared_by_waiting_calls():
+    flights, release = SingleFlight(), threading.Event()
+    load = _blocking(release, NotFoundException("No products in storage"))
+
+    pool, results = _call_all([lambda: flights.do("storage.stats", (10,), load)] * 3)
+    _wait_for_calls(flights, 3)
+    release.set()
+    for t in pool:
+        t.join(timeout=5)
+
+    assert all(isinstance(r, NotFoundException) for r in results)
+    assert flights.stats()[0].executions == 1
+    assert flights.do("storage.stats", (10,), lambda: "ok") == "ok"        # the error is not kept
+
+
+def test_commit_forgets_calls_in_flight():
+    flights, release = SingleFlight(), threading.Event()
+
+    pool, results = _call_all([lambda: flights.do("storage.get_all", (), _blocking(release, "before commit"))] * 2)
+    _wait_for_calls(flights, 2)
+    with Session(create_engine("sqlite://")) as session:
+        session.commit()
+
+    assert flights.do("storage.get_all", (), lambda: "after commit") == "after commit"     # does not join
+    release.set()
+    for t in pool:
+        t.join(timeout=5)
+    assert results == ["before commit", "before commit"]
+    assert flights.stats()[0].executions == 2
+
+
+@pytest.mark.parametrize("flights", [None, SingleFlight()])
+def test_statistics_service_with_and_without_flights(flights):
+    repo = MagicMock()
+    repo.get_order_totals.return_value = TotalsRow(3, 4, 10, Decimal("100"))
+    service = StatisticsService(repo, MagicMock(), flights=flights)
+
+    assert service.get_order_summary(["SKU-1"], "John").avg_order_value == Decimal("33.33")
+    repo.get_order_totals.assert_called_once_with(["SKU-1"], "John")
@@ -0,0 +1,53 @@
+from collections import namedtuple
+from decimal import Decimal
+from unittest.mock import MagicMock
+import pytest
+
+from webapp.services.exceptions import ValidationException
+from webapp.services.statistics.service import StatisticsService
+
+
+SkuRow = namedtuple("SkuRow", "sku units revenue orders_qty")
+TotalsRow = namedtuple("TotalsRow", "orders_qty lines_qty units revenue")
+
+
+@pytest.fixture
+def mock_statistics_service(mock_statistics_repo):
+    return StatisticsService(mock_statistics_repo, MagicMock())
+
+
+def test_get_sku_stats(mock_statistics_service, mock_statistics_repo):
+    mock_statistics_repo.get_sku_stats.return_value = [SkuRow("SKU-1", 3, 30.1, 2)]
+
+    result = mock_statistics_service.get_sku_stats(["SKU-1"], "John")
+
+    mock_statistics_repo.get_sku_stats.assert_called_once_with(["SKU-1"], "John")
+    assert result[0].revenue == Decimal("30.10")        # float from SQLite becomes money
+
+
+def test_get_top_products(mock_statistics_service, mock_statistics_repo):
+    mock_statistics_repo.get_top_products.return_value = [SkuRow("SKU-1", 3, Decimal("30"), 2)]
+
+    result = mock_statistics_service.get_top_products(limit=5, by="revenue")
+
+    mock_statistics_repo.get_top_products.assert_called_once_with(5, "revenue", None, None)
+    assert result[0].sku == "SKU-1"
+
+
+@pytest.mark.parametrize("limit, by", [(0, "units"), (101, "units"), (10, "name")])
+def test_get_top_products_error_validation(mock_statistics_service, mock_statistics_repo, limit, by):
+
+    with pytest.raises(ValidationException):
+        mock_statistics_service.get_top_products(limit=limit, by=by)
+
+    mock_statistics_repo.get_top_products.assert_not_called()
+
+
+def test_get_order_summary(mock_statistics_service, mock_statistics_repo):
+    mock_statistics_repo.get_order_totals.return_value = TotalsRow(3, 4, 10, Decimal("100"))
+
+    result = mock_statistics_service.get_order_summary()
+
+    assert result.avg_units_per_order == 3.33
+    assert result.avg_lines_per_order == 1.33
+    assert result.avg_order_value == Decimal("33.33")
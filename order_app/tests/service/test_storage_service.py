@@ -1,3 +1,4 @@
+from collections import namedtuple
 from decimal import Decimal
 from unittest.mock import patch, MagicMock
 import pytest
@@ -243,6 +244,50 @@ def test_deduct_qty_from_storage_sku_error_not_enough_qty(
 
 
 
+@pytest.mark.parametrize(
+    "updated, storage_row, expected_exception",
+    [
+        (False, Storage(sku="SKU-1", qty=10), ServiceException),
+        (False, None, NotFoundException),
+    ]
+)
+@patch("webapp.services.storage.service.db")
+def test_deduct_qty_from_storage_sku_conditional(
+        mock_db,
+        mock_storage_repo,
+        mock_product_repo,
+        updated,
+        storage_row,
+        expected_exception
+    ):
+
+    service = StorageService(mock_storage_repo, mock_product_repo, stock_strategy="conditional")
+
+    mock_product_repo.get_by_sku.return_value = MagicMock()
+    mock_storage_repo.decrement_qty_if_available.return_value = updated
+    mock_storage_repo.get_by_sku.return_value = storage_row
+
+    with pytest.raises(expected_exception):
+        service.deduct_qty_from_storage_sku(ModifyStorageDTO(sku="SKU-1", quantity=11))
+
+    mock_storage_repo.decrement_qty_if_available.assert_called_once_with("SKU-1", 11)
+
+
+@patch("webapp.services.storage.service.db")
+def test_deduct_qty_from_storage_sku_conditional_success(mock_db, mock_storage_repo, mock_product_repo):
+
+    service = StorageService(mock_storage_repo, mock_product_repo, stock_strategy="conditional")
+
+    mock_product_repo.get_by_sku.return_value = MagicMock()
+    mock_storage_repo.decrement_qty_if_available.return_value = True
+
+    result = service.deduct_qty_from_storage_sku(ModifyStorageDTO(sku="SKU-1", quantity=1))
+
+    assert result == "1 deduct from SKU-1"
+    mock_storage_repo.get_by_sku.assert_not_called()
+
+
+
 @patch("webapp.services.storage.service.db")
 def test_delete_storage_sku_success(
         mock_db,
@@ -293,3 +338,25 @@ def test_delete_storage_sku_error(
 
 
 
+
+
+def test_get_inventory_stats_bins_and_quantile_offsets(mock_storage_service, mock_storage_repo):
+    Summary = namedtuple("Summary", "skus zero_stock units min_qty max_qty")
+    Bin = namedtuple("Bin", "bin skus")
+    mock_storage_repo.get_qty_summary.return_value = Summary(10, 2, 150, 5, 34)
+    mock_storage_repo.get_qty_histogram.return_value = [Bin(0, 6), Bin(2, 4)]
+    mock_storage_repo.get_qty_at.side_effect = lambda offset: offset * 3
+
+    result = mock_storage_service.get_inventory_stats(bins=3, qs=(0.0, 0.5, 0.95))
+
+    mock_storage_repo.get_qty_histogram.assert_called_once_with(5, 10)
+    assert [(b.low, b.high, b.skus) for b in result.histogram] == [(5, 15, 6), (15, 25, 0), (25, 35, 4)]
+    assert result.quantiles == {0.0: 0, 0.5: 12, 0.95: 27}          # 0-based nearest-rank offsets 0, 4 and 9
+
+
+def test_get_inventory_stats_empty_storage(mock_storage_service, mock_storage_repo):
+    Summary = namedtuple("Summary", "skus zero_stock units min_qty max_qty")
+    mock_storage_repo.get_qty_summary.return_value = Summary(0, 0, 0, None, None)
+
+    with pytest.raises(NotFoundException):
+        mock_storage_service.get_inventory_stats()
@@ -0,0 +1,111 @@
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+import pytest
+
+from webapp.core.space_saving import SpaceSaving
+from webapp.services.exceptions import ValidationException
+from webapp.services.statistics.top_skus import TopSkuTracker
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = datetime(2026, 10, 18, 14, 0, 30)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def minutes(self, n: int) -> None:
+        self.now += timedelta(minutes=n)
+
+
+def test_space_saving_keeps_heavy_hitters():
+    rnd = random.Random(3)
+    stream = ["HOT-1"] * 3000 + ["HOT-2"] * 2000 + [f"SKU-{rnd.randrange(5000)}" for _ in range(5000)]
+    rnd.shuffle(stream)
+    summary = SpaceSaving(50)
+    for sku in stream:
+        summary.update(sku)
+
+    exact = Counter(stream)
+    kept = {sku: (count, error) for sku, count, error in summary.items()}
+    assert len(summary) == 50
+    for sku in ("HOT-1", "HOT-2"):
+        count, error = kept[sku]
+        assert count - error <= exact[sku] <= count
+
+
+def test_space_saving_take_back():
+    summary = SpaceSaving(2)
+
+    assert summary.update("A", 5) == [("A", 5, 0)]
+    assert summary.update("A", -2) == [("A", -2, 0)]
+    assert summary.update("A", -3) == [("A", -3, 0)]          # dropped at 0
+    assert summary.update("B", -1) == []                      # unknown key
+    assert len(summary) == 0
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def tracker(clock):
+    return TopSkuTracker(window_minutes=60, capacity=10, clock=clock)
+
+
+def test_top_skus_sliding_window(tracker, clock):
+    tracker.record([("SKU-1", 10, clock.now), ("SKU-2", 5, clock.now)])
+    clock.minutes(30)
+    tracker.record([("SKU-2", 10, clock.now), ("SKU-3", 1, clock.now)])
+
+    assert [(t.sku, t.units) for t in tracker.get_top(2)] == [("SKU-2", 15), ("SKU-1", 10)]
+    assert [(t.sku, t.units) for t in tracker.get_top(5, minutes=10)] == [("SKU-2", 10), ("SKU-3", 1)]
+
+    clock.minutes(31)                                           # first minute left the window
+    assert [(t.sku, t.units) for t in tracker.get_top(5)] == [("SKU-2", 10), ("SKU-3", 1)]
+
+
+def test_top_skus_remove_from_minute_of_creation(tracker, clock):
+    created = clock.now
+    tracker.record([("SKU-1", 10, created), ("SKU-2", 8, created)])
+    clock.minutes(5)
+    tracker.record([("SKU-1", 1, clock.now)])
+
+    tracker.remove("SKU-1", 10, created)
+    tracker.remove("SKU-2", 8, clock.now - timedelta(hours=5))         # out of the window - ignored
+    tracker.remove("SKU-2", 8, None)
+
+    assert [(t.sku, t.units) for t in tracker.get_top(5)] == [("SKU-2", 8), ("SKU-1", 1)]
+
+
+def test_top_skus_error_of_evicted_counters(clock):
+    tracker = TopSkuTracker(window_minutes=60, capacity=2, clock=clock)
+    tracker.record([("SKU-1", 5, clock.now), ("SKU-2", 3, clock.now), ("SKU-3", 4, clock.now)])  # SKU-3 evicts SKU-2
+
+    top = tracker.get_top(5)
+    assert [(t.sku, t.units, t.error) for t in top] == [("SKU-3", 7, 3), ("SKU-1", 5, 0)]
+
+
+# a line created just before the minute changed is recorded after it - it goes to the minute of its created, so
+# removing it takes it back from the same summary
+def test_top_skus_record_in_minute_of_creation(tracker, clock):
+    created = clock.now.replace(second=59, microsecond=999_000)
+    clock.now = created + timedelta(milliseconds=2)
+    tracker.record([("SKU-1", 4, clock.now)])
+    tracker.record([("SKU-1", 3, created), ("SKU-2", 2, created)])
+    tracker.record([("SKU-9", 1, clock.now - timedelta(hours=2))])       # older than the window - ignored
+
+    tracker.remove("SKU-1", 3, created)
+    tracker.remove("SKU-2", 2, created)
+
+    assert [(t.sku, t.units) for t in tracker.get_top(5)] == [("SKU-1", 4)]
+    assert [(t.sku, t.units) for t in tracker.get_top(5, minutes=1)] == [("SKU-1", 4)]
+
+
+@pytest.mark.parametrize("limit, minutes", [(0, None), (101, None), (10, 61), (10, -1)])
+def test_top_skus_error_validation(tracker, limit, minutes):
+
+    with pytest.raises(ValidationException):
+        tracker.get_top(limit, minutes)
@@ -1,3 +1,6 @@
+import atexit
+import os
+
 from flask import Flask
 
 from .api import api_bp
@@ -5,6 +8,10 @@ from .settings import config
 from .container import Container
 from .extensions import db, migrate
 from .core.error_handlers import register_error_handlers
+from .services.idempotency.purger import ExpiredKeysPurger
+from .services.statistics.sketch_flusher import SketchFlusher
+from .services.products.typeahead_loader import TypeaheadLoader
+from .commands import sketches_cli, rollups_cli, orders_cli, users_cli, recommendations_cli, storage_cli
 
 def create_app() -> Flask:
     app = Flask(__name__)                               # create flask app engine
@@ -18,12 +25,31 @@ def create_app() -> Flask:
 
     register_error_handlers(app)
     app.register_blueprint(api_bp)
+    app.cli.add_command(sketches_cli)
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(orders_cli)
+    app.cli.add_command(users_cli)
+    app.cli.add_command(recommendations_cli)
+    app.cli.add_command(storage_cli)
 
     from .database.models import users
 
     db.init_app(app)                                    # connect db to app, without it SQLAlchemy won't work
     migrate.init_app(app, db)                           # connect Migrate to app. We inform Migrate that this is my app and this is my db
 
+    ExpiredKeysPurger(                                  # background deleting of expired Idempotency-Key responses
+        app, container.idempotency_service(), config['default'].IDEMPOTENCY_PURGE_INTERVAL_SECONDS
+    ).start()
+    if _serving(app):
+        sketch_flusher = SketchFlusher(                 # merging quantile sketches of this worker into the database
+            app, container.quantile_sketch_service(), config['default'].QUANTILE_SKETCH_FLUSH_SECONDS
+        )
+        sketch_flusher.start()
+        atexit.register(sketch_flusher.close)           # deltas of the last interval are not lost on worker exit
+        TypeaheadLoader(                                # product names and SKUs in memory for the typeahead
+            app, container.product_typeahead(), config['default'].TYPEAHEAD_RELOAD_SECONDS
+        ).start()
+
 
     with app.app_context():                             # inform flask that we are inside the app and can use all functionality
         app.logger.info("[ API GATEWAY ROUTES ]:")      # separator - shown in console line before log below
@@ -42,4 +68,10 @@ def create_app() -> Flask:
             app.logger.info(r)
         app.logger.info("========================")
 
-    return app
\ No newline at end of file
+    return app
+
+
+# background threads of a worker run only in the served app - not in tests and not in `flask <command>` (flask sets
+# FLASK_RUN_FROM_CLI for every command it runs, the app is served by gunicorn)
+def _serving(app: Flask) -> bool:
+    return not app.config.get("TESTING") and os.environ.get("FLASK_RUN_FROM_CLI") != "true"
\ No newline at end of file
@@ -13,4 +13,7 @@ from .products import product_bp
 api_bp.register_blueprint(product_bp)
 
 from .orders import orders_bp
-api_bp.register_blueprint(orders_bp)
\ No newline at end of file
+api_bp.register_blueprint(orders_bp)
+
+from .statistics import statistics_bp
+api_bp.register_blueprint(statistics_bp)
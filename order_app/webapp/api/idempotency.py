@@ -0,0 +1,47 @@
+# Idempotency-Key support for write routes. The first request with a key runs normally and its response is stored,
+# a retry with the same key (and the same method, path and body) gets the stored response back without running the
+# service again. Requests without the header are not affected.
+
+import hashlib
+from typing import Callable
+
+from flask import Response, current_app, request
+from flask.typing import ResponseReturnValue
+
+from webapp.services.idempotency.service import IdempotencyService
+
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+
+def idempotent_call(idempotency_service: IdempotencyService, view: Callable[[], ResponseReturnValue]) -> ResponseReturnValue:
+    key = request.headers.get(IDEMPOTENCY_HEADER)
+    if not key:
+        return view()
+
+    fingerprint = _fingerprint()
+    stored = idempotency_service.begin(key, fingerprint)
+    if stored is not None:
+        replay = Response(stored.body, status=stored.status_code, mimetype="application/json")
+        replay.headers["Idempotent-Replayed"] = "true"
+        return replay
+
+    try:
+        response = current_app.make_response(view())
+    except Exception:
+        idempotency_service.abandon(key)        # service raised, transaction rolled back - the key can be used again
+        raise
+
+    if response.status_code < 500:
+        idempotency_service.complete(key, fingerprint, response.status_code, response.get_data(as_text=True))
+    else:
+        idempotency_service.abandon(key)
+    return response
+
+
+def _fingerprint() -> str:
+    digest = hashlib.sha256()
+    digest.update(request.method.encode())
+    digest.update(request.path.encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
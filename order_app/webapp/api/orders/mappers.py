@@ -3,11 +3,12 @@ from webapp.api.orders.schemas import (
     OrderDetailsResponseSchema,
     CreateOrderDetailSchema,
     CreateOrderSchema,
-    DeleteProductInOrderSchema
+    DeleteProductInOrderSchema,
+    BulkOrderResultSchema
 )
 
 from webapp.services.orders.dtos import ReadOrderDTO, CreateOrderDTO, CreateOrderDetailDTO, ReadOrderDetailDTO, \
-    DeleteProductsInOrderDTO
+    DeleteProductsInOrderDTO, BulkOrderResultDTO
 
 
 def to_schema_order_details_response(dto: ReadOrderDetailDTO) -> OrderDetailsResponseSchema:
@@ -20,7 +21,10 @@ def to_schema_orders_response(dto: ReadOrderDTO) -> OrderResponseSchema:
     return OrderResponseSchema(
         id=dto.id,
         user_name=dto.user_name,
-        details=[to_schema_order_details_response(detail) for detail in dto.details]
+        details=[to_schema_order_details_response(detail) for detail in dto.details],
+        total_qty=dto.total_qty,
+        line_count=dto.line_count,
+        total_value=dto.total_value
     )
 
 
@@ -42,4 +46,12 @@ def to_dto_delete_product_in_order(schema: DeleteProductInOrderSchema) -> Delete
     return DeleteProductsInOrderDTO(
         order_id=schema.order_id,
         product_sku=schema.product_sku
-    )
\ No newline at end of file
+    )
+
+
+def to_schema_bulk_order_result(dto: BulkOrderResultDTO) -> BulkOrderResultSchema:
+    return BulkOrderResultSchema(
+        index=dto.index,
+        order_id=dto.order_id,
+        error=dto.error
+    )
@@ -1,23 +1,46 @@
-from flask import jsonify, request
+import csv
+import io
+import json
+from decimal import Decimal
+from typing import Iterator
+
+from flask import jsonify, request, Response, stream_with_context
 from flask.typing import ResponseReturnValue
 from dependency_injector.wiring import inject, Provide
 
 from webapp.api.orders.schemas import OrderResponseSchema, CreateOrderSchema, CreateOrderDetailSchema, \
-    DeleteProductInOrderSchema
+    DeleteProductInOrderSchema, BulkCreateOrderSchema
 from webapp.api.orders.mappers import to_schema_orders_response, to_dto_create_order, to_dto_create_order_detail, \
-    to_dto_delete_product_in_order
+    to_dto_delete_product_in_order, to_schema_bulk_order_result
 
+from webapp.services.orders.dtos import OrderPageDTO, ReadOrderDTO
+from webapp.services.exceptions import ValidationException
 from webapp.services.orders.service import OrderService
+from webapp.services.idempotency.service import IdempotencyService
+from webapp.api.idempotency import idempotent_call
+from webapp.services.pagination import DEFAULT_PAGE_SIZE
 from webapp.container import Container
 
 from . import orders_bp
 
 
+# Both listings are keyset paginated: ?limit=<page size>&after=<cursor>. The body stays a plain list of orders and the
+# cursor of the next page is returned in the X-Next-Cursor header (missing header = last page).
+
+# ?sort=id|total_value|total_qty|line_count&direction=desc|asc (default id, desc) and ?min_value=&max_value= (range of
+# total_value); the cursor stays the id of the last order of the page.
 @orders_bp.get("/")
 @inject
 def get_all(order_service: OrderService = Provide[Container.order_service]) -> ResponseReturnValue:
-    orders = order_service.get_all_orders_with_details()
-    return jsonify([to_schema_orders_response(order).model_dump(mode="json") for order in orders]), 200
+    limit = request.args.get("limit", default=DEFAULT_PAGE_SIZE, type=int)
+    after = request.args.get("after", default=None, type=int)
+    sort = request.args.get("sort", default="id")
+    direction = request.args.get("direction", default="desc")
+
+    page = order_service.get_all_orders_with_details(
+        limit, after, sort, direction, _decimal_arg("min_value"), _decimal_arg("max_value")
+    )
+    return _page_response(page)
 
 
 
@@ -31,46 +54,158 @@ def get_order_by_id(order_id: int, order_service: OrderService = Provide[Contain
 @orders_bp.get("/user/<string:user_name>")
 @inject
 def get_orders_by_user_name(user_name: str, order_service: OrderService = Provide[Container.order_service]) -> ResponseReturnValue:
-    orders = order_service.get_all_orders_by_user_name(user_name)
-    return jsonify([to_schema_orders_response(order).model_dump(mode="json") for order in orders]), 200
+    limit = request.args.get("limit", default=DEFAULT_PAGE_SIZE, type=int)
+    after = request.args.get("after", default=None, type=int)
 
+    page = order_service.get_all_orders_by_user_name(user_name, limit, after)
+    return _page_response(page)
 
 
+
+# Full order history for nightly pulls: ?format=ndjson (default, one order per line) or ?format=csv (one order line per
+# row). The body is written by a generator while rows come from a server-side cursor, so memory stays flat.
+@orders_bp.get("/export")
+@inject
+def export_orders(order_service: OrderService = Provide[Container.order_service]) -> ResponseReturnValue:
+    export_format = request.args.get("format", default="ndjson")
+    if export_format not in _EXPORT_FORMATS:
+        raise ValidationException(f'Unknown export format {export_format}, use one of: {", ".join(_EXPORT_FORMATS)}')
+
+    write_lines, mimetype = _EXPORT_FORMATS[export_format]
+    orders = order_service.stream_orders_with_details()
+    return Response(stream_with_context(write_lines(orders)), mimetype=mimetype), 200
+
+
+
+# Write routes accept an Idempotency-Key header - a retry with the same key returns the stored response
+# (see webapp/api/idempotency.py) instead of creating / deleting again.
+
 @orders_bp.post("/add_order")
 @inject
-def add_order_with_details(order_service: OrderService = Provide[Container.order_service]):
-    payload = CreateOrderSchema.model_validate(request.get_json() or {})
-    dto = to_dto_create_order(payload)
-    result = order_service.add_order_with_details(dto)
-    return jsonify({"message":result}) , 201
+def add_order_with_details(
+        order_service: OrderService = Provide[Container.order_service],
+        idempotency_service: IdempotencyService = Provide[Container.idempotency_service]
+) -> ResponseReturnValue:
+    def create() -> ResponseReturnValue:
+        payload = CreateOrderSchema.model_validate(request.get_json() or {})
+        dto = to_dto_create_order(payload)
+        result = order_service.add_order_with_details(dto)
+        return jsonify({"message":result}) , 201
+
+    return idempotent_call(idempotency_service, create)
+
+
+# 201 - every order created, 207 - some orders failed (in all_or_nothing mode none of them was created)
+@orders_bp.post("/bulk")
+@inject
+def add_orders_bulk(
+        order_service: OrderService = Provide[Container.order_service],
+        idempotency_service: IdempotencyService = Provide[Container.idempotency_service]
+) -> ResponseReturnValue:
+    def create() -> ResponseReturnValue:
+        payload = BulkCreateOrderSchema.model_validate(request.get_json() or {})
+        dtos = [to_dto_create_order(order) for order in payload.orders]
+        results = order_service.add_orders_bulk(dtos, all_or_nothing=payload.mode == "all_or_nothing")
+        status = 201 if all(r.error is None for r in results) else 207
+        return jsonify([to_schema_bulk_order_result(r).model_dump(mode="json") for r in results]), status
+
+    return idempotent_call(idempotency_service, create)
 
 
 @orders_bp.post("/<int:order_id>/items")
 @inject
-def add_product_to_order(order_id: int, order_service: OrderService = Provide[Container.order_service]) -> ResponseReturnValue:
-    payload = CreateOrderDetailSchema.model_validate(request.get_json() or {})
-    dto = to_dto_create_order_detail(payload)
-    result = order_service.add_product_to_order(order_id, dto)
-    return jsonify({"message":result}), 201
+def add_product_to_order(
+        order_id: int,
+        order_service: OrderService = Provide[Container.order_service],
+        idempotency_service: IdempotencyService = Provide[Container.idempotency_service]
+) -> ResponseReturnValue:
+    def add() -> ResponseReturnValue:
+        payload = CreateOrderDetailSchema.model_validate(request.get_json() or {})
+        dto = to_dto_create_order_detail(payload)
+        result = order_service.add_product_to_order(order_id, dto)
+        return jsonify({"message":result}), 201
+
+    return idempotent_call(idempotency_service, add)
 
 
 @orders_bp.delete("/<int:order_id>")
 @inject
 def delete_order_with_details(
-    order_id: int, order_service: OrderService = Provide[Container.order_service]) -> ResponseReturnValue:
-    result = order_service.delete_order_with_details(order_id)
-    return jsonify({"message": result}), 200
+        order_id: int,
+        order_service: OrderService = Provide[Container.order_service],
+        idempotency_service: IdempotencyService = Provide[Container.idempotency_service]
+) -> ResponseReturnValue:
+    def delete() -> ResponseReturnValue:
+        result = order_service.delete_order_with_details(order_id)
+        return jsonify({"message": result}), 200
+
+    return idempotent_call(idempotency_service, delete)
 
 
 @orders_bp.delete("/delete_product")
 @inject
 def delete_product_in_order(
-    order_service: OrderService = Provide[Container.order_service]
+        order_service: OrderService = Provide[Container.order_service],
+        idempotency_service: IdempotencyService = Provide[Container.idempotency_service]
 ) -> ResponseReturnValue:
-    payload = DeleteProductInOrderSchema.model_validate(request.get_json() or {})
-    dto = to_dto_delete_product_in_order(payload)
-    result = order_service.delete_product_in_order(dto)
-    return jsonify({"message": result}), 200
+    def delete() -> ResponseReturnValue:
+        payload = DeleteProductInOrderSchema.model_validate(request.get_json() or {})
+        dto = to_dto_delete_product_in_order(payload)
+        result = order_service.delete_product_in_order(dto)
+        return jsonify({"message": result}), 200
+
+    return idempotent_call(idempotency_service, delete)
+
+
+def _page_response(page: OrderPageDTO) -> ResponseReturnValue:
+    response = jsonify([to_schema_orders_response(order).model_dump(mode="json") for order in page.items])
+    if page.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(page.next_cursor)
+    return response, 200
+
+
+def _decimal_arg(name: str) -> Decimal | None:
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        number = Decimal(value)
+    except ArithmeticError:         # decimal.InvalidOperation
+        raise ValidationException(f'{name} must be a number')
+    if not number.is_finite():
+        raise ValidationException(f'{name} must be a number')
+    return number
+
+
+def _ndjson_lines(orders: Iterator[ReadOrderDTO]) -> Iterator[str]:
+    for order in orders:
+        yield json.dumps(to_schema_orders_response(order).model_dump(mode="json")) + "\n"
+
+
+def _csv_lines(orders: Iterator[ReadOrderDTO]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        line = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return line
+
+    writer.writerow(["order_id", "user_name", "sku", "qty"])
+    yield flush()
+    for order in orders:
+        if not order.details:                         # order without lines still gets a row
+            writer.writerow([order.id, order.user_name, "", ""])
+        for detail in order.details:
+            writer.writerow([order.id, order.user_name, detail.sku, detail.qty])
+        yield flush()
+
+
+_EXPORT_FORMATS = {
+    "ndjson": (_ndjson_lines, "application/x-ndjson"),
+    "csv": (_csv_lines, "text/csv"),
+}
 
 
 # More REST API solution, where URL shows exactly whole operation. Schema is not needed in this solution.
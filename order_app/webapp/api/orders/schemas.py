@@ -1,4 +1,5 @@
-from typing import List
+from decimal import Decimal
+from typing import List, Literal
 from pydantic import BaseModel, Field
 
 
@@ -12,6 +13,9 @@ class OrderResponseSchema(BaseModel):
     id: int
     user_name: str
     details: List[OrderDetailsResponseSchema]
+    total_qty: int
+    line_count: int
+    total_value: Decimal
 
 
 class CreateOrderDetailSchema(BaseModel):
@@ -27,3 +31,14 @@ class CreateOrderSchema(BaseModel):
 class DeleteProductInOrderSchema(BaseModel):
     order_id: int
     product_sku: str
+
+
+class BulkCreateOrderSchema(BaseModel):
+    mode: Literal["all_or_nothing", "partial"] = "all_or_nothing"
+    orders: List[CreateOrderSchema] = Field(min_length=1, max_length=1000)
+
+
+class BulkOrderResultSchema(BaseModel):
+    index: int
+    order_id: int | None
+    error: str | None
@@ -1,5 +1,5 @@
-from webapp.services.products.dtos import ReadProductDTO, CreateProductDTO
-from webapp.api.products.schemas import ProductResponseSchema, CreateProductSchema
+from webapp.services.products.dtos import ReadProductDTO, CreateProductDTO, ProductSuggestionDTO
+from webapp.api.products.schemas import ProductResponseSchema, CreateProductSchema, ProductSuggestionSchema
 
 
 def to_schemas_product_response(dto: ReadProductDTO) -> ProductResponseSchema:
@@ -17,3 +17,9 @@ def to_dto_create_product(schema: CreateProductSchema) -> CreateProductDTO:
         price=schema.price
     )
 
+
+def to_schema_product_suggestion(dto: ProductSuggestionDTO) -> ProductSuggestionSchema:
+    return ProductSuggestionSchema(
+        sku=dto.sku,
+        name=dto.name
+    )
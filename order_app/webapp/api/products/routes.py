@@ -2,10 +2,12 @@ from flask import request, jsonify
 from flask.typing import ResponseReturnValue
 from dependency_injector.wiring import inject, Provide
 from webapp.api.products.schemas import CreateProductSchema
-from webapp.api.products.mappers import to_schemas_product_response, to_dto_create_product
+from webapp.api.products.mappers import to_schemas_product_response, to_dto_create_product, to_schema_product_suggestion
 from decimal import Decimal
 
 from webapp.services.products.service import ProductService
+from webapp.services.products.typeahead import ProductTypeahead
+from webapp.services.pagination import DEFAULT_PAGE_SIZE
 from webapp.container import Container
 from . import product_bp
 
@@ -36,6 +38,34 @@ def get_by_price_between(
     return jsonify([to_schemas_product_response(product).model_dump(mode="json") for product in products]), 200
 
 
+# full-text search of names: ?q=blue shirt (every word starts a word of the name), best match first,
+# ?limit=50&after=<X-Next-Cursor of the previous page>
+@product_bp.get("/search")
+@inject
+def search_by_name(product_service: ProductService = Provide[Container.product_service]) -> ResponseReturnValue:
+    query = request.args.get("q", default="")
+    limit = request.args.get("limit", default=DEFAULT_PAGE_SIZE, type=int)
+    after = request.args.get("after", default=None, type=int)
+
+    page = product_service.get_by_part_name(query, limit, after)
+    response = jsonify([to_schemas_product_response(product).model_dump(mode="json") for product in page.items])
+    if page.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(page.next_cursor)       # same cursor header as the other listings
+    return response, 200
+
+
+# typeahead for the search box: ?q=blu sh&limit=10 - SKUs starting with the text, then names where every word starts a
+# word of the name. Answered from memory of this worker, no database query (see services/products/typeahead.py)
+@product_bp.get("/typeahead")
+@inject
+def typeahead(typeahead: ProductTypeahead = Provide[Container.product_typeahead]) -> ResponseReturnValue:
+    query = request.args.get("q", default="")
+    limit = request.args.get("limit", default=10, type=int)
+
+    suggestions = typeahead.suggest(query, limit)
+    return jsonify([to_schema_product_suggestion(s).model_dump(mode="json") for s in suggestions]), 200
+
+
 @product_bp.post("/")
 @inject
 def create_product(product_service: ProductService = Provide[Container.product_service]) -> ResponseReturnValue:
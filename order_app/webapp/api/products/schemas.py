@@ -20,4 +20,8 @@ class CreateProductSchema(BaseModel):
 class ProductResponseSchema(BaseModel):
     sku: str
     name: str
-    price: Decimal
\ No newline at end of file
+    price: Decimal
+
+class ProductSuggestionSchema(BaseModel):
+    sku: str
+    name: str
@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+statistics_bp = Blueprint('statistics', __name__, url_prefix='/statistics')
+
+from . import routes
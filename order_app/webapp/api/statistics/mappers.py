@@ -0,0 +1,139 @@
+from webapp.api.statistics.schemas import SkuStatsResponseSchema, UserStatsResponseSchema, OrderSummaryResponseSchema, \
+    OrderRankResponseSchema, QuantilesResponseSchema, TopSkuResponseSchema, SalesBucketResponseSchema, \
+    SnapshotInfoResponseSchema, PriceBandResponseSchema, SkuUserMatrixResponseSchema, HistogramResponseSchema, \
+    BoughtTogetherResponseSchema, CacheStatsResponseSchema, CoalescingStatsResponseSchema
+from webapp.services.statistics.dtos import SkuStatsDTO, UserStatsDTO, OrderSummaryDTO, OrderRankDTO, QuantilesDTO, \
+    TopSkuDTO, SalesBucketDTO, SnapshotInfoDTO, PriceBandDTO, SkuUserMatrixDTO, HistogramDTO, BoughtTogetherDTO
+from webapp.core.lru import CacheStats
+from webapp.services.single_flight import FlightStats
+
+
+def to_schema_sku_stats(dto: SkuStatsDTO) -> SkuStatsResponseSchema:
+    return SkuStatsResponseSchema(
+        sku=dto.sku,
+        units=dto.units,
+        revenue=dto.revenue,
+        orders_qty=dto.orders_qty
+    )
+
+
+def to_schema_user_stats(dto: UserStatsDTO) -> UserStatsResponseSchema:
+    return UserStatsResponseSchema(
+        user_name=dto.user_name,
+        orders_qty=dto.orders_qty,
+        units=dto.units,
+        revenue=dto.revenue
+    )
+
+
+def to_schema_order_summary(dto: OrderSummaryDTO) -> OrderSummaryResponseSchema:
+    return OrderSummaryResponseSchema(
+        orders_qty=dto.orders_qty,
+        lines_qty=dto.lines_qty,
+        units=dto.units,
+        revenue=dto.revenue,
+        avg_units_per_order=dto.avg_units_per_order,
+        avg_lines_per_order=dto.avg_lines_per_order,
+        avg_order_value=dto.avg_order_value
+    )
+
+
+def to_schema_order_rank(dto: OrderRankDTO) -> OrderRankResponseSchema:
+    return OrderRankResponseSchema(
+        order_id=dto.order_id,
+        metric=dto.metric,
+        value=dto.value,
+        rank=dto.rank,
+        total=dto.total
+    )
+
+
+def to_schema_quantiles(dto: QuantilesDTO) -> QuantilesResponseSchema:
+    return QuantilesResponseSchema(
+        scope=dto.scope,
+        key=dto.key,
+        count=dto.count,
+        quantiles={str(q): value for q, value in dto.quantiles.items()},
+        exact=dto.exact,
+        rank_error=dto.rank_error
+    )
+
+
+def to_schema_top_sku(dto: TopSkuDTO) -> TopSkuResponseSchema:
+    return TopSkuResponseSchema(
+        sku=dto.sku,
+        units=dto.units,
+        error=dto.error
+    )
+
+
+def to_schema_sales_bucket(dto: SalesBucketDTO) -> SalesBucketResponseSchema:
+    return SalesBucketResponseSchema(
+        bucket=dto.bucket,
+        units=dto.units,
+        revenue=dto.revenue
+    )
+
+
+def to_schema_snapshot_info(dto: SnapshotInfoDTO) -> SnapshotInfoResponseSchema:
+    return SnapshotInfoResponseSchema(
+        lines=dto.lines,
+        skus=dto.skus,
+        users=dto.users,
+        as_of=dto.as_of
+    )
+
+
+def to_schema_price_band(dto: PriceBandDTO) -> PriceBandResponseSchema:
+    return PriceBandResponseSchema(
+        low=dto.low,
+        high=dto.high,
+        lines=dto.lines,
+        units=dto.units,
+        revenue=dto.revenue
+    )
+
+
+def to_schema_sku_user_matrix(dto: SkuUserMatrixDTO) -> SkuUserMatrixResponseSchema:
+    return SkuUserMatrixResponseSchema(
+        skus=dto.skus,
+        users=dto.users,
+        units=dto.units
+    )
+
+
+def to_schema_histogram(dto: HistogramDTO) -> HistogramResponseSchema:
+    return HistogramResponseSchema(
+        metric=dto.metric,
+        edges=dto.edges,
+        counts=dto.counts
+    )
+
+
+def to_schema_bought_together(dto: BoughtTogetherDTO) -> BoughtTogetherResponseSchema:
+    return BoughtTogetherResponseSchema(
+        sku=dto.sku,
+        orders=dto.orders,
+        share=dto.share
+    )
+
+
+def to_schema_cache_stats(name: str, stats: CacheStats) -> CacheStatsResponseSchema:
+    asked = stats.hits + stats.misses
+    return CacheStatsResponseSchema(
+        name=name,
+        hits=stats.hits,
+        misses=stats.misses,
+        hit_ratio=round(stats.hits / asked, 4) if asked else 0.0,
+        size=stats.size,
+        maxsize=stats.maxsize
+    )
+
+
+def to_schema_flight_stats(stats: FlightStats) -> CoalescingStatsResponseSchema:
+    return CoalescingStatsResponseSchema(
+        name=stats.name,
+        calls=stats.calls,
+        executions=stats.executions,
+        collapsed=stats.collapsed
+    )
@@ -0,0 +1,245 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from flask import jsonify, request
+from flask.typing import ResponseReturnValue
+from dependency_injector.wiring import inject, Provide
+
+from webapp.api.statistics.mappers import to_schema_sku_stats, to_schema_user_stats, to_schema_order_summary, \
+    to_schema_order_rank, to_schema_quantiles, to_schema_top_sku, to_schema_sales_bucket, to_schema_snapshot_info, \
+    to_schema_price_band, to_schema_sku_user_matrix, to_schema_histogram, to_schema_bought_together, \
+    to_schema_cache_stats, to_schema_flight_stats
+from webapp.services.statistics.service import StatisticsService, DEFAULT_TOP_LIMIT
+from webapp.services.statistics.quantiles import QuantileSketchService, DEFAULT_QUANTILES
+from webapp.services.statistics.top_skus import TopSkuTracker
+from webapp.services.statistics.sales import SalesRollupService
+from webapp.services.statistics.snapshot import OrderSnapshot
+from webapp.services.statistics.bought_together import BoughtTogetherIndex
+from webapp.services.exceptions import ValidationException
+from webapp.services.single_flight import SingleFlight
+from webapp.database.cache import RowCache
+from webapp.container import Container
+from . import statistics_bp
+
+
+# Every endpoint takes the same optional filters: ?sku=<sku> (can be repeated) and ?user=<user name>.
+
+@statistics_bp.get("/skus")
+@inject
+def get_sku_stats(
+        statistics_service: StatisticsService = Provide[Container.statistics_service]
+) -> ResponseReturnValue:
+    skus, user_name = _filters()
+    stats = statistics_service.get_sku_stats(skus, user_name)
+    return jsonify([to_schema_sku_stats(s).model_dump(mode="json") for s in stats]), 200
+
+
+# ?limit=<N>&by=units|revenue
+@statistics_bp.get("/skus/top")
+@inject
+def get_top_products(
+        statistics_service: StatisticsService = Provide[Container.statistics_service]
+) -> ResponseReturnValue:
+    skus, user_name = _filters()
+    limit = request.args.get("limit", default=DEFAULT_TOP_LIMIT, type=int)
+    by = request.args.get("by", default="units")
+
+    stats = statistics_service.get_top_products(limit, by, skus, user_name)
+    return jsonify([to_schema_sku_stats(s).model_dump(mode="json") for s in stats]), 200
+
+
+# Live top SKUs by units of the last minutes, from memory of this worker: ?limit=20&minutes=60 (default and max is
+# TOP_SKUS_WINDOW_MINUTES). units is an upper bound, units - error a lower bound. Filters above do not apply here.
+@statistics_bp.get("/skus/trending")
+@inject
+def get_trending_skus(top_sku_tracker: TopSkuTracker = Provide[Container.top_sku_tracker]) -> ResponseReturnValue:
+    limit = request.args.get("limit", default=20, type=int)
+    minutes = request.args.get("minutes", default=None, type=int)
+
+    top = top_sku_tracker.get_top(limit, minutes)
+    return jsonify([to_schema_top_sku(t).model_dump(mode="json") for t in top]), 200
+
+
+# "Customers who ordered <sku> also ordered": the ?limit=10 SKUs found in most orders together with it, from memory of
+# this worker (orders of other workers after BOUGHT_TOGETHER_MAX_AGE_SECONDS). Filters above do not apply here.
+@statistics_bp.get("/skus/<string:sku>/bought-together")
+@inject
+def get_bought_together(
+        sku: str,
+        bought_together: BoughtTogetherIndex = Provide[Container.bought_together_index]
+) -> ResponseReturnValue:
+    limit = request.args.get("limit", default=10, type=int)
+    neighbours = bought_together.get_neighbours(sku, limit)
+    return jsonify([to_schema_bought_together(n).model_dump(mode="json") for n in neighbours]), 200
+
+
+@statistics_bp.get("/users")
+@inject
+def get_user_stats(
+        statistics_service: StatisticsService = Provide[Container.statistics_service]
+) -> ResponseReturnValue:
+    skus, user_name = _filters()
+    stats = statistics_service.get_user_stats(skus, user_name)
+    return jsonify([to_schema_user_stats(s).model_dump(mode="json") for s in stats]), 200
+
+
+@statistics_bp.get("/summary")
+@inject
+def get_order_summary(
+        statistics_service: StatisticsService = Provide[Container.statistics_service]
+) -> ResponseReturnValue:
+    skus, user_name = _filters()
+    summary = statistics_service.get_order_summary(skus, user_name)
+    return jsonify(to_schema_order_summary(summary).model_dump(mode="json")), 200
+
+
+# Ranking of single orders by ?metric=value (order total, default) or ?metric=lines (number of order lines).
+# Filters above do not apply here.
+
+# ?k=<N> - k-th smallest order
+@statistics_bp.get("/orders/kth")
+@inject
+def get_kth_order(
+        statistics_service: StatisticsService = Provide[Container.statistics_service]
+) -> ResponseReturnValue:
+    k = request.args.get("k", default=1, type=int)
+    order = statistics_service.get_kth_order(_metric(), k)
+    return jsonify(to_schema_order_rank(order).model_dump(mode="json")), 200
+
+
+# ?p=<0-100> - p = 50 is the median
+@statistics_bp.get("/orders/percentile")
+@inject
+def get_order_percentile(
+        statistics_service: StatisticsService = Provide[Container.statistics_service]
+) -> ResponseReturnValue:
+    p = request.args.get("p", default=50.0, type=float)
+    order = statistics_service.get_order_percentile(_metric(), p)
+    return jsonify(to_schema_order_rank(order).model_dump(mode="json")), 200
+
+
+@statistics_bp.get("/orders/<int:order_id>/rank")
+@inject
+def get_order_rank(
+        order_id: int,
+        statistics_service: StatisticsService = Provide[Container.statistics_service]
+) -> ResponseReturnValue:
+    order = statistics_service.get_order_rank(_metric(), order_id)
+    return jsonify(to_schema_order_rank(order).model_dump(mode="json")), 200
+
+
+# Approximate quantiles of order line qty from KLL sketches: /quantiles/sku/<sku> or /quantiles/user/<user name>,
+# ?q=0.5&q=0.99 (default 0.5, 0.9, 0.99). Error bound: the returned qty has a rank within rank_error * count of the
+# asked one (99 % confidence, about 1.65 % for k = 200); exact = true means the sketch still holds every line.
+# Lines from other workers are included after their next flush (QUANTILE_SKETCH_FLUSH_SECONDS).
+@statistics_bp.get("/quantiles/<string:scope>/<string:key>")
+@inject
+def get_quantiles(
+        scope: str,
+        key: str,
+        sketch_service: QuantileSketchService = Provide[Container.quantile_sketch_service]
+) -> ResponseReturnValue:
+    qs = request.args.getlist("q", type=float) or DEFAULT_QUANTILES
+    quantiles = sketch_service.get_quantiles(scope, key, qs)
+    return jsonify(to_schema_quantiles(quantiles).model_dump(mode="json")), 200
+
+
+# Sales per bucket from the rollup tables: ?period=hour|day (default day), ?from=<ISO datetime>&to=<ISO datetime> in
+# UTC (default: the last 24 hours / 30 days), ?sku= filter as above. Only buckets with sales are returned.
+@statistics_bp.get("/sales")
+@inject
+def get_sales(
+        rollup_service: SalesRollupService = Provide[Container.sales_rollup_service]
+) -> ResponseReturnValue:
+    skus, _ = _filters()
+    period = request.args.get("period", default="day")
+    sales = rollup_service.get_sales(period, _datetime_arg("from"), _datetime_arg("to"), skus)
+    return jsonify([to_schema_sales_bucket(s).model_dump(mode="json") for s in sales]), 200
+
+
+# hits / misses of the read-through caches of this worker (products and storage rows by sku) since it started
+@statistics_bp.get("/caches")
+@inject
+def get_cache_stats(
+        product_cache: RowCache = Provide[Container.product_cache],
+        storage_cache: RowCache = Provide[Container.storage_cache]
+) -> ResponseReturnValue:
+    caches = {"products": product_cache, "storage": storage_cache}
+    stats = [to_schema_cache_stats(name, cache.stats()) for name, cache in caches.items()]
+    return jsonify([s.model_dump(mode="json") for s in stats]), 200
+
+
+# calls of the coalesced reads in this worker since it started - collapsed = calls that got the result of another call
+@statistics_bp.get("/coalescing")
+@inject
+def get_coalescing_stats(single_flight: SingleFlight = Provide[Container.single_flight]) -> ResponseReturnValue:
+    stats = [to_schema_flight_stats(s) for s in single_flight.stats()]
+    return jsonify([s.model_dump(mode="json") for s in stats]), 200
+
+
+# Ad-hoc analytics from the columnar snapshot of this worker (computed in memory, a few seconds behind the database -
+# see GET /snapshot for its size and as_of). Filters above do not apply here.
+
+@statistics_bp.get("/snapshot")
+@inject
+def get_snapshot_info(order_snapshot: OrderSnapshot = Provide[Container.order_snapshot]) -> ResponseReturnValue:
+    return jsonify(to_schema_snapshot_info(order_snapshot.get_info()).model_dump(mode="json")), 200
+
+
+# ?edge=10&edge=50 - bands of product price: < 10, 10 - 50, >= 50
+@statistics_bp.get("/snapshot/price-bands")
+@inject
+def get_price_bands(order_snapshot: OrderSnapshot = Provide[Container.order_snapshot]) -> ResponseReturnValue:
+    edges = _decimal_args("edge")
+    bands = order_snapshot.get_price_bands(edges)
+    return jsonify([to_schema_price_band(b).model_dump(mode="json") for b in bands]), 200
+
+
+# ?sku=<sku>&user=<user name> (both can be repeated); without them the best ?limit=20 SKUs / users by units
+@statistics_bp.get("/snapshot/sku-users")
+@inject
+def get_sku_user_matrix(order_snapshot: OrderSnapshot = Provide[Container.order_snapshot]) -> ResponseReturnValue:
+    limit = request.args.get("limit", default=20, type=int)
+    matrix = order_snapshot.get_sku_user_matrix(request.args.getlist("sku"), request.args.getlist("user"), limit)
+    return jsonify(to_schema_sku_user_matrix(matrix).model_dump(mode="json")), 200
+
+
+# /snapshot/distribution/qty or /snapshot/distribution/order_value, ?bins=10
+@statistics_bp.get("/snapshot/distribution/<string:metric>")
+@inject
+def get_distribution(
+        metric: str,
+        order_snapshot: OrderSnapshot = Provide[Container.order_snapshot]
+) -> ResponseReturnValue:
+    bins = request.args.get("bins", default=10, type=int)
+    histogram = order_snapshot.get_distribution(metric, bins)
+    return jsonify(to_schema_histogram(histogram).model_dump(mode="json")), 200
+
+
+def _decimal_args(name: str) -> list[Decimal]:
+    values = request.args.getlist(name)
+    try:
+        return [Decimal(value) for value in values]
+    except ArithmeticError:         # decimal.InvalidOperation
+        raise ValidationException(f'{name} must be a number')
+
+
+def _datetime_arg(name: str) -> datetime | None:
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValidationException(f'{name}={value} is not an ISO datetime')
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)        # buckets are naive UTC
+    return moment
+
+
+def _metric() -> str:
+    return request.args.get("metric", default="value")
+
+
+def _filters() -> tuple[list[str], str | None]:
+    return request.args.getlist("sku"), request.args.get("user")
@@ -0,0 +1,106 @@
+from pydantic import BaseModel
+from datetime import datetime
+from decimal import Decimal
+
+
+
+class SkuStatsResponseSchema(BaseModel):
+    sku: str
+    units: int
+    revenue: Decimal
+    orders_qty: int
+
+
+class UserStatsResponseSchema(BaseModel):
+    user_name: str
+    orders_qty: int
+    units: int
+    revenue: Decimal
+
+
+class OrderSummaryResponseSchema(BaseModel):
+    orders_qty: int
+    lines_qty: int
+    units: int
+    revenue: Decimal
+    avg_units_per_order: float
+    avg_lines_per_order: float
+    avg_order_value: Decimal
+
+
+class OrderRankResponseSchema(BaseModel):
+    order_id: int
+    metric: str
+    value: Decimal | int
+    rank: int
+    total: int
+
+
+class QuantilesResponseSchema(BaseModel):
+    scope: str
+    key: str
+    count: int
+    quantiles: dict[str, float | None]      # "0.5" -> qty
+    exact: bool
+    rank_error: float
+
+
+class TopSkuResponseSchema(BaseModel):
+    sku: str
+    units: int
+    error: int
+
+
+class SalesBucketResponseSchema(BaseModel):
+    bucket: datetime
+    units: int
+    revenue: Decimal
+
+
+class SnapshotInfoResponseSchema(BaseModel):
+    lines: int
+    skus: int
+    users: int
+    as_of: datetime | None
+
+
+class PriceBandResponseSchema(BaseModel):
+    low: Decimal | None
+    high: Decimal | None
+    lines: int
+    units: int
+    revenue: Decimal
+
+
+class SkuUserMatrixResponseSchema(BaseModel):
+    skus: list[str]
+    users: list[str]
+    units: list[list[int]]
+
+
+class HistogramResponseSchema(BaseModel):
+    metric: str
+    edges: list[float]
+    counts: list[int]
+
+
+class BoughtTogetherResponseSchema(BaseModel):
+    sku: str
+    orders: int
+    share: float
+
+
+class CacheStatsResponseSchema(BaseModel):
+    name: str
+    hits: int
+    misses: int
+    hit_ratio: float
+    size: int
+    maxsize: int
+
+
+class CoalescingStatsResponseSchema(BaseModel):
+    name: str
+    calls: int
+    executions: int
+    collapsed: int
@@ -1,5 +1,6 @@
-from webapp.services.storage.dtos import ModifyStorageDTO, ReadStorageDTO
-from webapp.api.storage.schemas import StorageResponseSchema, ModifyStorageSchema
+from webapp.services.storage.dtos import ModifyStorageDTO, ReadStorageDTO, ReorderSuggestionDTO, InventoryStatsDTO
+from webapp.api.storage.schemas import StorageResponseSchema, ModifyStorageSchema, ReorderSuggestionResponseSchema, \
+    InventoryStatsResponseSchema, InventoryBinResponseSchema
 
 
 def to_schema_storage_response(dto: ReadStorageDTO) -> StorageResponseSchema:
@@ -9,6 +10,29 @@ def to_schema_storage_response(dto: ReadStorageDTO) -> StorageResponseSchema:
     )
 
 
+def to_schema_reorder_suggestion(dto: ReorderSuggestionDTO) -> ReorderSuggestionResponseSchema:
+    return ReorderSuggestionResponseSchema(
+        sku=dto.sku,
+        stock=dto.stock,
+        daily_demand=dto.daily_demand,
+        days_of_cover=dto.days_of_cover,
+        suggested_qty=dto.suggested_qty,
+        computed_at=dto.computed_at
+    )
+
+
+def to_schema_inventory_stats(dto: InventoryStatsDTO) -> InventoryStatsResponseSchema:
+    return InventoryStatsResponseSchema(
+        skus=dto.skus,
+        zero_stock=dto.zero_stock,
+        total_units=dto.total_units,
+        min_qty=dto.min_qty,
+        max_qty=dto.max_qty,
+        quantiles={str(q): qty for q, qty in dto.quantiles.items()},
+        histogram=[InventoryBinResponseSchema(low=b.low, high=b.high, skus=b.skus) for b in dto.histogram]
+    )
+
+
 def to_dto_modify_storage(schema: ModifyStorageSchema) -> ModifyStorageDTO:
     return ModifyStorageDTO(sku=schema.sku, quantity=schema.quantity)
 
@@ -3,10 +3,12 @@ from flask.typing import ResponseReturnValue
 from dependency_injector.wiring import inject, Provide
 
 from webapp.api.storage.schemas import StorageResponseSchema, ModifyStorageSchema
-from webapp.api.storage.mappers import to_schema_storage_response, to_dto_modify_storage
+from webapp.api.storage.mappers import to_schema_storage_response, to_dto_modify_storage, to_schema_reorder_suggestion, \
+    to_schema_inventory_stats
 
 
-from webapp.services.storage.service import StorageService
+from webapp.services.storage.service import StorageService, DEFAULT_INVENTORY_QUANTILES
+from webapp.services.storage.forecast import DemandForecastService
 from webapp.container import Container
 from . import storage_bp
 
@@ -37,6 +39,31 @@ def get_by_price_between(storage_service: StorageService = Provide[Container.sto
     return jsonify([to_schema_storage_response(storage).model_dump(mode="json") for storage in storages]), 200
 
 
+# distribution of stock over all storage rows: ?bins=10 equal histogram bins, ?q=0.1&q=0.5&q=0.9 quantiles of qty
+@storage_bp.get("/stats")
+@inject
+def get_inventory_stats(storage_service: StorageService = Provide[Container.storage_service]) -> ResponseReturnValue:
+    bins = request.args.get("bins", default=10, type=int)
+    qs = request.args.getlist("q", type=float) or DEFAULT_INVENTORY_QUANTILES
+
+    stats = storage_service.get_inventory_stats(bins, qs)
+    return jsonify(to_schema_inventory_stats(stats).model_dump(mode="json")), 200
+
+
+# SKUs running out by the last `flask storage forecast`: ?max_days=7 (default REORDER_LEAD_TIME_DAYS) of cover at most,
+# ?limit=50. Nothing is computed here.
+@storage_bp.get("/reorder")
+@inject
+def get_reorder_suggestions(
+        forecast_service: DemandForecastService = Provide[Container.demand_forecast_service]
+    ) -> ResponseReturnValue:
+    max_days = request.args.get("max_days", default=None, type=float)
+    limit = request.args.get("limit", default=50, type=int)
+
+    suggestions = forecast_service.get_reorder_suggestions(max_days, limit)
+    return jsonify([to_schema_reorder_suggestion(s).model_dump(mode="json") for s in suggestions]), 200
+
+
 @storage_bp.post("/")
 @inject
 def add_product_to_storage(storage_service: StorageService = Provide[Container.storage_service]) -> ResponseReturnValue:
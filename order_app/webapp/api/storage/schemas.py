@@ -1,3 +1,6 @@
+from datetime import datetime
+from decimal import Decimal
+
 from pydantic import BaseModel, Field
 
 class StorageResponseSchema(BaseModel):
@@ -8,3 +11,28 @@ class StorageResponseSchema(BaseModel):
 class ModifyStorageSchema(BaseModel):
     sku: str = Field(min_length=3)
     quantity: int = Field(gt=0)
+
+
+class ReorderSuggestionResponseSchema(BaseModel):
+    sku: str
+    stock: int
+    daily_demand: Decimal
+    days_of_cover: Decimal | None
+    suggested_qty: int
+    computed_at: datetime
+
+
+class InventoryBinResponseSchema(BaseModel):
+    low: int
+    high: int
+    skus: int
+
+
+class InventoryStatsResponseSchema(BaseModel):
+    skus: int
+    zero_stock: int
+    total_units: int
+    min_qty: int
+    max_qty: int
+    quantiles: dict[str, int]               # "0.5" -> qty
+    histogram: list[InventoryBinResponseSchema]
@@ -1,5 +1,5 @@
-from webapp.services.users.dtos import ReadUserDTO, CreateUserDTO
-from webapp.api.users.schemas import CreateUserSchema, UserResponseSchema
+from webapp.services.users.dtos import ReadUserDTO, CreateUserDTO, UserOrderSummaryDTO
+from webapp.api.users.schemas import CreateUserSchema, UserResponseSchema, UserOrderSummaryResponseSchema
 
 
 def to_schemas_user_response(dto: ReadUserDTO) -> UserResponseSchema:
@@ -10,6 +10,17 @@ def to_schemas_user_response(dto: ReadUserDTO) -> UserResponseSchema:
     )
 
 
+def to_schemas_user_order_summary(dto: UserOrderSummaryDTO) -> UserOrderSummaryResponseSchema:
+    return UserOrderSummaryResponseSchema(
+        name=dto.name,
+        orders_count=dto.orders_count,
+        units=dto.units,
+        lifetime_value=dto.lifetime_value,
+        first_order_at=dto.first_order_at,
+        last_order_at=dto.last_order_at
+    )
+
+
 def to_dto_create_user(schema: CreateUserSchema) -> CreateUserDTO:
     return CreateUserDTO(name= schema.name)
 
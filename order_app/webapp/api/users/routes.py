@@ -2,17 +2,25 @@ from flask import request, jsonify
 from flask.typing import ResponseReturnValue
 from dependency_injector.wiring import inject, Provide
 from webapp.api.users.schemas import CreateUserSchema
-from webapp.api.users.mappers import to_schemas_user_response, to_dto_create_user
+from webapp.api.users.mappers import to_schemas_user_response, to_dto_create_user, \
+    to_schemas_user_order_summary
 
 from webapp.services.users.service import UserService
+from webapp.services.pagination import DEFAULT_PAGE_SIZE
 from webapp.container import Container
 from . import user_bp
 
 @user_bp.get("/")
 @inject
 def get_all(user_service: UserService = Provide[Container.user_service]) -> ResponseReturnValue:
-    read_dto = user_service.get_all()
-    return jsonify([to_schemas_user_response(user).model_dump(mode='json') for user in read_dto]), 200
+    limit = request.args.get("limit", default=DEFAULT_PAGE_SIZE, type=int)
+    after = request.args.get("after", default=None, type=int)
+
+    page = user_service.get_all(limit, after)
+    response = jsonify([to_schemas_user_response(user).model_dump(mode='json') for user in page.items])
+    if page.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(page.next_cursor)       # same cursor contract as orders listing
+    return response, 200
 
 
 @user_bp.get("/<username>")
@@ -22,6 +30,13 @@ def get_by_username(username: str, user_service: UserService = Provide[Container
     return jsonify(to_schemas_user_response(user_dto).model_dump(mode='json')), 200
 
 
+@user_bp.get("/<username>/summary")
+@inject
+def get_order_summary(username: str, user_service: UserService = Provide[Container.user_service]) -> ResponseReturnValue:
+    summary = user_service.get_order_summary(username)
+    return jsonify(to_schemas_user_order_summary(summary).model_dump(mode='json')), 200
+
+
 @user_bp.delete("/<int:user_id>")
 @inject
 def delete_user_by_id(user_id: int, user_service: UserService = Provide[Container.user_service]) -> ResponseReturnValue:
@@ -1,3 +1,6 @@
+from datetime import datetime
+from decimal import Decimal
+
 from pydantic import BaseModel, StringConstraints, Field
 from typing_extensions import Annotated
 
@@ -14,4 +17,13 @@ class CreateUserSchema(BaseModel):
 class UserResponseSchema(BaseModel):
     id: int
     name: str
-    orders_qty: int
\ No newline at end of file
+    orders_qty: int
+
+
+class UserOrderSummaryResponseSchema(BaseModel):
+    name: str
+    orders_count: int
+    units: int
+    lifetime_value: Decimal
+    first_order_at: datetime | None
+    last_order_at: datetime | None
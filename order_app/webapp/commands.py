@@ -0,0 +1,91 @@
+# Flask CLI commands for maintenance jobs, registered in create_app:
+# >> flask sketches rebuild
+# >> flask rollups backfill
+# >> flask orders recompute-totals
+# >> flask users rebuild-stats
+# >> flask recommendations rebuild
+# >> flask storage forecast
+
+import click
+from flask.cli import AppGroup
+from dependency_injector.wiring import inject, Provide
+
+from webapp.container import Container
+from webapp.services.orders.service import OrderService
+from webapp.services.statistics.quantiles import QuantileSketchService
+from webapp.services.statistics.sales import SalesRollupService
+from webapp.services.statistics.bought_together import BoughtTogetherIndex
+from webapp.services.storage.forecast import DemandForecastService
+from webapp.services.users.service import UserService
+
+
+sketches_cli = AppGroup("sketches", help="Quantile sketches of order line qty")
+rollups_cli = AppGroup("rollups", help="Hourly and daily sales rollups")
+orders_cli = AppGroup("orders", help="Order maintenance")
+users_cli = AppGroup("users", help="User maintenance")
+recommendations_cli = AppGroup("recommendations", help="Bought together SKU pairs")
+storage_cli = AppGroup("storage", help="Stock planning")
+
+
+@sketches_cli.command("rebuild")
+@click.option("--chunk-size", default=10_000, show_default=True, help="Rows fetched from the database at once")
+@inject
+def rebuild_sketches(
+        chunk_size: int,
+        sketch_service: QuantileSketchService = Provide[Container.quantile_sketch_service]
+) -> None:
+    lines = sketch_service.rebuild(chunk_size)
+    click.echo(f"Quantile sketches rebuilt from {lines} order lines")
+
+
+@rollups_cli.command("backfill")
+@click.option("--chunk-size", default=10_000, show_default=True, help="Rows fetched from / written to the database at once")
+@inject
+def backfill_rollups(
+        chunk_size: int,
+        rollup_service: SalesRollupService = Provide[Container.sales_rollup_service]
+) -> None:
+    lines = rollup_service.backfill(chunk_size)
+    click.echo(f"Sales rollups rebuilt from {lines} order lines")
+
+
+@orders_cli.command("recompute-totals")
+@click.option("--chunk-size", default=10_000, show_default=True, help="Orders updated in one transaction")
+@inject
+def recompute_order_totals(
+        chunk_size: int,
+        order_service: OrderService = Provide[Container.order_service]
+) -> None:
+    orders = order_service.recompute_order_totals(chunk_size)
+    click.echo(f"Totals of {orders} orders computed again")
+
+
+@users_cli.command("rebuild-stats")
+@click.option("--chunk-size", default=10_000, show_default=True, help="Users updated in one transaction")
+@inject
+def rebuild_user_stats(
+        chunk_size: int,
+        user_service: UserService = Provide[Container.user_service]
+) -> None:
+    users = user_service.rebuild_order_stats(chunk_size)
+    click.echo(f"Order stats of {users} users computed again")
+
+
+@recommendations_cli.command("rebuild")
+@click.option("--chunk-size", default=10_000, show_default=True, help="Rows fetched from / written to the database at once")
+@inject
+def rebuild_recommendations(
+        chunk_size: int,
+        bought_together: BoughtTogetherIndex = Provide[Container.bought_together_index]
+) -> None:
+    orders = bought_together.rebuild(chunk_size)
+    click.echo(f"SKU pairs rebuilt from {orders} orders")
+
+
+@storage_cli.command("forecast")
+@inject
+def forecast_demand(
+        forecast_service: DemandForecastService = Provide[Container.demand_forecast_service]
+) -> None:
+    products = forecast_service.run()
+    click.echo(f"Demand forecast stored for {products} products")
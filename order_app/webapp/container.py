@@ -8,11 +8,37 @@ from webapp.database.repositories.orders import TotalOrderRepository
 from webapp.database.repositories.products import ProductRepository
 from webapp.database.repositories.storage import StorageRepository
 from webapp.database.repositories.users import UserRepository
+from webapp.database.repositories.idempotency import IdempotencyRepository
+from webapp.database.repositories.statistics import StatisticsRepository
+from webapp.database.repositories.quantile_sketches import QuantileSketchRepository
+from webapp.database.repositories.sales_rollups import SalesRollupRepository
+from webapp.database.repositories.user_order_stats import UserOrderStatsRepository
+from webapp.database.repositories.sku_pairs import SkuPairRepository
+from webapp.database.repositories.reorder_forecasts import ReorderForecastRepository
+from webapp.database.cache import RowCache
+from webapp.database.models.products import Product
+from webapp.database.models.storage import Storage
+from webapp.database.models.users import User
+from webapp.core.cache_backends import LocalCacheBackend, SharedMemoryCacheBackend, RespClient, RedisCacheBackend
 
 from webapp.services.orders.service import OrderService
 from webapp.services.products.service import ProductService
+from webapp.services.products.dtos import ReadProductDTO
+from webapp.services.products.typeahead import ProductTypeahead
 from webapp.services.storage.service import StorageService
+from webapp.services.storage.dtos import ReadStorageDTO
 from webapp.services.users.service import UserService
+from webapp.services.idempotency.service import IdempotencyService
+from webapp.services.statistics.service import StatisticsService
+from webapp.services.statistics.order_index import OrderStatisticsIndex
+from webapp.services.statistics.quantiles import QuantileSketchService
+from webapp.services.statistics.top_skus import TopSkuTracker
+from webapp.services.statistics.sales import SalesRollupService
+from webapp.services.statistics.snapshot import OrderSnapshot
+from webapp.services.statistics.bought_together import BoughtTogetherIndex
+from webapp.services.storage.forecast import DemandForecastService
+from webapp.services.single_flight import SingleFlight
+from webapp.settings import Config
 
 class Container(containers.DeclarativeContainer):
 
@@ -23,7 +49,11 @@ class Container(containers.DeclarativeContainer):
             "webapp.api.orders",
             "webapp.api.products",
             "webapp.api.storage",
-            "webapp.api.users"
+            "webapp.api.users",
+            "webapp.api.statistics"
+        ],
+        modules=[
+            "webapp.commands"
         ]
     )
 
@@ -35,28 +65,173 @@ class Container(containers.DeclarativeContainer):
     storage_repository = providers.Singleton(StorageRepository)
     products_repository = providers.Singleton(ProductRepository)
     total_orders_repository = providers.Singleton(TotalOrderRepository)
+    idempotency_repository = providers.Singleton(IdempotencyRepository)
+    statistics_repository = providers.Singleton(StatisticsRepository)
+    quantile_sketch_repository = providers.Singleton(QuantileSketchRepository)
+    sales_rollup_repository = providers.Singleton(SalesRollupRepository)
+    user_order_stats_repository = providers.Singleton(UserOrderStatsRepository)
+    sku_pair_repository = providers.Singleton(SkuPairRepository)
+    reorder_forecast_repository = providers.Singleton(ReorderForecastRepository)
+
+    # one backend for all read-through caches, picked by CACHE_BACKEND (see settings.py)
+    cache_backend = providers.Selector(
+        providers.Object(Config.CACHE_BACKEND),
+        local = providers.Singleton(
+            LocalCacheBackend,
+            maxsize = Config.CACHE_LOCAL_SIZE
+        ),
+        shared_memory = providers.Singleton(
+            SharedMemoryCacheBackend,
+            segment = Config.CACHE_SHM_SEGMENT,
+            slots = Config.CACHE_SHM_SLOTS,
+            slot_size = Config.CACHE_SHM_SLOT_BYTES
+        ),
+        redis = providers.Singleton(
+            RedisCacheBackend,
+            client = providers.Singleton(
+                RespClient,
+                url = Config.CACHE_REDIS_URL,
+                timeout_seconds = Config.CACHE_REDIS_TIMEOUT_SECONDS,
+                retry_after_seconds = Config.CACHE_REDIS_RETRY_SECONDS
+            ),
+            key_prefix = Config.CACHE_KEY_PREFIX
+        )
+    )
+
+    product_cache: providers.Singleton[RowCache[ReadProductDTO]] = providers.Singleton(
+        RowCache,
+        model = Product,
+        backend = cache_backend,
+        ttl_seconds = Config.PRODUCT_CACHE_TTL_SECONDS
+    )
+
+    storage_cache: providers.Singleton[RowCache[ReadStorageDTO]] = providers.Singleton(
+        RowCache,
+        model = Storage,
+        backend = cache_backend,
+        ttl_seconds = Config.STORAGE_CACHE_TTL_SECONDS
+    )
+
+    user_cache: providers.Singleton[RowCache[int]] = providers.Singleton(          # user id by username
+        RowCache,
+        model = User,
+        backend = cache_backend,
+        ttl_seconds = Config.USER_CACHE_TTL_SECONDS,
+        key = "username"
+    )
+
+    # one per worker, shared by the services - names of the reads keep their results apart
+    single_flight = providers.Singleton(SingleFlight)
+
+    order_statistics_index = providers.Singleton(
+        OrderStatisticsIndex,
+        statistics_repo = statistics_repository,
+        max_age_seconds = Config.ORDER_STATS_MAX_AGE_SECONDS
+    )
+
+    quantile_sketch_service = providers.Singleton(
+        QuantileSketchService,
+        sketch_repo = quantile_sketch_repository,
+        order_repo = total_orders_repository,
+        k = Config.QUANTILE_SKETCH_K
+    )
+
+    top_sku_tracker = providers.Singleton(
+        TopSkuTracker,
+        window_minutes = Config.TOP_SKUS_WINDOW_MINUTES,
+        capacity = Config.TOP_SKUS_CAPACITY
+    )
+
+    order_snapshot = providers.Singleton(
+        OrderSnapshot,
+        statistics_repo = statistics_repository,
+        max_age_seconds = Config.ORDER_SNAPSHOT_MAX_AGE_SECONDS,
+        full_reload_seconds = Config.ORDER_SNAPSHOT_FULL_RELOAD_SECONDS,
+        lag_seconds = Config.ORDER_SNAPSHOT_LAG_SECONDS
+    )
+
+    demand_forecast_service = providers.Singleton(
+        DemandForecastService,
+        forecast_repo = reorder_forecast_repository,
+        history_days = Config.REORDER_HISTORY_DAYS,
+        alpha = Config.REORDER_SMOOTHING_ALPHA,
+        lead_time_days = Config.REORDER_LEAD_TIME_DAYS,
+        cover_days = Config.REORDER_COVER_DAYS
+    )
+
+    bought_together_index = providers.Singleton(
+        BoughtTogetherIndex,
+        pair_repo = sku_pair_repository,
+        max_age_seconds = Config.BOUGHT_TOGETHER_MAX_AGE_SECONDS
+    )
+
+    sales_rollup_service = providers.Singleton(
+        SalesRollupService,
+        rollup_repo = sales_rollup_repository,
+        product_repo = products_repository
+    )
 
 
     order_service = providers.Singleton(
         OrderService,
         order_repo = total_orders_repository,
         storage_repo = storage_repository,
-        user_repo = user_repository
+        user_repo = user_repository,
+        stock_strategy = Config.STOCK_MUTATION_STRATEGY,
+        group_commit = Config.ORDER_GROUP_COMMIT,
+        group_commit_window_ms = Config.ORDER_GROUP_COMMIT_WINDOW_MS,
+        group_commit_max_batch = Config.ORDER_GROUP_COMMIT_MAX_BATCH,
+        order_index = order_statistics_index,
+        quantile_sketches = quantile_sketch_service,
+        top_skus = top_sku_tracker,
+        sales_rollups = sales_rollup_service,
+        user_stats_repo = user_order_stats_repository,
+        bought_together = bought_together_index,
+        user_cache = user_cache,
+        flights = single_flight if Config.READ_COALESCING else None
+    )
+
+    product_typeahead = providers.Singleton(
+        ProductTypeahead,
+        product_repo = products_repository,
+        max_products = Config.TYPEAHEAD_MAX_PRODUCTS
     )
 
     product_service = providers.Singleton(
         ProductService,
-        product_repo = products_repository
+        product_repo = products_repository,
+        typeahead = product_typeahead,
+        product_cache = product_cache
     )
 
 
     storage_service = providers.Singleton(
         StorageService,
         storage_repo = storage_repository,
-        product_repo = products_repository
+        product_repo = products_repository,
+        stock_strategy = Config.STOCK_MUTATION_STRATEGY,
+        product_cache = product_cache,
+        storage_cache = storage_cache,
+        flights = single_flight if Config.READ_COALESCING else None
     )
 
     user_service = providers.Singleton(
         UserService,
-        user_repo = user_repository
+        user_repo = user_repository,
+        user_stats_repo = user_order_stats_repository
+    )
+
+    idempotency_service = providers.Singleton(
+        IdempotencyService,
+        idempotency_repo = idempotency_repository,
+        ttl_seconds = Config.IDEMPOTENCY_TTL_SECONDS,
+        lease_seconds = Config.IDEMPOTENCY_LEASE_SECONDS,
+        cache_size = Config.IDEMPOTENCY_CACHE_SIZE
+    )
+
+    statistics_service = providers.Singleton(
+        StatisticsService,
+        statistics_repo = statistics_repository,
+        order_index = order_statistics_index,
+        flights = single_flight if Config.READ_COALESCING else None
     )
@@ -0,0 +1,5 @@
+from webapp.core.cache_backends.base import CacheBackend
+from webapp.core.cache_backends.local import LocalCacheBackend
+from webapp.core.cache_backends.shared_memory import SharedMemoryCacheBackend
+from webapp.core.cache_backends.resp import RespClient, RespError, RedisCacheBackend
+
@@ -0,0 +1,24 @@
+from typing import Any, Collection, Protocol
+
+from webapp.core.lru import CacheStats
+
+
+# Key -> value store behind the read-through caches (database/cache.py). Selected with CACHE_BACKEND:
+#   local          - LocalCacheBackend, an LRU in memory of one worker; a commit drops the keys only there
+#   shared_memory  - SharedMemoryCacheBackend, one table in shared memory for all workers of one host
+#   redis          - RedisCacheBackend, a Redis-protocol server (Redis, Valkey, KeyDB ..) for all workers of all hosts
+# With a shared backend the entries live in one place, so dropping the keys of a commit drops them for every worker.
+# Errors of a remote store are not raised: get() becomes a miss, a failed delete leaves the entry until its TTL.
+class CacheBackend(Protocol):
+    name: str
+
+    def get(self, key: str) -> Any | None: ...
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None: ...
+
+    def delete(self, keys: Collection[str]) -> None: ...
+
+    # all keys starting with the prefix - one cache dropped as a whole
+    def delete_prefix(self, prefix: str) -> None: ...
+
+    def stats(self) -> CacheStats: ...
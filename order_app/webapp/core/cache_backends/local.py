@@ -0,0 +1,28 @@
+from typing import Any, Collection
+
+from webapp.core.lru import LRUCache, CacheStats
+
+
+# Per-process backend: values are kept as they are (no serialization), maxsize entries of all caches together.
+class LocalCacheBackend:
+    name = "local"
+
+    def __init__(self, maxsize: int = 10_000) -> None:
+        self.lru: LRUCache[str, Any] = LRUCache(maxsize)
+
+    def get(self, key: str) -> Any | None:
+        return self.lru.get(key)
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self.lru.put(key, value, ttl_seconds)
+
+    def delete(self, keys: Collection[str]) -> None:
+        for key in keys:
+            self.lru.delete(key)
+
+    def delete_prefix(self, prefix: str) -> None:
+        for key in [key for key in self.lru.keys() if key.startswith(prefix)]:
+            self.lru.delete(key)
+
+    def stats(self) -> CacheStats:
+        return self.lru.stats()
@@ -0,0 +1,194 @@
+# Cache in a Redis-protocol server (Redis, Valkey, KeyDB, Dragonfly ..) shared by all workers of all hosts. Speaks RESP2
+# over a plain socket - GET, SET .. PX, DEL, SCAN and DBSIZE are all it needs, so there is no client library to
+# install. One connection per worker, used under a lock; a broken connection is opened again on the next command.
+#
+# The server is an optimization: when it is down or slow (timeout_seconds) get() is a miss, set() is skipped and a
+# failed delete is logged - the entry then lives until its TTL. After a failed command the server is skipped for
+# retry_after_seconds (commands fail at once, no connect), so an outage costs one timeout per worker and interval
+# instead of one per request. Keys are prefixed with key_prefix, so several apps
+# can share one database. Values are pickled - the server must be private to the app.
+
+import logging
+import pickle
+import socket
+import threading
+import time
+from typing import Any, Callable, Collection
+from urllib.parse import urlsplit
+
+from webapp.core.lru import CacheStats
+
+
+logger = logging.getLogger(__name__)
+
+type RespValue = bytes | int | list["RespValue"] | None
+
+
+class RespError(Exception):
+    pass
+
+
+class RespClient:
+    def __init__(
+            self,
+            url: str = "redis://localhost:6379/0",
+            timeout_seconds: float = 0.5,
+            retry_after_seconds: float = 5.0,
+            clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.password = parts.password
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.timeout_seconds = timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self.clock = clock
+        self._sock: socket.socket | None = None
+        self._reader: Any = None
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+
+
+    def execute(self, *args: str | bytes | int | float) -> RespValue:
+        with self._lock:
+            if self._sock is None and self.clock() < self._down_until:
+                raise ConnectionError("Cache server skipped after a failed command")
+            try:
+                if self._sock is None:
+                    self._connect()
+                return self._call(*args)
+            except OSError:
+                self._close()
+                self._down_until = self.clock() + self.retry_after_seconds
+                raise
+
+
+    def close(self) -> None:
+        with self._lock:
+            self._close()
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    def _connect(self) -> None:
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout_seconds)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+        if self.password:
+            self._call("AUTH", self.password)
+        if self.db:
+            self._call("SELECT", self.db)
+
+
+    def _close(self) -> None:
+        if self._sock is not None:
+            self._reader.close()
+            self._sock.close()
+        self._sock, self._reader = None, None
+
+
+    def _call(self, *args: str | bytes | int | float) -> RespValue:
+        assert self._sock is not None
+        parts = [arg if isinstance(arg, bytes) else str(arg).encode() for arg in args]
+        self._sock.sendall(b"".join([b"*%d\r\n" % len(parts), *(b"$%d\r\n%s\r\n" % (len(p), p) for p in parts)]))
+        return self._read()
+
+
+    def _read(self) -> RespValue:
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by the cache server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest
+        if kind == b"-":
+            raise RespError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [self._read() for _ in range(length)]
+        raise RespError(f"Unknown reply {line!r}")
+
+
+class RedisCacheBackend:
+    name = "redis"
+
+    def __init__(self, client: RespClient, key_prefix: str = "order_app:") -> None:
+        self.client = client
+        self.key_prefix = key_prefix
+        self.hits = 0
+        self.misses = 0
+
+
+    def get(self, key: str) -> Any | None:
+        try:
+            value = self.client.execute("GET", self.key_prefix + key)
+        except (OSError, RespError):
+            logger.warning("Cache server is not available, reading %s from the database", key, exc_info=True)
+            value = None
+        if not isinstance(value, bytes):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(value)
+
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        try:
+            self.client.execute("SET", self.key_prefix + key, payload, "PX", max(int(ttl_seconds * 1000), 1))
+        except (OSError, RespError):
+            logger.warning("Cache server is not available, %s is not cached", key, exc_info=True)
+
+
+    def delete(self, keys: Collection[str]) -> None:
+        if not keys:
+            return
+        try:
+            self.client.execute("DEL", *(self.key_prefix + key for key in keys))
+        except (OSError, RespError):
+            logger.exception("Dropping %s from the cache server failed - stale until their TTL", list(keys))
+
+
+    def delete_prefix(self, prefix: str) -> None:
+        try:
+            cursor = b"0"
+            while True:
+                reply = self.client.execute("SCAN", cursor, "MATCH", self._pattern(prefix), "COUNT", 1000)
+                if not isinstance(reply, list) or len(reply) != 2:
+                    raise RespError(f"Unexpected SCAN reply {reply!r}")
+                next_cursor, found = reply
+                if not isinstance(next_cursor, bytes) or not isinstance(found, list):
+                    raise RespError(f"Unexpected SCAN reply {reply!r}")
+                cursor = next_cursor
+                keys = [key for key in found if isinstance(key, bytes)]
+                if keys:
+                    self.client.execute("DEL", *keys)
+                if cursor == b"0":
+                    return
+        except (OSError, RespError):
+            logger.exception("Dropping %s* from the cache server failed - stale until their TTL", prefix)
+
+
+    # size is the number of keys of the whole database (DBSIZE), maxsize 0 - bounded by maxmemory of the server
+    def stats(self) -> CacheStats:
+        try:
+            reply = self.client.execute("DBSIZE")
+        except (OSError, RespError):
+            reply = None
+        size = reply if isinstance(reply, int) else 0
+        return CacheStats(hits=self.hits, misses=self.misses, size=size, maxsize=0)
+
+
+    def _pattern(self, prefix: str) -> str:
+        escaped = "".join("\\" + c if c in "*?[]\\" else c for c in self.key_prefix + prefix)
+        return escaped + "*"
@@ -0,0 +1,192 @@
+# Cache for all workers of one host: a fixed hash table in a named shared memory segment (/dev/shm/<segment>). The
+# first worker creates the segment, the others attach to it; it outlives the workers (a restart keeps it warm) and
+# has to be removed by hand (rm /dev/shm/<segment>) when its layout setting changes.
+#
+# Layout: header (magic, slots, slot size) and `slots` slots of `slot_size` bytes:
+#   state | key hash | expires at (unix time) | key length | value length | key | pickled value
+# Open addressing - a key can sit in one of PROBES slots after slot hash % slots. A new key takes a free, deleted or
+# expired slot of its window, otherwise the one that expires first. Values that do not fit in a slot are not cached.
+# Every access takes an flock of <lock_dir>/<segment>.lock (workers) and a thread lock (threads of one worker) - the
+# work inside is a few struct reads, so one lock is enough.
+#
+# Values are pickled - the segment is readable only by the user running the app (mode 0600).
+
+import fcntl
+import hashlib
+import os
+import pickle
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Any, Callable, Collection, Iterator
+
+from webapp.core.lru import CacheStats
+
+
+MAGIC = b"OACACHE1"
+HEADER = struct.Struct("<8sQQ")                 # magic, slots, slot size
+SLOT = struct.Struct("<BQdHI")                  # state, key hash, expires at, key length, value length
+EMPTY, USED, DELETED = 0, 1, 2
+PROBES = 8
+
+
+def _hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")      # same in every process
+
+
+class SharedMemoryCacheBackend:
+    name = "shared_memory"
+
+    def __init__(
+            self,
+            segment: str = "order_app_cache",
+            slots: int = 16_384,
+            slot_size: int = 512,
+            lock_dir: str | None = None,
+            clock: Callable[[], float] = time.time
+    ) -> None:
+        if slots <= 0 or slot_size <= SLOT.size:
+            raise ValueError(f"slots must be positive and slot_size bigger than {SLOT.size}")
+        self.segment = segment
+        self.slots = slots
+        self.slot_size = slot_size
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._thread_lock = threading.Lock()
+        self._lock_file = open(os.path.join(lock_dir or tempfile.gettempdir(), f"{segment}.lock"), "a+b")
+
+        size = HEADER.size + slots * slot_size
+        with self._locked():
+            try:
+                self._shm = shared_memory.SharedMemory(segment, create=True, size=size, track=False)
+                HEADER.pack_into(self._shm.buf, 0, MAGIC, slots, slot_size)
+            except FileExistsError:
+                self._shm = shared_memory.SharedMemory(segment, track=False)
+                if HEADER.unpack_from(self._shm.buf, 0) != (MAGIC, slots, slot_size):
+                    raise ValueError(f"Shared memory segment {segment} has another layout - remove /dev/shm/{segment}")
+
+
+    def get(self, key: str) -> Any | None:
+        raw = key.encode()
+        with self._locked():
+            offset = self._find(_hash(raw), raw)
+            value = self._read_value(offset) if offset is not None else None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return pickle.loads(value)
+
+
+    def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        raw = key.encode()
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if SLOT.size + len(raw) + len(payload) > self.slot_size:
+            return
+
+        key_hash = _hash(raw)
+        with self._locked():
+            offset = self._find(key_hash, raw)
+            if offset is None:
+                offset = self._free_slot(key_hash)
+            buf = self._shm.buf
+            start = offset + SLOT.size
+            buf[start:start + len(raw)] = raw
+            buf[start + len(raw):start + len(raw) + len(payload)] = payload
+            SLOT.pack_into(buf, offset, USED, key_hash, self.clock() + ttl_seconds, len(raw), len(payload))
+
+
+    def delete(self, keys: Collection[str]) -> None:
+        with self._locked():
+            for key in keys:
+                raw = key.encode()
+                offset = self._find(_hash(raw), raw)
+                if offset is not None:
+                    self._shm.buf[offset] = DELETED
+
+
+    def delete_prefix(self, prefix: str) -> None:
+        raw = prefix.encode()
+        with self._locked():
+            for offset in self._used():
+                if self._read_key(offset).startswith(raw):
+                    self._shm.buf[offset] = DELETED
+
+
+    def stats(self) -> CacheStats:
+        with self._locked():
+            now = self.clock()
+            size = sum(1 for offset in self._used() if SLOT.unpack_from(self._shm.buf, offset)[2] > now)
+        return CacheStats(hits=self.hits, misses=self.misses, size=size, maxsize=self.slots)
+
+
+    def close(self) -> None:
+        self._shm.close()
+        self._lock_file.close()
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+
+    def _offsets(self, key_hash: int) -> Iterator[int]:
+        for i in range(min(PROBES, self.slots)):
+            yield HEADER.size + (key_hash + i) % self.slots * self.slot_size
+
+
+    # offset of the live slot of the key, None when it is missing or expired (an expired slot is freed)
+    def _find(self, key_hash: int, raw: bytes) -> int | None:
+        for offset in self._offsets(key_hash):
+            state, slot_hash, expires, _, _ = SLOT.unpack_from(self._shm.buf, offset)
+            if state == EMPTY:
+                return None
+            if state == USED and slot_hash == key_hash and self._read_key(offset) == raw:
+                if expires <= self.clock():
+                    self._shm.buf[offset] = DELETED
+                    return None
+                return offset
+        return None
+
+
+    def _free_slot(self, key_hash: int) -> int:
+        now = self.clock()
+        victim, victim_expires = None, float("inf")
+        for offset in self._offsets(key_hash):
+            state, _, expires, _, _ = SLOT.unpack_from(self._shm.buf, offset)
+            if state != USED or expires <= now:
+                return offset
+            if expires < victim_expires:
+                victim, victim_expires = offset, expires
+        assert victim is not None
+        return victim
+
+
+    def _used(self) -> Iterator[int]:
+        for i in range(self.slots):
+            offset = HEADER.size + i * self.slot_size
+            if self._shm.buf[offset] == USED:
+                yield offset
+
+
+    def _read_key(self, offset: int) -> bytes:
+        key_length = SLOT.unpack_from(self._shm.buf, offset)[3]
+        return bytes(self._shm.buf[offset + SLOT.size:offset + SLOT.size + key_length])
+
+
+    def _read_value(self, offset: int) -> bytes:
+        _, _, _, key_length, value_length = SLOT.unpack_from(self._shm.buf, offset)
+        start = offset + SLOT.size + key_length
+        return bytes(self._shm.buf[start:start + value_length])
@@ -0,0 +1,9 @@
+# Time source of everything that is bucketed or compared by time (order lines, rollups, snapshot watermark, trending
+# window, forecast). Naive datetimes in UTC, written by Python - func.now() of the database gives the local time of
+# the server (Europe/Warsaw in docker-compose), so it is only a fallback for rows written outside the app.
+
+from datetime import datetime, timezone
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
@@ -0,0 +1,121 @@
+# KLL quantile sketch (Karnin, Lang, Liberty 2016) - approximate quantiles of a stream in O(k) memory.
+# Items live in levels ("compactors"); an item on level h stands for 2**h original items. When the sketch is full,
+# one level is sorted and every second item (random offset) goes one level up, so memory stays about 3k items no matter
+# how many values were added. Two sketches merge by joining their levels, so per-worker sketches can be combined.
+#
+# Error: with k = 200 the rank of a returned quantile is within about 1.65 % of n of the true rank with 99 %
+# confidence (bound published for the DataSketches KLL implementation; it scales like 1 / k). While no level was
+# compacted yet (n below about k), the sketch keeps every value and answers are exact.
+
+import math
+import random
+from typing import Any
+
+
+_shared_random = random.Random()                        # seeding a Random per sketch costs more than the sketch
+
+
+class KLLSketch:
+    def __init__(self, k: int = 200, seed: int | None = None) -> None:
+        if k < 8:
+            raise ValueError("k must be at least 8")
+        self.k = k
+        self.count = 0                                  # number of values added (sum of weights)
+        self.compactors: list[list[float]] = []
+        self.size = 0                                   # items kept in all levels
+        self.max_size = 0
+        self._random = random.Random(seed) if seed is not None else _shared_random
+        self._grow()
+
+
+    @property
+    def exact(self) -> bool:
+        return len(self.compactors) == 1
+
+
+    # bound of the rank error as a fraction of count (99 % confidence), 0 while the sketch is exact
+    @property
+    def rank_error(self) -> float:
+        return 0.0 if self.exact else round(3.3 / self.k, 4)
+
+
+    def update(self, value: float) -> None:
+        self.compactors[0].append(value)
+        self.count += 1
+        self.size += 1
+        if self.size >= self.max_size:
+            self._compress()
+
+
+    def merge(self, other: "KLLSketch") -> None:
+        while len(self.compactors) < len(other.compactors):
+            self._grow()
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.count += other.count
+        self.size += other.size
+        while self.size >= self.max_size:
+            self._compress()
+
+
+    # value below which about q of all values lie (0 <= q <= 1); None for an empty sketch
+    def quantile(self, q: float) -> float | None:
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        weighted = sorted(
+            (value, 1 << level) for level, items in enumerate(self.compactors) for value in items
+        )
+        if not weighted:
+            return None
+
+        target = max(1, math.ceil(q * self.count))
+        seen = 0
+        for value, weight in weighted:
+            seen += weight
+            if seen >= target:
+                return value
+        return weighted[-1][0]
+
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"k": self.k, "count": self.count, "compactors": self.compactors}
+
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "KLLSketch":
+        sketch = cls(k=data["k"])
+        while len(sketch.compactors) < len(data["compactors"]):
+            sketch._grow()
+        sketch.compactors = [list(items) for items in data["compactors"]]
+        sketch.count = data["count"]
+        sketch.size = sum(len(items) for items in sketch.compactors)
+        return sketch
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    # higher levels hold more: level h of H has capacity k * (2/3) ** (H - h - 1), at least 2
+    def _capacity(self, level: int) -> int:
+        depth = len(self.compactors) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+
+    def _grow(self) -> None:
+        self.compactors.append([])
+        self.max_size = sum(self._capacity(level) for level in range(len(self.compactors)))
+
+
+    # compacts the lowest full level into the level above it
+    def _compress(self) -> None:
+        for level, items in enumerate(self.compactors):
+            if len(items) >= self._capacity(level):
+                if level + 1 >= len(self.compactors):
+                    self._grow()
+                items.sort()
+                keep = [items.pop()] if len(items) % 2 else []      # odd item stays, the weight stays exact
+                promoted = items[self._random.randint(0, 1)::2]
+                self.compactors[level + 1].extend(promoted)
+                self.compactors[level] = keep
+                self.size -= len(items) - len(promoted)
+                return
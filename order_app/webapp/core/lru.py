@@ -0,0 +1,75 @@
+# Small thread-safe LRU map shared by in-process caches. Bounded by number of entries - the least recently used entry
+# is dropped when maxsize is reached. With ttl_seconds an entry also expires that many seconds after it was put
+# (an expired entry is a miss and is dropped when it is asked for). Hits and misses of get() are counted.
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+
+class LRUCache[K, V]:
+    def __init__(
+            self, maxsize: int, ttl_seconds: float | None = None, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[V, float | None]] = OrderedDict()       # key -> (value, expires at)
+        self._lock = Lock()
+
+    def get(self, key: K) -> V | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] is not None and entry[1] <= self.clock():
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._data.move_to_end(key)
+            return entry[0]
+
+    # ttl_seconds of this entry instead of the default of the cache
+    def put(self, key: K, value: V, ttl_seconds: float | None = None) -> None:
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        with self._lock:
+            expires = self.clock() + ttl if ttl is not None else None
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: K) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def keys(self) -> list[K]:
+        with self._lock:
+            return list(self._data)
+
+    def stats(self) -> CacheStats:
+        return CacheStats(hits=self.hits, misses=self.misses, size=len(self._data), maxsize=self.maxsize)
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,163 @@
+# Order-statistic tree - a treap (randomized balanced BST) where every node knows the size of its subtree, so
+# "k-th smallest key" and "how many keys are smaller than x" take O(log n) expected, as do insert and remove.
+# Keys must be comparable and unique (use tuples like (value, id) for values that repeat). Not thread-safe,
+# the owner guards it with its own lock.
+
+import random
+from collections import deque
+from typing import Any, Iterable, Protocol
+
+
+class Comparable(Protocol):
+    def __lt__(self, other: Any, /) -> bool: ...
+
+
+class _Node:
+    __slots__ = ("key", "priority", "size", "left", "right")
+
+    def __init__(self, key: Any, priority: float) -> None:
+        self.key = key
+        self.priority = priority
+        self.size = 1
+        self.left: _Node | None = None
+        self.right: _Node | None = None
+
+
+class OrderStatisticTree[K: Comparable]:
+    def __init__(self, keys: Iterable[K] = (), seed: int | None = None) -> None:
+        self._random = random.Random(seed)
+        self._root = self._build(sorted(keys))
+
+    def __len__(self) -> int:
+        return _size(self._root)
+
+    def __contains__(self, key: K) -> bool:
+        node = self._root
+        while node is not None:
+            if key == node.key:
+                return True
+            node = node.left if key < node.key else node.right
+        return False
+
+    def insert(self, key: K) -> None:
+        self._root = self._insert(self._root, _Node(key, self._random.random()))
+
+    def remove(self, key: K) -> bool:
+        self._root, removed = self._remove(self._root, key)
+        return removed
+
+    # k is 0-based: kth(0) is the smallest key, kth(len - 1) the biggest
+    def kth(self, k: int) -> K:
+        if k < 0 or k >= len(self):
+            raise IndexError(f"k={k} out of range for {len(self)} keys")
+        node = self._root
+        while node is not None:
+            left = _size(node.left)
+            if k < left:
+                node = node.left
+            elif k == left:
+                return node.key
+            else:
+                k -= left + 1
+                node = node.right
+        raise AssertionError("subtree sizes are broken")
+
+    # number of keys strictly smaller than key (the key does not have to be in the tree)
+    def rank(self, key: K) -> int:
+        result = 0
+        node = self._root
+        while node is not None:
+            if key <= node.key:
+                node = node.left
+            else:
+                result += _size(node.left) + 1
+                node = node.right
+        return result
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    # O(n) build from sorted keys: balanced shape, random priorities handed out biggest-first in BFS order, so every
+    # parent has a higher priority than its children and later inserts keep the tree a valid treap
+    def _build(self, keys: list[K]) -> _Node | None:
+        def build(lo: int, hi: int) -> _Node | None:
+            if lo >= hi:
+                return None
+            mid = (lo + hi) // 2
+            node = _Node(keys[mid], 0.0)
+            node.left = build(lo, mid)
+            node.right = build(mid + 1, hi)
+            node.size = hi - lo
+            return node
+
+        root = build(0, len(keys))
+        priorities = sorted((self._random.random() for _ in keys), reverse=True)
+        queue = deque([root] if root else [])
+        for priority in priorities:
+            node = queue.popleft()
+            node.priority = priority
+            queue.extend(child for child in (node.left, node.right) if child is not None)
+        return root
+
+
+    def _insert(self, node: _Node | None, new: _Node) -> _Node:
+        if node is None:
+            return new
+        if new.priority > node.priority:
+            new.left, new.right = self._split(node, new.key)
+            _update(new)
+            return new
+        if new.key < node.key:
+            node.left = self._insert(node.left, new)
+        else:
+            node.right = self._insert(node.right, new)
+        _update(node)
+        return node
+
+
+    def _remove(self, node: _Node | None, key: K) -> tuple[_Node | None, bool]:
+        if node is None:
+            return None, False
+        if key == node.key:
+            return self._merge(node.left, node.right), True
+        if key < node.key:
+            node.left, removed = self._remove(node.left, key)
+        else:
+            node.right, removed = self._remove(node.right, key)
+        _update(node)
+        return node, removed
+
+
+    # (keys < key, keys >= key)
+    def _split(self, node: _Node | None, key: K) -> tuple[_Node | None, _Node | None]:
+        if node is None:
+            return None, None
+        if node.key < key:
+            node.right, right = self._split(node.right, key)
+            _update(node)
+            return node, right
+        left, node.left = self._split(node.left, key)
+        _update(node)
+        return left, node
+
+
+    # every key of left is smaller than every key of right
+    def _merge(self, left: _Node | None, right: _Node | None) -> _Node | None:
+        if left is None or right is None:
+            return left or right
+        if left.priority > right.priority:
+            left.right = self._merge(left.right, right)
+            _update(left)
+            return left
+        right.left = self._merge(left, right.left)
+        _update(right)
+        return right
+
+
+def _size(node: _Node | None) -> int:
+    return node.size if node is not None else 0
+
+
+def _update(node: _Node) -> None:
+    node.size = 1 + _size(node.left) + _size(node.right)
@@ -0,0 +1,47 @@
+# Sorted-array prefix index: (term, ref) pairs kept in two parallel arrays ordered by term. All terms starting with a
+# prefix are one contiguous slice found with a binary search - O(log n + matches), no per-node objects like a trie.
+# Refs are plain ints in an array('q') (8 bytes each instead of an int object) and are returned as slices of it.
+# A bulk load sorts once (from_pairs), add() keeps the order with an insert into the arrays (O(n) memmove) - fine for
+# occasional single writes.
+# Not thread-safe - the owner locks.
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Iterable
+
+
+class PrefixIndex:
+    def __init__(self) -> None:
+        self._terms: list[str] = []
+        self._refs: array[int] = array("q")
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[tuple[str, int]]) -> "PrefixIndex":
+        index = cls()
+        ordered = sorted(pairs)
+        index._terms = [term for term, _ in ordered]
+        index._refs = array("q", (ref for _, ref in ordered))
+        return index
+
+    def add(self, term: str, ref: int) -> None:
+        i = bisect_right(self._terms, term)
+        self._terms.insert(i, term)
+        self._refs.insert(i, ref)
+
+    # refs of the terms starting with `prefix` (the first `limit` of them), ordered by term - then by ref for a bulk
+    # load, by insertion for add(). A copy of a slice of the array: C speed, and the caller can keep it while the index
+    # changes.
+    def scan(self, prefix: str, limit: int | None = None) -> array[int]:
+        lo, hi = self._range(prefix)
+        return self._refs[lo:hi if limit is None else min(hi, lo + limit)]
+
+    # number of terms starting with `prefix`, two binary searches
+    def count(self, prefix: str) -> int:
+        lo, hi = self._range(prefix)
+        return hi - lo
+
+    def _range(self, prefix: str) -> tuple[int, int]:
+        return bisect_left(self._terms, prefix), bisect_left(self._terms, prefix + "\U0010ffff")
+
+    def __len__(self) -> int:
+        return len(self._terms)
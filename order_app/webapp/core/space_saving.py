@@ -0,0 +1,59 @@
+# Space-Saving heavy hitters (Metwally, Agrawal, El Abbadi 2005). Keeps at most `capacity` counters; a new key takes
+# over the smallest counter and inherits its count as "error". Every key with a true count above total / capacity is
+# guaranteed to be kept, and for a kept key: count - error <= true count <= count.
+#
+# update() returns the changes of counters as (key, count delta, error delta), so an owner can keep sums over many
+# summaries (e.g. a sliding window of per-minute summaries) without scanning them. Not thread-safe.
+
+from typing import Hashable
+
+
+type CounterChange[K] = tuple[K, int, int]
+
+
+class SpaceSaving[K: Hashable]:
+    def __init__(self, capacity: int) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self.counts: dict[K, int] = {}
+        self.errors: dict[K, int] = {}
+
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+    # weight < 0 takes back units of a kept key (the counter is dropped at 0); unknown keys are ignored
+    def update(self, key: K, weight: int = 1) -> list[CounterChange[K]]:
+        if key in self.counts:
+            if self.counts[key] + weight > 0:
+                self.counts[key] += weight
+                return [(key, weight, 0)]
+            return [self._drop(key)]
+
+        if weight <= 0:
+            return []
+
+        if len(self.counts) < self.capacity:
+            self.counts[key] = weight
+            self.errors[key] = 0
+            return [(key, weight, 0)]
+
+        smallest = min(self.counts, key=self.counts.__getitem__)         # O(capacity), capacity is small
+        inherited = self.counts[smallest]
+        evicted = self._drop(smallest)
+        self.counts[key] = inherited + weight
+        self.errors[key] = inherited
+        return [evicted, (key, inherited + weight, inherited)]
+
+
+    def items(self) -> list[tuple[K, int, int]]:
+        return [(key, count, self.errors[key]) for key, count in self.counts.items()]
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    def _drop(self, key: K) -> CounterChange[K]:
+        return key, -self.counts.pop(key), -self.errors.pop(key)
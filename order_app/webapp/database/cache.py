@@ -0,0 +1,169 @@
+# Read-through cache of single rows by a unique key (a product / a storage row by sku, a user by username). Values
+# are immutable DTOs built by the loader of the caller - never ORM objects, those belong to one session. Entries are
+# kept in a CacheBackend (core/cache_backends) under "<table>.<column>:<key>" - in memory of the worker or shared by
+# all workers, see CACHE_BACKEND.
+#
+# Invalidation is driven by commits. Session events note the keys of cached tables a transaction changes:
+#   after_flush     - new, changed and deleted ORM objects (unit of work); a changed key column drops the old key too
+#   do_orm_execute  - UPDATE / DELETE statements; keys are read from "key = :x" / "key IN (...)" of the WHERE, a
+#                     statement without them drops the whole cache
+# after_commit drops exactly those keys from the backend, a rollback forgets them. With a shared backend the entries
+# are gone for every worker at once; with the local one only for this worker (others see the commit after the TTL).
+# A value read inside a transaction that changed its key is not cached (it may be rolled back), and a value loaded
+# while a commit of this worker invalidated the cache is not cached either (it may be older than the commit) - a value
+# loaded by one worker while another one commits can still land after the drop, the TTL bounds that window.
+# Hits and misses are counted per cache and worker.
+
+import threading
+import weakref
+from collections import defaultdict
+from enum import Enum
+from typing import Any, Callable, Final, Hashable, Literal
+
+from sqlalchemy import event, inspect, BinaryExpression, BindParameter, BooleanClauseList, Update, Delete, ColumnElement
+from sqlalchemy.orm import Session, SessionTransaction, ORMExecuteState, DeclarativeBase
+from sqlalchemy.sql import operators
+
+from webapp.extensions import db
+from webapp.core.cache_backends import CacheBackend
+from webapp.core.lru import CacheStats
+
+
+class _AllKeys(Enum):
+    ALL_KEYS = "all"
+
+
+ALL_KEYS: Final = _AllKeys.ALL_KEYS                     # the whole cache
+
+type Keys = set[Hashable] | Literal[_AllKeys.ALL_KEYS]
+type ChangedKeys = dict["RowCache[Any]", Keys]          # cache -> keys or ALL_KEYS
+
+_caches: dict[str, weakref.WeakSet["RowCache[Any]"]] = defaultdict(weakref.WeakSet)     # table -> caches of its rows
+
+
+class RowCache[V]:
+    def __init__(
+            self,
+            model: type[DeclarativeBase],
+            backend: CacheBackend,
+            ttl_seconds: float = 60,
+            key: str | None = None                      # name of a unique column, the primary key by default
+    ) -> None:
+        if ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+        self.table: str = model.__tablename__
+        mapper = inspect(model)
+        self.key_column: ColumnElement[Any] = model.__table__.c[key] if key is not None else mapper.primary_key[0]
+        self.key_attr: str = mapper.get_property_by_column(self.key_column).key
+        self.name = f"{self.table}.{self.key_column.key}"
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._version = 0                               # changes on every invalidation by this worker
+        self._lock = threading.Lock()
+        _caches[self.table].add(self)
+
+
+    # cached value of the key, or load() - None from load() (missing row) is not cached
+    def get(self, key: Hashable, load: Callable[[], V | None]) -> V | None:
+        value = self.backend.get(self._backend_key(key))
+        if value is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        version = self._version
+        value = load()
+        if value is not None and not _changed_in_transaction(self, key):
+            with self._lock:
+                if version == self._version:
+                    self.backend.set(self._backend_key(key), value, self.ttl_seconds)
+        return value
+
+
+    def invalidate(self, keys: Keys) -> None:
+        with self._lock:
+            self._version += 1
+            if keys is ALL_KEYS:
+                self.backend.delete_prefix(f"{self.name}:")
+            else:
+                self.backend.delete([self._backend_key(key) for key in keys])
+
+
+    # hits / misses of this cache in this worker, size / maxsize of the backend (shared by all caches)
+    def stats(self) -> CacheStats:
+        backend = self.backend.stats()
+        return CacheStats(hits=self.hits, misses=self.misses, size=backend.size, maxsize=backend.maxsize)
+
+
+    def _backend_key(self, key: Hashable) -> str:
+        return f"{self.name}:{key}"
+
+
+def _changed_in_transaction(cache: "RowCache[Any]", key: Hashable) -> bool:
+    changed: ChangedKeys = db.session.info.get("changed_keys", {})
+    keys = changed.get(cache)
+    return keys is ALL_KEYS or (keys is not None and key in keys)
+
+
+def _note(session: Session, cache: "RowCache[Any]", keys: Keys) -> None:
+    changed: ChangedKeys = session.info.setdefault("changed_keys", {})
+    current = changed.get(cache)
+    if keys is ALL_KEYS or current is ALL_KEYS:
+        changed[cache] = ALL_KEYS
+    else:
+        changed[cache] = (current or set()) | keys
+
+
+# keys of `column` fixed by the WHERE of an UPDATE / DELETE - None when the statement is not limited by them
+def _keys_in_where(stmt: Update | Delete, column: ColumnElement[Any]) -> set[Hashable] | None:
+    where = stmt.whereclause
+    clauses = where.clauses if isinstance(where, BooleanClauseList) and where.operator is operators.and_ else [where]
+    for clause in clauses:
+        if not isinstance(clause, BinaryExpression) or not isinstance(clause.right, BindParameter):
+            continue
+        if getattr(clause.left, "key", None) != column.key or getattr(clause.left, "table", None) is not column.table:
+            continue
+        if clause.operator is operators.eq:
+            return {clause.right.value}
+        if clause.operator is operators.in_op:
+            return set(clause.right.value or ())
+    return None
+
+
+# the key of the object and, when the key column was changed, the key it had before
+def _object_keys(obj: Any, key_attr: str) -> set[Hashable]:
+    attr = inspect(obj).attrs[key_attr]
+    return {key for key in (attr.value, *attr.history.deleted) if key is not None}
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context: Any) -> None:
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        for cache in list(_caches.get(getattr(obj, "__tablename__", ""), ())):
+            _note(session, cache, _object_keys(obj, cache.key_attr))
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _do_orm_execute(state: ORMExecuteState) -> None:
+    stmt = state.statement
+    if not isinstance(stmt, (Update, Delete)):
+        return
+    for cache in list(_caches.get(getattr(stmt.table, "name", ""), ())):
+        keys = _keys_in_where(stmt, cache.key_column)
+        _note(state.session, cache, ALL_KEYS if keys is None else keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    changed: ChangedKeys = session.info.pop("changed_keys", {})
+    for cache, keys in changed.items():
+        cache.invalidate(keys)
+
+
+# rolled back (after a commit the keys are gone already) - only the outermost transaction, not a savepoint
+@event.listens_for(Session, "after_transaction_end")
+def _after_transaction_end(session: Session, transaction: SessionTransaction) -> None:
+    if transaction.parent is None:
+        session.info.pop("changed_keys", None)
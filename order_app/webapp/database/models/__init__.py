@@ -1 +1,2 @@
-from . import (users, products, storage, orders, order_details)
\ No newline at end of file
+from . import (users, products, storage, orders, order_details, idempotency_keys, quantile_sketches, sales_rollups,
+               user_order_stats, sku_pairs, reorder_forecasts)
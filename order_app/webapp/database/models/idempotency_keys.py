@@ -0,0 +1,19 @@
+from sqlalchemy import String, Integer, Text, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+from webapp.extensions import db
+from datetime import datetime
+
+
+class IdempotencyKey(db.Model):     # type: ignore
+    __tablename__ = 'idempotency_keys'
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)         # sha256 of method + path + body
+    status_code: Mapped[int | None] = mapped_column(Integer, nullable=True)      # None - request still in progress
+    response_body: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
+
+    def __repr__(self):
+        return f"<IdempotencyKey(key='{self.key}', status_code={self.status_code})>"
@@ -1,6 +1,7 @@
 from sqlalchemy import Integer, ForeignKey, DateTime, func, PrimaryKeyConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from webapp.extensions import db
+from webapp.core.clock import utc_now
 from datetime import datetime
 
 
@@ -25,10 +26,12 @@ class OrderDetail(db.Model):    # type: ignore
         ForeignKey("products.sku", ondelete="cascade"), nullable=False, index=True
     )
     qty: Mapped[int] = mapped_column(Integer, nullable=False)
-    created: Mapped[datetime] = mapped_column(DateTime, server_default=func.now())
+    created: Mapped[datetime] = mapped_column(      # UTC from Python, watermark of OrderSnapshot and rollup bucket
+        DateTime, default=utc_now, server_default=func.now(), index=True
+    )
 
-    product: Mapped['Product'] = relationship(back_populates='order_details', lazy='selectin')
-    order: Mapped['Order'] = relationship(back_populates='order_details', lazy='selectin')
+    product: Mapped['Product'] = relationship(back_populates='order_details', lazy='raise')
+    order: Mapped['Order'] = relationship(back_populates='order_details', lazy='raise')
 
 
     def __repr__(self):
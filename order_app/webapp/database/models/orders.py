@@ -1,7 +1,10 @@
-from sqlalchemy import ForeignKey, Integer
+from sqlalchemy import ForeignKey, Integer, DECIMAL, DateTime, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from webapp.extensions import db, migrate
+from webapp.core.clock import utc_now
 
+from datetime import datetime
+from decimal import Decimal
 from typing import TYPE_CHECKING, List
 if TYPE_CHECKING:
     from .order_details import OrderDetail
@@ -11,17 +14,29 @@ if TYPE_CHECKING:
 class Order(db.Model):   # type: ignore
     __tablename__ = 'orders'
 
+    __table_args__ = (                  # (total, id) - sorted listing with keyset pagination reads only the index
+        db.Index("ix_orders_total_value_id", "total_value", "id"),
+        db.Index("ix_orders_total_qty_id", "total_qty", "id"),
+        db.Index("ix_orders_line_count_id", "line_count", "id"),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="cascade"), nullable=False, index=True)
+    created: Mapped[datetime] = mapped_column(DateTime, default=utc_now, server_default=func.now())
+
+    # denormalized totals of order_details, kept up to date by OrderService (see TotalOrderRepository)
+    total_qty: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    line_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    total_value: Mapped[Decimal] = mapped_column(DECIMAL(14, 2), nullable=False, default=0, server_default="0")
 
     order_details: Mapped[List['OrderDetail']] = relationship(
         back_populates='order',
         cascade="all, delete-orphan",
-        lazy='selectin'
+        lazy='raise'
     )
 
 
-    user: Mapped['User'] = relationship(back_populates='orders', lazy='selectin')
+    user: Mapped['User'] = relationship(back_populates='orders', lazy='raise')
 
     def __repr__(self):
         return f"<Order id={self.id}, user_id={self.user_id}>"
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import String, CheckConstraint, DECIMAL
+from sqlalchemy import String, CheckConstraint, DECIMAL, Index, DDL, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from webapp.extensions import db
 from decimal import Decimal
@@ -17,6 +17,7 @@ class Product(db.Model):     # type: ignore
 
     __table_args__ = (
         CheckConstraint("price >= 0", name="pp_positive_price"),
+        Index("ft_products_name", "name", mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),    # name search
     )
 
     sku: Mapped[str] = mapped_column(String(10), primary_key=True)
@@ -26,15 +27,34 @@ class Product(db.Model):     # type: ignore
     order_details: Mapped[List['OrderDetail']] = relationship(
         back_populates='product',
         cascade="all, delete-orphan",
-        lazy="selectin"
+        lazy="raise"
     )
 
     storage: Mapped["Storage"] = relationship(
         back_populates="product",
         uselist=False,
-        lazy="selectin",
+        lazy="raise",
         cascade="all, delete-orphan")
 
 
     def __repr__(self):
-        return f"<SKU='{self.sku}' name='{self.name}' price={self.price}>"
\ No newline at end of file
+        return f"<SKU='{self.sku}' name='{self.name}' price={self.price}>"
+
+
+# SQLite (tests, local runs) has no FULLTEXT index - an external-content FTS5 table over products.name, kept in sync
+# by triggers, stands in for it (see ProductRepository.get_by_part_name).
+SQLITE_NAME_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5("
+    "name, content='products', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER products_fts_insert AFTER INSERT ON products BEGIN "
+    "INSERT INTO products_fts(rowid, name) VALUES (new.rowid, new.name); END",
+    "CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.rowid, old.name); END",
+    "CREATE TRIGGER products_fts_update AFTER UPDATE OF name ON products BEGIN "
+    "INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.rowid, old.name); "
+    "INSERT INTO products_fts(rowid, name) VALUES (new.rowid, new.name); END",
+)
+
+for _statement in SQLITE_NAME_SEARCH_DDL:
+    event.listen(Product.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+event.listen(Product.__table__, "before_drop", DDL("DROP TABLE IF EXISTS products_fts").execute_if(dialect="sqlite"))
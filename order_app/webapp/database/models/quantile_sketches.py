@@ -0,0 +1,20 @@
+from sqlalchemy import String, Text, BigInteger, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+from webapp.extensions import db
+from datetime import datetime
+
+
+# One merged KLL sketch of OrderDetail.qty per SKU / per user. Workers merge their new values into the row
+# periodically (see QuantileSketchService.flush), so the row holds the values of all workers.
+class QuantileSketch(db.Model):     # type: ignore
+    __tablename__ = 'quantile_sketches'
+
+    scope: Mapped[str] = mapped_column(String(10), primary_key=True)              # "sku" or "user"
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)               # sku or username
+    count: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)                    # JSON of KLLSketch.to_dict()
+    updated: Mapped[datetime] = mapped_column(DateTime, server_default=func.now(), onupdate=func.now())
+
+
+    def __repr__(self):
+        return f"<QuantileSketch(scope='{self.scope}', key='{self.key}', count={self.count})>"
@@ -0,0 +1,22 @@
+from sqlalchemy import String, Integer, DateTime, DECIMAL, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from webapp.extensions import db
+from datetime import datetime
+from decimal import Decimal
+
+
+# Result of the last demand forecast per product (see DemandForecastService.run) - read by GET /api/storage/reorder
+# without computing anything. All rows are replaced by every run.
+class ReorderForecast(db.Model):     # type: ignore
+    __tablename__ = 'reorder_forecasts'
+
+    sku: Mapped[str] = mapped_column(String(10), ForeignKey("products.sku", ondelete="cascade"), primary_key=True)
+    stock: Mapped[int] = mapped_column(Integer, nullable=False)                     # Storage.qty at the run
+    daily_demand: Mapped[Decimal] = mapped_column(DECIMAL(12, 3), nullable=False)   # smoothed units per day
+    days_of_cover: Mapped[Decimal | None] = mapped_column(DECIMAL(12, 1), index=True)   # None without demand
+    suggested_qty: Mapped[int] = mapped_column(Integer, nullable=False)
+    computed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+    def __repr__(self):
+        return f"<ReorderForecast(sku='{self.sku}', days_of_cover={self.days_of_cover})>"
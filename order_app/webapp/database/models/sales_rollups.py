@@ -0,0 +1,27 @@
+from sqlalchemy import String, BigInteger, DateTime, DECIMAL
+from sqlalchemy.orm import Mapped, mapped_column
+from webapp.extensions import db
+from datetime import datetime
+from decimal import Decimal
+
+
+# Units and revenue of order lines summed per time bucket and SKU. OrderService keeps the rows up to date in the same
+# transaction as the order lines (see SalesRollupService), so range reports read the buckets instead of order_details.
+# bucket is the start of the hour / day in UTC, like OrderDetail.created.
+class SalesRollupMixin:
+    bucket: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+    sku: Mapped[str] = mapped_column(String(10), primary_key=True)                # no FK - history outlives products
+    units: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    revenue: Mapped[Decimal] = mapped_column(DECIMAL(14, 2), nullable=False)     # qty * price at the time of the write
+
+
+    def __repr__(self):
+        return f"<{type(self).__name__}(bucket={self.bucket}, sku='{self.sku}', units={self.units})>"
+
+
+class HourlySales(SalesRollupMixin, db.Model):     # type: ignore
+    __tablename__ = 'sales_hourly'
+
+
+class DailySales(SalesRollupMixin, db.Model):      # type: ignore
+    __tablename__ = 'sales_daily'
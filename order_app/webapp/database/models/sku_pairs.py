@@ -0,0 +1,18 @@
+from sqlalchemy import String, Integer
+from sqlalchemy.orm import Mapped, mapped_column
+from webapp.extensions import db
+
+
+# Number of orders that contain both SKUs ("bought together"), one row per unordered pair with sku_a < sku_b. The
+# diagonal row (sku, sku) counts the orders that contain the SKU at all. Kept up to date by OrderService inside the
+# order write transactions (see BoughtTogetherIndex); no foreign key to products - order lines may use unknown SKUs.
+class SkuPair(db.Model):     # type: ignore
+    __tablename__ = 'sku_pairs'
+
+    sku_a: Mapped[str] = mapped_column(String(10), primary_key=True)
+    sku_b: Mapped[str] = mapped_column(String(10), primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+    def __repr__(self):
+        return f"<SkuPair(sku_a='{self.sku_a}', sku_b='{self.sku_b}', orders={self.orders})>"
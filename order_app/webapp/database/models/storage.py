@@ -21,9 +21,9 @@ class Storage(db.Model):    # type: ignore
         nullable=False
     )
 
-    qty: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    qty: Mapped[int] = mapped_column(Integer, nullable=False, default=0, index=True)    # low-stock range scans
 
-    product: Mapped["Product"] = relationship(back_populates="storage", lazy="selectin")
+    product: Mapped["Product"] = relationship(back_populates="storage", lazy="raise")
 
     def __repr__(self):
         return f"<Storage(sku='{self.sku}', qty={self.qty})>"
\ No newline at end of file
@@ -0,0 +1,23 @@
+from sqlalchemy import Integer, BigInteger, DateTime, DECIMAL, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from webapp.extensions import db
+from datetime import datetime
+from decimal import Decimal
+
+
+# One row per user with orders: order count, units, lifetime value and time of the first / last order, kept up to date
+# by OrderService in the same transaction as the orders (see UserOrderStatsRepository). Users without orders have no
+# row. Sums come from the denormalized Order totals.
+class UserOrderStats(db.Model):     # type: ignore
+    __tablename__ = 'user_order_stats'
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="cascade"), primary_key=True)
+    orders_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    units: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    lifetime_value: Mapped[Decimal] = mapped_column(DECIMAL(14, 2), nullable=False)
+    first_order_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_order_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+    def __repr__(self):
+        return f"<UserOrderStats(user_id={self.user_id}, orders_count={self.orders_count})>"
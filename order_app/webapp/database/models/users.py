@@ -12,7 +12,7 @@ class User(db.Model):   # type: ignore
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     username: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
 
-    orders: Mapped[list["Order"]] = relationship(back_populates="user", lazy="selectin")
+    orders: Mapped[list["Order"]] = relationship(back_populates="user", lazy="raise")
 
 
     def __repr__(self):
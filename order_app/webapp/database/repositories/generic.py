@@ -1,12 +1,15 @@
-from typing import Iterable, cast
+from typing import Iterable, Sequence, cast
 from sqlalchemy import select
+from sqlalchemy.orm.interfaces import ORMOption
 from flask_sqlalchemy.model import Model
 from webapp.extensions import db
+from webapp.database.repositories.loaders import LoaderProfiles
 
 
 class GenericRepository[T: Model]:
-    def __init__(self, model: type[T]) -> None:
+    def __init__(self, model: type[T], profiles: LoaderProfiles | None = None) -> None:
         self.model = model
+        self.profiles = profiles or {"summary": ()}
 
     def add(self, instance: T) -> T:
         db.session.add(instance)
@@ -15,12 +18,14 @@ class GenericRepository[T: Model]:
     def add_all(self, instances: Iterable[T]) -> None:
         db.session.add_all(list(instances))
 
-    def get(self, pk: int) -> T | None:
+    def get(self, pk: int, profile: str = "summary") -> T | None:
         pk = cast(int, pk) # for IDE
-        return db.session.get(self.model, pk)
+        options = self._options(profile)
+        # populate_existing - the object can already sit in the session (expired after commit) and options must apply
+        return db.session.get(self.model, pk, options=options, populate_existing=bool(options))
 
-    def get_all(self) -> list[T]:
-        stmt = select(self.model)
+    def get_all(self, profile: str = "summary") -> list[T]:
+        stmt = select(self.model).options(*self._options(profile))
         return list(db.session.scalars(stmt).all())
 
     def delete(self, instance: T) -> None:
@@ -29,4 +34,9 @@ class GenericRepository[T: Model]:
     def delete_by_id(self, pk: int | str) -> None:
         obj = db.session.get(self.model, pk)
         if obj:
-            db.session.delete(obj)
\ No newline at end of file
+            db.session.delete(obj)
+
+    def _options(self, profile: str) -> Sequence[ORMOption]:
+        if profile not in self.profiles:
+            raise ValueError(f"Unknown loader profile '{profile}' for {self.model.__name__}")
+        return self.profiles[profile]
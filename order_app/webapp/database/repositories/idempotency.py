@@ -0,0 +1,48 @@
+from datetime import datetime
+from typing import Any, cast
+
+from sqlalchemy import delete, update, CursorResult
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from webapp.extensions import db
+from webapp.database.models.idempotency_keys import IdempotencyKey
+
+
+# Not a GenericRepository - every call runs in its own short session/transaction on db.engine and commits right away.
+# The key must be visible to other workers before the order transaction starts, and it must not be rolled back or
+# committed together with the request's db.session.
+class IdempotencyRepository:
+
+    def get(self, key: str) -> IdempotencyKey | None:
+        with Session(db.engine, expire_on_commit=False) as session:
+            return session.get(IdempotencyKey, key)
+
+    # an expired key - not purged yet, or left in progress by a worker that died - is taken over in the same transaction
+    def reserve(self, key: str, fingerprint: str, expires_at: datetime, now: datetime) -> bool:
+        try:
+            with Session(db.engine) as session, session.begin():
+                session.execute(
+                    delete(IdempotencyKey).where(IdempotencyKey.key == key, IdempotencyKey.expires_at <= now)
+                )
+                session.add(IdempotencyKey(key=key, fingerprint=fingerprint, expires_at=expires_at))
+        except IntegrityError:      # primary key taken - the same key is already stored or in progress
+            return False
+        return True
+
+    def complete(self, key: str, status_code: int, response_body: str, expires_at: datetime) -> None:
+        with Session(db.engine) as session, session.begin():
+            session.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key)
+                .values(status_code=status_code, response_body=response_body, expires_at=expires_at)
+            )
+
+    def release(self, key: str) -> None:
+        with Session(db.engine) as session, session.begin():
+            session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+
+    def purge_expired(self, now: datetime) -> int:
+        with Session(db.engine) as session, session.begin():
+            stmt = delete(IdempotencyKey).where(IdempotencyKey.expires_at < now)
+            return cast(CursorResult[Any], session.execute(stmt)).rowcount
@@ -0,0 +1,58 @@
+# Loader profiles. All relationships in models are declared with lazy="raise", so nothing is loaded "by accident".
+# Each repository method chooses one named profile and gets exactly the eager loads it needs:
+#   summary        - the row itself (+ cheap many-to-one parents needed to show it)
+#   with_details   - summary + child collections one level down
+#   with_products  - with_details + products of the order details / product of the storage row
+# Accessing a relationship that the profile did not load raises InvalidRequestError instead of firing hidden queries.
+
+from typing import Mapping, Sequence
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.interfaces import ORMOption
+
+from webapp.database.models.orders import Order
+from webapp.database.models.order_details import OrderDetail
+from webapp.database.models.products import Product
+from webapp.database.models.storage import Storage
+from webapp.database.models.users import User
+
+
+type LoaderProfiles = Mapping[str, Sequence[ORMOption]]
+
+
+ORDER_PROFILES: LoaderProfiles = {
+    "summary": (
+        selectinload(Order.user),
+    ),
+    "with_details": (
+        selectinload(Order.user),
+        selectinload(Order.order_details),
+    ),
+    "with_products": (
+        selectinload(Order.user),
+        selectinload(Order.order_details).selectinload(OrderDetail.product),
+    ),
+}
+
+
+PRODUCT_PROFILES: LoaderProfiles = {
+    "summary": (),
+    "with_details": (
+        selectinload(Product.order_details),
+    ),
+}
+
+
+STORAGE_PROFILES: LoaderProfiles = {
+    "summary": (),
+    "with_products": (
+        selectinload(Storage.product),
+    ),
+}
+
+
+USER_PROFILES: LoaderProfiles = {
+    "summary": (),
+    "with_details": (
+        selectinload(User.orders),
+    ),
+}
@@ -1,65 +1,205 @@
-from sqlalchemy.orm import joinedload, selectinload
 from webapp.extensions import db
 from webapp.database.repositories.generic import GenericRepository
+from webapp.database.repositories.loaders import ORDER_PROFILES
 from webapp.database.models.orders import Order
 from webapp.database.models.order_details import OrderDetail
+from webapp.database.models.products import Product
 from webapp.database.models.users import User
 
-from sqlalchemy import select, desc
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Collection, Iterator, cast
+from sqlalchemy import select, desc, asc, insert, update, func, or_, and_, Select, Row, ColumnElement, CursorResult
 
 
-class TotalOrderRepository(GenericRepository[Order]):
-    def __init__(self) -> None:
-        super().__init__(Order)
+# (order id, username, sku, qty, total_qty, line_count, total_value) of stream_order_rows
+type OrderExportRow = Row[tuple[int, str, str | None, int | None, int, int, Decimal]]
 
-    def get_all_total_orders(self) -> list[Order]:
-        stmt = (
-            select(Order)
-            .options(
-                selectinload(Order.user),
-                joinedload(Order.order_details)
-                .joinedload(OrderDetail.product)
-            )
-            .order_by(desc(Order.id))
-        )
+# columns GET /api/orders/ can be sorted by, each has an index (column, id) - see Order.__table_args__
+SORT_COLUMNS = {
+    "id": Order.id,
+    "total_value": Order.total_value,
+    "total_qty": Order.total_qty,
+    "line_count": Order.line_count,
+}
 
-        result = db.session.execute(stmt).unique().scalars().all()
-        return list(result)
+
+class TotalOrderRepository(GenericRepository[Order]):
+    def __init__(self) -> None:
+        super().__init__(Order, ORDER_PROFILES)
+
+    def get_all_total_orders(
+            self,
+            limit: int | None = None,
+            after: int | None = None,
+            sort: str = "id",
+            descending: bool = True,
+            min_value: Decimal | None = None,
+            max_value: Decimal | None = None
+    ) -> list[Order]:
+        stmt = select(Order)
+        if min_value is not None:
+            stmt = stmt.where(Order.total_value >= min_value)
+        if max_value is not None:
+            stmt = stmt.where(Order.total_value <= max_value)
+
+        stmt = self._keyset_page(stmt, limit, after, sort, descending)
+        return list(db.session.scalars(stmt).all())
 
 
     def get_total_order_by_id(self, order_id: int) -> Order | None:
         stmt = (
             select(Order)
             .where(Order.id == order_id)
-            .options(
-                selectinload(Order.user),
-                joinedload(Order.order_details)
-                .joinedload(OrderDetail.product)
-            )
+            .options(*self._options("with_products"))
         )
 
-        return db.session.execute(stmt).unique().scalars().first()
+        return db.session.scalars(stmt).first()
 
-    def get_total_orders_by_user_name(self, user_name: str) -> list[Order]:
+    def get_total_orders_by_user_name(
+            self, user_name: str, limit: int | None = None, after: int | None = None
+    ) -> list[Order]:
         stmt = (
             select(Order)
             .join(Order.user)  # join do tabeli users
             .where(User.username == user_name)
-            .options(
-                selectinload(Order.user),
-                joinedload(Order.order_details).joinedload(OrderDetail.product)
-            )
         )
 
-        return list(db.session.execute(stmt).unique().scalars().all())
+        stmt = self._keyset_page(stmt, limit, after)
+        return list(db.session.scalars(stmt).all())
 
 
 
 
+    # Flat (order id, username, sku, qty, order totals) rows of all orders ordered by order id, one row per order line (sku and qty
+    # are None for an order without lines). yield_per turns on server-side cursors (stream_results) and fetches
+    # chunk_size rows at a time, no ORM objects are built - memory does not grow with the size of the table.
+    # The caller has to consume the rows inside the session / app context.
+    def stream_order_rows(self, chunk_size: int = 1000) -> Iterator[OrderExportRow]:
+        stmt = (
+            select(
+                Order.id, User.username, OrderDetail.product_sku, OrderDetail.qty,
+                Order.total_qty, Order.line_count, Order.total_value
+            )
+            .join(Order.user)
+            .outerjoin(Order.order_details)
+            .order_by(Order.id, OrderDetail.product_sku)
+            .execution_options(yield_per=chunk_size)
+        )
+
+        # the outer join makes sku and qty nullable, their column types do not
+        yield from cast(Iterator[OrderExportRow], db.session.execute(stmt))
+
+
     def add_product_to_order(self, order: Order, product_sku: str, qty: int) -> OrderDetail | None:
         od = OrderDetail(product_sku=product_sku, qty=qty)
-        order.order_details.append(od)
+        od.order = order                # backref queues the append, order.order_details does not have to be loaded
+        db.session.add(od)
 
         db.session.flush()
 
         return od
+
+
+    # one executemany INSERT for all rows - used by bulk ingestion, the Order objects do not get the details loaded
+    def add_details_bulk(self, rows: list[dict[str, int | str | datetime]]) -> None:
+        if rows:
+            db.session.execute(insert(OrderDetail), rows)
+
+
+    # Totals of the orders computed again from their lines with current prices, one UPDATE with correlated
+    # subqueries. For orders created in the running transaction (nobody else sees them yet) and for
+    # `flask orders recompute-totals`. Returns the number of updated orders.
+    def recompute_totals(self, order_ids: Collection[int]) -> int:
+        return self._recompute_totals(Order.id.in_(list(order_ids)))
+
+
+    def recompute_totals_between(self, first_id: int, last_id: int) -> int:
+        return self._recompute_totals(Order.id.between(first_id, last_id))
+
+
+    # (sku, qty, created) of the lines of one order - read before the order is deleted
+    def get_order_lines(self, order_id: int) -> list[tuple[str, int, datetime]]:
+        stmt = (
+            select(OrderDetail.product_sku, OrderDetail.qty, OrderDetail.created)
+            .where(OrderDetail.order_id == order_id)
+        )
+        return [(row.product_sku, row.qty, row.created) for row in db.session.execute(stmt)]
+
+
+    # one line added (sign=1) or removed (sign=-1): UPDATE .. SET total = total + delta changes the stored row, so
+    # concurrent writes to the same order do not overwrite each other. The value uses the current price of the SKU.
+    def add_line_to_totals(self, order_id: int, sku: str, qty: int, sign: int = 1) -> None:
+        price = select(Product.price).where(Product.sku == sku).scalar_subquery()
+        stmt = (
+            update(Order)
+            .where(Order.id == order_id)
+            .values(
+                total_qty=Order.total_qty + sign * qty,
+                line_count=Order.line_count + sign,
+                total_value=Order.total_value + sign * qty * func.coalesce(price, 0)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(stmt)
+
+
+    def get_max_id(self) -> int:
+        return db.session.execute(select(func.coalesce(func.max(Order.id), 0))).scalar_one()
+
+
+    def _recompute_totals(self, where: ColumnElement[bool]) -> int:
+        lines = select(OrderDetail).where(OrderDetail.order_id == Order.id)
+        stmt = (
+            update(Order)
+            .where(where)
+            .values(
+                total_qty=func.coalesce(lines.with_only_columns(func.sum(OrderDetail.qty)).scalar_subquery(), 0),
+                line_count=lines.with_only_columns(func.count()).scalar_subquery(),
+                total_value=func.coalesce(
+                    lines.with_only_columns(func.sum(OrderDetail.qty * Product.price))
+                    .join(Product, Product.sku == OrderDetail.product_sku)
+                    .scalar_subquery(),
+                    0
+                )
+            )
+            .execution_options(synchronize_session=False)
+        )
+        return cast(CursorResult[Any], db.session.execute(stmt)).rowcount
+
+
+    # Keyset (seek) pagination, Order.id DESC by default. "after" is the id of the last order of the previous page, so
+    # the database jumps straight to it through the index instead of counting and skipping rows like OFFSET does.
+    # Sorted by a total, the seek is (total, id) past the totals of the "after" order (read by primary key).
+    # Details are loaded with selectinload, because a joined collection would multiply rows and break LIMIT.
+    def _keyset_page(
+            self,
+            stmt: Select[tuple[Order]],
+            limit: int | None,
+            after: int | None,
+            sort: str = "id",
+            descending: bool = True
+    ) -> Select[tuple[Order]]:
+        column = SORT_COLUMNS[sort]
+        if after is not None:
+            if sort == "id":
+                stmt = stmt.where(Order.id < after if descending else Order.id > after)
+            else:
+                last = select(column).where(Order.id == after).scalar_subquery()
+                if descending:
+                    stmt = stmt.where(or_(column < last, and_(column == last, Order.id < after)))
+                else:
+                    stmt = stmt.where(or_(column > last, and_(column == last, Order.id > after)))
+
+        direction = desc if descending else asc
+        keys = [column, Order.id] if sort != "id" else [Order.id]
+        stmt = (
+            stmt
+            .options(*self._options("with_products"))
+            .order_by(*(direction(key) for key in keys))
+        )
+
+        if limit is not None:
+            stmt = stmt.limit(limit)
+
+        return stmt
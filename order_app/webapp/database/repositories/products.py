@@ -1,17 +1,62 @@
 from webapp.extensions import db
 from webapp.database.repositories.generic import GenericRepository
+from webapp.database.repositories.loaders import PRODUCT_PROFILES
 from webapp.database.models.products import Product
-from sqlalchemy import select
+from sqlalchemy import select, table, column, literal_column, Integer, Row
+from sqlalchemy.dialects import mysql
 from decimal import Decimal
+from typing import Collection, Iterator
+import re
+
+
+# the FTS5 stand-in for the FULLTEXT index in SQLite (see models/products.py)
+products_fts = table("products_fts", column("rowid", Integer), column("name"), column("rank"))
 
 
 class ProductRepository(GenericRepository[Product]):
     def __init__(selfself) -> None:
-        super().__init__(Product)
+        super().__init__(Product, PRODUCT_PROFILES)
+
 
+    # Full-text search of product names, best match first (then by sku). Every word of the query must start a word of
+    # the name: "blu sh" finds "Blue Shirt". Uses an index in both databases instead of scanning the table like
+    # ILIKE '%term%' does:
+    #   MySQL  - MATCH .. AGAINST on the FULLTEXT index ft_products_name (boolean mode, InnoDB relevance). Mind
+    #            innodb_ft_min_token_size (3) and the stopword list - shorter / stop words of a name are not indexed
+    #   SQLite - the FTS5 table products_fts, ranked by bm25
+    # Other databases fall back to ILIKE per word.
+    def get_by_part_name(self, product_name: str, limit: int | None = None, offset: int = 0) -> list[Product]:
+        words = re.findall(r"\w+", product_name.lower())
+        if not words:
+            return []
 
-    def get_by_part_name(self, product_name: str) -> list[Product]:
-        stmt = select(Product).where(Product.name.ilike(f"%{product_name}%"))       #ilike ignore letter size
+        dialect = db.session.get_bind().dialect.name
+        if dialect == "mysql":
+            against = " ".join(f"+{w}*" for w in words)
+            relevance = mysql.match(Product.__table__.c.name, against=against).in_boolean_mode()
+            stmt = select(Product).where(relevance).order_by(relevance.desc(), Product.sku)
+        elif dialect == "sqlite":
+            # the page is ranked inside FTS5 (rank = bm25, lower is better) and only its rows are joined to products
+            page = (
+                select(products_fts.c.rowid, products_fts.c.rank)
+                .where(products_fts.c.name.op("MATCH")(" ".join(f'"{w}"*' for w in words)))
+                .order_by(products_fts.c.rank, products_fts.c.rowid)
+                .offset(offset)
+                .limit(-1 if limit is None else limit)
+                .subquery()
+            )
+            stmt = (
+                select(Product)
+                .join(page, page.c.rowid == literal_column("products.rowid"))
+                .order_by(page.c.rank, page.c.rowid)
+            )
+            return list(db.session.scalars(stmt).all())
+        else:
+            stmt = select(Product).where(*(Product.name.ilike(f"%{w}%") for w in words)).order_by(Product.sku)
+
+        stmt = stmt.offset(offset)
+        if limit is not None:
+            stmt = stmt.limit(limit)
         return list(db.session.scalars(stmt).all())
 
     def get_by_price_between(self, min_price: Decimal = Decimal(0.0), max_price: Decimal = Decimal(9999.99)) -> list[Product]:
@@ -26,4 +71,14 @@ class ProductRepository(GenericRepository[Product]):
 
     def get_by_sku(self, sku: str) -> Product | None:
         stmt = select(Product).where(Product.sku == sku)
-        return db.session.scalar(stmt)
\ No newline at end of file
+        return db.session.scalar(stmt)
+
+    # (sku, name) of all products from a server-side cursor, chunk_size rows at a time - bulk load of the typeahead index
+    def stream_names(self, chunk_size: int = 10_000) -> Iterator[Row[tuple[str, str]]]:
+        stmt = select(Product.sku, Product.name).order_by(Product.sku).execution_options(yield_per=chunk_size)
+        yield from db.session.execute(stmt)
+
+    # sku -> current price, one query for many SKUs; unknown SKUs are missing from the dict
+    def get_prices(self, skus: Collection[str]) -> dict[str, Decimal]:
+        stmt = select(Product.sku, Product.price).where(Product.sku.in_(skus))
+        return {sku: price for sku, price in db.session.execute(stmt).all()}
@@ -0,0 +1,31 @@
+from typing import Collection
+from sqlalchemy import select, delete
+
+from webapp.extensions import db
+from webapp.database.models.quantile_sketches import QuantileSketch
+
+
+# Not a GenericRepository - the primary key is (scope, key).
+class QuantileSketchRepository:
+
+    def get(self, scope: str, key: str) -> QuantileSketch | None:
+        return db.session.get(QuantileSketch, (scope, key))
+
+
+    # rows locked in key order, so two workers flushing the same keys cannot deadlock
+    def get_for_update(self, scope: str, keys: Collection[str]) -> list[QuantileSketch]:
+        stmt = (
+            select(QuantileSketch)
+            .where(QuantileSketch.scope == scope, QuantileSketch.key.in_(sorted(keys)))
+            .order_by(QuantileSketch.key)
+            .with_for_update()
+        )
+        return list(db.session.scalars(stmt).all())
+
+
+    def add_all(self, sketches: Collection[QuantileSketch]) -> None:
+        db.session.add_all(list(sketches))
+
+
+    def delete_all(self) -> None:
+        db.session.execute(delete(QuantileSketch))
@@ -0,0 +1,49 @@
+from datetime import datetime
+
+from sqlalchemy import select, delete, insert, func, Row
+
+from webapp.extensions import db
+from webapp.database.models.products import Product
+from webapp.database.models.reorder_forecasts import ReorderForecast
+from webapp.database.models.sales_rollups import DailySales
+from webapp.database.models.storage import Storage
+
+
+# Not a GenericRepository - forecasts are written for all products at once and read as a ranked list.
+class ReorderForecastRepository:
+
+    # (sku, day, units) of every SKU with sales in [start, end) - one grouped query over the daily rollup
+    def get_daily_units(self, start: datetime, end: datetime) -> list[Row[tuple[str, datetime, int]]]:
+        stmt = (
+            select(DailySales.sku, DailySales.bucket, func.sum(DailySales.units).label("units"))
+            .where(DailySales.bucket >= start, DailySales.bucket < end)
+            .group_by(DailySales.sku, DailySales.bucket)
+        )
+        return list(db.session.execute(stmt).all())
+
+
+    # (sku, qty) of every product, 0 for products without a storage row
+    def get_stock(self) -> list[Row[tuple[str, int]]]:
+        stmt = (
+            select(Product.sku, func.coalesce(Storage.qty, 0).label("qty"))
+            .outerjoin(Storage, Storage.sku == Product.sku)
+            .order_by(Product.sku)
+        )
+        return list(db.session.execute(stmt).all())
+
+
+    # SKUs that run out within max_days, fewest days of cover first (index on days_of_cover)
+    def get_at_risk(self, max_days: float, limit: int) -> list[ReorderForecast]:
+        stmt = (
+            select(ReorderForecast)
+            .where(ReorderForecast.days_of_cover <= max_days)
+            .order_by(ReorderForecast.days_of_cover, ReorderForecast.sku)
+            .limit(limit)
+        )
+        return list(db.session.scalars(stmt).all())
+
+
+    def replace_all(self, rows: list[dict]) -> None:
+        db.session.execute(delete(ReorderForecast))
+        if rows:
+            db.session.execute(insert(ReorderForecast), rows)
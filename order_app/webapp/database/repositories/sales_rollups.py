@@ -0,0 +1,66 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Collection, Iterator
+
+from sqlalchemy import select, delete, insert, func, Row
+
+from webapp.extensions import db
+from webapp.database.repositories.upsert import upsert
+from webapp.database.models.order_details import OrderDetail
+from webapp.database.models.products import Product
+from webapp.database.models.sales_rollups import SalesRollupMixin
+
+
+type RollupModel = type[SalesRollupMixin]
+
+
+# Not a GenericRepository - one repository for both rollup tables (HourlySales / DailySales), the model is an argument.
+class SalesRollupRepository:
+
+    # (bucket, units, revenue) rows of buckets in [start, end), summed over the (given) SKUs
+    def get_range(
+            self, model: RollupModel, start: datetime, end: datetime, skus: Collection[str] | None = None
+    ) -> list[Row[tuple[datetime, int, Decimal]]]:
+        stmt = (
+            select(model.bucket, func.sum(model.units).label("units"), func.sum(model.revenue).label("revenue"))
+            .where(model.bucket >= start, model.bucket < end)
+            .group_by(model.bucket)
+            .order_by(model.bucket)
+        )
+        if skus:
+            stmt = stmt.where(model.sku.in_(skus))
+        return list(db.session.execute(stmt).all())
+
+
+    # (created, sku, qty, price) of every order line, streamed in chunks (yield_per) - source of the backfill.
+    # price is 0 for lines without a product, like in SalesRollupService.lines_added
+    def stream_lines(self, chunk_size: int = 10_000) -> Iterator[Row[tuple[datetime, str, int, Decimal]]]:
+        stmt = (
+            select(OrderDetail.created, OrderDetail.product_sku, OrderDetail.qty, func.coalesce(Product.price, 0))
+            .outerjoin(OrderDetail.product)
+            .execution_options(yield_per=chunk_size)
+        )
+        yield from db.session.execute(stmt)
+
+
+    # rows as {"bucket", "sku", "units", "revenue"} are added to the stored ones (negative values take back), in one
+    # INSERT .. ON DUPLICATE KEY UPDATE / ON CONFLICT DO UPDATE. Sorted by key, so two writers cannot deadlock.
+    def increment(self, model: RollupModel, rows: list[dict]) -> None:
+        if not rows:
+            return
+        rows = sorted(rows, key=lambda r: (r["bucket"], r["sku"]))
+
+        stmt = upsert(
+            model, rows, key=[model.bucket, model.sku],
+            changes=lambda new: {"units": model.units + new.units, "revenue": model.revenue + new.revenue}
+        )
+        db.session.execute(stmt)
+
+
+    def add_all(self, model: RollupModel, rows: list[dict]) -> None:
+        if rows:
+            db.session.execute(insert(model), rows)
+
+
+    def delete_all(self, model: RollupModel) -> None:
+        db.session.execute(delete(model))
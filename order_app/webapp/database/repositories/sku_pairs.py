@@ -0,0 +1,59 @@
+from typing import Iterator
+
+from sqlalchemy import select, delete, insert, Row
+
+from webapp.extensions import db
+from webapp.database.repositories.upsert import upsert
+from webapp.database.models.order_details import OrderDetail
+from webapp.database.models.sku_pairs import SkuPair
+
+
+# Not a GenericRepository - the primary key is (sku_a, sku_b) and rows are changed by deltas only.
+class SkuPairRepository:
+
+    # (sku_a, sku_b, orders) of all pairs still bought together, streamed in chunks (yield_per)
+    def stream_pairs(self, chunk_size: int = 10_000) -> Iterator[Row[tuple[str, str, int]]]:
+        stmt = (
+            select(SkuPair.sku_a, SkuPair.sku_b, SkuPair.orders)
+            .where(SkuPair.orders > 0)
+            .execution_options(yield_per=chunk_size)
+        )
+        yield from db.session.execute(stmt)
+
+
+    def get_order_skus(self, order_id: int) -> list[str]:
+        stmt = select(OrderDetail.product_sku).where(OrderDetail.order_id == order_id)
+        return list(db.session.scalars(stmt).all())
+
+
+    # (order_id, sku) of every order line, ordered by order - source of the rebuild
+    def stream_order_skus(self, chunk_size: int = 10_000) -> Iterator[Row[tuple[int, str]]]:
+        stmt = (
+            select(OrderDetail.order_id, OrderDetail.product_sku)
+            .order_by(OrderDetail.order_id)
+            .execution_options(yield_per=chunk_size)
+        )
+        yield from db.session.execute(stmt)
+
+
+    # rows as {"sku_a", "sku_b", "orders"} are added to the stored ones (negative values take back), in one
+    # INSERT .. ON DUPLICATE KEY UPDATE / ON CONFLICT DO UPDATE. Sorted by key, so two writers cannot deadlock.
+    def increment(self, rows: list[dict]) -> None:
+        if not rows:
+            return
+        rows = sorted(rows, key=lambda r: (r["sku_a"], r["sku_b"]))
+
+        stmt = upsert(
+            SkuPair, rows, key=[SkuPair.sku_a, SkuPair.sku_b],
+            changes=lambda new: {"orders": SkuPair.orders + new.orders}
+        )
+        db.session.execute(stmt)
+
+
+    def add_all(self, rows: list[dict]) -> None:
+        if rows:
+            db.session.execute(insert(SkuPair), rows)
+
+
+    def delete_all(self) -> None:
+        db.session.execute(delete(SkuPair))
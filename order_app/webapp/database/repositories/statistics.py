@@ -0,0 +1,154 @@
+# Read-only aggregate queries for order statistics. Every method is ONE grouped SELECT over order_details / products /
+# orders / users - sums and counts are done by the database, no ORM objects are loaded. Not a GenericRepository,
+# because the statistics do not belong to one model.
+#
+# Filters shared by all methods: skus - only these order lines are counted, user_name - only orders of this user.
+
+from datetime import datetime
+from typing import Collection, Iterator, Sequence
+from decimal import Decimal
+
+from sqlalchemy import select, func, desc, Row, Select
+
+from webapp.extensions import db
+from webapp.database.models.orders import Order
+from webapp.database.models.order_details import OrderDetail
+from webapp.database.models.products import Product
+from webapp.database.models.users import User
+
+
+class StatisticsRepository:
+
+    # (sku, units, revenue, orders_qty) rows; revenue = qty * current Product.price
+    def get_sku_stats(
+            self, skus: Collection[str] | None = None, user_name: str | None = None
+    ) -> list[Row[tuple[str, int, Decimal, int]]]:
+        stmt = self._sku_stats(skus, user_name).order_by(OrderDetail.product_sku)
+        return list(db.session.execute(stmt).all())
+
+
+    # the same rows as get_sku_stats, the best limit SKUs by "units" or "revenue"
+    def get_top_products(
+            self, limit: int, by: str, skus: Collection[str] | None = None, user_name: str | None = None
+    ) -> list[Row[tuple[str, int, Decimal, int]]]:
+        stmt = (
+            self._sku_stats(skus, user_name)
+            .order_by(desc(by), OrderDetail.product_sku)
+            .limit(limit)
+        )
+        return list(db.session.execute(stmt).all())
+
+
+    # (user_name, orders_qty, units, revenue) rows of users having at least one (matching) order
+    def get_user_stats(
+            self, skus: Collection[str] | None = None, user_name: str | None = None
+    ) -> list[Row[tuple[str, int, int, Decimal]]]:
+        stmt = (
+            select(
+                User.username.label("user_name"),
+                func.count(func.distinct(Order.id)).label("orders_qty"),
+                func.coalesce(func.sum(OrderDetail.qty), 0).label("units"),
+                func.coalesce(func.sum(Product.price * OrderDetail.qty), 0).label("revenue"),
+            )
+            .select_from(Order)
+            .join(Order.user)
+            .outerjoin(Order.order_details)
+            .outerjoin(OrderDetail.product)
+            .group_by(User.id, User.username)
+            .order_by(User.username)
+        )
+        stmt = self._filter(stmt, skus, user_name)
+        return list(db.session.execute(stmt).all())
+
+
+    # one row (orders_qty, lines_qty, units, revenue) for all matching orders
+    def get_order_totals(
+            self, skus: Collection[str] | None = None, user_name: str | None = None
+    ) -> Row[tuple[int, int, int, Decimal]]:
+        stmt = (
+            select(
+                func.count(func.distinct(Order.id)).label("orders_qty"),
+                func.count(OrderDetail.product_sku).label("lines_qty"),
+                func.coalesce(func.sum(OrderDetail.qty), 0).label("units"),
+                func.coalesce(func.sum(Product.price * OrderDetail.qty), 0).label("revenue"),
+            )
+            .select_from(Order)
+            .outerjoin(Order.order_details)
+            .outerjoin(OrderDetail.product)
+        )
+        if user_name is not None:
+            stmt = stmt.join(Order.user)
+        stmt = self._filter(stmt, skus, user_name)
+        return db.session.execute(stmt).one()
+
+
+    # (order_id, value, lines_qty) per order - value = sum of qty * Product.price; all orders or only order_ids
+    def get_order_values(
+            self, order_ids: Collection[int] | None = None
+    ) -> list[Row[tuple[int, Decimal, int]]]:
+        stmt = (
+            select(
+                Order.id.label("order_id"),
+                func.coalesce(func.sum(Product.price * OrderDetail.qty), 0).label("value"),
+                func.count(OrderDetail.product_sku).label("lines_qty"),
+            )
+            .outerjoin(Order.order_details)
+            .outerjoin(OrderDetail.product)
+            .group_by(Order.id)
+        )
+        if order_ids is not None:
+            stmt = stmt.where(Order.id.in_(set(order_ids)))
+        return list(db.session.execute(stmt).all())
+
+    # (order_id, user_id, sku, qty) of the lines with since <= created < until, as chunks of plain tuples straight from
+    # the cursor (partitions of a yield_per result, no ORM objects) - bulk source of the columnar OrderSnapshot.
+    # Uses the index on order_details.created.
+    def stream_line_chunks(
+            self, since: datetime | None, until: datetime, chunk_size: int = 50_000
+    ) -> Iterator[Sequence[Row[tuple[int, int, str, int]]]]:
+        stmt = (
+            select(OrderDetail.order_id, Order.user_id, OrderDetail.product_sku, OrderDetail.qty)
+            .join(OrderDetail.order)
+            .where(OrderDetail.created < until)
+            .execution_options(yield_per=chunk_size)
+        )
+        if since is not None:
+            stmt = stmt.where(OrderDetail.created >= since)
+        yield from db.session.execute(stmt).partitions()
+
+
+    # (sku, price) of all products
+    def get_prices(self) -> list[Row[tuple[str, Decimal]]]:
+        return list(db.session.execute(select(Product.sku, Product.price)).all())
+
+
+    # (id, username) of all users
+    def get_usernames(self) -> list[Row[tuple[int, str]]]:
+        return list(db.session.execute(select(User.id, User.username)).all())
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    def _sku_stats(self, skus: Collection[str] | None, user_name: str | None) -> Select[tuple[str, int, Decimal, int]]:
+        stmt = (
+            select(
+                OrderDetail.product_sku.label("sku"),
+                func.sum(OrderDetail.qty).label("units"),
+                func.sum(Product.price * OrderDetail.qty).label("revenue"),
+                func.count(func.distinct(OrderDetail.order_id)).label("orders_qty"),
+            )
+            .join(OrderDetail.product)
+            .group_by(OrderDetail.product_sku)
+        )
+        if user_name is not None:                   # orders and users are joined only when they are filtered
+            stmt = stmt.join(OrderDetail.order).join(Order.user)
+        return self._filter(stmt, skus, user_name)
+
+
+    def _filter[S: Select](self, stmt: S, skus: Collection[str] | None, user_name: str | None) -> S:
+        if skus:
+            stmt = stmt.where(OrderDetail.product_sku.in_(set(skus)))
+        if user_name is not None:
+            stmt = stmt.where(User.username == user_name)
+        return stmt
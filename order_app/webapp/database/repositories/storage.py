@@ -1,12 +1,14 @@
 from webapp.extensions import db
 from webapp.database.repositories.generic import GenericRepository
+from webapp.database.repositories.loaders import STORAGE_PROFILES
 from webapp.database.models.storage import Storage
-from sqlalchemy import select
+from sqlalchemy import select, update, func, case, Row, CursorResult
+from typing import Any, Iterable, cast
 
 
 class StorageRepository(GenericRepository[Storage]):
     def __init__(self) -> None:
-        super().__init__(Storage)
+        super().__init__(Storage, STORAGE_PROFILES)
 
     def get_by_sku(self, sku: str) -> Storage | None:
         stmt = select(Storage).where(Storage.sku == sku)
@@ -17,10 +19,37 @@ class StorageRepository(GenericRepository[Storage]):
             select(Storage)
             .where(Storage.qty >= min_qty)
             .where(Storage.qty <= max_qty)
+            .order_by(Storage.qty, Storage.sku)         # range scan of ix_storage_qty
         )
         return list(db.session.scalars(stmt).all())
 
 
+    # (skus, zero_stock, units, min_qty, max_qty) over all storage rows, one aggregate query
+    def get_qty_summary(self) -> Row[tuple[int, int, int, int, int]]:
+        stmt = select(
+            func.count().label("skus"),
+            func.coalesce(func.sum(case((Storage.qty == 0, 1), else_=0)), 0).label("zero_stock"),
+            func.coalesce(func.sum(Storage.qty), 0).label("units"),
+            func.min(Storage.qty).label("min_qty"),
+            func.max(Storage.qty).label("max_qty")
+        )
+        return db.session.execute(stmt).one()
+
+
+    # (bin, skus) of the non-empty bins [low + bin * width, low + (bin + 1) * width), one grouped query. Grouped by the
+    # label - the bound parameters of a repeated expression would not match under ONLY_FULL_GROUP_BY in MySQL
+    def get_qty_histogram(self, low: int, width: int) -> list[Row[tuple[int, int]]]:
+        bucket = ((Storage.qty - low) // width).label("bin")            # FLOOR(a / b) in MySQL, a / b in SQLite
+        stmt = select(bucket, func.count().label("skus")).group_by("bin").order_by("bin")
+        return list(db.session.execute(stmt).all())
+
+
+    # qty of the row at 0-based position `offset` in qty order - read from ix_storage_qty
+    def get_qty_at(self, offset: int) -> int | None:
+        stmt = select(Storage.qty).order_by(Storage.qty).offset(offset).limit(1)
+        return db.session.scalar(stmt)
+
+
     def get_by_sku_for_update(self, sku: str) -> Storage | None:
         stmt = (
             select(Storage)
@@ -28,4 +57,37 @@ class StorageRepository(GenericRepository[Storage]):
             .with_for_update() # lock the row - avoiding situation where many order will try to update the same product
         )
 
-        return db.session.scalar(stmt)
\ No newline at end of file
+        return db.session.scalar(stmt)
+
+
+    def get_by_skus(self, skus: Iterable[str]) -> list[Storage]:
+        stmt = select(Storage).where(Storage.sku.in_(sorted(set(skus)))).order_by(Storage.sku)
+        return list(db.session.scalars(stmt).all())
+
+
+    def get_by_skus_for_update(self, skus: Iterable[str]) -> list[Storage]:
+        stmt = (
+            select(Storage)
+            .where(Storage.sku.in_(sorted(set(skus))))
+            .order_by(Storage.sku)      # rows are locked in index order - the same order for every transaction
+            .with_for_update()
+        )
+
+        return list(db.session.scalars(stmt).all())
+
+
+    # Atomic "check and decrement" in one statement - returns False when the sku is missing or qty is too low.
+    def decrement_qty_if_available(self, sku: str, qty: int) -> bool:
+        stmt = (
+            update(Storage)
+            .where(Storage.sku == sku)
+            .where(Storage.qty >= qty)
+            .values(qty=Storage.qty - qty)
+        )
+
+        return cast(CursorResult[Any], db.session.execute(stmt)).rowcount == 1
+
+
+    def increment_qty(self, sku: str, qty: int) -> bool:
+        stmt = update(Storage).where(Storage.sku == sku).values(qty=Storage.qty + qty)
+        return cast(CursorResult[Any], db.session.execute(stmt)).rowcount == 1
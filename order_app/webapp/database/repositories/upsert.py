@@ -0,0 +1,34 @@
+# Insert that adds to the stored row when the key is taken - INSERT .. ON DUPLICATE KEY UPDATE on MySQL,
+# INSERT .. ON CONFLICT DO UPDATE on SQLite (tests). The rows are a list of dicts or a SELECT of `columns`.
+# `changes` gets the columns of the row that was not inserted (inserted on MySQL, excluded on SQLite) and returns the
+# new values of the stored row - written with portable SQL, the same expressions go to both dialects.
+
+from typing import Any, Callable, Sequence
+
+from sqlalchemy import Insert, Select, ColumnElement
+from sqlalchemy.sql.base import ReadOnlyColumnCollection
+from sqlalchemy.sql.elements import KeyedColumnElement
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import InstrumentedAttribute
+
+from webapp.extensions import db
+
+
+type NewRow = ReadOnlyColumnCollection[str, KeyedColumnElement[Any]]
+
+
+def upsert(
+        model: type[Any],
+        rows: list[dict[str, Any]] | Select[Any],
+        key: Sequence[InstrumentedAttribute[Any]],
+        changes: Callable[[NewRow], dict[str, ColumnElement[Any]]],
+        columns: Sequence[str] = ()
+) -> Insert:
+    if db.session.get_bind().dialect.name == "mysql":
+        mysql_stmt = mysql.insert(model)
+        mysql_stmt = mysql_stmt.values(rows) if isinstance(rows, list) else mysql_stmt.from_select(columns, rows)
+        return mysql_stmt.on_duplicate_key_update(changes(mysql_stmt.inserted))
+
+    sqlite_stmt = sqlite.insert(model)
+    sqlite_stmt = sqlite_stmt.values(rows) if isinstance(rows, list) else sqlite_stmt.from_select(columns, rows)
+    return sqlite_stmt.on_conflict_do_update(index_elements=key, set_=changes(sqlite_stmt.excluded))
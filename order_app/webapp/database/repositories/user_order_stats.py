@@ -0,0 +1,126 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Collection, cast
+
+from sqlalchemy import select, insert, update, delete, func, case, Row, Select, ColumnElement, CursorResult
+
+from webapp.extensions import db
+from webapp.database.repositories.upsert import upsert, NewRow
+from webapp.database.models.orders import Order
+from webapp.database.models.products import Product
+from webapp.database.models.users import User
+from webapp.database.models.user_order_stats import UserOrderStats
+
+
+STATS_COLUMNS = ["user_id", "orders_count", "units", "lifetime_value", "first_order_at", "last_order_at"]
+
+
+# Not a GenericRepository - rows are never loaded as objects, every write is one statement that changes the stored
+# row (INSERT .. SELECT / UPDATE x = x + delta), so concurrent orders of one user do not overwrite each other.
+class UserOrderStatsRepository:
+
+    # (username, orders_count, units, lifetime_value, first_order_at, last_order_at) - zeros for a user without
+    # orders, None for an unknown user. One row read by primary key, no orders are counted.
+    def get_by_username(self, username: str) -> Row[tuple[str, int, int, Decimal, datetime, datetime]] | None:
+        stmt = (
+            select(
+                User.username,
+                func.coalesce(UserOrderStats.orders_count, 0).label("orders_count"),
+                func.coalesce(UserOrderStats.units, 0).label("units"),
+                func.coalesce(UserOrderStats.lifetime_value, 0).label("lifetime_value"),
+                UserOrderStats.first_order_at,
+                UserOrderStats.last_order_at
+            )
+            .outerjoin(UserOrderStats, UserOrderStats.user_id == User.id)
+            .where(User.username == username)
+        )
+        return db.session.execute(stmt).first()
+
+
+    # New orders (with their totals already computed) are added to the rows of their users, one
+    # INSERT .. SELECT .. ON DUPLICATE KEY UPDATE / ON CONFLICT DO UPDATE.
+    def add_orders(self, order_ids: Collection[int]) -> None:
+        if not order_ids:
+            return
+        rows = self._from_orders(Order.id.in_(list(order_ids)))
+        stmt = upsert(
+            UserOrderStats, rows, key=[UserOrderStats.user_id], changes=self._add_to_stats, columns=STATS_COLUMNS
+        )
+        db.session.execute(stmt)
+
+
+    # one line added to (sign=1) or removed from (sign=-1) an order of the user, valued at the current price like
+    # TotalOrderRepository.add_line_to_totals
+    def add_line(self, order_id: int, sku: str, qty: int, sign: int = 1) -> None:
+        price = select(Product.price).where(Product.sku == sku).scalar_subquery()
+        user_id = select(Order.user_id).where(Order.id == order_id).scalar_subquery()
+        stmt = (
+            update(UserOrderStats)
+            .where(UserOrderStats.user_id == user_id)
+            .values(
+                units=UserOrderStats.units + sign * qty,
+                lifetime_value=UserOrderStats.lifetime_value + sign * qty * func.coalesce(price, 0)
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.session.execute(stmt)
+
+
+    # Rows of the users computed again from their orders - after an order is deleted (the first / last order time
+    # cannot be taken back by a delta) and for `flask users rebuild-stats`. Returns the number of users with orders.
+    def recompute(self, user_ids: Collection[int]) -> int:
+        user_ids = list(user_ids)
+        return self._recompute(UserOrderStats.user_id.in_(user_ids), Order.user_id.in_(user_ids))
+
+
+    def recompute_between(self, first_id: int, last_id: int) -> int:
+        return self._recompute(
+            UserOrderStats.user_id.between(first_id, last_id), Order.user_id.between(first_id, last_id)
+        )
+
+
+    def get_max_user_id(self) -> int:
+        return db.session.execute(select(func.coalesce(func.max(User.id), 0))).scalar_one()
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    def _recompute(self, stats_where: ColumnElement[bool], orders_where: ColumnElement[bool]) -> int:
+        db.session.execute(delete(UserOrderStats).where(stats_where))
+        stmt = insert(UserOrderStats).from_select(STATS_COLUMNS, self._from_orders(orders_where))
+        return cast(CursorResult[Any], db.session.execute(stmt)).rowcount
+
+
+    # stored row + the row of the new orders; first / last order time by CASE - LEAST / GREATEST are MySQL only
+    @staticmethod
+    def _add_to_stats(new: NewRow) -> dict[str, ColumnElement[Any]]:
+        stats = UserOrderStats
+        return {
+            "orders_count": stats.orders_count + new.orders_count,
+            "units": stats.units + new.units,
+            "lifetime_value": stats.lifetime_value + new.lifetime_value,
+            "first_order_at": case(
+                (new.first_order_at < stats.first_order_at, new.first_order_at), else_=stats.first_order_at
+            ),
+            "last_order_at": case(
+                (new.last_order_at > stats.last_order_at, new.last_order_at), else_=stats.last_order_at
+            )
+        }
+
+
+    # one stats row per user of the selected orders, sums of the denormalized Order totals
+    @staticmethod
+    def _from_orders(where: ColumnElement[bool]) -> Select:
+        return (
+            select(
+                Order.user_id,
+                func.count(Order.id),
+                func.sum(Order.total_qty),
+                func.sum(Order.total_value),
+                func.min(Order.created),
+                func.max(Order.created)
+            )
+            .where(where)
+            .group_by(Order.user_id)
+        )
@@ -1,20 +1,50 @@
-from sqlalchemy.orm import selectinload
-
 from webapp.extensions import db
 from webapp.database.repositories.generic import GenericRepository
+from webapp.database.repositories.loaders import USER_PROFILES
 from webapp.database.models.users import User
-from sqlalchemy import select
+from webapp.database.models.orders import Order
+from sqlalchemy import select, func, Row, Select
+from typing import Iterable
 
 class UserRepository(GenericRepository[User]):
     def __init__(self) -> None:
-        super().__init__(User)
-
-    def get_all(self) -> list[User]:
-        stmt = select(User).options(selectinload(User.orders))
-        return list(db.session.scalars(stmt).all())
+        super().__init__(User, USER_PROFILES)
 
     def get_by_username(self, username: str) -> User | None:
-        stmt = select(User).where(User.username == username).options(selectinload(User.orders))
+        stmt = select(User).where(User.username == username).options(*self._options("summary"))
         return db.session.scalar(stmt)
 
 
+    def get_ids_by_usernames(self, usernames: Iterable[str]) -> dict[str, int]:
+        stmt = select(User.username, User.id).where(User.username.in_(set(usernames)))
+        return {username: user_id for username, user_id in db.session.execute(stmt).all()}
+
+
+    # (id, username, orders_qty) rows - orders are counted by the database, no Order objects are loaded.
+    def get_all_with_orders_qty(
+            self, limit: int | None = None, after: int | None = None
+    ) -> list[Row[tuple[int, str, int]]]:
+        page = select(User.id).order_by(User.id)
+        if after is not None:
+            page = page.where(User.id > after)
+        if limit is not None:
+            page = page.limit(limit)
+
+        # users of the page are picked first (seek on PK), so COUNT runs only for them and not for the whole table
+        page_ids = page.subquery()
+        stmt = self._with_orders_qty().join(page_ids, page_ids.c.id == User.id).order_by(User.id)
+        return list(db.session.execute(stmt).all())
+
+
+    def get_by_username_with_orders_qty(self, username: str) -> Row[tuple[int, str, int]] | None:
+        stmt = self._with_orders_qty().where(User.username == username)
+        return db.session.execute(stmt).first()
+
+
+    @staticmethod
+    def _with_orders_qty() -> Select[tuple[int, str, int]]:
+        return (
+            select(User.id, User.username, func.count(Order.id).label("orders_qty"))
+            .outerjoin(Order, Order.user_id == User.id)
+            .group_by(User.id, User.username)
+        )
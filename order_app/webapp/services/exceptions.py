@@ -17,4 +17,10 @@ class ProductAlreadyExistsException(ServiceException):
     status_code = 409
 
 class UserAlreadyExistsException(ServiceException):
-    status_code = 409
\ No newline at end of file
+    status_code = 409
+
+class IdempotencyConflictException(ServiceException):
+    status_code = 409
+
+class IdempotencyKeyReusedException(ServiceException):
+    status_code = 422
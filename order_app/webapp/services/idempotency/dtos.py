@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+
+@dataclass(frozen=True)
+class StoredResponseDTO:
+    fingerprint: str
+    status_code: int
+    body: str
+    expires_at: datetime
@@ -0,0 +1,33 @@
+import logging
+import threading
+
+from flask import Flask
+
+from webapp.services.idempotency.service import IdempotencyService
+
+
+logger = logging.getLogger(__name__)
+
+
+# Daemon thread deleting expired idempotency keys every interval_seconds. Each gunicorn worker runs its own - the
+# DELETE is idempotent, so running it more than once does no harm.
+class ExpiredKeysPurger(threading.Thread):
+    def __init__(self, app: Flask, idempotency_service: IdempotencyService, interval_seconds: int) -> None:
+        super().__init__(name="idempotency-purger", daemon=True)
+        self.app = app
+        self.idempotency_service = idempotency_service
+        self.interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            try:
+                with self.app.app_context():
+                    purged = self.idempotency_service.purge_expired()
+                if purged:
+                    logger.info("Purged %s expired idempotency keys", purged)
+            except Exception:
+                logger.exception("Purging idempotency keys failed")
+
+    def stop(self) -> None:
+        self._stop_event.set()
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+
+from webapp.core.lru import LRUCache
+from webapp.database.repositories.idempotency import IdempotencyRepository
+
+from webapp.services.idempotency.dtos import StoredResponseDTO
+from webapp.services.exceptions import IdempotencyConflictException, IdempotencyKeyReusedException
+
+
+class IdempotencyService:
+
+    def __init__(
+            self,
+            idempotency_repo: IdempotencyRepository,
+            ttl_seconds: int = 86400,
+            lease_seconds: int = 300,
+            cache_size: int = 1024
+    ):
+        self.idempotency_repo = idempotency_repo
+        self.ttl = timedelta(seconds=ttl_seconds)           # completed key - the stored response is replayed
+        self.lease = timedelta(seconds=lease_seconds)       # key in progress - taken over after it by the next retry
+        self.cache: LRUCache[str, StoredResponseDTO] = LRUCache(cache_size)   # completed keys only
+
+
+# ---------------------------------------------------------------------------------------
+# Request flow: begin -> (run the request) -> complete / abandon
+# ---------------------------------------------------------------------------------------
+
+    # Returns the stored response when the key was already used, otherwise reserves the key (None) for the lease only -
+    # a key left in progress by a worker that died blocks retries for minutes, not for the whole TTL.
+    def begin(self, key: str, fingerprint: str) -> StoredResponseDTO | None:
+        stored = self._get_stored(key)
+        if stored is not None:
+            return self._check_fingerprint(key, fingerprint, stored)
+
+        now = self._now()
+        if self.idempotency_repo.reserve(key, fingerprint, now + self.lease, now):
+            return None
+
+        # lost the race for the key - another request finished it in the meantime or is still running
+        stored = self._get_stored(key)
+        if stored is not None:
+            return self._check_fingerprint(key, fingerprint, stored)
+        raise IdempotencyConflictException(f'Request with Idempotency-Key {key} is still in progress')
+
+
+    # the response is stored for the full TTL
+    def complete(self, key: str, fingerprint: str, status_code: int, body: str) -> None:
+        expires_at = self._now() + self.ttl
+        self.idempotency_repo.complete(key, status_code, body, expires_at)
+        self.cache.put(key, StoredResponseDTO(fingerprint, status_code, body, expires_at))
+
+
+    # the request failed and changed nothing - the key is released, so the client can retry with it
+    def abandon(self, key: str) -> None:
+        self.idempotency_repo.release(key)
+
+
+    def purge_expired(self) -> int:
+        return self.idempotency_repo.purge_expired(self._now())
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    def _get_stored(self, key: str) -> StoredResponseDTO | None:
+        now = self._now()
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            if cached.expires_at > now:
+                return cached
+            self.cache.delete(key)
+
+        record = self.idempotency_repo.get(key)
+        if record is None or record.status_code is None or record.expires_at <= now:
+            return None
+
+        stored = StoredResponseDTO(record.fingerprint, record.status_code, record.response_body or "", record.expires_at)
+        self.cache.put(key, stored)
+        return stored
+
+
+    def _check_fingerprint(self, key: str, fingerprint: str, stored: StoredResponseDTO) -> StoredResponseDTO:
+        if stored.fingerprint != fingerprint:
+            raise IdempotencyKeyReusedException(f'Idempotency-Key {key} was already used for a different request')
+        return stored
+
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(timezone.utc).replace(tzinfo=None)      # DateTime columns are stored as naive UTC
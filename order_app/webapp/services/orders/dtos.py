@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from decimal import Decimal
 from typing import List
 
 
@@ -14,8 +15,16 @@ class ReadOrderDTO:
     id: int
     user_name: str
     details: List[ReadOrderDetailDTO]
+    total_qty: int
+    line_count: int
+    total_value: Decimal                    # sum of qty * price at the time the lines were written
 
 
+@dataclass(frozen=True)
+class OrderPageDTO:
+    items: List[ReadOrderDTO]
+    next_cursor: int | None                 # id of the last order on the page, None if this is the last page
+
 
 @dataclass(frozen=True)
 class CreateOrderDetailDTO:
@@ -32,3 +41,10 @@ class CreateOrderDTO:
 class DeleteProductsInOrderDTO:
     order_id: int
     product_sku: str
+
+
+@dataclass(frozen=True)
+class BulkOrderResultDTO:
+    index: int                              # position of the order in the request
+    order_id: int | None                    # None when the order was not created
+    error: str | None
@@ -0,0 +1,109 @@
+# Group commit for order writes inside one worker process. Concurrent callers put their order into a queue, the first
+# of them becomes the leader: it waits up to window_ms (or until max_batch orders are queued), then applies the whole
+# batch in ONE transaction - every order in its own SAVEPOINT, so a failing order is rolled back alone - and pays one
+# commit for all of them. Every caller gets its own result or its own exception back. After the batch the leader
+# passes the leadership to the oldest waiting caller, so nobody is stuck serving other requests forever.
+#
+# prepare() runs first in the batch transaction - OrderService locks the sorted union of the batch's stock rows there,
+# so two workers' batches take their locks in the same order instead of order by order. A database error
+# (OperationalError - deadlock, lock wait timeout, lost connection) is not the fault of one order: InnoDB has rolled
+# back the whole transaction, so the batch is aborted and every caller gets the error, no order id of it is returned.
+
+import threading
+import time
+from typing import Callable
+
+from sqlalchemy.exc import OperationalError
+
+from webapp.extensions import db
+
+
+class _Entry[T, R]:
+    __slots__ = ("item", "result", "error", "done")
+
+    def __init__(self, item: T) -> None:
+        self.item = item
+        self.result: R | None = None
+        self.error: BaseException | None = None
+        self.done = False
+
+    def outcome(self) -> R:
+        if self.error is not None:
+            raise self.error
+        return self.result      # type: ignore[return-value]
+
+
+class GroupCommitter[T, R]:
+    def __init__(
+            self,
+            apply: Callable[[T], R],
+            window_ms: int = 5,
+            max_batch: int = 50,
+            prepare: Callable[[list[T]], None] | None = None
+    ) -> None:
+        if max_batch <= 0:
+            raise ValueError("max_batch must be positive")
+        self.apply = apply                  # runs inside the shared transaction, must not open its own
+        self.prepare = prepare              # gets all items of the batch before the first apply, same transaction
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self._queue: list[_Entry[T, R]] = []
+        self._leader: _Entry[T, R] | None = None
+        self._cond = threading.Condition()
+
+
+    def submit(self, item: T) -> R:
+        entry: _Entry[T, R] = _Entry(item)
+
+        with self._cond:
+            self._queue.append(entry)
+            if self._leader is None:
+                self._leader = entry
+            self._cond.notify_all()         # leader may be waiting for a full batch
+
+            while not entry.done and self._leader is not entry:
+                self._cond.wait()
+
+            if entry.done:
+                return entry.outcome()
+
+            deadline = time.monotonic() + self.window
+            while len(self._queue) < self.max_batch and (remaining := deadline - time.monotonic()) > 0:
+                self._cond.wait(remaining)
+
+            batch = self._queue[:self.max_batch]
+            del self._queue[:self.max_batch]
+
+        try:
+            self._run_batch(batch)
+        finally:
+            with self._cond:
+                for queued in batch:
+                    queued.done = True
+                self._leader = self._queue[0] if self._queue else None
+                self._cond.notify_all()
+
+        return entry.outcome()
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    def _run_batch(self, batch: list[_Entry[T, R]]) -> None:
+        try:
+            with db.session.begin():
+                if self.prepare is not None:
+                    self.prepare([entry.item for entry in batch])
+                for entry in batch:
+                    try:
+                        with db.session.begin_nested():
+                            entry.result = self.apply(entry.item)
+                    except OperationalError:
+                        raise                               # the whole transaction is gone, not only the savepoint
+                    except Exception as e:
+                        entry.error = e
+        except Exception as e:                              # batch or commit failed - nothing from it was saved
+            for entry in batch:
+                entry.result = None
+                if entry.error is None:
+                    entry.error = e
@@ -1,3 +1,8 @@
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import Row
+
 from webapp.database.models.orders import Order
 from webapp.database.models.order_details import OrderDetail
 
@@ -9,7 +14,23 @@ def order_to_dto(order: Order) -> ReadOrderDTO:
     return ReadOrderDTO(
         id=order.id,
         user_name=order.user.username if order.user else "",
-        details=[order_detail_to_dto(od) for od in order.order_details]
+        details=[order_detail_to_dto(od) for od in order.order_details],
+        total_qty=order.total_qty,
+        line_count=order.line_count,
+        total_value=order.total_value
+    )
+
+
+# rows of one order from TotalOrderRepository.stream_order_rows
+def order_rows_to_dto(rows: Iterable[Row[tuple[int, str, str | None, int | None, int, int, Decimal]]]) -> ReadOrderDTO:
+    rows = list(rows)
+    return ReadOrderDTO(
+        id=rows[0].id,
+        user_name=rows[0].username,
+        details=[ReadOrderDetailDTO(sku=r.product_sku, qty=r.qty) for r in rows if r.product_sku is not None],
+        total_qty=rows[0].total_qty,
+        line_count=rows[0].line_count,
+        total_value=rows[0].total_value
     )
 
 
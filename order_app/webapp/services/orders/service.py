@@ -1,17 +1,36 @@
+from datetime import datetime
+from decimal import Decimal
+from collections import Counter
+from itertools import groupby
+from typing import Iterable, Iterator
+
 from webapp.database.repositories.storage import StorageRepository
 from webapp.database.repositories.users import UserRepository
 from webapp.extensions import db
+from webapp.core.clock import utc_now
 from webapp.database.models.orders import Order
 from webapp.database.models.order_details import OrderDetail
-from webapp.database.repositories.orders import TotalOrderRepository
-from webapp.services.orders.dtos import ReadOrderDTO, CreateOrderDTO, CreateOrderDetailDTO, DeleteProductsInOrderDTO
-from webapp.services.orders.mappers import order_to_dto, read_dto_order_details_to_order_details
+from webapp.database.repositories.orders import TotalOrderRepository, SORT_COLUMNS
+from webapp.database.repositories.user_order_stats import UserOrderStatsRepository
+from webapp.database.cache import RowCache
+from webapp.services.orders.dtos import ReadOrderDTO, CreateOrderDTO, CreateOrderDetailDTO, DeleteProductsInOrderDTO, \
+    OrderPageDTO, BulkOrderResultDTO
+from webapp.services.orders.group_commit import GroupCommitter
+from webapp.services.orders.mappers import order_to_dto, order_rows_to_dto, read_dto_order_details_to_order_details
 from webapp.services.exceptions import NotFoundException, ProductAlreadyExistsException, NotEnoughStockException, \
-    ServiceException
+    ServiceException, ValidationException
 from webapp.services.products.service import ProductService
 from webapp.services.storage.dtos import ModifyStorageDTO
 from webapp.services.storage.service import StorageService
-from webapp.services.users.service import UserService
+from webapp.services.storage.stock import StockMutator, StockStrategy
+from webapp.services.statistics.bought_together import BoughtTogetherIndex, PairDeltas, order_pairs, line_pairs
+from webapp.services.statistics.order_index import OrderStatisticsIndex
+from webapp.services.statistics.quantiles import QuantileSketchService
+from webapp.services.statistics.sales import SalesRollupService
+from webapp.services.statistics.top_skus import TopSkuTracker
+from webapp.services.users.service import UserService, get_user_id
+from webapp.services.pagination import DEFAULT_PAGE_SIZE, validate_page
+from webapp.services.single_flight import SingleFlight, coalesced
 
 
 class OrderService:
@@ -19,19 +38,63 @@ class OrderService:
                  order_repo: TotalOrderRepository,
                  storage_repo: StorageRepository,
                  user_repo: UserRepository,
+                 stock_strategy: str = StockStrategy.LOCK,
+                 group_commit: bool = False,
+                 group_commit_window_ms: int = 5,
+                 group_commit_max_batch: int = 50,
+                 order_index: OrderStatisticsIndex | None = None,
+                 quantile_sketches: QuantileSketchService | None = None,
+                 top_skus: TopSkuTracker | None = None,
+                 sales_rollups: SalesRollupService | None = None,
+                 user_stats_repo: UserOrderStatsRepository | None = None,
+                 bought_together: BoughtTogetherIndex | None = None,
+                 user_cache: RowCache[int] | None = None,
+                 flights: SingleFlight | None = None,
                  ):
         self.order_repo = order_repo
         self.storage_repo = storage_repo
         self.user_repo = user_repo
+        self.stock = StockMutator(storage_repo, stock_strategy)
+        # opt-in: concurrent add_order_with_details calls of this worker share one transaction (savepoint per order)
+        self.group_committer: GroupCommitter[CreateOrderDTO, tuple[int, datetime]] | None = GroupCommitter(
+            self._create_order, group_commit_window_ms, group_commit_max_batch, prepare=self._lock_batch_stock
+        ) if group_commit else None
+        self.order_index = order_index          # ranking of orders, told about every committed change
+        self.quantile_sketches = quantile_sketches      # qty quantiles per SKU / user, get every committed line
+        self.top_skus = top_skus                        # live top SKUs, get every committed and removed line
+        self.sales_rollups = sales_rollups              # hourly / daily sales, updated inside the same transaction
+        self.user_stats_repo = user_stats_repo          # user_order_stats rows, updated inside the same transaction
+        self.bought_together = bought_together          # SKU pairs, saved inside the transaction, applied after it
+        self.user_cache = user_cache                    # username -> id, read-through, reads only
+        self.flights = flights                          # identical concurrent listings share one query
 
 
 # ---------------------------------------------------------------------------------------
 # Read methods
 # ---------------------------------------------------------------------------------------
 
-    def get_all_orders_with_details(self) -> list[ReadOrderDTO]:
-        stmt = self.order_repo.get_all_total_orders()
-        return [order_to_dto(o) for o in stmt]
+    # sort by "id" (default), "total_value", "total_qty" or "line_count", direction "desc" (default) or "asc";
+    # min_value / max_value - range of Order.total_value
+    def get_all_orders_with_details(
+            self,
+            limit: int = DEFAULT_PAGE_SIZE,
+            after: int | None = None,
+            sort: str = "id",
+            direction: str = "desc",
+            min_value: Decimal | None = None,
+            max_value: Decimal | None = None
+    ) -> OrderPageDTO:
+        validate_page(limit, after)
+        self._listing_validation(after, sort, direction, min_value, max_value)
+
+        def load() -> OrderPageDTO:
+            stmt = self.order_repo.get_all_total_orders(       # one extra row tells if next page exists
+                limit + 1, after, sort=sort, descending=direction == "desc", min_value=min_value, max_value=max_value
+            )
+            return self._to_page(stmt, limit)
+
+        key = (limit, after, sort, direction, min_value, max_value)
+        return coalesced(self.flights, "orders.get_all_orders_with_details", key, load)
 
 
     def get_order_with_details_by_id(self, order_id: int) -> ReadOrderDTO:
@@ -41,10 +104,20 @@ class OrderService:
         return order_to_dto(stmt)
 
 
-    def get_all_orders_by_user_name(self, user_name: str) -> list[ReadOrderDTO]:
+    def get_all_orders_by_user_name(
+            self, user_name: str, limit: int = DEFAULT_PAGE_SIZE, after: int | None = None
+    ) -> OrderPageDTO:
+        validate_page(limit, after)
         self._check_if_user_name_exists(user_name)
-        stmt = self.order_repo.get_total_orders_by_user_name(user_name)
-        return [order_to_dto(o) for o in stmt]
+        stmt = self.order_repo.get_total_orders_by_user_name(user_name, limit + 1, after)
+        return self._to_page(stmt, limit)
+
+    # Whole order history for exports - a generator, orders are built one by one from streamed rows, so only one order
+    # is kept in memory at a time. Must be consumed inside the app context (stream_with_context in the route).
+    def stream_orders_with_details(self, chunk_size: int = 1000) -> Iterator[ReadOrderDTO]:
+        rows = self.order_repo.stream_order_rows(chunk_size)
+        for _, order_rows in groupby(rows, key=lambda r: r.id):
+            yield order_rows_to_dto(order_rows)
 
 # ---------------------------------------------------------------------------------------
 # Create methods
@@ -55,21 +128,93 @@ class OrderService:
 
         for item in dto.details:
             self._positive_data_validation(item.sku, item.qty)
+        self._unique_skus_validation(dto.details)
+
+        if self.group_committer is not None:
+            order_id, created = self.group_committer.submit(dto)
+        else:
+            with db.session.begin():
+                order_id, created = self._create_order(dto)
+
+        self._orders_changed([order_id])
+        self._lines_added(dto.user_name, dto.details, created)
+        self._pairs_changed(order_pairs(d.sku for d in dto.details))
+        return f'Order {order_id} created successfully with {len(dto.details)} products'
+
+
+    # Batch of orders in one transaction: users and SKUs are resolved with one query each, stock rows are locked once
+    # (FOR UPDATE, sku order) for the whole batch and checked in memory, details go in with one executemany.
+    # all_or_nothing=True  - any failed order means nothing is written, the other orders are reported as rolled back
+    # all_or_nothing=False - valid orders are created, failed ones are only reported
+    def add_orders_bulk(self, dtos: list[CreateOrderDTO], all_or_nothing: bool = True) -> list[BulkOrderResultDTO]:
+        errors: dict[int, str] = {}
+        for index, dto in enumerate(dtos):
+            try:
+                for item in dto.details:
+                    self._positive_data_validation(item.sku, item.qty)
+                self._unique_skus_validation(dto.details)
+            except ServiceException as e:
+                errors[index] = str(e)
+
+        created_ids: dict[int, int] = {}
+        now = utc_now()                         # created of all lines of the batch
+        pairs: PairDeltas = Counter()
 
         with db.session.begin():
-
-            user = self.user_repo.get_by_username(dto.user_name)
-            if user is None:
-                raise NotFoundException(f'User {dto.user_name} not found')
-
-            order = Order(user_id=user.id)
-            order = self.order_repo.add(order)  # creating an object of adding order to pass tests
-            db.session.flush() # to have order in DB to go further with the below code
-
-            for detail in dto.details:
-                self._add_product_internal(order, detail)
-
-        return f'Order {order.id} created successfully with {len(dto.details)} products'
+            user_ids = self.user_repo.get_ids_by_usernames({dto.user_name for dto in dtos})
+            stock = {
+                s.sku: s for s in
+                self.storage_repo.get_by_skus_for_update({d.sku for dto in dtos for d in dto.details})
+            }
+            available = {sku: s.qty for sku, s in stock.items()}
+
+            for index, dto in enumerate(dtos):
+                if index not in errors:
+                    error = self._reserve_bulk_order(dto, user_ids, available)
+                    if error is not None:
+                        errors[index] = error
+
+            if not (errors and all_or_nothing):
+                created = {
+                    index: Order(user_id=user_ids[dto.user_name])
+                    for index, dto in enumerate(dtos) if index not in errors
+                }
+                self.order_repo.add_all(created.values())
+                db.session.flush()          # order ids are needed for the details
+                created_ids = {index: order.id for index, order in created.items()}
+
+                self.order_repo.add_details_bulk([
+                    {"order_id": created_ids[index], "product_sku": d.sku, "qty": d.qty, "created": now}
+                    for index, dto in enumerate(dtos) if index in created_ids
+                    for d in dto.details
+                ])
+                self.order_repo.recompute_totals(created_ids.values())
+                if self.user_stats_repo is not None:
+                    self.user_stats_repo.add_orders(created_ids.values())
+
+                for sku, qty in available.items():
+                    stock[sku].qty = qty
+
+                if self.sales_rollups is not None:
+                    self.sales_rollups.lines_added(
+                        (d.sku, d.qty, now) for index, dto in enumerate(dtos) if index in created_ids
+                        for d in dto.details
+                    )
+                for index in created_ids:
+                    pairs.update(order_pairs(d.sku for d in dtos[index].details))
+                if self.bought_together is not None:
+                    self.bought_together.save(pairs)
+
+        self._orders_changed(created_ids.values())
+        for index in created_ids:
+            self._lines_added(dtos[index].user_name, dtos[index].details, now)
+        self._pairs_changed(pairs)
+        rolled_back = 'Order not created, batch rolled back because other orders failed'
+        return [
+            BulkOrderResultDTO(index=index, order_id=created_ids[index], error=None) if index in created_ids
+            else BulkOrderResultDTO(index=index, order_id=None, error=errors.get(index, rolled_back))
+            for index in range(len(dtos))
+        ]
 
 
     def add_product_to_order(self, order_id: int, dto: CreateOrderDetailDTO) -> str:
@@ -77,12 +222,27 @@ class OrderService:
 
 
         with db.session.begin():
-            order = self.order_repo.get(order_id)
+            order = self.order_repo.get(order_id, profile="with_details")
             if order is None:
                 raise NotFoundException(f'Order {order_id} not found')
 
-            self._add_product_internal(order, dto)
-
+            self._check_product_not_in_order(order, dto.sku)
+            pairs = line_pairs(dto.sku, [od.product_sku for od in order.order_details])
+            self.stock.take([(dto.sku, dto.qty)])
+            created = utc_now()
+            self._add_product_internal(order, dto, created)
+            self.order_repo.add_line_to_totals(order_id, dto.sku, dto.qty)
+            if self.user_stats_repo is not None:
+                self.user_stats_repo.add_line(order_id, dto.sku, dto.qty)
+            if self.sales_rollups is not None:
+                self.sales_rollups.lines_added([(dto.sku, dto.qty, created)])
+            if self.bought_together is not None:
+                self.bought_together.save(pairs)
+            user_name = order.user.username if order.user else ""
+
+        self._orders_changed([order_id])
+        self._lines_added(user_name, [dto], created)
+        self._pairs_changed(pairs)
         return f"Product {dto.sku} of {dto.qty} qty added to order {order_id} successfully"
 
 # ---------------------------------------------------------------------------------------
@@ -92,15 +252,35 @@ class OrderService:
 
     # delete order
     def delete_order_with_details(self, order_id: int) -> str:
+        pairs: PairDeltas = Counter()
+        removed: list[tuple[str, int, datetime]] = []
         with db.session.begin():
+            if self.sales_rollups is not None or self.top_skus is not None:
+                removed = self.order_repo.get_order_lines(order_id)         # the rows are gone after commit
+            if self.sales_rollups is not None:
+                self.sales_rollups.lines_removed(removed)
+            if self.bought_together is not None:
+                pairs = self.bought_together.order_removed(order_id)
+                self.bought_together.save(pairs)
+            user_stats_repo = self.user_stats_repo
+            order = self.order_repo.get(order_id) if user_stats_repo is not None else None
             self.order_repo.delete_by_id(order_id)
-
+            if user_stats_repo is not None and order is not None:
+                db.session.flush()          # the row of the user is computed from the remaining orders
+                user_stats_repo.recompute([order.user_id])
+
+        if self.order_index is not None:
+            self.order_index.remove([order_id])
+        if self.top_skus is not None:
+            for line in removed:
+                self.top_skus.remove(*line)
+        self._pairs_changed(pairs)
         return f'Order {order_id} deleted with all details'
 
 
     def delete_product_in_order(self, dto: DeleteProductsInOrderDTO) -> str:
         with db.session.begin():
-            order = self.order_repo.get(dto.order_id)
+            order = self.order_repo.get(dto.order_id, profile="with_details")
             if order is None:
                 raise NotFoundException(f'Order {dto.order_id} not found')
 
@@ -113,12 +293,22 @@ class OrderService:
                 raise NotFoundException(f'Product {dto.product_sku} not found in order {dto.order_id}')
 
 
-            storage_item = self.storage_repo.get_by_sku_for_update(detail.product_sku)
-            if storage_item is None:
-                raise NotFoundException(f'Product {dto.product_sku} not found in storage')
-            storage_item.qty += detail.qty
+            self.stock.give_back(detail.product_sku, detail.qty)
+            removed = (detail.product_sku, detail.qty, detail.created)     # the row is gone after commit
             order.order_details.remove(detail)
-
+            self.order_repo.add_line_to_totals(dto.order_id, detail.product_sku, detail.qty, sign=-1)
+            if self.user_stats_repo is not None:
+                self.user_stats_repo.add_line(dto.order_id, detail.product_sku, detail.qty, sign=-1)
+            if self.sales_rollups is not None:
+                self.sales_rollups.lines_removed([removed])
+            pairs = line_pairs(detail.product_sku, [od.product_sku for od in order.order_details], sign=-1)
+            if self.bought_together is not None:
+                self.bought_together.save(pairs)
+
+        self._orders_changed([dto.order_id])
+        if self.top_skus is not None:
+            self.top_skus.remove(*removed)
+        self._pairs_changed(pairs)
         return f'Product {dto.product_sku} deleted from order {dto.order_id}'
 
 
@@ -129,37 +319,142 @@ class OrderService:
 
 
 
+    # Order totals computed again from order_details with current prices, chunk_size orders per transaction
+    # (flask orders recompute-totals). Returns the number of orders.
+    def recompute_order_totals(self, chunk_size: int = 10_000) -> int:
+        updated = 0
+        last_id = self.order_repo.get_max_id()
+        for first_id in range(1, last_id + 1, chunk_size):
+            with db.session.begin():
+                updated += self.order_repo.recompute_totals_between(first_id, first_id + chunk_size - 1)
+        return updated
+
 # ---------------------------------------------------------------------------------------
 # Privet methods
 # ---------------------------------------------------------------------------------------
 
     def _check_if_user_name_exists(self, user_name: str) -> None:
-        if self.user_repo.get_by_username(user_name) is None:
+        if get_user_id(self.user_repo, self.user_cache, user_name) is None:
             raise NotFoundException(f'{user_name} does not exist')
 
 
+    def _orders_changed(self, order_ids: Iterable[int]) -> None:
+        if self.order_index is not None:
+            self.order_index.refresh(list(order_ids))
+
+
+    def _pairs_changed(self, pairs: PairDeltas) -> None:
+        if self.bought_together is not None:
+            self.bought_together.apply(pairs)
+
+
+    def _lines_added(self, user_name: str, details: Iterable[CreateOrderDetailDTO], created: datetime) -> None:
+        lines = [(d.sku, d.qty) for d in details]
+        if self.quantile_sketches is not None:
+            self.quantile_sketches.record(user_name, lines)
+        if self.top_skus is not None:
+            self.top_skus.record([(sku, qty, created) for sku, qty in lines])
+
+
+    def _listing_validation(
+            self,
+            after: int | None,
+            sort: str,
+            direction: str,
+            min_value: Decimal | None,
+            max_value: Decimal | None
+    ) -> None:
+        if sort not in SORT_COLUMNS:
+            raise ValidationException(f'Orders can be sorted by {", ".join(SORT_COLUMNS)}, not by {sort}')
+        if direction not in ("asc", "desc"):
+            raise ValidationException(f'Direction {direction} must be asc or desc')
+        if min_value is not None and max_value is not None and min_value > max_value:
+            raise ValidationException(f'min_value {min_value} is greater than max_value {max_value}')
+        if after is not None and sort != "id" and self.order_repo.get(after) is None:
+            raise ValidationException(f'Cursor {after} is not an existing order')     # its totals are the seek key
+
+
+    def _to_page(self, orders: list[Order], limit: int) -> OrderPageDTO:
+        items = [order_to_dto(o) for o in orders[:limit]]
+        next_cursor = items[-1].id if len(orders) > limit else None
+        return OrderPageDTO(items=items, next_cursor=next_cursor)
+
+
     def _positive_data_validation(self, sku: str, qty: int) -> None:
         if qty <= 0:
             raise ServiceException(f'Qty {qty} must be positive')
         if not sku or sku.strip() == '':
             raise ServiceException(f'Product sku {sku} is empty')
 
-    def _add_product_internal(self, order: Order, dto: CreateOrderDetailDTO) -> None:
-        for detail in order.order_details:
-            if detail.product_sku == dto.sku:
-                raise ProductAlreadyExistsException(f'Product {dto.sku} already exists in order {order.id}')
-
-        product_storage = self.storage_repo.get_by_sku_for_update(dto.sku)
+    def _unique_skus_validation(self, details: list[CreateOrderDetailDTO]) -> None:
+        seen: set[str] = set()
+        for detail in details:
+            if detail.sku in seen:
+                raise ProductAlreadyExistsException(f'Product {detail.sku} is listed more than once in the order')
+            seen.add(detail.sku)
 
-        if product_storage is None:
-            raise NotFoundException(f'Product {dto.sku} not found in storage')
 
-        if product_storage.qty < dto.qty:
-            raise NotEnoughStockException(
-                f'Ordered QTY {dto.qty} > Storage QTY {product_storage.qty}'
-            )
-
-        od = OrderDetail(product_sku=dto.sku, qty=dto.qty)
+    def _check_product_not_in_order(self, order: Order, sku: str) -> None:
+        for detail in order.order_details:
+            if detail.product_sku == sku:
+                raise ProductAlreadyExistsException(f'Product {sku} already exists in order {order.id}')
+
+
+    # checks one order of a bulk batch against stock left by the previous orders, takes its qty when everything fits
+    def _reserve_bulk_order(
+            self, dto: CreateOrderDTO, user_ids: dict[str, int], available: dict[str, int]
+    ) -> str | None:
+        if dto.user_name not in user_ids:
+            return f'User {dto.user_name} not found'
+
+        errors = [f'Product {d.sku} not found in storage' for d in dto.details if d.sku not in available]
+        errors += [
+            f'Product {d.sku}: ordered QTY {d.qty} > Storage QTY {available[d.sku]}'
+            for d in dto.details if d.sku in available and available[d.sku] < d.qty
+        ]
+        if errors:
+            return '; '.join(errors)
+
+        for d in dto.details:
+            available[d.sku] -= d.qty
+        return None
+
+
+    # stock rows of a whole group commit batch, locked in sku order before any of its orders takes stock
+    def _lock_batch_stock(self, dtos: list[CreateOrderDTO]) -> None:
+        self.storage_repo.get_by_skus_for_update({d.sku for dto in dtos for d in dto.details})
+
+
+    # body of add_order_with_details, runs inside a transaction opened by the caller (own one or a group commit)
+    # returns the id of the order and the created of its lines
+    def _create_order(self, dto: CreateOrderDTO) -> tuple[int, datetime]:
+        user = self.user_repo.get_by_username(dto.user_name)      # not from user_cache, see get_user_id
+        if user is None:
+            raise NotFoundException(f'User {dto.user_name} not found')
+
+        self.stock.take([(d.sku, d.qty) for d in dto.details])     # all SKUs checked before any line is applied
+
+        order = Order(user_id=user.id, order_details=[])      # empty collection, nothing to lazy-load later
+        order = self.order_repo.add(order)  # creating an object of adding order to pass tests
+        db.session.flush() # to have order in DB to go further with the below code
+
+        created = utc_now()
+        for detail in dto.details:
+            self._add_product_internal(order, detail, created)
+        db.session.flush()
+        self.order_repo.recompute_totals([order.id])
+        if self.user_stats_repo is not None:
+            self.user_stats_repo.add_orders([order.id])
+        if self.sales_rollups is not None:
+            self.sales_rollups.lines_added([(d.sku, d.qty, created) for d in dto.details])
+        if self.bought_together is not None:
+            self.bought_together.save(order_pairs(d.sku for d in dto.details))
+
+        return order.id, created
+
+
+    # stock for the line is already taken by self.stock (lock or conditional strategy)
+    # created is passed to the sales rollups too, so the line and its bucket use the same moment
+    def _add_product_internal(self, order: Order, dto: CreateOrderDetailDTO, created: datetime) -> None:
+        od = OrderDetail(product_sku=dto.sku, qty=dto.qty, created=created)
         order.order_details.append(od)
-
-        product_storage.qty -= dto.qty
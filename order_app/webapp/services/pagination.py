@@ -0,0 +1,15 @@
+# Shared rules for keyset (cursor) pagination used by the listing endpoints. A cursor is the id of the last row of the
+# previous page, so every page is a seek on the primary key and costs the same no matter how deep the client goes.
+
+from webapp.services.exceptions import ValidationException
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def validate_page(limit: int, after: int | None) -> None:
+    if limit <= 0 or limit > MAX_PAGE_SIZE:
+        raise ValidationException(f'Limit {limit} must be between 1 and {MAX_PAGE_SIZE}')
+    if after is not None and after <= 0:
+        raise ValidationException(f'Cursor {after} must be positive')
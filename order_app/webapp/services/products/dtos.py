@@ -14,3 +14,15 @@ class ReadProductDTO:
     sku: str
     name: str
     price: Decimal
+
+
+@dataclass(frozen=True)
+class ProductPageDTO:
+    items: list[ReadProductDTO]
+    next_cursor: int | None                 # number of results up to the end of this page, None on the last page
+
+
+@dataclass(frozen=True)
+class ProductSuggestionDTO:
+    sku: str
+    name: str
@@ -3,22 +3,37 @@ from webapp.extensions import db
 from webapp.database.models.products import Product
 
 from webapp.database.repositories.products import ProductRepository
+from webapp.database.cache import RowCache
 
-from webapp.services.exceptions import NotFoundException, ProductAlreadyExistsException
+from webapp.services.products.typeahead import ProductTypeahead
 
-from webapp.services.products.dtos import CreateProductDTO, ReadProductDTO
+from webapp.services.exceptions import NotFoundException, ProductAlreadyExistsException, ValidationException
+
+from webapp.services.products.dtos import CreateProductDTO, ReadProductDTO, ProductPageDTO
 
 from webapp.services.products.mappers import product_to_dto
 
+from webapp.services.pagination import DEFAULT_PAGE_SIZE, validate_page
+
 from decimal import Decimal
 
 
+MAX_SEARCH_OFFSET = 1000           # results are ranked, so pages are counted by OFFSET - deep pages cost more
+
+
 
 
 class ProductService:
 
-    def __init__(self, product_repo: ProductRepository):
+    def __init__(
+            self,
+            product_repo: ProductRepository,
+            typeahead: ProductTypeahead | None = None,
+            product_cache: RowCache[ReadProductDTO] | None = None
+    ):
         self.product_repo = product_repo
+        self.typeahead = typeahead
+        self.product_cache = product_cache
 
 
 # ---------------------------------------------------------------------------------------
@@ -30,10 +45,10 @@ class ProductService:
 
 
     def get_by_sku(self, sku: str) -> ReadProductDTO:
-        product = self.product_repo.get_by_sku(sku)
+        product = get_product(self.product_repo, self.product_cache, sku)
         if product is None:
             raise NotFoundException(f"Product with sku {sku} not found.")
-        return product_to_dto(product)
+        return product
 
 
     def get_by_price_between(self, price_min: Decimal, price_max: Decimal) -> list[ReadProductDTO]:
@@ -43,11 +58,22 @@ class ProductService:
         return [product_to_dto(product) for product in products]
 
 
-    def get_by_part_name(self, product_name: str) -> list[ReadProductDTO]:
-        products = self.product_repo.get_by_part_name(product_name)
+    # full-text search of names, best match first; the cursor is the number of results on the previous pages
+    def get_by_part_name(
+            self, product_name: str, limit: int = DEFAULT_PAGE_SIZE, after: int | None = None
+    ) -> ProductPageDTO:
+        validate_page(limit, after)
+        if after is not None and after > MAX_SEARCH_OFFSET:
+            raise ValidationException(f'Search results are paged up to {MAX_SEARCH_OFFSET}, refine the search')
+        if not product_name.strip():
+            raise ValidationException('Search text cannot be empty')
+
+        offset = after or 0
+        products = self.product_repo.get_by_part_name(product_name, limit + 1, offset)     # one extra: next page?
         if len(products) == 0:
             raise NotFoundException(f"Product with name {product_name} not found.")
-        return [product_to_dto(product) for product in products]
+        items = [product_to_dto(product) for product in products[:limit]]
+        return ProductPageDTO(items=items, next_cursor=offset + limit if len(products) > limit else None)
 
 # ---------------------------------------------------------------------------------------
 # Create methods
@@ -59,6 +85,8 @@ class ProductService:
             product = Product(sku=dto.sku, name=dto.name, price=dto.price)
             self.product_repo.add(product)
 
+        if self.typeahead is not None:
+            self.typeahead.add(product.sku, product.name)         # after the commit
         return product_to_dto(product)
 
 
@@ -67,9 +95,21 @@ class ProductService:
 # Privet methods
 # ---------------------------------------------------------------------------------------
     def _validate_product(self, sku: str) -> Product | None:
-        product = self.product_repo.get_by_sku(sku)
+        product = get_product(self.product_repo, self.product_cache, sku)
 
         if product is not None:
             raise ProductAlreadyExistsException(f"Product with sku {sku} already exists.")
 
         return None
+
+
+# Product by sku through the read-through cache (when there is one) - also used by StorageService to check that a
+# product exists. Products are cached as DTOs, see database/cache.py.
+def get_product(
+        product_repo: ProductRepository, product_cache: RowCache[ReadProductDTO] | None, sku: str
+) -> ReadProductDTO | None:
+    def load() -> ReadProductDTO | None:
+        product = product_repo.get_by_sku(sku)
+        return product_to_dto(product) if product is not None else None
+
+    return load() if product_cache is None else product_cache.get(sku, load)
@@ -0,0 +1,190 @@
+# Product typeahead served from memory - no database round trip per keystroke. Two sorted-array prefix indexes
+# (core/prefix_index.py): one over the words of Product.name, one over the SKUs; products are kept as parallel lists
+# of sku / name and the indexes point into them.
+#
+# Loading: in bulk from a stream of (sku, name) rows - TypeaheadLoader does it when the worker starts and again every
+# TYPEAHEAD_RELOAD_SECONDS (products of other workers), the first question loads it if the loader has not finished
+# yet. A reload builds new arrays next to the old ones and swaps them; questions keep using the old arrays meanwhile.
+# Writes: ProductService.create_product calls add() after its commit.
+#
+# Memory is bounded by max_products - products over the limit are not indexed (a warning is logged, `truncated`
+# is set). Names have at most 90 characters, so a product costs a few hundred bytes; repeated words are interned.
+
+import logging
+import re
+import sys
+import threading
+from typing import Container, Iterable, Sequence
+
+from webapp.extensions import db
+from webapp.core.prefix_index import PrefixIndex
+from webapp.database.repositories.products import ProductRepository
+from webapp.services.products.dtos import ProductSuggestionDTO
+from webapp.services.exceptions import ValidationException
+
+
+logger = logging.getLogger(__name__)
+
+MAX_SUGGESTIONS = 50
+MAX_FILTER_SET = 10_000            # refs of a word put in a set to filter the candidates of a multi-word text
+
+
+def _words(text: str) -> list[str]:
+    return re.findall(r"\w+", text.casefold())
+
+
+class ProductTypeahead:
+    def __init__(self, product_repo: ProductRepository, max_products: int = 1_000_000) -> None:
+        self.product_repo = product_repo
+        self.max_products = max_products
+        self.truncated = False
+        self._skus: list[str] = []
+        self._names: list[str] = []
+        self._refs: dict[str, int] = {}                 # sku -> position in _skus / _names
+        self._name_index = PrefixIndex()
+        self._sku_index = PrefixIndex()
+        self._pending: list[tuple[str, str]] | None = None     # products added while a load runs
+        self._loaded = False
+        self._lock = threading.Lock()                   # the arrays
+        self._load_lock = threading.Lock()              # one load at a time
+
+
+# ---------------------------------------------------------------------------------------
+# Read methods
+# ---------------------------------------------------------------------------------------
+
+    # Products whose SKU starts with the text (case-insensitive) first, then products where every word of the text
+    # starts a word of the name ("blu sh" -> "Blue Shirt"), ordered by the matching word. Empty list when nothing
+    # matches - the storefront asks on every keystroke.
+    def suggest(self, text: str, limit: int = 10) -> list[ProductSuggestionDTO]:
+        if not 0 < limit <= MAX_SUGGESTIONS:
+            raise ValidationException(f'Limit {limit} must be between 1 and {MAX_SUGGESTIONS}')
+        words = _words(text)
+        if not words:
+            raise ValidationException('Search text cannot be empty')
+
+        self._ensure_loaded()
+        with self._lock:
+            refs: dict[int, None] = {}                  # distinct, in order
+            if len(text.split()) == 1:
+                refs.update(dict.fromkeys(self._sku_index.scan(text.strip().casefold(), limit)))
+            if len(refs) < limit:
+                refs.update(dict.fromkeys(self._name_matches(words, limit - len(refs), refs)))
+            return [ProductSuggestionDTO(sku=self._skus[ref], name=self._names[ref]) for ref in refs]
+
+# ---------------------------------------------------------------------------------------
+# Write methods
+# ---------------------------------------------------------------------------------------
+
+    # after the commit of a new product; before the first load there is nothing to do (the load reads it)
+    def add(self, sku: str, name: str) -> None:
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((sku, name))
+            if self._loaded:
+                self._insert(sku, name)
+
+
+    # all products read again from the database, returns the number of indexed products
+    def load(self, chunk_size: int = 10_000) -> int:
+        with self._load_lock:
+            return self._load(chunk_size)
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load()
+
+
+    def _load(self, chunk_size: int = 10_000) -> int:
+        with self._lock:
+            self._pending = []
+
+        skus: list[str] = []
+        names: list[str] = []
+        name_terms: list[tuple[str, int]] = []
+        truncated = False
+        try:
+            for sku, name in self.product_repo.stream_names(chunk_size):
+                if len(skus) >= self.max_products:
+                    truncated = True
+                    break
+                name_terms.extend((sys.intern(word), len(skus)) for word in set(_words(name)))
+                skus.append(sku)
+                names.append(name)
+            db.session.rollback()                       # end the read transaction of the stream
+            name_index = PrefixIndex.from_pairs(name_terms)
+            sku_index = PrefixIndex.from_pairs((sku.casefold(), ref) for ref, sku in enumerate(skus))
+        except Exception:
+            with self._lock:
+                self._pending = None
+            raise
+
+        with self._lock:
+            self._skus, self._names = skus, names
+            self._refs = {sku: ref for ref, sku in enumerate(skus)}
+            self._name_index, self._sku_index = name_index, sku_index
+            self.truncated = truncated
+            for sku, name in self._pending or []:      # committed during the stream, maybe not read by it
+                self._insert(sku, name)
+            self._pending = None
+            self._loaded = True
+
+        if self.truncated:
+            logger.warning("Typeahead index is full (%s products), newer products are not suggested", self.max_products)
+        return len(self._skus)
+
+
+    def _insert(self, sku: str, name: str) -> None:
+        if sku in self._refs:
+            return
+        if len(self._skus) >= self.max_products:
+            self.truncated = True
+            return
+        ref = len(self._skus)
+        self._skus.append(sku)
+        self._names.append(name)
+        self._refs[sku] = ref
+        self._sku_index.add(sku.casefold(), ref)
+        for word in set(_words(name)):
+            self._name_index.add(sys.intern(word), ref)
+
+
+    # The word of the text with the fewest terms picks the candidates, the other words filter them: a rare word by the
+    # set of its refs, a common one ("s" of "blue s") by a regex over the name of the candidate. Refs in `skip` and
+    # repeated refs (two words of a name with the same prefix) do not count to the limit.
+    def _name_matches(self, words: list[str], limit: int, skip: Container[int]) -> list[int]:
+        counts = {word: self._name_index.count(word) for word in words}
+        key, *others = sorted(counts, key=counts.__getitem__)
+        sets = [set(self._name_index.scan(word)) for word in others if counts[word] <= MAX_FILTER_SET]
+        patterns = [re.compile(rf"\b{re.escape(word)}") for word in others if counts[word] > MAX_FILTER_SET]
+
+        candidates: Sequence[int] = self._name_index.scan(key) if others else self._name_index.scan(key, 2 * limit)
+        for refs in sets:
+            candidates = [ref for ref in candidates if ref in refs]
+        found = self._first(candidates, limit, skip, patterns)
+        if len(found) < limit and not others and len(candidates) < counts[key]:     # the window had repeated refs
+            found = self._first(self._name_index.scan(key), limit, skip, patterns)
+        return found
+
+
+    # the first `limit` distinct refs not in `skip` whose names match all patterns - regexes run only until the limit
+    def _first(
+            self, refs: Iterable[int], limit: int, skip: Container[int], patterns: list[re.Pattern[str]]
+    ) -> list[int]:
+        found: dict[int, None] = {}
+        for ref in refs:
+            if ref in skip or ref in found:
+                continue
+            if patterns and not all(p.search(self._names[ref].casefold()) for p in patterns):
+                continue
+            found[ref] = None
+            if len(found) == limit:
+                break
+        return list(found)
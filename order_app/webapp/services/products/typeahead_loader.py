@@ -0,0 +1,38 @@
+import logging
+import threading
+
+from flask import Flask
+
+from webapp.extensions import db
+from webapp.services.products.typeahead import ProductTypeahead
+
+
+logger = logging.getLogger(__name__)
+
+
+# Daemon thread loading the typeahead index of this worker when it starts and again every interval_seconds
+# (0 = only at start), so products created by other workers show up. Questions keep being answered from the old
+# arrays while a reload runs. Started by create_app only in the served app - tests and flask commands do not load the
+# whole product table.
+class TypeaheadLoader(threading.Thread):
+    def __init__(self, app: Flask, typeahead: ProductTypeahead, interval_seconds: int) -> None:
+        super().__init__(name="typeahead-loader", daemon=True)
+        self.app = app
+        self.typeahead = typeahead
+        self.interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while True:
+            try:
+                with self.app.app_context():
+                    products = self.typeahead.load()
+                    db.session.remove()
+                logger.info("Loaded %s products into the typeahead index", products)
+            except Exception:
+                logger.exception("Loading the typeahead index failed")
+            if not self.interval_seconds or self._stop_event.wait(self.interval_seconds):
+                return
+
+    def stop(self) -> None:
+        self._stop_event.set()
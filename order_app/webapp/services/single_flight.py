@@ -0,0 +1,105 @@
+# Single-flight for expensive reads inside one worker process. The first caller of a read (name + its arguments)
+# runs it, callers asking for the same read while it runs wait and get the same result - or the same exception -
+# instead of sending the same query again. Results are shared between requests, so they must be immutable DTOs (never
+# ORM objects, those belong to the session of the leader) and must not be changed by the callers.
+#
+# A commit in this worker forgets the reads in flight: a caller asking after the commit starts a new read instead of
+# joining one that may have started before it - a client reading right after its own write always sees the write.
+# The reads already in flight still finish for the callers that joined them.
+#
+# Calls and executions are counted per name - calls - executions = callers that got the result of another caller.
+
+import threading
+import weakref
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Hashable
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+_flights: weakref.WeakSet["SingleFlight"] = weakref.WeakSet()          # forgotten on every commit
+
+
+@dataclass(frozen=True)
+class FlightStats:
+    name: str
+    calls: int
+    executions: int
+    collapsed: int
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+
+    def outcome(self) -> Any:
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._in_flight: dict[tuple[str, Hashable], _Flight] = {}
+        self._calls: Counter[str] = Counter()
+        self._executions: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        _flights.add(self)
+
+
+    # result of fn(), shared with every caller of the same name and key while it runs - key must be hashable
+    def do[R](self, name: str, key: Hashable, fn: Callable[[], R]) -> R:
+        with self._lock:
+            self._calls[name] += 1
+            flight = self._in_flight.get((name, key))
+            leader = flight is None
+            if flight is None:
+                flight = self._in_flight[(name, key)] = _Flight()
+                self._executions[name] += 1
+
+        if not leader:
+            flight.done.wait()
+            return flight.outcome()
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._in_flight.get((name, key)) is flight:
+                    del self._in_flight[(name, key)]
+            flight.done.set()
+
+
+    def forget(self) -> None:
+        with self._lock:
+            self._in_flight.clear()
+
+
+    def stats(self) -> list[FlightStats]:
+        with self._lock:
+            return [
+                FlightStats(name=name, calls=calls, executions=self._executions[name],
+                            collapsed=calls - self._executions[name])
+                for name, calls in sorted(self._calls.items())
+            ]
+
+
+# services take SingleFlight | None - without it every call runs on its own
+def coalesced[R](flights: SingleFlight | None, name: str, key: Hashable, fn: Callable[[], R]) -> R:
+    return fn() if flights is None else flights.do(name, key, fn)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    for flights in list(_flights):
+        flights.forget()
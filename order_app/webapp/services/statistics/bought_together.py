@@ -0,0 +1,156 @@
+# "Customers who ordered X also ordered Y" without a self-join of order_details per request. For every pair of SKUs
+# the number of orders that contain both - a sparse, symmetric SKU x SKU matrix kept as a dict of counters
+# (sku -> {other sku -> orders}) - and the number of orders per SKU (the diagonal).
+#
+# Writes: OrderService takes the changed pairs of a write (order_pairs / line_pairs / order_removed) and calls save()
+# INSIDE its transaction - one upsert of the deltas into sku_pairs, committed or rolled back together with the order -
+# and apply() after the commit, which changes the matrix of this worker. An order with n SKUs changes n * (n + 1) / 2
+# rows.
+#
+# Reads: top-N neighbours of a SKU from memory. The matrix is loaded from sku_pairs on the first question and again
+# when it is older than max_age_seconds (0 = never), so writes of other workers show up after that time. A load that
+# runs between the commit and apply() of a write counts that write twice until the next load.
+
+import heapq
+import threading
+import time
+from collections import Counter
+from itertools import combinations, groupby
+from typing import Iterable
+
+from webapp.extensions import db
+from webapp.database.repositories.sku_pairs import SkuPairRepository
+from webapp.services.statistics.dtos import BoughtTogetherDTO
+from webapp.services.exceptions import NotFoundException, ValidationException
+
+
+MAX_NEIGHBOURS = 100
+
+type PairDeltas = Counter[tuple[str, str]]          # (sku_a, sku_b) with sku_a <= sku_b -> change of orders
+
+
+# all pairs of the SKUs of one order, the diagonal included
+def order_pairs(skus: Iterable[str], sign: int = 1) -> PairDeltas:
+    distinct = sorted(set(skus))
+    deltas: PairDeltas = Counter({(sku, sku): sign for sku in distinct})
+    deltas.update({pair: sign for pair in combinations(distinct, 2)})
+    return deltas
+
+
+# a line of `sku` added to (sign=1) or removed from (sign=-1) an order with the lines of `others`
+def line_pairs(sku: str, others: Iterable[str], sign: int = 1) -> PairDeltas:
+    deltas: PairDeltas = Counter({(sku, sku): sign})
+    deltas.update({(min(sku, other), max(sku, other)): sign for other in set(others) - {sku}})
+    return deltas
+
+
+class BoughtTogetherIndex:
+    def __init__(self, pair_repo: SkuPairRepository, max_age_seconds: int = 300) -> None:
+        self.pair_repo = pair_repo
+        self.max_age_seconds = max_age_seconds
+        self._neighbours: dict[str, dict[str, int]] = {}           # sku -> other sku -> orders with both
+        self._orders: dict[str, int] = {}                           # sku -> orders with the sku
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------------------
+# Read methods
+# ---------------------------------------------------------------------------------------
+
+    # SKUs ordered together with `sku` most often, share = part of the orders of `sku` that contain the other SKU
+    def get_neighbours(self, sku: str, limit: int = 10) -> list[BoughtTogetherDTO]:
+        if not 0 < limit <= MAX_NEIGHBOURS:
+            raise ValidationException(f'Limit {limit} must be between 1 and {MAX_NEIGHBOURS}')
+
+        with self._lock:
+            self._ensure_loaded()
+            orders = self._orders.get(sku, 0)
+            if not orders:
+                raise NotFoundException(f'No orders with SKU {sku}')
+            best = heapq.nsmallest(limit, self._neighbours.get(sku, {}).items(), key=lambda kv: (-kv[1], kv[0]))
+
+        return [
+            BoughtTogetherDTO(sku=other, orders=together, share=round(together / orders, 4))
+            for other, together in best
+        ]
+
+# ---------------------------------------------------------------------------------------
+# Write methods
+# ---------------------------------------------------------------------------------------
+
+    # inside the transaction of the caller
+    def save(self, deltas: PairDeltas) -> None:
+        self.pair_repo.increment([
+            {"sku_a": sku_a, "sku_b": sku_b, "orders": delta} for (sku_a, sku_b), delta in deltas.items() if delta
+        ])
+
+
+    # pairs of an order that is going to be deleted - call before the delete, inside its transaction
+    def order_removed(self, order_id: int) -> PairDeltas:
+        return order_pairs(self.pair_repo.get_order_skus(order_id), sign=-1)
+
+
+    # after the commit of save() - no-op until the matrix is loaded (the load reads the committed rows)
+    def apply(self, deltas: PairDeltas) -> None:
+        with self._lock:
+            if self._loaded_at is None:
+                return
+            for (sku_a, sku_b), delta in deltas.items():
+                self._add(sku_a, sku_b, delta)
+
+
+    # sku_pairs computed again from order_details, order by order from a stream (yield_per). Run it when no orders
+    # are written - orders committed during the rebuild may be missing. Returns the number of orders.
+    def rebuild(self, chunk_size: int = 10_000) -> int:
+        pairs: PairDeltas = Counter()
+        orders = 0
+        for _, lines in groupby(self.pair_repo.stream_order_skus(chunk_size), key=lambda row: row.order_id):
+            pairs.update(order_pairs(row.product_sku for row in lines))
+            orders += 1
+        db.session.rollback()                   # end the read transaction of the stream
+
+        rows = [{"sku_a": sku_a, "sku_b": sku_b, "orders": count} for (sku_a, sku_b), count in pairs.items()]
+        with db.session.begin():
+            self.pair_repo.delete_all()
+            for i in range(0, len(rows), chunk_size):
+                self.pair_repo.add_all(rows[i:i + chunk_size])
+        self.invalidate()
+        return orders
+
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        expired = self.max_age_seconds and self._loaded_at is not None \
+                  and time.monotonic() - self._loaded_at > self.max_age_seconds
+        if self._loaded_at is not None and not expired:
+            return
+
+        self._neighbours, self._orders = {}, {}
+        for sku_a, sku_b, orders in self.pair_repo.stream_pairs():
+            self._add(sku_a, sku_b, orders)
+        self._loaded_at = time.monotonic()
+
+
+    def _add(self, sku_a: str, sku_b: str, delta: int) -> None:
+        if sku_a == sku_b:
+            self._bump(self._orders, sku_a, delta)
+            return
+        self._bump(self._neighbours.setdefault(sku_a, {}), sku_b, delta)
+        self._bump(self._neighbours.setdefault(sku_b, {}), sku_a, delta)
+
+
+    @staticmethod
+    def _bump(counts: dict[str, int], key: str, delta: int) -> None:
+        count = counts.get(key, 0) + delta
+        if count > 0:
+            counts[key] = count
+        else:
+            counts.pop(key, None)
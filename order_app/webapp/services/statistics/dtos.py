@@ -0,0 +1,102 @@
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+
+
+
+@dataclass(frozen=True)
+class SkuStatsDTO:
+    sku: str
+    units: int
+    revenue: Decimal
+    orders_qty: int
+
+
+@dataclass(frozen=True)
+class UserStatsDTO:
+    user_name: str
+    orders_qty: int
+    units: int
+    revenue: Decimal
+
+
+@dataclass(frozen=True)
+class OrderSummaryDTO:
+    orders_qty: int
+    lines_qty: int
+    units: int
+    revenue: Decimal
+    avg_units_per_order: float              # average order size
+    avg_lines_per_order: float
+    avg_order_value: Decimal
+
+
+@dataclass(frozen=True)
+class OrderRankDTO:
+    order_id: int
+    metric: str                             # "value" (order total) or "lines" (number of order lines)
+    value: Decimal | int
+    rank: int                               # 1 = smallest; orders with equal value share the rank
+    total: int                              # number of orders in the ranking
+
+
+@dataclass(frozen=True)
+class QuantilesDTO:
+    scope: str                              # "sku" or "user"
+    key: str
+    count: int                              # number of order lines in the sketch
+    quantiles: dict[float, float | None]    # q -> qty
+    exact: bool
+    rank_error: float                       # max rank error as a fraction of count (99 % confidence)
+
+
+@dataclass(frozen=True)
+class TopSkuDTO:
+    sku: str
+    units: int                              # upper bound of units sold in the window
+    error: int                              # units - error is the lower bound
+
+
+@dataclass(frozen=True)
+class SalesBucketDTO:
+    bucket: datetime                        # start of the hour / day (UTC)
+    units: int
+    revenue: Decimal
+
+
+@dataclass(frozen=True)
+class SnapshotInfoDTO:
+    lines: int
+    skus: int
+    users: int
+    as_of: datetime | None                  # lines created before this moment (UTC) are in the snapshot
+
+
+@dataclass(frozen=True)
+class PriceBandDTO:
+    low: Decimal | None                     # None - no lower bound
+    high: Decimal | None                    # band is low <= price < high
+    lines: int
+    units: int
+    revenue: Decimal
+
+
+@dataclass(frozen=True)
+class SkuUserMatrixDTO:
+    skus: list[str]                         # rows
+    users: list[str]                        # columns
+    units: list[list[int]]
+
+
+@dataclass(frozen=True)
+class HistogramDTO:
+    metric: str                             # "qty" or "order_value"
+    edges: list[float]                      # len(counts) + 1 edges, the last bin includes its right edge
+    counts: list[int]
+
+
+@dataclass(frozen=True)
+class BoughtTogetherDTO:
+    sku: str
+    orders: int                             # orders with both SKUs
+    share: float                            # orders / orders with the asked SKU
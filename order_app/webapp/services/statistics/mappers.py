@@ -0,0 +1,53 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import Row
+
+from webapp.services.statistics.dtos import SkuStatsDTO, UserStatsDTO, OrderSummaryDTO, SalesBucketDTO
+
+
+CENT = Decimal("0.01")
+
+
+def money(value: Decimal | float | int | None) -> Decimal:
+    return Decimal(str(value or 0)).quantize(CENT)      # SQLite returns sums of DECIMAL as float
+
+
+def sku_row_to_dto(row: Row[tuple[str, int, Decimal, int]]) -> SkuStatsDTO:
+    return SkuStatsDTO(
+        sku=row.sku,
+        units=row.units,
+        revenue=money(row.revenue),
+        orders_qty=row.orders_qty
+    )
+
+
+def user_row_to_dto(row: Row[tuple[str, int, int, Decimal]]) -> UserStatsDTO:
+    return UserStatsDTO(
+        user_name=row.user_name,
+        orders_qty=row.orders_qty,
+        units=row.units,
+        revenue=money(row.revenue)
+    )
+
+
+def totals_row_to_dto(row: Row[tuple[int, int, int, Decimal]]) -> OrderSummaryDTO:
+    orders_qty = row.orders_qty
+    revenue = money(row.revenue)
+    return OrderSummaryDTO(
+        orders_qty=orders_qty,
+        lines_qty=row.lines_qty,
+        units=row.units,
+        revenue=revenue,
+        avg_units_per_order=round(row.units / orders_qty, 2) if orders_qty else 0.0,
+        avg_lines_per_order=round(row.lines_qty / orders_qty, 2) if orders_qty else 0.0,
+        avg_order_value=(revenue / orders_qty).quantize(CENT) if orders_qty else money(0)
+    )
+
+
+def sales_row_to_dto(row: Row[tuple[datetime, int, Decimal]]) -> SalesBucketDTO:
+    return SalesBucketDTO(
+        bucket=row.bucket,
+        units=int(row.units),
+        revenue=money(row.revenue)
+    )
@@ -0,0 +1,139 @@
+# In-memory ranking of orders by value (sum of qty * Product.price) and by number of lines, kept in two
+# order-statistic trees, so k-th smallest / rank / percentile cost O(log n) instead of sorting all orders per request.
+#
+# The index is loaded with one grouped query on the first question and then kept up to date by OrderService: after
+# each committed write the changed orders are read again (one small query) and moved in the trees. Every worker has
+# its own index and sees only its own writes, so the whole index is loaded again when it is older than
+# max_age_seconds (0 = never) - writes of other workers, deleted users or changed prices show up after that time.
+
+import math
+import threading
+import time
+from decimal import Decimal
+from typing import Collection
+
+from webapp.core.order_statistic_tree import OrderStatisticTree
+from webapp.database.repositories.statistics import StatisticsRepository
+from webapp.services.statistics.dtos import OrderRankDTO
+from webapp.services.statistics.mappers import money
+from webapp.services.exceptions import NotFoundException, ValidationException
+
+
+METRICS = ("value", "lines")
+
+
+class OrderStatisticsIndex:
+    def __init__(self, statistics_repo: StatisticsRepository, max_age_seconds: int = 300) -> None:
+        self.statistics_repo = statistics_repo
+        self.max_age_seconds = max_age_seconds
+        self._orders: dict[int, dict[str, Decimal | int]] = {}            # order_id -> {"value": ..., "lines": ...}
+        self._trees: dict[str, OrderStatisticTree[tuple[Decimal | int, int]]] = {}
+        self._loaded_at: float | None = None
+        self._lock = threading.RLock()
+
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._orders)
+
+
+    # 1-based k: kth("value", 1) is the cheapest order - checked against the size under the same lock as the lookup
+    def kth(self, metric: str, k: int) -> OrderRankDTO:
+        with self._lock:
+            total = self._ranked_orders_qty()
+            if k <= 0 or k > total:
+                raise ValidationException(f'k {k} must be between 1 and {total}')
+            return self._kth(metric, k)
+
+
+    # nearest-rank percentile, p between 0 and 100 - the size is read under the same lock as the lookup
+    def percentile(self, metric: str, p: float) -> OrderRankDTO:
+        with self._lock:
+            total = self._ranked_orders_qty()
+            return self._kth(metric, max(1, math.ceil(p / 100 * total)))
+
+
+    def rank(self, metric: str, order_id: int) -> OrderRankDTO | None:
+        with self._lock:
+            self._ensure_loaded()
+            if order_id not in self._orders:
+                return None
+            return self._to_dto(metric, order_id, self._orders[order_id][metric])
+
+
+    # read the orders again after they were created or changed (no-op until the index is loaded)
+    def refresh(self, order_ids: Collection[int]) -> None:
+        with self._lock:
+            if self._loaded_at is None or not order_ids:
+                return
+            rows = self.statistics_repo.get_order_values(order_ids)
+            for order_id in order_ids:
+                self._discard(order_id)
+            for row in rows:
+                self._put(row.order_id, money(row.value), row.lines_qty)
+
+
+    def remove(self, order_ids: Collection[int]) -> None:
+        with self._lock:
+            for order_id in order_ids:
+                self._discard(order_id)
+
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        expired = self.max_age_seconds and self._loaded_at is not None \
+                  and time.monotonic() - self._loaded_at > self.max_age_seconds
+        if self._loaded_at is not None and not expired:
+            return
+
+        rows = self.statistics_repo.get_order_values()
+        self._orders = {row.order_id: {"value": money(row.value), "lines": row.lines_qty} for row in rows}
+        self._trees = {
+            metric: OrderStatisticTree((values[metric], order_id) for order_id, values in self._orders.items())
+            for metric in METRICS
+        }
+        self._loaded_at = time.monotonic()
+
+
+    def _ranked_orders_qty(self) -> int:
+        self._ensure_loaded()
+        if not self._orders:
+            raise NotFoundException('There are no orders to rank')
+        return len(self._orders)
+
+
+    def _kth(self, metric: str, k: int) -> OrderRankDTO:
+        value, order_id = self._trees[metric].kth(k - 1)
+        return self._to_dto(metric, order_id, value)
+
+
+    def _put(self, order_id: int, value: Decimal, lines: int) -> None:
+        self._orders[order_id] = {"value": value, "lines": lines}
+        for metric in METRICS:
+            self._trees[metric].insert((self._orders[order_id][metric], order_id))
+
+
+    def _discard(self, order_id: int) -> None:
+        values = self._orders.pop(order_id, None)
+        if values is not None:
+            for metric in METRICS:
+                self._trees[metric].remove((values[metric], order_id))
+
+
+    # competition rank: orders with the same value share the rank of the first of them
+    def _to_dto(self, metric: str, order_id: int, value: Decimal | int) -> OrderRankDTO:
+        return OrderRankDTO(
+            order_id=order_id,
+            metric=metric,
+            value=value,
+            rank=self._trees[metric].rank((value, 0)) + 1,           # order ids start at 1, so (value, 0) is first
+            total=len(self._orders)
+        )
@@ -0,0 +1,154 @@
+# Approximate quantiles (p50 / p90 / p99 ...) of OrderDetail.qty per SKU and per user, from KLL sketches.
+#
+# Writes: OrderService calls record() after every committed order line. Values go to small per-worker "delta" sketches
+# in memory; flush() (SketchFlusher thread, every QUANTILE_SKETCH_FLUSH_SECONDS) merges the deltas into the shared
+# rows of quantile_sketches under FOR UPDATE and empties them. KLL sketches are mergeable, so every worker adds its own
+# part and the row describes the lines of all workers. If the flush fails, the deltas are kept for the next one.
+#
+# Reads: the stored sketch merged with this worker's not yet flushed delta. Lines of other workers show up after
+# their next flush. Deleted order lines are not subtracted (a sketch cannot forget values) - rebuild() computes all
+# sketches again from order_details (flask sketches rebuild).
+#
+# Error bounds: KLLSketch.rank_error - with k = 200 the returned value has a rank within about 1.65 % of the number
+# of lines from the asked quantile (99 % confidence). Sketches with few lines are exact (rank_error = 0).
+
+import json
+import threading
+from typing import Iterable, Sequence
+
+from webapp.core.kll import KLLSketch
+from webapp.extensions import db
+from webapp.database.models.quantile_sketches import QuantileSketch
+from webapp.database.repositories.orders import TotalOrderRepository
+from webapp.database.repositories.quantile_sketches import QuantileSketchRepository
+from webapp.services.statistics.dtos import QuantilesDTO
+from webapp.services.exceptions import NotFoundException, ValidationException
+
+
+SCOPES = ("sku", "user")
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class QuantileSketchService:
+    def __init__(self, sketch_repo: QuantileSketchRepository, order_repo: TotalOrderRepository, k: int = 200) -> None:
+        self.sketch_repo = sketch_repo
+        self.order_repo = order_repo
+        self.k = k
+        self._deltas: dict[tuple[str, str], KLLSketch] = {}
+        self._lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------------------
+# Read methods
+# ---------------------------------------------------------------------------------------
+
+    def get_quantiles(self, scope: str, key: str, qs: Sequence[float] = DEFAULT_QUANTILES) -> QuantilesDTO:
+        if scope not in SCOPES:
+            raise ValidationException(f'Quantiles are kept per {", ".join(SCOPES)}, not per {scope}')
+        if not qs or any(not 0 <= q <= 1 for q in qs):
+            raise ValidationException('Quantiles must be between 0 and 1')
+
+        row = self.sketch_repo.get(scope, key)
+        sketch = KLLSketch.from_dict(json.loads(row.payload)) if row is not None else KLLSketch(self.k)
+        with self._lock:
+            delta = self._deltas.get((scope, key))
+            if delta is not None:
+                sketch.merge(delta)
+
+        if sketch.count == 0:
+            raise NotFoundException(f'No order lines for {scope} {key}')
+
+        return QuantilesDTO(
+            scope=scope,
+            key=key,
+            count=sketch.count,
+            quantiles={q: sketch.quantile(q) for q in qs},
+            exact=sketch.exact,
+            rank_error=sketch.rank_error
+        )
+
+# ---------------------------------------------------------------------------------------
+# Write methods
+# ---------------------------------------------------------------------------------------
+
+    # committed order lines of one user as (sku, qty)
+    def record(self, user_name: str, lines: Iterable[tuple[str, int]]) -> None:
+        with self._lock:
+            for sku, qty in lines:
+                self._delta("sku", sku).update(qty)
+                self._delta("user", user_name).update(qty)
+
+
+    # merges the deltas of this worker into the stored sketches, returns the number of written sketches
+    def flush(self) -> int:
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+        if not deltas:
+            return 0
+
+        try:
+            with db.session.begin():
+                for scope in SCOPES:
+                    keys = {key for s, key in deltas if s == scope}
+                    if not keys:
+                        continue
+                    stored = {row.key: row for row in self.sketch_repo.get_for_update(scope, keys)}
+                    new_rows = []
+                    for key in sorted(keys):
+                        row = stored.get(key)
+                        sketch = KLLSketch.from_dict(json.loads(row.payload)) if row is not None else KLLSketch(self.k)
+                        sketch.merge(deltas[(scope, key)])
+                        if row is None:
+                            new_rows.append(QuantileSketch(scope=scope, key=key, count=0, payload=""))
+                            row = new_rows[-1]
+                        row.count = sketch.count
+                        row.payload = json.dumps(sketch.to_dict())
+                    self.sketch_repo.add_all(new_rows)
+        except Exception:
+            self._restore(deltas)
+            raise
+
+        return len(deltas)
+
+
+    # all sketches computed again from order_details, streamed in chunks (yield_per). Run it when no orders are written
+    # - deltas of other workers that are not flushed yet would be counted twice.
+    def rebuild(self, chunk_size: int = 10_000) -> int:
+        sketches: dict[tuple[str, str], KLLSketch] = {}
+        lines = 0
+        for row in self.order_repo.stream_order_rows(chunk_size):
+            if row.product_sku is None:
+                continue
+            for key in (("sku", row.product_sku), ("user", row.username)):
+                sketch = sketches.get(key)
+                if sketch is None:
+                    sketch = sketches[key] = KLLSketch(self.k)
+                sketch.update(row.qty)
+            lines += 1
+        db.session.rollback()                   # end the read transaction of the stream
+
+        with self._lock:
+            self._deltas = {}
+        with db.session.begin():
+            self.sketch_repo.delete_all()
+            self.sketch_repo.add_all([
+                QuantileSketch(scope=scope, key=key, count=sketch.count, payload=json.dumps(sketch.to_dict()))
+                for (scope, key), sketch in sketches.items()
+            ])
+        return lines
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    def _delta(self, scope: str, key: str) -> KLLSketch:
+        sketch = self._deltas.get((scope, key))
+        if sketch is None:
+            sketch = self._deltas[(scope, key)] = KLLSketch(self.k)
+        return sketch
+
+
+    def _restore(self, deltas: dict[tuple[str, str], KLLSketch]) -> None:
+        with self._lock:
+            for key, sketch in deltas.items():
+                self._delta(*key).merge(sketch)
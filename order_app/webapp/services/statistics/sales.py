@@ -0,0 +1,137 @@
+# Sales per hour / day from the rollup tables (sales_hourly, sales_daily) instead of scanning order_details.
+#
+# Writes: OrderService calls lines_added / lines_removed INSIDE its own transaction, so the rollups
+# are committed or rolled back together with the order lines. Every call is one upsert per table (rows added to the
+# stored ones). Added and removed lines go to the hour / day of their OrderDetail.created, the same value backfill()
+# reads back. Revenue uses the price at the time of the write, so a line removed after a price change leaves a small
+# difference - backfill() computes everything again.
+#
+# All buckets are in UTC (naive datetimes from webapp.core.clock, OrderDetail.created is written with the same clock).
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Collection, Iterable
+
+from webapp.extensions import db
+from webapp.core.clock import utc_now
+from webapp.database.models.sales_rollups import HourlySales, DailySales
+from webapp.database.repositories.products import ProductRepository
+from webapp.database.repositories.sales_rollups import SalesRollupRepository, RollupModel
+from webapp.services.statistics.dtos import SalesBucketDTO
+from webapp.services.statistics.mappers import sales_row_to_dto
+from webapp.services.exceptions import ValidationException
+
+
+PERIODS: dict[str, RollupModel] = {"hour": HourlySales, "day": DailySales}
+STEPS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+DEFAULT_BUCKETS = {"hour": 24, "day": 30}           # range of a report without ?from=
+MAX_BUCKETS = 1000
+
+
+def floor_to(period: str, moment: datetime) -> datetime:
+    if period == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class SalesRollupService:
+    def __init__(
+            self,
+            rollup_repo: SalesRollupRepository,
+            product_repo: ProductRepository,
+            clock: Callable[[], datetime] = utc_now
+    ) -> None:
+        self.rollup_repo = rollup_repo
+        self.product_repo = product_repo
+        self.clock = clock
+
+
+# ---------------------------------------------------------------------------------------
+# Read methods
+# ---------------------------------------------------------------------------------------
+
+    # buckets in [start, end) with sales, oldest first; end defaults to the end of the current bucket
+    def get_sales(
+            self,
+            period: str = "day",
+            start: datetime | None = None,
+            end: datetime | None = None,
+            skus: Collection[str] | None = None
+    ) -> list[SalesBucketDTO]:
+        if period not in PERIODS:
+            raise ValidationException(f'Period must be one of {", ".join(PERIODS)}, not {period}')
+
+        step = STEPS[period]
+        end = end or floor_to(period, self.clock()) + step
+        start = floor_to(period, start) if start else end - DEFAULT_BUCKETS[period] * step
+        if start >= end:
+            raise ValidationException('Start of the range must be before its end')
+        if (end - start) / step > MAX_BUCKETS:
+            raise ValidationException(f'Range is longer than {MAX_BUCKETS} {period}s')
+
+        rows = self.rollup_repo.get_range(PERIODS[period], start, end, skus)
+        return [sales_row_to_dto(row) for row in rows if row.units]
+
+# ---------------------------------------------------------------------------------------
+# Write methods - run inside the transaction of the caller
+# ---------------------------------------------------------------------------------------
+
+    # new order lines as (sku, qty, created)
+    def lines_added(self, lines: Iterable[tuple[str, int, datetime]]) -> None:
+        self._increment([(created, sku, qty) for sku, qty, created in lines], sign=1)
+
+
+    # removed order lines as (sku, qty, created)
+    def lines_removed(self, lines: Iterable[tuple[str, int, datetime | None]]) -> None:
+        now = self.clock()
+        self._increment([(created or now, sku, qty) for sku, qty, created in lines], sign=-1)
+
+
+    # Both tables computed again from order_details: lines are streamed in chunks (yield_per) and summed in memory,
+    # the rows are written in chunks of chunk_size in one transaction. Run it when no orders are written - lines
+    # committed during the backfill may be missing. Returns the number of order lines.
+    def backfill(self, chunk_size: int = 10_000) -> int:
+        totals: dict[str, dict[tuple[datetime, str], list]] = {period: {} for period in PERIODS}
+        lines = 0
+        for created, sku, qty, price in self.rollup_repo.stream_lines(chunk_size):
+            for period, buckets in totals.items():
+                total = buckets.get((floor_to(period, created), sku))
+                if total is None:
+                    total = buckets[(floor_to(period, created), sku)] = [0, Decimal(0)]
+                total[0] += qty
+                total[1] += qty * Decimal(str(price))
+            lines += 1
+        db.session.rollback()                   # end the read transaction of the stream
+
+        with db.session.begin():
+            for period, buckets in totals.items():
+                model = PERIODS[period]
+                self.rollup_repo.delete_all(model)
+                rows = [
+                    {"bucket": bucket, "sku": sku, "units": units, "revenue": revenue}
+                    for (bucket, sku), (units, revenue) in buckets.items()
+                ]
+                for i in range(0, len(rows), chunk_size):
+                    self.rollup_repo.add_all(model, rows[i:i + chunk_size])
+        return lines
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    # (moment, sku, qty) lines summed per bucket and SKU, one upsert per table
+    def _increment(self, lines: list[tuple[datetime, str, int]], sign: int) -> None:
+        if not lines:
+            return
+        prices = self.product_repo.get_prices({sku for _, sku, _ in lines})
+
+        for period, model in PERIODS.items():
+            rows: dict[tuple[datetime, str], dict] = {}
+            for moment, sku, qty in lines:
+                key = (floor_to(period, moment), sku)
+                row = rows.get(key)
+                if row is None:
+                    row = rows[key] = {"bucket": key[0], "sku": sku, "units": 0, "revenue": Decimal(0)}
+                row["units"] += sign * qty
+                row["revenue"] += sign * qty * prices.get(sku, Decimal(0))
+            self.rollup_repo.increment(model, list(rows.values()))
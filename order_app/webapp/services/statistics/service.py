@@ -0,0 +1,112 @@
+from typing import Collection
+
+from webapp.database.repositories.statistics import StatisticsRepository
+
+from webapp.services.statistics.dtos import SkuStatsDTO, UserStatsDTO, OrderSummaryDTO, OrderRankDTO
+from webapp.services.statistics.mappers import sku_row_to_dto, user_row_to_dto, totals_row_to_dto
+from webapp.services.statistics.order_index import OrderStatisticsIndex, METRICS
+from webapp.services.exceptions import ValidationException, NotFoundException
+from webapp.services.single_flight import SingleFlight, coalesced
+
+
+TOP_BY = ("units", "revenue")
+DEFAULT_TOP_LIMIT = 10
+MAX_TOP_LIMIT = 100
+
+
+# Read-only service - every aggregate is a single query of the repository, nothing is summed in Python.
+# skus / user_name narrow the counted order lines (see StatisticsRepository).
+# k-th / rank / percentile of orders come from the in-memory OrderStatisticsIndex (O(log n) per question).
+# Identical aggregates asked at the same time share one query (flights).
+class StatisticsService:
+
+    def __init__(
+            self,
+            statistics_repo: StatisticsRepository,
+            order_index: OrderStatisticsIndex,
+            flights: SingleFlight | None = None
+    ):
+        self.statistics_repo = statistics_repo
+        self.order_index = order_index
+        self.flights = flights
+
+
+# ---------------------------------------------------------------------------------------
+# Read methods
+# ---------------------------------------------------------------------------------------
+
+    # units sold and revenue per SKU
+    def get_sku_stats(self, skus: Collection[str] | None = None, user_name: str | None = None) -> list[SkuStatsDTO]:
+        def load() -> list[SkuStatsDTO]:
+            return [sku_row_to_dto(row) for row in self.statistics_repo.get_sku_stats(skus, user_name)]
+
+        return coalesced(self.flights, "statistics.get_sku_stats", _filter_key(skus, user_name), load)
+
+
+    def get_top_products(
+            self,
+            limit: int = DEFAULT_TOP_LIMIT,
+            by: str = "units",
+            skus: Collection[str] | None = None,
+            user_name: str | None = None
+    ) -> list[SkuStatsDTO]:
+        if limit <= 0 or limit > MAX_TOP_LIMIT:
+            raise ValidationException(f'Limit {limit} must be between 1 and {MAX_TOP_LIMIT}')
+        if by not in TOP_BY:
+            raise ValidationException(f'Top products can be ordered by {", ".join(TOP_BY)}, not by {by}')
+
+        def load() -> list[SkuStatsDTO]:
+            return [sku_row_to_dto(row) for row in self.statistics_repo.get_top_products(limit, by, skus, user_name)]
+
+        key = (limit, by, *_filter_key(skus, user_name))
+        return coalesced(self.flights, "statistics.get_top_products", key, load)
+
+
+    # orders, units and revenue per user
+    def get_user_stats(self, skus: Collection[str] | None = None, user_name: str | None = None) -> list[UserStatsDTO]:
+        def load() -> list[UserStatsDTO]:
+            return [user_row_to_dto(row) for row in self.statistics_repo.get_user_stats(skus, user_name)]
+
+        return coalesced(self.flights, "statistics.get_user_stats", _filter_key(skus, user_name), load)
+
+
+    # totals and average order size
+    def get_order_summary(self, skus: Collection[str] | None = None, user_name: str | None = None) -> OrderSummaryDTO:
+        def load() -> OrderSummaryDTO:
+            return totals_row_to_dto(self.statistics_repo.get_order_totals(skus, user_name))
+
+        return coalesced(self.flights, "statistics.get_order_summary", _filter_key(skus, user_name), load)
+
+
+    # k-th smallest order by "value" or "lines", k = 1 is the smallest
+    def get_kth_order(self, metric: str, k: int) -> OrderRankDTO:
+        self._metric_validation(metric)
+        return self.order_index.kth(metric, k)
+
+
+    # nearest-rank percentile: the smallest order with at least p % of orders <= it (p = 50 is the median)
+    def get_order_percentile(self, metric: str, p: float) -> OrderRankDTO:
+        if not 0 <= p <= 100:
+            raise ValidationException(f'Percentile {p} must be between 0 and 100')
+        self._metric_validation(metric)
+        return self.order_index.percentile(metric, p)
+
+
+    def get_order_rank(self, metric: str, order_id: int) -> OrderRankDTO:
+        self._metric_validation(metric)
+        rank = self.order_index.rank(metric, order_id)
+        if rank is None:
+            raise NotFoundException(f'Order {order_id} not found')
+        return rank
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    def _metric_validation(self, metric: str) -> None:
+        if metric not in METRICS:
+            raise ValidationException(f'Orders can be ranked by {", ".join(METRICS)}, not by {metric}')
+
+
+def _filter_key(skus: Collection[str] | None, user_name: str | None) -> tuple[tuple[str, ...] | None, str | None]:
+    return (tuple(skus) if skus is not None else None), user_name
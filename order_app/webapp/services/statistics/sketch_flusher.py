@@ -0,0 +1,43 @@
+import logging
+import threading
+
+from flask import Flask
+
+from webapp.extensions import db
+from webapp.services.statistics.quantiles import QuantileSketchService
+
+
+logger = logging.getLogger(__name__)
+
+
+# Daemon thread merging the quantile sketch deltas of this worker into the database every interval_seconds.
+# Each gunicorn worker runs its own; rows are locked while merging, so workers do not overwrite each other.
+# close() is registered with atexit - the deltas recorded since the last interval are flushed when the worker exits.
+class SketchFlusher(threading.Thread):
+    def __init__(self, app: Flask, sketch_service: QuantileSketchService, interval_seconds: int) -> None:
+        super().__init__(name="quantile-sketch-flusher", daemon=True)
+        self.app = app
+        self.sketch_service = sketch_service
+        self.interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval_seconds):
+            self.flush()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def close(self) -> None:
+        self.stop()
+        self.flush()
+
+    def flush(self) -> None:
+        try:
+            with self.app.app_context():
+                flushed = self.sketch_service.flush()
+                db.session.remove()
+            if flushed:
+                logger.info("Flushed %s quantile sketches", flushed)
+        except Exception:
+            logger.exception("Flushing quantile sketches failed")
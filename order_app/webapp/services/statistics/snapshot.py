@@ -0,0 +1,236 @@
+# Columnar in-memory snapshot of order lines for ad-hoc analytics (revenue by price band, SKU x user matrices,
+# distributions). Every order line is one position in NumPy arrays: order id, user id, integer-coded SKU and qty;
+# prices are one array indexed by the SKU code (current Product.price in cents). Answers are vectorized (bincount,
+# searchsorted, histogram) - milliseconds over millions of lines instead of a grouped query per report.
+#
+# Loading: lines come in bulk as plain tuples from the cursor (StatisticsRepository.stream_line_chunks), never as ORM
+# objects. The first question loads everything with created < now - lag_seconds; that moment is the watermark. When
+# the data is older than max_age_seconds, only lines with watermark <= created < now - lag are added. The lag leaves
+# time for transactions to commit - a line whose transaction was open longer than the lag is missed until the next
+# full reload. Deleted lines and changed qty are not seen by the watermark either: everything is loaded again every
+# full_reload_seconds. Prices and user names are read again on every refresh (small tables).
+#
+# Every worker keeps its own snapshot. All times are naive UTC from webapp.core.clock - the clock OrderDetail.created
+# is written with, so the watermark and created are compared in the same time zone.
+
+import threading
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable, Sequence
+
+import numpy as np
+
+from webapp.core.clock import utc_now
+from webapp.database.repositories.statistics import StatisticsRepository
+from webapp.services.statistics.dtos import PriceBandDTO, SkuUserMatrixDTO, HistogramDTO, SnapshotInfoDTO
+from webapp.services.statistics.mappers import money, CENT
+from webapp.services.exceptions import NotFoundException, ValidationException
+
+
+DISTRIBUTIONS = ("qty", "order_value")
+MAX_BINS = 100
+MAX_PRICE_EDGES = 50
+MAX_MATRIX_SIZE = 100                       # SKUs / users on one side of the matrix
+
+
+class OrderSnapshot:
+    def __init__(
+            self,
+            statistics_repo: StatisticsRepository,
+            max_age_seconds: int = 30,
+            full_reload_seconds: int = 3600,
+            lag_seconds: int = 5,
+            chunk_size: int = 50_000,
+            clock: Callable[[], datetime] = utc_now
+    ) -> None:
+        self.statistics_repo = statistics_repo
+        self.max_age = timedelta(seconds=max_age_seconds)
+        self.full_reload = timedelta(seconds=full_reload_seconds)
+        self.lag = timedelta(seconds=lag_seconds)
+        self.chunk_size = chunk_size
+        self.clock = clock
+
+        self._order_ids = np.empty(0, dtype=np.int64)         # one position per order line
+        self._user_ids = np.empty(0, dtype=np.int64)
+        self._sku_codes = np.empty(0, dtype=np.int32)
+        self._qty = np.empty(0, dtype=np.int64)
+        self._skus: list[str] = []                             # sku code -> sku
+        self._sku_codes_by_sku: dict[str, int] = {}
+        self._price_cents = np.empty(0, dtype=np.int64)        # sku code -> current price in cents, 0 without product
+        self._usernames: dict[int, str] = {}
+        self._watermark: datetime | None = None                # lines with created < watermark are loaded
+        self._loaded_at: datetime | None = None
+        self._refreshed_at: datetime | None = None
+        self._lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------------------
+# Read methods
+# ---------------------------------------------------------------------------------------
+
+    def get_info(self) -> SnapshotInfoDTO:
+        with self._lock:
+            self._ensure_fresh()
+            return SnapshotInfoDTO(
+                lines=len(self._qty), skus=len(self._skus), users=len(self._usernames), as_of=self._watermark
+            )
+
+
+    # lines, units and revenue per band of product price: edges [10, 50] give bands < 10, 10 - 50 and >= 50
+    def get_price_bands(self, edges: Sequence[Decimal]) -> list[PriceBandDTO]:
+        if not 0 < len(edges) <= MAX_PRICE_EDGES:
+            raise ValidationException(f'Give between 1 and {MAX_PRICE_EDGES} price edges')
+        if not all(edge.is_finite() for edge in edges) or any(low >= high for low, high in zip(edges, edges[1:])):
+            raise ValidationException('Price edges must be increasing')
+
+        with self._lock:
+            self._ensure_fresh()
+            line_prices = self._price_cents[self._sku_codes]
+            edge_cents = np.array([int(edge * 100) for edge in edges], dtype=np.int64)
+            bands = np.searchsorted(edge_cents, line_prices, side="right")        # 0 = below the first edge
+            n = len(edges) + 1
+            lines = np.bincount(bands, minlength=n)
+            units = np.bincount(bands, weights=self._qty, minlength=n)
+            revenue = np.bincount(bands, weights=self._qty * line_prices, minlength=n)
+
+        bounds = [None, *edges, None]
+        return [
+            PriceBandDTO(
+                low=bounds[i],
+                high=bounds[i + 1],
+                lines=int(lines[i]),
+                units=int(units[i]),
+                revenue=(Decimal(int(revenue[i])) * CENT).quantize(CENT)
+            )
+            for i in range(n)
+        ]
+
+
+    # units per SKU (rows) and user (columns); without skus / user_names the best `limit` of them by units
+    def get_sku_user_matrix(
+            self, skus: Sequence[str] = (), user_names: Sequence[str] = (), limit: int = 20
+    ) -> SkuUserMatrixDTO:
+        if not 0 < limit <= MAX_MATRIX_SIZE or len(skus) > MAX_MATRIX_SIZE or len(user_names) > MAX_MATRIX_SIZE:
+            raise ValidationException(f'Matrix can have at most {MAX_MATRIX_SIZE} SKUs and users')
+
+        with self._lock:
+            self._ensure_fresh()
+            user_ids_by_name = {name: user_id for user_id, name in self._usernames.items()}
+            if skus:        # unknown SKUs / users are left out
+                row_codes = np.array([self._sku_codes_by_sku[s] for s in skus if s in self._sku_codes_by_sku], np.int64)
+            else:
+                row_codes = self._top(self._sku_codes, limit)
+            if user_names:
+                col_ids = np.array([user_ids_by_name[u] for u in user_names if u in user_ids_by_name], np.int64)
+            else:
+                col_ids = self._top(self._user_ids, limit)
+
+            rows = self._positions(row_codes, self._sku_codes)
+            cols = self._positions(col_ids, self._user_ids)
+            kept = (rows >= 0) & (cols >= 0)
+            cells = np.bincount(
+                rows[kept] * len(col_ids) + cols[kept],
+                weights=self._qty[kept],
+                minlength=len(row_codes) * len(col_ids)
+            ).astype(np.int64).reshape(len(row_codes), len(col_ids))
+
+            return SkuUserMatrixDTO(
+                skus=[self._skus[code] for code in row_codes],
+                users=[self._usernames.get(int(user_id), str(user_id)) for user_id in col_ids],
+                units=cells.tolist()
+            )
+
+
+    # histogram of line qty or of order value (sum of qty * price of the order) in `bins` equal bins
+    def get_distribution(self, metric: str, bins: int = 10) -> HistogramDTO:
+        if metric not in DISTRIBUTIONS:
+            raise ValidationException(f'Distribution of {", ".join(DISTRIBUTIONS)}, not of {metric}')
+        if not 0 < bins <= MAX_BINS:
+            raise ValidationException(f'Bins {bins} must be between 1 and {MAX_BINS}')
+
+        with self._lock:
+            self._ensure_fresh()
+            if not len(self._qty):
+                raise NotFoundException('No order lines in the snapshot')
+            values: np.ndarray
+            if metric == "qty":
+                values = self._qty
+            else:
+                cents = np.bincount(self._order_ids, weights=self._qty * self._price_cents[self._sku_codes])
+                values = cents[np.bincount(self._order_ids) > 0] / 100
+            counts, edges = np.histogram(values, bins=bins)
+
+        return HistogramDTO(metric=metric, edges=[float(edge) for edge in edges], counts=counts.tolist())
+
+# ---------------------------------------------------------------------------------------
+# Write methods
+# ---------------------------------------------------------------------------------------
+
+    # the next question loads everything again
+    def invalidate(self) -> None:
+        with self._lock:
+            self._loaded_at = None
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    def _ensure_fresh(self) -> None:
+        now = self.clock()
+        if self._loaded_at is None or now - self._loaded_at > self.full_reload:
+            self._load(now, full=True)
+        elif self._refreshed_at is None or now - self._refreshed_at > self.max_age:
+            self._load(now, full=False)
+
+
+    def _load(self, now: datetime, full: bool) -> None:
+        if full:
+            self._skus, self._sku_codes_by_sku, self._watermark = [], {}, None
+            parts = [(np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0, np.int32), np.empty(0, np.int64))]
+        else:
+            parts = [(self._order_ids, self._user_ids, self._sku_codes, self._qty)]
+        until = now - self.lag
+
+        for chunk in self.statistics_repo.stream_line_chunks(self._watermark, until, self.chunk_size):
+            order_ids, user_ids, skus, qty = zip(*chunk)
+            parts.append((
+                np.array(order_ids, dtype=np.int64),
+                np.array(user_ids, dtype=np.int64),
+                np.array([self._code(sku) for sku in skus], dtype=np.int32),
+                np.array(qty, dtype=np.int64),
+            ))
+        self._order_ids, self._user_ids, self._sku_codes, self._qty = (np.concatenate(column) for column in zip(*parts))
+
+        prices = self.statistics_repo.get_prices()
+        codes = [self._code(sku) for sku, _ in prices]              # products without lines yet get a code too
+        self._price_cents = np.zeros(len(self._skus), dtype=np.int64)
+        self._price_cents[codes] = [int(money(price) * 100) for _, price in prices]
+        self._usernames = {user_id: name for user_id, name in self.statistics_repo.get_usernames()}
+
+        self._watermark = until
+        self._refreshed_at = now
+        if full:
+            self._loaded_at = now
+
+
+    def _code(self, sku: str) -> int:
+        code = self._sku_codes_by_sku.get(sku)
+        if code is None:
+            code = self._sku_codes_by_sku[sku] = len(self._skus)
+            self._skus.append(sku)
+        return code
+
+
+    # values of `column` with the most units, best first, only those with any units
+    def _top(self, column: np.ndarray, limit: int) -> np.ndarray:
+        units = np.bincount(column, weights=self._qty)
+        best = np.argsort(-units, kind="stable")[:limit]
+        return best[units[best] > 0]
+
+
+    # position of every line's value in `selected`, -1 when it is not selected
+    def _positions(self, selected: np.ndarray, column: np.ndarray) -> np.ndarray:
+        size = max(int(column.max(initial=0)), int(selected.max(initial=0))) + 1
+        positions = np.full(size, -1, dtype=np.int64)
+        positions[selected] = np.arange(len(selected))
+        return positions[column]
@@ -0,0 +1,140 @@
+# Live "top SKUs in the last N minutes" without touching the database. Units of committed order lines go to
+# per-minute Space-Saving summaries (at most `capacity` SKUs per minute). For the configured window the sums of all
+# minute summaries are kept up to date on every change, together with a ranking tree of (-units, sku), so the top
+# list is read in O(K log n). Shorter windows (?minutes=) are merged from the minute summaries on request.
+#
+# Lines are counted in and taken back from the minute of their OrderDetail.created (naive UTC, webapp.core.clock), if
+# it is still in the window. Every worker counts only its own writes - it is a live view, not a report (see
+# /statistics/skus for exact numbers from the database).
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Iterable
+
+from webapp.core.clock import utc_now
+from webapp.core.order_statistic_tree import OrderStatisticTree
+from webapp.core.space_saving import SpaceSaving, CounterChange
+from webapp.services.statistics.dtos import TopSkuDTO
+from webapp.services.exceptions import ValidationException
+
+
+MAX_TOP_LIMIT = 100
+
+
+class TopSkuTracker:
+    def __init__(self, window_minutes: int = 60, capacity: int = 200, clock: Callable[[], datetime] = utc_now) -> None:
+        if window_minutes <= 0:
+            raise ValueError("window_minutes must be positive")
+        self.window_minutes = window_minutes
+        self.capacity = capacity
+        self.clock = clock
+        self._buckets: OrderedDict[int, SpaceSaving[str]] = OrderedDict()      # minute -> summary, oldest first
+        self._units: dict[str, int] = {}                                       # sums over the whole window
+        self._errors: dict[str, int] = {}
+        self._ranking: OrderStatisticTree[tuple[int, str]] = OrderStatisticTree()
+        self._lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------------------
+# Read methods
+# ---------------------------------------------------------------------------------------
+
+    def get_top(self, limit: int = 20, minutes: int | None = None) -> list[TopSkuDTO]:
+        if limit <= 0 or limit > MAX_TOP_LIMIT:
+            raise ValidationException(f'Limit {limit} must be between 1 and {MAX_TOP_LIMIT}')
+        minutes = minutes or self.window_minutes
+        if minutes <= 0 or minutes > self.window_minutes:
+            raise ValidationException(f'Window must be between 1 and {self.window_minutes} minutes')
+
+        with self._lock:
+            self._expire(self._minute())
+            if minutes == self.window_minutes:
+                top = [self._ranking.kth(i) for i in range(min(limit, len(self._ranking)))]
+                return [TopSkuDTO(sku=sku, units=-units, error=self._errors[sku]) for units, sku in top]
+            return self._top_of_last(limit, minutes)
+
+# ---------------------------------------------------------------------------------------
+# Write methods
+# ---------------------------------------------------------------------------------------
+
+    # committed order lines as (sku, qty, created), counted in the minute they were created in
+    def record(self, lines: Iterable[tuple[str, int, datetime]]) -> None:
+        with self._lock:
+            now = self._minute()
+            self._expire(now)
+            for sku, qty, created in lines:
+                minute = self._minute_of(created)
+                if minute > now - self.window_minutes:
+                    self._apply(self._bucket(minute).update(sku, qty))
+
+
+    # a removed order line, taken back from the minute it was created in
+    def remove(self, sku: str, qty: int, created: datetime | None) -> None:
+        if created is None:
+            return
+        with self._lock:
+            self._expire(self._minute())
+            bucket = self._buckets.get(self._minute_of(created))
+            if bucket is not None:
+                self._apply(bucket.update(sku, -qty))
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    def _minute(self) -> int:
+        return self._minute_of(self.clock())
+
+
+    @staticmethod
+    def _minute_of(moment: datetime) -> int:
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return int(moment.timestamp() // 60)
+
+
+    # summary of the minute, a line committed just before the minute changed may go to an older one than the newest
+    def _bucket(self, minute: int) -> SpaceSaving[str]:
+        bucket = self._buckets.get(minute)
+        if bucket is None:
+            older = bool(self._buckets) and minute < next(reversed(self._buckets))
+            bucket = self._buckets[minute] = SpaceSaving(self.capacity)
+            if older:
+                self._buckets = OrderedDict(sorted(self._buckets.items()))
+        return bucket
+
+
+    # minute summaries that left the window are subtracted from the window sums
+    def _expire(self, minute: int) -> None:
+        while self._buckets and next(iter(self._buckets)) <= minute - self.window_minutes:
+            _, bucket = self._buckets.popitem(last=False)
+            self._apply([(sku, -count, -error) for sku, count, error in bucket.items()])
+
+
+    def _apply(self, changes: list[CounterChange[str]]) -> None:
+        for sku, units, error in changes:
+            old = self._units.get(sku, 0)
+            if old:
+                self._ranking.remove((-old, sku))
+            new = old + units
+            if new > 0:
+                self._units[sku] = new
+                self._errors[sku] = self._errors.get(sku, 0) + error
+                self._ranking.insert((-new, sku))
+            else:
+                self._units.pop(sku, None)
+                self._errors.pop(sku, None)
+
+
+    def _top_of_last(self, limit: int, minutes: int) -> list[TopSkuDTO]:
+        first = self._minute() - minutes + 1
+        units: dict[str, int] = {}
+        errors: dict[str, int] = {}
+        for minute, bucket in self._buckets.items():
+            if minute >= first:
+                for sku, count, error in bucket.items():
+                    units[sku] = units.get(sku, 0) + count
+                    errors[sku] = errors.get(sku, 0) + error
+        top = sorted(units, key=lambda sku: (-units[sku], sku))[:limit]
+        return [TopSkuDTO(sku=sku, units=units[sku], error=errors[sku]) for sku in top]
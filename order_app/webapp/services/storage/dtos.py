@@ -1,4 +1,6 @@
 from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
 
 @dataclass(frozen=True)
 class ReadStorageDTO:
@@ -10,3 +12,31 @@ class ReadStorageDTO:
 class ModifyStorageDTO:
     sku: str
     quantity: int
+
+
+@dataclass(frozen=True)
+class ReorderSuggestionDTO:
+    sku: str
+    stock: int
+    daily_demand: Decimal                   # exponentially smoothed units per day
+    days_of_cover: Decimal | None           # days until the stock runs out at that demand, None without demand
+    suggested_qty: int
+    computed_at: datetime
+
+
+@dataclass(frozen=True)
+class InventoryBinDTO:
+    low: int
+    high: int                               # exclusive
+    skus: int
+
+
+@dataclass(frozen=True)
+class InventoryStatsDTO:
+    skus: int                               # storage rows
+    zero_stock: int
+    total_units: int
+    min_qty: int
+    max_qty: int
+    quantiles: dict[float, int]             # q -> qty (nearest rank)
+    histogram: list[InventoryBinDTO]        # equal integer-wide bins from min_qty to max_qty, empty ones included
@@ -0,0 +1,105 @@
+# Reorder suggestions from recent daily demand. run() (`flask storage forecast`, e.g. once a day from cron):
+#   1. units per SKU and day of the last history_days full days - one grouped query over the daily sales rollup
+#   2. a SKU x day matrix (zeros for days without sales) and the exponentially smoothed demand of all SKUs at once:
+#      level_t = alpha * units_t + (1 - alpha) * level_t-1 with level_0 = units_0, unrolled into one weight per day,
+#      so the whole forecast is one matrix-vector product
+#   3. days of cover = stock / demand, suggested qty = what is missing for lead_time_days + cover_days of demand
+# Results go to reorder_forecasts; GET /api/storage/reorder only reads them.
+#
+# Demand comes from sales_daily - run `flask rollups backfill` once when there are orders older than the rollups.
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Callable
+
+import numpy as np
+
+from webapp.extensions import db
+from webapp.core.clock import utc_now
+from webapp.database.repositories.reorder_forecasts import ReorderForecastRepository
+from webapp.services.storage.dtos import ReorderSuggestionDTO
+from webapp.services.storage.mappers import forecast_to_dto
+from webapp.services.statistics.sales import floor_to
+from webapp.services.exceptions import ValidationException
+
+
+MAX_REORDER_LIMIT = 500
+
+
+class DemandForecastService:
+    def __init__(
+            self,
+            forecast_repo: ReorderForecastRepository,
+            history_days: int = 28,
+            alpha: float = 0.3,
+            lead_time_days: int = 7,
+            cover_days: int = 14,
+            clock: Callable[[], datetime] = utc_now
+    ) -> None:
+        if history_days <= 0 or not 0 < alpha <= 1:
+            raise ValueError("history_days must be positive and alpha in (0, 1]")
+        self.forecast_repo = forecast_repo
+        self.history_days = history_days
+        self.lead_time_days = lead_time_days
+        self.cover_days = cover_days
+        self.clock = clock
+
+        ages = np.arange(history_days - 1, -1, -1)                # days before the last day, oldest first
+        self._weights = alpha * (1 - alpha) ** ages
+        self._weights[0] = (1 - alpha) ** (history_days - 1)       # level_0 = units of the first day
+
+
+# ---------------------------------------------------------------------------------------
+# Read methods
+# ---------------------------------------------------------------------------------------
+
+    # SKUs whose stock lasts at most max_days (default: the lead time) by the last forecast, fewest days first
+    def get_reorder_suggestions(self, max_days: float | None = None, limit: int = 50) -> list[ReorderSuggestionDTO]:
+        if not 0 < limit <= MAX_REORDER_LIMIT:
+            raise ValidationException(f'Limit {limit} must be between 1 and {MAX_REORDER_LIMIT}')
+        max_days = self.lead_time_days if max_days is None else max_days
+        if max_days < 0:
+            raise ValidationException('max_days cannot be negative')
+
+        return [forecast_to_dto(f) for f in self.forecast_repo.get_at_risk(max_days, limit)]
+
+# ---------------------------------------------------------------------------------------
+# Write methods
+# ---------------------------------------------------------------------------------------
+
+    # forecast of every product, stored in one transaction; returns the number of products
+    def run(self) -> int:
+        end = floor_to("day", self.clock())                        # today is not over yet
+        start = end - timedelta(days=self.history_days)
+
+        with db.session.begin():
+            stock = self.forecast_repo.get_stock()
+            codes = {row.sku: i for i, row in enumerate(stock)}
+            sales = np.zeros((len(stock), self.history_days))
+            daily = [row for row in self.forecast_repo.get_daily_units(start, end) if row.sku in codes]
+            if daily:
+                rows = np.array([codes[row.sku] for row in daily])
+                days = np.array([(row.bucket - start).days for row in daily])
+                np.add.at(sales, (rows, days), [float(row.units) for row in daily])
+
+            qty = np.array([row.qty for row in stock], dtype=float)
+            # rounded like the stored value, so cover and suggestion can be checked from the row; rollups of removed
+            # lines can go below zero
+            demand = np.round(np.maximum(sales @ self._weights, 0), 3)
+            cover = np.divide(qty, demand, out=np.full(len(stock), np.nan), where=demand > 0)
+            target = demand * (self.lead_time_days + self.cover_days)
+            suggested = np.maximum(np.ceil(target - qty), 0)
+
+            now = self.clock()
+            self.forecast_repo.replace_all([
+                {
+                    "sku": row.sku,
+                    "stock": row.qty,
+                    "daily_demand": Decimal(f"{demand[i]:.3f}"),
+                    "days_of_cover": None if np.isnan(cover[i]) else Decimal(f"{cover[i]:.1f}"),
+                    "suggested_qty": int(suggested[i]),
+                    "computed_at": now,
+                }
+                for i, row in enumerate(stock)
+            ])
+        return len(stock)
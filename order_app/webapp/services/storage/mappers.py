@@ -1,5 +1,6 @@
+from webapp.database.models.reorder_forecasts import ReorderForecast
 from webapp.database.models.storage import Storage
-from webapp.services.storage.dtos import ReadStorageDTO
+from webapp.services.storage.dtos import ReadStorageDTO, ReorderSuggestionDTO
 
 
 def storage_to_dto(storage: Storage) -> ReadStorageDTO:
@@ -9,3 +10,14 @@ def storage_to_dto(storage: Storage) -> ReadStorageDTO:
     )
 
 
+def forecast_to_dto(forecast: ReorderForecast) -> ReorderSuggestionDTO:
+    return ReorderSuggestionDTO(
+        sku = forecast.sku,
+        stock = forecast.stock,
+        daily_demand = forecast.daily_demand,
+        days_of_cover = forecast.days_of_cover,
+        suggested_qty = forecast.suggested_qty,
+        computed_at = forecast.computed_at,
+    )
+
+
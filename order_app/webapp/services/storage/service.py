@@ -1,33 +1,64 @@
+import math
+from typing import Sequence
+
 from webapp.extensions import db
 from webapp.database.models.storage import Storage
 from webapp.database.repositories.storage import StorageRepository
 from webapp.database.repositories.products import ProductRepository
+from webapp.database.cache import RowCache
 
-from webapp.services.storage.dtos import ReadStorageDTO, ModifyStorageDTO
+from webapp.services.storage.dtos import ReadStorageDTO, ModifyStorageDTO, InventoryStatsDTO, InventoryBinDTO
 from webapp.services.storage.mappers import storage_to_dto
+from webapp.services.storage.stock import StockStrategy
+from webapp.services.products.dtos import ReadProductDTO
+from webapp.services.products.service import get_product
+from webapp.services.single_flight import SingleFlight, coalesced
+
+from webapp.services.exceptions import NotFoundException, ProductAlreadyExistsException, ServiceException, \
+    ValidationException
+
 
-from webapp.services.exceptions import NotFoundException, ProductAlreadyExistsException, ServiceException
+DEFAULT_INVENTORY_QUANTILES = (0.1, 0.5, 0.9)
+MAX_INVENTORY_BINS = 100
 
 
 
 class StorageService:
-    def __init__(self, storage_repo: StorageRepository, product_repo: ProductRepository):
+    def __init__(
+            self,
+            storage_repo: StorageRepository,
+            product_repo: ProductRepository,
+            stock_strategy: str = StockStrategy.LOCK,
+            product_cache: RowCache[ReadProductDTO] | None = None,
+            storage_cache: RowCache[ReadStorageDTO] | None = None,
+            flights: SingleFlight | None = None
+    ):
         self.storage_repo = storage_repo
         self.product_repo = product_repo
+        self.stock_strategy = StockStrategy(stock_strategy)
+        self.product_cache = product_cache
+        self.storage_cache = storage_cache
+        self.flights = flights                  # identical concurrent full listings / stats share one query
 
 # ---------------------------------------------------------------------------------------
 # Read methods
 # ---------------------------------------------------------------------------------------
 
     def get_all(self) -> list[ReadStorageDTO]:
-        stmt = self.storage_repo.get_all()
-        return [storage_to_dto(s) for s in stmt]
+        def load() -> list[ReadStorageDTO]:
+            return [storage_to_dto(s) for s in self.storage_repo.get_all()]
+
+        return coalesced(self.flights, "storage.get_all", (), load)
 
     def get_by_sku(self, sku: str) -> ReadStorageDTO:
-        stmt = self.storage_repo.get_by_sku(sku)
-        if stmt is None:
+        def load() -> ReadStorageDTO | None:
+            storage = self.storage_repo.get_by_sku(sku)
+            return storage_to_dto(storage) if storage is not None else None
+
+        storage = load() if self.storage_cache is None else self.storage_cache.get(sku, load)
+        if storage is None:
             raise NotFoundException(f'Product {sku} not found in storage')
-        return storage_to_dto(stmt)
+        return storage
 
 
 
@@ -37,6 +68,22 @@ class StorageService:
             raise NotFoundException(f'Product with qty between {min_qty} and {max_qty} not found in storage')
         return [storage_to_dto(s) for s in stmt]
 
+
+    # Distribution of Storage.qty over all rows, computed by the database: one aggregate query, one grouped query for
+    # the histogram and one index read (ix_storage_qty, OFFSET) per quantile - no Storage objects are loaded.
+    def get_inventory_stats(
+            self, bins: int = 10, qs: Sequence[float] = DEFAULT_INVENTORY_QUANTILES
+    ) -> InventoryStatsDTO:
+        if not 0 < bins <= MAX_INVENTORY_BINS:
+            raise ValidationException(f'Bins {bins} must be between 1 and {MAX_INVENTORY_BINS}')
+        if not qs or any(not 0 <= q <= 1 for q in qs):
+            raise ValidationException('Quantiles must be between 0 and 1')
+
+        qs = tuple(qs)
+        return coalesced(
+            self.flights, "storage.get_inventory_stats", (bins, qs), lambda: self._inventory_stats(bins, qs)
+        )
+
 # ---------------------------------------------------------------------------------------
 # Modify methods
 # ---------------------------------------------------------------------------------------
@@ -59,6 +106,9 @@ class StorageService:
 
 
     def deduct_qty_from_storage_sku(self, dto: ModifyStorageDTO) -> str:
+        if self.stock_strategy is StockStrategy.CONDITIONAL:
+            return self._deduct_qty_conditional(dto)
+
         with db.session.begin():
             storage_product = self._ensure_product(dto.sku)
             if storage_product.qty < dto.quantity:
@@ -81,9 +131,37 @@ class StorageService:
 # Privet methods
 # ---------------------------------------------------------------------------------------
 
+    def _inventory_stats(self, bins: int, qs: Sequence[float]) -> InventoryStatsDTO:
+        summary = self.storage_repo.get_qty_summary()
+        if not summary.skus:
+            raise NotFoundException('No products in storage')
+
+        low, spread = summary.min_qty, summary.max_qty - summary.min_qty + 1
+        width = math.ceil(spread / bins)
+        counts = {row.bin: row.skus for row in self.storage_repo.get_qty_histogram(low, width)}
+        histogram = [
+            InventoryBinDTO(low=low + i * width, high=low + (i + 1) * width, skus=counts.get(i, 0))
+            for i in range(math.ceil(spread / width))
+        ]
+        quantiles: dict[float, int] = {}
+        for q in qs:
+            qty = self.storage_repo.get_qty_at(max(math.ceil(q * summary.skus) - 1, 0))
+            quantiles[q] = qty if qty is not None else summary.max_qty     # rows deleted after the summary was read
+
+        return InventoryStatsDTO(
+            skus=summary.skus,
+            zero_stock=summary.zero_stock,
+            total_units=summary.units,
+            min_qty=summary.min_qty,
+            max_qty=summary.max_qty,
+            quantiles=quantiles,
+            histogram=histogram
+        )
+
+
+    # the product from the cache, the storage row always from the database - it is changed by the caller
     def _ensure_product(self, sku: str) -> Storage:
-        product = self.product_repo.get_by_sku(sku)
-        if product is None:
+        if not self._product_exists(sku):
             raise NotFoundException(f'Product {sku} not found in system. Add to products first.')
 
         storage_product = self.storage_repo.get_by_sku(sku)
@@ -93,8 +171,29 @@ class StorageService:
         return storage_product
 
 
+    # UPDATE ... WHERE qty >= :n - the row is not read and locked first, rowcount says if the deduction happened
+    def _deduct_qty_conditional(self, dto: ModifyStorageDTO) -> str:
+        with db.session.begin():
+            if not self._product_exists(dto.sku):
+                raise NotFoundException(f'Product {dto.sku} not found in system. Add to products first.')
+
+            if not self.storage_repo.decrement_qty_if_available(dto.sku, dto.quantity):
+                if self.storage_repo.get_by_sku(dto.sku) is None:
+                    raise NotFoundException(f'Product {dto.sku} not found. Add to storage')
+                raise ServiceException(f'Product {dto.sku} cannot have negative qty')
+
+        return f'{dto.quantity} deduct from {dto.sku}'
+
+
+    # products are not changed by storage writes, so the existence check of a write can use the cache
+    def _product_exists(self, sku: str) -> bool:
+        if self.product_cache is None:
+            return self.product_repo.get_by_sku(sku) is not None
+        return get_product(self.product_repo, self.product_cache, sku) is not None
+
+
     def _check_is_sku_free(self, sku: str) -> None:
-        if self.product_repo.get_by_sku(sku) is None:
+        if not self._product_exists(sku):
             raise NotFoundException(f'Product {sku} not found in system. Add to products first.')
         if self.storage_repo.get_by_sku(sku) is not None:
             raise ProductAlreadyExistsException(f'Product {sku} already exists in storage')
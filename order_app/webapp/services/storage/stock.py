@@ -0,0 +1,93 @@
+# Two ways of taking stock out of storage inside an order transaction. Selected with STOCK_MUTATION_STRATEGY:
+#
+#   lock         - SELECT ... WHERE sku IN (...) ORDER BY sku FOR UPDATE, check and change qty in Python. Rows stay
+#                  locked until commit, so every order on a hot SKU waits for the previous one to finish.
+#   conditional  - UPDATE storage SET qty = qty - :n WHERE sku = :sku AND qty >= :n, one statement per SKU (in sku
+#                  order) and rowcount tells if it succeeded. No read before the write, but the X-lock the UPDATE
+#                  takes on the row (InnoDB) is still held until commit - hot SKUs still serialize on it, only the
+#                  round trip of the SELECT is saved.
+#
+# Both report every missing / short SKU in one error. Decrements already done are undone by the caller's rollback.
+
+from enum import StrEnum
+from typing import Sequence
+
+from webapp.database.repositories.storage import StorageRepository
+from webapp.services.exceptions import NotFoundException, NotEnoughStockException
+
+
+class StockStrategy(StrEnum):
+    LOCK = "lock"
+    CONDITIONAL = "conditional"
+
+
+class StockMutator:
+    def __init__(self, storage_repo: StorageRepository, strategy: str = StockStrategy.LOCK):
+        self.storage_repo = storage_repo
+        self.strategy = StockStrategy(strategy)
+
+
+    def take(self, lines: Sequence[tuple[str, int]]) -> None:
+        if self.strategy is StockStrategy.CONDITIONAL:
+            self._take_conditional(lines)
+        else:
+            self._take_locked(lines)
+
+
+    def give_back(self, sku: str, qty: int) -> None:
+        if self.strategy is StockStrategy.CONDITIONAL:
+            if not self.storage_repo.increment_qty(sku, qty):
+                raise NotFoundException(f'Product {sku} not found in storage')
+            return
+
+        storage_item = self.storage_repo.get_by_sku_for_update(sku)
+        if storage_item is None:
+            raise NotFoundException(f'Product {sku} not found in storage')
+        storage_item.qty += qty
+
+# ---------------------------------------------------------------------------------------
+# Privet methods
+# ---------------------------------------------------------------------------------------
+
+    def _take_locked(self, lines: Sequence[tuple[str, int]]) -> None:
+        stock = {s.sku: s for s in self.storage_repo.get_by_skus_for_update([sku for sku, _ in lines])}
+        self._raise_if_unavailable(lines, {sku: s.qty for sku, s in stock.items()})
+
+        for sku, qty in lines:
+            stock[sku].qty -= qty
+
+
+    def _take_conditional(self, lines: Sequence[tuple[str, int]]) -> None:
+        failed = [
+            (sku, qty) for sku, qty in sorted(lines)                # sku order - the same lock order as the lock mode
+            if not self.storage_repo.decrement_qty_if_available(sku, qty)
+        ]
+
+        if not failed:
+            return
+
+        # A failed UPDATE always means the order cannot be served. The re-read only explains why - it may see an older
+        # snapshot of the transaction (REPEATABLE READ) that still shows enough stock, so it never decides.
+        current = {s.sku: s.qty for s in self.storage_repo.get_by_skus([sku for sku, _ in failed])}
+        errors = [
+            f'Product {sku} not found in storage' if sku not in current
+            else f'Product {sku}: ordered QTY {qty} > Storage QTY {current[sku]}' if current[sku] < qty
+            else f'Product {sku}: ordered QTY {qty} is no longer available in storage'
+            for sku, qty in failed
+        ]
+        if all(sku not in current for sku, _ in failed):
+            raise NotFoundException('; '.join(errors))
+        raise NotEnoughStockException('; '.join(errors))
+
+
+    def _raise_if_unavailable(self, lines: Sequence[tuple[str, int]], available: dict[str, int]) -> None:
+        missing = [sku for sku, _ in lines if sku not in available]
+        short = [(sku, qty) for sku, qty in lines if sku in available and available[sku] < qty]
+
+        errors = [f'Product {sku} not found in storage' for sku in missing]
+        errors += [f'Product {sku}: ordered QTY {qty} > Storage QTY {available[sku]}' for sku, qty in short]
+
+        if short:
+            raise NotEnoughStockException('; '.join(errors))
+        if missing:
+            raise NotFoundException('; '.join(errors))
@@ -1,4 +1,7 @@
 from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import List
 
 
 
@@ -13,3 +16,19 @@ class ReadUserDTO:
     id: int
     name: str
     orders_qty: int
+
+
+@dataclass(frozen=True)
+class UserOrderSummaryDTO:
+    name: str
+    orders_count: int
+    units: int
+    lifetime_value: Decimal
+    first_order_at: datetime | None         # None for a user without orders
+    last_order_at: datetime | None
+
+
+@dataclass(frozen=True)
+class UserPageDTO:
+    items: List[ReadUserDTO]
+    next_cursor: int | None                 # id of the last user on the page, None if this is the last page
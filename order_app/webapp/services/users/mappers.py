@@ -1,9 +1,34 @@
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import Row
+
 from webapp.database.models.users import User
-from webapp.services.users.dtos import ReadUserDTO
+from webapp.services.users.dtos import ReadUserDTO, UserOrderSummaryDTO
+from webapp.services.statistics.mappers import money
 
-def user_to_dto(user: User) -> ReadUserDTO:
+def user_to_dto(user: User, orders_qty: int) -> ReadUserDTO:
     return ReadUserDTO(
         id=user.id,
         name=user.username,
-        orders_qty=len(user.orders)
-    )
\ No newline at end of file
+        orders_qty=orders_qty
+    )
+
+
+def user_row_to_dto(row: Row[tuple[int, str, int]]) -> ReadUserDTO:
+    return ReadUserDTO(
+        id=row.id,
+        name=row.username,
+        orders_qty=row.orders_qty
+    )
+
+
+def user_stats_row_to_dto(row: Row[tuple[str, int, int, Decimal, datetime, datetime]]) -> UserOrderSummaryDTO:
+    return UserOrderSummaryDTO(
+        name=row.username,
+        orders_count=row.orders_count,
+        units=int(row.units),
+        lifetime_value=money(row.lifetime_value),
+        first_order_at=row.first_order_at,
+        last_order_at=row.last_order_at
+    )
@@ -1,31 +1,59 @@
 from webapp.extensions import db
 from webapp.database.models.users import User
 from webapp.database.repositories.users import UserRepository
+from webapp.database.repositories.user_order_stats import UserOrderStatsRepository
+from webapp.database.cache import RowCache
 
-from webapp.services.users.dtos import CreateUserDTO, ReadUserDTO
-from webapp.services.users.mappers import user_to_dto
+from webapp.services.users.dtos import CreateUserDTO, ReadUserDTO, UserPageDTO, UserOrderSummaryDTO
+from webapp.services.users.mappers import user_to_dto, user_row_to_dto, user_stats_row_to_dto
+from webapp.services.pagination import DEFAULT_PAGE_SIZE, validate_page
 
 from webapp.services.exceptions import UserAlreadyExistsException, NotFoundException
 
 class UserService:
 
-    def __init__(self, user_repo: UserRepository):
+    def __init__(self, user_repo: UserRepository, user_stats_repo: UserOrderStatsRepository):
         self.user_repo = user_repo
+        self.user_stats_repo = user_stats_repo
 
 
 # ---------------------------------------------------------------------------------------
 # Read methods
 # ---------------------------------------------------------------------------------------
 
-    def get_all(self) -> list[ReadUserDTO]:
-        users = self.user_repo.get_all()
-        return [user_to_dto(user) for user in users]
+    def get_all(self, limit: int = DEFAULT_PAGE_SIZE, after: int | None = None) -> UserPageDTO:
+        validate_page(limit, after)
+        rows = self.user_repo.get_all_with_orders_qty(limit + 1, after)       # one extra row tells if next page exists
+        items = [user_row_to_dto(row) for row in rows[:limit]]
+        next_cursor = items[-1].id if len(rows) > limit else None
+        return UserPageDTO(items=items, next_cursor=next_cursor)
 
     def get_by_username(self, username: str) -> ReadUserDTO:
-        user = self.user_repo.get_by_username(username)
-        if user is None:
+        row = self.user_repo.get_by_username_with_orders_qty(username)
+        if row is None:
+            raise NotFoundException(f"User with username {username} not found.")
+        return user_row_to_dto(row)
+
+    # order count, units, lifetime value and first / last order time - one user_order_stats row, no orders are read
+    def get_order_summary(self, username: str) -> UserOrderSummaryDTO:
+        row = self.user_stats_repo.get_by_username(username)
+        if row is None:
             raise NotFoundException(f"User with username {username} not found.")
-        return user_to_dto(user)
+        return user_stats_row_to_dto(row)
+
+# ---------------------------------------------------------------------------------------
+# Write methods
+# ---------------------------------------------------------------------------------------
+
+    # user_order_stats computed again from the orders (their stored totals - run `flask orders recompute-totals`
+    # first if those are in doubt), chunk_size users per transaction. Returns the number of users with orders.
+    def rebuild_order_stats(self, chunk_size: int = 10_000) -> int:
+        rebuilt = 0
+        last_id = self.user_stats_repo.get_max_user_id()
+        for first_id in range(1, last_id + 1, chunk_size):
+            with db.session.begin():
+                rebuilt += self.user_stats_repo.recompute_between(first_id, first_id + chunk_size - 1)
+        return rebuilt
 
 # ---------------------------------------------------------------------------------------
 # Delete methods
@@ -56,7 +84,7 @@ class UserService:
             user = User(username=dto.name)
             self.user_repo.add(user)
             db.session.flush()
-        return user_to_dto(user)
+        return user_to_dto(user, orders_qty=0)
 
 
 
@@ -73,4 +101,15 @@ class UserService:
         user = self.user_repo.get(user_id)
         if user is None:
             raise NotFoundException(f"User with id {user_id} not found.")
-        return user
\ No newline at end of file
+        return user
+
+
+# id of the user through the read-through cache (when there is one) - for reads only. Users are cached by username,
+# see database/cache.py. A cached id can belong to a user deleted (or deleted and created again) by another worker
+# until the TTL, so write transactions read the user from the database instead.
+def get_user_id(user_repo: UserRepository, user_cache: RowCache[int] | None, username: str) -> int | None:
+    def load() -> int | None:
+        user = user_repo.get_by_username(username)
+        return user.id if user is not None else None
+
+    return load() if user_cache is None else user_cache.get(username, load)
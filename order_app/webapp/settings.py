@@ -46,6 +46,106 @@ class Config:
         "max_overflow": 20,                 # if all pool_size connections are busy, create 20 new connections in case of overflow
     }
 
+    # ------------------------------------------------------------------------------------
+    # Stock mutation strategy - "lock" (SELECT ... FOR UPDATE, then change qty) or "conditional"
+    # (UPDATE ... SET qty = qty - n WHERE qty >= n). Conditional mode keeps hot SKUs locked for a shorter time
+    # ------------------------------------------------------------------------------------
+    STOCK_MUTATION_STRATEGY: str = os.getenv("STOCK_MUTATION_STRATEGY", "lock")
+
+    # ------------------------------------------------------------------------------------
+    # Group commit of order writes (opt-in) - concurrent new orders of one worker wait up to the window (ms) or until
+    # the batch is full and are saved in one transaction, each order in its own savepoint
+    # ------------------------------------------------------------------------------------
+    ORDER_GROUP_COMMIT: bool = os.getenv("ORDER_GROUP_COMMIT", "False") in ("1", "true", "True")
+    ORDER_GROUP_COMMIT_WINDOW_MS: int = int(os.getenv("ORDER_GROUP_COMMIT_WINDOW_MS", "5"))
+    ORDER_GROUP_COMMIT_MAX_BATCH: int = int(os.getenv("ORDER_GROUP_COMMIT_MAX_BATCH", "50"))
+
+    # ------------------------------------------------------------------------------------
+    # In-memory ranking of orders (k-th, rank, percentile) - each worker loads it again from the database after this
+    # many seconds to see writes of other workers (0 = only own writes)
+    # ------------------------------------------------------------------------------------
+    ORDER_STATS_MAX_AGE_SECONDS: int = int(os.getenv("ORDER_STATS_MAX_AGE_SECONDS", "300"))
+
+    # ------------------------------------------------------------------------------------
+    # Quantile sketches of order line qty per SKU / user - size of a sketch (bigger k = smaller error, more memory)
+    # and how often each worker merges its new lines into the database
+    # ------------------------------------------------------------------------------------
+    QUANTILE_SKETCH_K: int = int(os.getenv("QUANTILE_SKETCH_K", "200"))
+    QUANTILE_SKETCH_FLUSH_SECONDS: int = int(os.getenv("QUANTILE_SKETCH_FLUSH_SECONDS", "60"))
+
+    # ------------------------------------------------------------------------------------
+    # Live top SKUs - length of the sliding window and how many SKUs each per-minute counter keeps (must be well above
+    # the asked top N; SKUs selling more than 1/capacity of a minute's units are never missed)
+    # ------------------------------------------------------------------------------------
+    TOP_SKUS_WINDOW_MINUTES: int = int(os.getenv("TOP_SKUS_WINDOW_MINUTES", "60"))
+    TOP_SKUS_CAPACITY: int = int(os.getenv("TOP_SKUS_CAPACITY", "200"))
+
+    # ------------------------------------------------------------------------------------
+    # Columnar snapshot of order lines for analytics - how old it may get before new lines are added, how often it is
+    # loaded again in full (sees deleted lines) and how many seconds new lines wait for their transactions to commit
+    # ------------------------------------------------------------------------------------
+    ORDER_SNAPSHOT_MAX_AGE_SECONDS: int = int(os.getenv("ORDER_SNAPSHOT_MAX_AGE_SECONDS", "30"))
+    ORDER_SNAPSHOT_FULL_RELOAD_SECONDS: int = int(os.getenv("ORDER_SNAPSHOT_FULL_RELOAD_SECONDS", "3600"))
+    ORDER_SNAPSHOT_LAG_SECONDS: int = int(os.getenv("ORDER_SNAPSHOT_LAG_SECONDS", "5"))
+
+    # ------------------------------------------------------------------------------------
+    # "Bought together" SKU pairs - each worker loads the matrix again from sku_pairs after this many seconds to see
+    # orders of other workers (0 = only own writes)
+    # ------------------------------------------------------------------------------------
+    BOUGHT_TOGETHER_MAX_AGE_SECONDS: int = int(os.getenv("BOUGHT_TOGETHER_MAX_AGE_SECONDS", "300"))
+
+    # ------------------------------------------------------------------------------------
+    # Demand forecast for reorder suggestions (flask storage forecast) - days of history, smoothing factor (bigger =
+    # faster reaction to the last days), supplier lead time and how many days of demand a reorder should cover after it
+    # ------------------------------------------------------------------------------------
+    REORDER_HISTORY_DAYS: int = int(os.getenv("REORDER_HISTORY_DAYS", "28"))
+    REORDER_SMOOTHING_ALPHA: float = float(os.getenv("REORDER_SMOOTHING_ALPHA", "0.3"))
+    REORDER_LEAD_TIME_DAYS: int = int(os.getenv("REORDER_LEAD_TIME_DAYS", "7"))
+    REORDER_COVER_DAYS: int = int(os.getenv("REORDER_COVER_DAYS", "14"))
+
+    # ------------------------------------------------------------------------------------
+    # Product typeahead (GET /api/products/typeahead) - most products kept in memory of one worker and how often the
+    # worker loads them again to see products of other workers (0 = only at start)
+    # ------------------------------------------------------------------------------------
+    TYPEAHEAD_MAX_PRODUCTS: int = int(os.getenv("TYPEAHEAD_MAX_PRODUCTS", "1000000"))
+    TYPEAHEAD_RELOAD_SECONDS: int = int(os.getenv("TYPEAHEAD_RELOAD_SECONDS", "600"))
+
+    # ------------------------------------------------------------------------------------
+    # Read-through caches of products, storage rows and users - seconds an entry lives (commits drop the changed keys
+    # at once, in every worker with a shared backend) and the backend keeping them:
+    #   local          - memory of each worker, CACHE_LOCAL_SIZE entries
+    #   shared_memory  - one segment for all workers of a host, CACHE_SHM_SLOTS slots of CACHE_SHM_SLOT_BYTES bytes
+    #   redis          - a Redis-protocol server at CACHE_REDIS_URL for all workers of all hosts
+    # ------------------------------------------------------------------------------------
+    PRODUCT_CACHE_TTL_SECONDS: float = float(os.getenv("PRODUCT_CACHE_TTL_SECONDS", "300"))
+    STORAGE_CACHE_TTL_SECONDS: float = float(os.getenv("STORAGE_CACHE_TTL_SECONDS", "5"))
+    USER_CACHE_TTL_SECONDS: float = float(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "local")
+    CACHE_LOCAL_SIZE: int = int(os.getenv("CACHE_LOCAL_SIZE", "10000"))
+    CACHE_SHM_SEGMENT: str = os.getenv("CACHE_SHM_SEGMENT", "order_app_cache")
+    CACHE_SHM_SLOTS: int = int(os.getenv("CACHE_SHM_SLOTS", "16384"))
+    CACHE_SHM_SLOT_BYTES: int = int(os.getenv("CACHE_SHM_SLOT_BYTES", "512"))
+    CACHE_REDIS_URL: str = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_REDIS_TIMEOUT_SECONDS: float = float(os.getenv("CACHE_REDIS_TIMEOUT_SECONDS", "0.5"))
+    CACHE_REDIS_RETRY_SECONDS: float = float(os.getenv("CACHE_REDIS_RETRY_SECONDS", "5"))     # skipped after a failure
+    CACHE_KEY_PREFIX: str = os.getenv("CACHE_KEY_PREFIX", "order_app:")
+
+    # ------------------------------------------------------------------------------------
+    # Single-flight of expensive reads (order listing, full storage, statistics) - identical requests running at the
+    # same time in one worker share one query and its result (GET /api/statistics/coalescing shows how many)
+    # ------------------------------------------------------------------------------------
+    READ_COALESCING: bool = os.getenv("READ_COALESCING", "True") in ("1", "true", "True")
+
+    # ------------------------------------------------------------------------------------
+    # Idempotency-Key for order writes - how long a stored response is replayed, how long a key in progress is held
+    # (a worker that died leaves it behind), how many are kept in memory of one worker and how often expired keys
+    # are deleted from the database
+    # ------------------------------------------------------------------------------------
+    IDEMPOTENCY_TTL_SECONDS: int = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_LEASE_SECONDS: int = int(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "300"))
+    IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "1024"))
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: int = int(os.getenv("IDEMPOTENCY_PURGE_INTERVAL_SECONDS", "600"))
+
     # ------------------------------------------------------------------------------------
     # Logging - set logs for FLASK and set their format, place of showing logs
     # ------------------------------------------------------------------------------------